@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Async GitHub Fetch Engine
+Prefetches README content and topics for a whole batch of repositories concurrently
+"""
+
+import asyncio
+import base64
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+# Returned in place of content when a conditional request answered 304
+NOT_MODIFIED = object()
+
+class AsyncGitHubFetcher:
+    def __init__(self, github_token: Optional[str] = None, max_in_flight: int = 20,
+                 api_url: str = 'https://api.github.com', timeout: int = 10, readme_chars: int = 3000):
+        self.github_token = github_token
+        self.max_in_flight = max(1, max_in_flight)
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.readme_chars = readme_chars
+        self.rate_limited = False
+        self.response_etags = {}  # (kind, full_name) -> ETag of the last definitive (200/404) response
+
+    def build_headers(self, accept: Optional[str] = None, etag: Optional[str] = None) -> Dict[str, str]:
+        headers = {}
+        if accept:
+            headers['Accept'] = accept
+        if self.github_token:
+            headers['Authorization'] = f'token {self.github_token}'
+        if etag:
+            headers['If-None-Match'] = etag
+        return headers
+
+    async def get_json(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                       url: str, headers: Dict[str, str]) -> Tuple[int, Optional[Dict], Optional[str]]:
+        """GET a URL under the in-flight limit; returns (status, json, etag) or (0, None, None) on network error"""
+        async with semaphore:
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 403 and response.headers.get('X-RateLimit-Remaining') == '0':
+                        # Leave it to the synchronous path, which knows how to wait for the reset
+                        self.rate_limited = True
+                        return 0, None, None
+                    if response.status >= 500:
+                        # Not "no README": leave it to the synchronous path, which retries 5xx
+                        return 0, None, None
+                    if response.status != 200:
+                        return response.status, None, None
+                    return 200, await response.json(content_type=None), response.headers.get('ETag')
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return 0, None, None
+
+    async def fetch_readme(self, session, semaphore, repo_name: str, etag: Optional[str] = None):
+        """README text (truncated like the sync path), "" when missing, None when not fetched"""
+        url = f"{self.api_url}/repos/{repo_name}/readme"
+        status, data, response_etag = await self.get_json(session, semaphore, url, self.build_headers(etag=etag))
+        if status == 0:
+            return None
+        if status == 304:
+            return NOT_MODIFIED
+        if status in (200, 404):
+            self.response_etags[('readme', repo_name)] = response_etag
+        if status != 200 or not data or 'content' not in data:
+            return ""
+        content = base64.b64decode(data['content']).decode('utf-8', errors='ignore')
+        return content[:self.readme_chars]
+
+    async def fetch_topics(self, session, semaphore, repo_name: str, etag: Optional[str] = None):
+        """Topic names, [] when unavailable, None when not fetched"""
+        url = f"{self.api_url}/repos/{repo_name}/topics"
+        headers = self.build_headers('application/vnd.github.mercy-preview+json', etag)
+        status, data, response_etag = await self.get_json(session, semaphore, url, headers)
+        if status == 0:
+            return None
+        if status == 304:
+            return NOT_MODIFIED
+        if status in (200, 404):
+            self.response_etags[('topics', repo_name)] = response_etag
+        if status != 200 or not data:
+            return []
+        topics = data.get('names', [])
+        return topics if isinstance(topics, list) else []
+
+    async def prefetch_async(self, readme_repos: List[str], topic_repos: List[str],
+                             etags: Dict[Tuple[str, str], str]) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            readme_tasks = [self.fetch_readme(session, semaphore, name, etags.get(('readme', name)))
+                            for name in readme_repos]
+            topic_tasks = [self.fetch_topics(session, semaphore, name, etags.get(('topics', name)))
+                           for name in topic_repos]
+            results = await asyncio.gather(*readme_tasks, *topic_tasks)
+
+        readmes = {}
+        for name, content in zip(readme_repos, results[:len(readme_repos)]):
+            if content is not None:
+                readmes[name] = content
+
+        topics = {}
+        for name, names in zip(topic_repos, results[len(readme_repos):]):
+            if names is not None:
+                topics[name] = names
+
+        return readmes, topics
+
+    def prefetch(self, readme_repos: List[str], topic_repos: List[str],
+                 etags: Optional[Dict[Tuple[str, str], str]] = None) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+        """Fetch READMEs and topics concurrently; repos that could not be fetched are omitted.
+
+        etags maps (kind, full_name) to a previously seen ETag; those requests are sent
+        conditionally and a 304 comes back as NOT_MODIFIED instead of content.
+        """
+        self.rate_limited = False
+        self.response_etags = {}
+        if not readme_repos and not topic_repos:
+            return {}, {}
+        return asyncio.run(self.prefetch_async(readme_repos, topic_repos, etags or {}))
@@ -0,0 +1,1608 @@
+#!/usr/bin/env python3
+"""
+Local Benchmarks for the Classifier Chain
+Runs the classifiers against local stand-ins (stub GitHub API, in-memory S3) and reports timings
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from enhanced_classifier_v4 import EnhancedClassifierV4
+from local_stubs import InMemoryS3Client, StubGitHubServer, make_repo_files, make_synthetic_repos
+from repo_record import REPO_FIELDS
+from smart_rate_limit_classifier import SmartRateLimitClassifier
+
+VOLATILE_FIELDS = {"classification_timestamp"}
+
+def results_to_csv(results: List[Dict]) -> str:
+    """Deterministic CSV of classification rows, ignoring run-dependent fields"""
+    if not results:
+        return ""
+    fieldnames = [k for k in results[0].keys() if k not in VOLATILE_FIELDS]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    for row in sorted(results, key=lambda r: r["repository"]):
+        writer.writerow(row)
+    return buffer.getvalue()
+
+def make_classifier(cls, server: StubGitHubServer, org_name: str = "aws-samples"):
+    """Instantiate a classifier wired to the local stub server and an in-memory S3"""
+    os.environ['GITHUB_API_URL'] = server.url
+    with contextlib.redirect_stdout(io.StringIO()):
+        return cls(org_name, s3_client=InMemoryS3Client())
+
+def classify_v4(classifier, repos: List[Dict], batch_size: int = 5) -> List[Dict]:
+    """Fetch + classify loop of process_all_repositories_with_logging without S3 side effects"""
+    results = []
+    prefetched_until = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(0, len(repos), batch_size):
+            if classifier.uses_prefetch() and i >= prefetched_until:
+                window = repos[i:i + max(batch_size, classifier.prefetch_window)]
+                classifier.prefetch_batch(window)
+                prefetched_until = i + len(window)
+            for repo in repos[i:i + batch_size]:
+                classification = classifier.classify_repository_enhanced_with_logging(repo)
+                if classification:
+                    results.append(classification)
+    return results
+
+def bench_async_fetch(args) -> None:
+    """Sequential vs concurrent README/topics fetch on the V4 classifier"""
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} repos, {args.latency * 1000:.0f}ms stub latency, concurrency {args.concurrency}")
+
+    with StubGitHubServer(repos, latency=args.latency) as server:
+        sequential = make_classifier(EnhancedClassifierV4, server)
+        start = time.time()
+        sequential_rows = classify_v4(sequential, repos)
+        sequential_time = time.time() - start
+        sequential_requests = sum(server.request_counts.values())
+
+        server.request_counts.clear()
+        concurrent = make_classifier(EnhancedClassifierV4, server)
+        concurrent.enable_async_fetch(args.concurrency)
+        start = time.time()
+        concurrent_rows = classify_v4(concurrent, repos)
+        concurrent_time = time.time() - start
+        concurrent_requests = sum(server.request_counts.values())
+
+    identical = results_to_csv(sequential_rows) == results_to_csv(concurrent_rows)
+    print(f"⏱️  Sequential: {sequential_time:.2f}s ({sequential_requests} requests)")
+    print(f"⚡ Concurrent: {concurrent_time:.2f}s ({concurrent_requests} requests)")
+    print(f"📈 Speedup: {sequential_time / max(concurrent_time, 1e-9):.1f}x")
+    print(f"{'✅' if identical else '❌'} Output CSV identical: {identical}")
+
+def bench_readme_requests(args) -> None:
+    """Count README requests per repo for each classifier entry point (must be <= 1)"""
+    from generic_classifier import GenericRepositoryClassifier
+    from enhanced_generic_classifier import EnhancedGenericRepositoryClassifier
+
+    entry_points = [
+        (GenericRepositoryClassifier, 'classify_repository'),
+        (EnhancedGenericRepositoryClassifier, 'classify_repository_with_retry'),
+        (SmartRateLimitClassifier, 'classify_repository_with_smart_retry'),
+        (EnhancedClassifierV4, 'classify_repository_enhanced_with_logging'),
+    ]
+    repos = make_synthetic_repos(args.repos)
+    failures = 0
+
+    with StubGitHubServer(repos) as server:
+        for cls, method in entry_points:
+            server.repo_request_counts.clear()
+            classifier = make_classifier(cls, server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for repo in repos:
+                    getattr(classifier, method)(repo)
+
+            per_repo = [server.repo_request_counts[('readme', repo['full_name'])] for repo in repos]
+            worst = max(per_repo) if per_repo else 0
+            ok = worst <= 1
+            failures += 0 if ok else 1
+            print(f"{'✅' if ok else '❌'} {cls.__name__}.{method}: "
+                  f"{sum(per_repo)} README requests for {len(repos)} repos (max {worst} per repo)")
+
+    if failures:
+        raise SystemExit(1)
+
+def bench_persistent_cache(args) -> None:
+    """Requests charged to the rate limit on cold, unchanged and re-pushed re-runs with the on-disk cache"""
+    import tempfile
+
+    repos = make_synthetic_repos(args.repos)
+    with tempfile.TemporaryDirectory() as tmp, StubGitHubServer(repos) as server:
+        cache_path = os.path.join(tmp, 'github_cache.sqlite')
+        runs = [
+            ("Cold cache", repos),
+            ("Re-run, nothing changed", repos),
+            ("Re-run, every repo re-pushed", [dict(repo, pushed_at='2099-01-01T00:00:00Z') for repo in repos]),
+        ]
+        for label, run_repos in runs:
+            server.request_counts.clear()
+            classifier = make_classifier(EnhancedClassifierV4, server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                classifier.enable_persistent_cache(cache_path)
+                if args.concurrency:
+                    classifier.enable_async_fetch(args.concurrency)
+                classify_v4(classifier, run_repos)
+            classifier.persistent_cache.close()
+
+            # Every request is tallied under its route; 304s are additionally tallied as not_modified
+            not_modified = server.request_counts['not_modified']
+            charged = sum(server.request_counts.values()) - 2 * not_modified
+            print(f"📊 {label}: {charged} rate-limited requests, {not_modified} free 304 revalidations")
+
+def bench_graphql(args) -> None:
+    """REST (sequential / async) vs GraphQL batch fetching: requests and wall time"""
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} repos, {args.latency * 1000:.0f}ms stub latency")
+
+    modes = [
+        ("REST sequential", lambda c: None),
+        (f"REST async x{args.concurrency}", lambda c: c.enable_async_fetch(args.concurrency)),
+        (f"GraphQL {args.batch_size}/request", lambda c: c.enable_graphql_fetch(args.batch_size)),
+    ]
+    outputs = []
+    with StubGitHubServer(repos, latency=args.latency) as server:
+        for label, configure in modes:
+            server.request_counts.clear()
+            classifier = make_classifier(EnhancedClassifierV4, server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                configure(classifier)
+            start = time.time()
+            rows = classify_v4(classifier, repos)
+            elapsed = time.time() - start
+            requests_made = sum(server.request_counts.values())
+            outputs.append(results_to_csv(rows))
+            print(f"⏱️  {label}: {elapsed:.2f}s, {requests_made} requests ({requests_made / len(repos):.2f}/repo)")
+
+    identical = all(output == outputs[0] for output in outputs)
+    print(f"{'✅' if identical else '❌'} Output CSV identical across modes: {identical}")
+
+def bench_rate_limit(args) -> None:
+    """README fetches against a stub enforcing per-token rate limits: throughput vs combined budget"""
+
+    repos = make_synthetic_repos(args.repos)
+    budget = args.rate_limit / args.window
+    print(f"📊 {len(repos)} README requests, {args.rate_limit} requests/token per {args.window:.0f}s window"
+          f"{f', secondary limit every {args.secondary_every} requests' if args.secondary_every else ''}")
+
+    for token_count in sorted({1, args.tokens}):
+        with StubGitHubServer(repos, rate_limit=args.rate_limit, rate_window=args.window,
+                              secondary_limit_every=args.secondary_every) as server:
+            classifier = make_classifier(SmartRateLimitClassifier, server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                classifier.enable_token_pool([f"token-{i}" for i in range(token_count)])
+            start = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                fetched = sum(1 for repo in repos if classifier.get_readme_with_smart_retry(repo))
+            elapsed = time.time() - start
+            throughput = len(repos) / elapsed
+            limited = server.request_counts['rate_limited'] + server.request_counts['secondary_limited']
+            print(f"⏱️  {token_count} token(s): {elapsed:.1f}s, {fetched}/{len(repos)} READMEs, "
+                  f"{limited} rate-limited responses, {throughput:.1f} req/s "
+                  f"({throughput / (budget * token_count):.0%} of the {budget * token_count:.0f} req/s budget)")
+
+class PerCallHTTPClient:
+    """The pre-pooling behaviour: module-level requests.get, one new connection per call"""
+
+    def get(self, url: str, **kwargs):
+        import requests
+        kwargs.setdefault('timeout', 10)
+        return requests.get(url, **kwargs)
+
+def bench_http_client(args) -> None:
+    """Per-request latency over TLS: fresh connection per call vs the shared pooled session"""
+    from github_http import GitHubHTTPClient
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} README requests + V4 classification over TLS, {args.latency * 1000:.0f}ms stub latency")
+
+    with StubGitHubServer(repos, latency=args.latency, tls=True) as server:
+        os.environ['REQUESTS_CA_BUNDLE'] = server.cert_path
+        for label, client in [("requests.get per call", PerCallHTTPClient()),
+                              ("shared pooled session", GitHubHTTPClient())]:
+            server.connections = 0
+            server.bytes_sent = 0
+            timings = []
+            for repo in repos:
+                start = time.perf_counter()
+                response = client.get(f"{server.url}/repos/{repo['full_name']}/readme")
+                response.json()
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            mean = sum(timings) / len(timings)
+            print(f"⏱️  {label}: mean {mean * 1000:.2f}ms, p50 {timings[len(timings) // 2] * 1000:.2f}ms, "
+                  f"p95 {timings[int(len(timings) * 0.95)] * 1000:.2f}ms, {server.connections} connections, "
+                  f"{server.bytes_sent / len(timings):.0f} bytes/response")
+
+            server.connections = 0
+            classifier = make_classifier(EnhancedClassifierV4, server)
+            classifier.http = client
+            start = time.time()
+            classify_v4(classifier, repos)
+            print(f"   V4 classification: {time.time() - start:.2f}s, {server.connections} connections")
+        os.environ.pop('REQUESTS_CA_BUNDLE', None)
+
+def list_repos_serially(api_url: str, org_name: str, per_page: int = 100) -> List[Dict]:
+    """The original ?page=N walk: one page at a time until an empty page comes back"""
+    from github_http import get_http_client
+
+    repos = []
+    page = 1
+    while True:
+        response = get_http_client().get(f"{api_url}/orgs/{org_name}/repos?page={page}&per_page={per_page}")
+        if response.status_code != 200 or not response.json():
+            break
+        repos.extend(response.json())
+        page += 1
+    return repos
+
+def bench_list_repos(args) -> None:
+    """Serial page walk vs Link-header driven concurrent listing"""
+    from repo_lister import list_org_repos
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} repos ({-(-len(repos) // 100)} pages), {args.latency * 1000:.0f}ms stub latency")
+
+    with StubGitHubServer(repos, latency=args.latency) as server:
+        start = time.time()
+        serial = list_repos_serially(server.url, "aws-samples")
+        print(f"⏱️  Serial ?page=N walk: {time.time() - start:.2f}s, {server.request_counts['list']} requests")
+
+        server.request_counts.clear()
+        start = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            parallel = list_org_repos("aws-samples", max_workers=args.workers, api_url=server.url)
+        print(f"⚡ Link rel=\"last\" + {args.workers} workers: {time.time() - start:.2f}s, "
+              f"{server.request_counts['list']} requests")
+
+    identical = [r["id"] for r in serial] == [r["id"] for r in parallel]
+    print(f"{'✅' if identical else '❌'} Same repositories in the same order: {identical} ({len(parallel)} repos)")
+
+def simulate_week_of_changes(repos: List[Dict], changed: int, new: int, removed: int) -> List[Dict]:
+    """Copy of the listing with pushes (new description/topics), new repos and deletions"""
+    import copy
+
+    current = copy.deepcopy(repos[removed:])
+    step = max(1, len(current) // max(changed, 1))
+    for repo in current[::step][:changed]:
+        repo["pushed_at"] = repo["updated_at"] = "2025-10-08T12:00:00Z"
+        repo["description"] = f"Rewritten with Amazon Bedrock agents and Step Functions ({repo['name']})"
+        repo["topics"] = sorted(set(repo.get("topics") or []) | {"genai"})
+    for repo in current[1::step][:changed // 4]:
+        # Starring bumps updated_at but not pushed_at
+        repo["stargazers_count"] += 10
+        repo["updated_at"] = "2025-10-08T12:00:00Z"
+    extra = make_synthetic_repos(len(repos) + new)[len(repos):]
+    return current + extra
+
+def read_results_csv(s3_client, bucket: str, key: str) -> str:
+    """Results CSV from the in-memory S3 without the run-dependent columns, sorted by repository"""
+    from incremental_refresh import parse_results_csv
+
+    rows = parse_results_csv(s3_client.get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8'))
+    for row in rows:
+        row.pop("classification_method", None)
+    return results_to_csv(rows)
+
+def bench_incremental(args) -> None:
+    """Full re-run vs incremental refresh after a simulated week of changes"""
+
+    repos = make_synthetic_repos(args.repos)
+    current = simulate_week_of_changes(repos, args.changed, args.new, args.removed)
+    print(f"📊 {len(repos)} repos, then {args.changed} pushed, {args.new} new, {args.removed} removed "
+          f"({args.latency * 1000:.0f}ms stub latency, concurrency {args.concurrency})")
+
+    def run(server, s3_client, action):
+        os.environ['GITHUB_API_URL'] = server.url
+        with contextlib.redirect_stdout(io.StringIO()):
+            classifier = EnhancedClassifierV4("aws-samples", s3_client=s3_client)
+            classifier.enable_async_fetch(args.concurrency)
+            server.request_counts.clear()
+            start = time.time()
+            action(classifier)
+        return classifier, time.time() - start, sum(server.request_counts.values())
+
+    def full_run(classifier):
+        classifier.fetch_all_repos()
+        classifier.process_all_repositories_with_logging(batch_size=5)
+
+    with StubGitHubServer(repos, latency=args.latency) as server:
+        s3_client = InMemoryS3Client()
+        _, elapsed, requests_made = run(server, s3_client, full_run)
+        print(f"⏱️  Initial full run: {elapsed:.1f}s, {requests_made} requests")
+
+        server.set_repos(current)
+        classifier, elapsed, requests_made = run(server, s3_client, lambda c: c.process_incremental_refresh(batch_size=5))
+        print(f"🔁 Incremental refresh: {elapsed:.1f}s, {requests_made} requests")
+        incremental = read_results_csv(s3_client, classifier.bucket_name, 'results/enhanced_v3_latest.csv')
+
+        fresh_s3 = InMemoryS3Client()
+        classifier, elapsed, requests_made = run(server, fresh_s3, full_run)
+        print(f"⏱️  Full re-run: {elapsed:.1f}s, {requests_made} requests")
+        full = read_results_csv(fresh_s3, classifier.bucket_name,
+                                f'results/enhanced_v3_final_{len(current)}_repos.csv')
+
+    identical = incremental == full
+    print(f"{'✅' if identical else '❌'} Merged results identical to a full re-run: {identical}")
+
+class SimulatedCrash(Exception):
+    pass
+
+def bench_checkpoints(args) -> None:
+    """Bytes uploaded for checkpoints: full progress.json rewrite per batch vs append-only segments"""
+    import json
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} repos, batch size {args.batch_size}, crash after {args.crash_after} repos")
+
+    # Legacy format: the whole growing checkpoint with indent=2, once per batch
+    legacy_bytes = 0
+    legacy_puts = 0
+    completed = []
+    for i in range(0, len(repos), args.batch_size):
+        completed.extend(repo["full_name"] for repo in repos[i:i + args.batch_size])
+        checkpoint = {"current_index": i + args.batch_size, "completed_repos": completed,
+                      "failed_repos": {}, "total_processed": len(completed), "last_run": "2025-10-08T12:00:00"}
+        legacy_bytes += len(json.dumps(checkpoint, indent=2))
+        legacy_puts += 1
+    print(f"📦 Legacy progress.json rewrites: {legacy_puts} PUTs, {legacy_bytes / 1e6:.1f} MB")
+
+    s3_client = InMemoryS3Client()
+
+    def new_classifier():
+        with contextlib.redirect_stdout(io.StringIO()):
+            classifier = SmartRateLimitClassifier("aws-samples", s3_client=s3_client)
+        classifier.load_master_index = lambda: repos
+        return classifier
+
+    def classify_until_crash(classifier, budget):
+        calls = [0]
+
+        def classify(repo):
+            calls[0] += 1
+            if budget is not None and calls[0] > budget:
+                raise SimulatedCrash()
+            return {"solution_type": "Foundation Builders"}
+        classifier.classify_repository_with_smart_retry = classify
+
+    first = new_classifier()
+    classify_until_crash(first, args.crash_after)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            first.run_smart_classification(args.batch_size)
+    except SimulatedCrash:
+        pass
+
+    resumed = new_classifier()
+    start = time.time()
+    checkpoint = resumed.load_checkpoint()
+    print(f"🔄 Resume after crash: {len(checkpoint['completed_repos'])} completed, index "
+          f"{checkpoint['current_index']}, rebuilt in {(time.time() - start) * 1000:.0f}ms")
+
+    classify_until_crash(resumed, None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        resumed.run_smart_classification(args.batch_size)
+    store_bytes = first.checkpoint_store.bytes_written + resumed.checkpoint_store.bytes_written
+    final = json.loads(s3_client.get_object(Bucket=resumed.bucket_name, Key=resumed.checkpoint_key)['Body'].read())
+    print(f"📦 Append-only segments: {s3_client.put_count} PUTs, {store_bytes / 1e6:.2f} MB "
+          f"({legacy_bytes / max(store_bytes, 1):.0f}x less)")
+    complete = len(final["completed_repos"]) == len(repos)
+    print(f"{'✅' if complete else '❌'} Final progress.json lists all {len(final['completed_repos'])} repos")
+
+def bench_log_sink(args) -> None:
+    """S3 processing log: read-modify-write per event vs the buffered segment sink"""
+    from log_sink import S3LogSink, read_log_events
+
+    bucket = "logs-bench"
+    messages = [f"Completed batch {i + 1}/{args.events}: 5/5 successful" for i in range(args.events)]
+    print(f"📊 {len(messages)} processing-log events")
+
+    legacy_s3 = InMemoryS3Client()
+    downloaded = 0
+    start = time.time()
+    for message in messages:
+        # What log_processing_event used to do on every call
+        try:
+            existing = legacy_s3.get_object(Bucket=bucket, Key='logs/processing_log.txt')['Body'].read().decode('utf-8')
+        except KeyError:
+            existing = ""
+        downloaded += len(existing)
+        legacy_s3.put_object(Bucket=bucket, Key='logs/processing_log.txt',
+                             Body=existing + f"[{datetime.now().isoformat()}] {message}\n")
+    legacy_time = time.time() - start
+    print(f"⏱️  Read-modify-write: {legacy_time:.2f}s ({legacy_time / len(messages) * 1e6:.0f}µs/event), "
+          f"{legacy_s3.put_count} PUTs, {legacy_s3.bytes_uploaded / 1e6:.1f} MB up, {downloaded / 1e6:.1f} MB down")
+
+    sink_s3 = InMemoryS3Client()
+    sink = S3LogSink(sink_s3, bucket, 'logs/processing/', flush_interval=args.flush_interval)
+    start = time.time()
+    for message in messages:
+        sink.write({"timestamp": datetime.now().isoformat(), "message": message})
+    write_time = time.time() - start
+    sink.close()
+    print(f"⚡ Buffered sink: {write_time * 1000:.1f}ms in write() ({write_time / len(messages) * 1e6:.1f}µs/event), "
+          f"{sink.segments_written} segments, {sink_s3.bytes_uploaded / 1e6:.2f} MB up")
+
+    events = list(read_log_events(sink_s3, bucket, 'logs/processing/'))
+    intact = [event["message"] for event in events] == messages
+    print(f"{'✅' if intact else '❌'} Reader stitched {len(events)} events back in order: {intact}")
+
+def legacy_extract_services(keyword_map: Dict[str, str], text: str) -> set:
+    """The original per-keyword loop: one re.search per map entry"""
+    import re
+
+    text_lower = text.lower()
+    services = set()
+    for keyword, service in keyword_map.items():
+        if re.search(r'\b' + re.escape(keyword) + r'\b', text_lower):
+            services.add(service)
+    return services
+
+def load_matcher_corpus(readme_chars: int = 3000) -> List[str]:
+    """Texts from the committed CSVs: repo names/USPs from aws_samples_classification.csv (it has no
+    description column), descriptions from the other result files, and README-sized concatenations"""
+    texts = []
+    with open('aws_samples_classification.csv', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = row['repository'].split('/')[-1].replace('-', ' ')
+            texts.append(f"{name} {row.get('use_case_category', '')} {row.get('usp', '')}")
+    for path in ['classification_results.csv', 'enhanced_v3_progress_batch100.csv']:
+        with open(path, newline='', encoding='utf-8') as f:
+            texts.extend(row['description'] for row in csv.DictReader(f) if row.get('description'))
+
+    readmes = []
+    for i in range(0, len(texts), 40):
+        readmes.append(' '.join(texts[i:i + 40])[:readme_chars])
+    return texts + readmes
+
+def bench_service_matcher(args) -> None:
+    """Per-keyword regex loop vs the compiled single-pass matcher, with a parity check"""
+    from enhanced_classifier_v2 import EnhancedClassifierV2
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        classifier = EnhancedClassifierV2("aws-samples", s3_client=InMemoryS3Client())
+    keyword_map = classifier.aws_services_map
+    texts = load_matcher_corpus()
+    # Edge cases: overlapping/nested keywords, punctuation and boundaries
+    texts += ["api gateway and apigateway", "x-ray tracing", "s3-bucket lambdas", "amazon s3/lambda",
+              "secrets manager, certificate manager", "step functions+sns", "ec2ecs", "elb/alb/nlb", ""]
+    print(f"📊 {len(texts)} texts ({sum(len(t) for t in texts) / 1e6:.1f} MB), {len(keyword_map)} keywords")
+
+    timings = {}
+    outputs = {}
+    for label, extract in [("per-keyword re.search", lambda t: legacy_extract_services(keyword_map, t)),
+                           ("compiled matcher", classifier.extract_aws_services_from_text)]:
+        best = None
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            result = [extract(text) for text in texts]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = best
+        outputs[label] = result
+        print(f"⏱️  {label}: {best * 1000:.1f}ms ({best / len(texts) * 1e6:.1f}µs/text)")
+
+    legacy, compiled = outputs.values()
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"📈 Speedup: {timings['per-keyword re.search'] / timings['compiled matcher']:.1f}x")
+    print(f"{'✅' if not mismatches else '❌'} Parity with the per-keyword loop: {len(texts) - mismatches}/{len(texts)} identical")
+
+def legacy_rule_labels(ruleset: Dict, parts: Dict[str, str]) -> Dict[str, str]:
+    """The per-method evaluation the rule engine replaced: build each dimension's field text,
+    then `any(word in text ...)` category by category"""
+    labels = {}
+    for name, rule in ruleset['dimensions'].items():
+        text = " ".join(parts.get(part) or "" for part in ruleset['fields'][rule['field']])
+        labels[name] = rule['default']
+        for category in rule['categories']:
+            if any(word in text for word in category['keywords']):
+                labels[name] = category['label']
+                break
+    return labels
+
+def load_rule_corpus() -> List[Dict[str, str]]:
+    """Lowercased name/description (also as raw_description)/topics/aws_services parts of the repos in the committed CSVs"""
+    repos = []
+    for path in ['classification_results.csv', 'enhanced_v3_progress_batch100.csv']:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                repos.append({
+                    "name": row['repository'].split('/')[-1].lower(),
+                    "description": row.get('description', '').lower(),
+                    "topics": " ".join(t.strip() for t in row.get('topics', '').split(',')).lower(),
+                    "aws_services": row.get('aws_services', '').lower()
+                })
+                repos[-1]["raw_description"] = repos[-1]["description"]
+    with open('aws_samples_classification.csv', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = row['repository'].split('/')[-1].lower()
+            repos.append({"name": name, "description": name.replace('-', ' '), "raw_description": name.replace('-', ' '),
+                          "topics": "", "aws_services": row.get('aws_services', '').lower()})
+    return repos
+
+def bench_rules(args) -> None:
+    """Per-dimension keyword loops vs one rule engine scan per repo, with a parity check"""
+    from rule_engine import RULES_PATH, get_rule_engine
+
+    with open(RULES_PATH, encoding='utf-8') as f:
+        rules = json.load(f)
+    corpus = load_rule_corpus()
+    repos = [corpus[i % len(corpus)] for i in range(args.repos)]
+    print(f"📊 {len(repos)} repos ({len(corpus)} distinct from the committed CSVs)")
+
+    for ruleset in rules:
+        engine = get_rule_engine(ruleset)
+        keywords = len(engine.targets)
+        start = time.perf_counter()
+        legacy = [legacy_rule_labels(rules[ruleset], parts) for parts in repos]
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled = [engine.classify(parts) for parts in repos]
+        engine_time = time.perf_counter() - start
+
+        mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+        print(f"⏱️  {ruleset} ({len(engine.dimensions)} dimensions, {keywords} keywords): "
+              f"keyword loops {legacy_time:.2f}s, rule engine {engine_time:.2f}s "
+              f"({engine_time / len(repos) * 1e6:.1f}µs/repo, {legacy_time / engine_time:.1f}x)")
+        print(f"   {'✅' if not mismatches else '❌'} Parity: {len(repos) - mismatches}/{len(repos)} identical")
+
+def bench_offline_reclassify(args) -> None:
+    """Row-by-row classify_repository vs the vectorized offline re-classifier, with a parity check"""
+    from generic_classifier import GenericRepositoryClassifier
+    from offline_reclassifier import build_repo_frame, classify_frame, load_cached_descriptions
+
+    repos = make_synthetic_repos(args.repos)
+    ignored = {"classification_method"}
+    with StubGitHubServer(repos) as server:
+        classifier = make_classifier(GenericRepositoryClassifier, server)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            online = [classifier.classify_repository(repo) for repo in repos]
+        online_time = time.perf_counter() - start
+        readme_requests = server.request_counts["readme"]
+    print(f"⏱️  Row by row (README fallback over HTTP): {online_time:.2f}s, {readme_requests} README requests")
+
+    # Re-labelling from cached text: the previous results' descriptions stand in for the README fallbacks
+    cached = load_cached_descriptions(results_to_csv(online))
+    cached_repos = [dict(repo, description=repo.get("description") or cached.get(repo["full_name"], ""))
+                    for repo in repos]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = [classifier.classify_repository(repo) for repo in cached_repos]
+    row_time = time.perf_counter() - start
+    print(f"⏱️  Row by row (cached text): {row_time * 1000:.0f}ms")
+
+    start = time.perf_counter()
+    frame = build_repo_frame(repos, cached)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorized = classify_frame(frame)
+    classify_time = time.perf_counter() - start
+    print(f"⚡ Vectorized: {(build_time + classify_time) * 1000:.0f}ms "
+          f"(columns {build_time * 1000:.0f}ms + dimensions {classify_time * 1000:.0f}ms), "
+          f"{row_time / (build_time + classify_time):.1f}x faster than row by row on cached text")
+
+    def strip(results: List[Dict]) -> List[Dict]:
+        return [{k: v for k, v in row.items() if k not in ignored} for row in results]
+
+    vectorized_rows = vectorized.to_dict("records")
+    identical = results_to_csv(strip(rows)) == results_to_csv(strip(vectorized_rows))
+    print(f"{'✅' if identical else '❌'} Vectorized labels identical to classify_repository: {identical} "
+          f"({len(vectorized_rows)} rows, {len(vectorized.columns)} columns)")
+
+def legacy_save_enhanced_results(s3_client, bucket: str, results: List[Dict], filename_suffix: str) -> None:
+    """save_enhanced_results before the streaming writer: the whole CSV rebuilt with += on every call"""
+    headers = list(results[0].keys())
+    csv_content = ','.join(headers) + '\n'
+    for result in results:
+        row = []
+        for header in headers:
+            value = str(result.get(header, '')).replace(',', ';').replace('\n', ' ')
+            row.append(f'"{value}"')
+        csv_content += ','.join(row) + '\n'
+    s3_client.put_object(Bucket=bucket, Key=f'results/{filename_suffix}.csv', Body=csv_content, ContentType='text/csv')
+
+class UploadCounter(InMemoryS3Client):
+    """S3 stand-in that counts PUTs but only keeps final objects (the progress copies would not fit in memory)"""
+
+    def put_object(self, Bucket: str, Key: str, Body, ContentType: Optional[str] = None, **kwargs):
+        data = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        self.put_count += 1
+        self.bytes_uploaded += len(data)
+        self.keys_written = getattr(self, 'keys_written', set()) | {Key}
+        if '_final' in Key or '/parts/' in Key:
+            self.buckets.setdefault(Bucket, {})[Key] = data
+        return {}
+
+def bench_results_writer(args) -> None:
+    """Per-batch full CSV rewrites vs the streaming part writer, with a round-trip check"""
+    from offline_reclassifier import build_repo_frame, classify_frame
+    from results_writer import S3ResultsWriter
+
+    repos = make_synthetic_repos(args.repos)
+    for i, repo in enumerate(repos):
+        if i % 4 == 0:
+            repo["description"] = f"Sample with commas, \"quotes\" and a\nline break #{i}"
+    frame = classify_frame(build_repo_frame(repos))
+    rows = [{k: str(v) for k, v in row.items()} for row in frame.to_dict("records")]
+    batches = [rows[i:i + args.batch_size] for i in range(0, len(rows), args.batch_size)]
+    print(f"📊 {len(rows)} rows in {len(batches)} batches of {args.batch_size}")
+
+    def final_rows(s3_client, key: str) -> List[Dict]:
+        body = s3_client.get_object(Bucket='results-bench', Key=key)['Body'].read().decode('utf-8')
+        return list(csv.DictReader(io.StringIO(body)))
+
+    legacy_s3 = UploadCounter()
+    start = time.perf_counter()
+    results = []
+    for batch_num, batch in enumerate(batches, 1):
+        results.extend(batch)
+        legacy_save_enhanced_results(legacy_s3, 'results-bench', results, f"enhanced_v3_progress_batch{batch_num}")
+    legacy_save_enhanced_results(legacy_s3, 'results-bench', results, "enhanced_v3_final")
+    legacy_time = time.perf_counter() - start
+    legacy_ok = sum(1 for a, b in zip(rows, final_rows(legacy_s3, 'results/enhanced_v3_final.csv')) if a == b)
+    print(f"⏱️  Full rewrite per batch: {legacy_time:.2f}s, {legacy_s3.put_count} PUTs, "
+          f"{legacy_s3.bytes_uploaded / 1e6:.1f} MB uploaded, {len(legacy_s3.keys_written)} objects left")
+    print(f"   {'✅' if legacy_ok == len(rows) else '❌'} Rows that round-trip: {legacy_ok}/{len(rows)}")
+
+    stream_s3 = UploadCounter()
+    start = time.perf_counter()
+    writer = S3ResultsWriter(stream_s3, 'results-bench', 'enhanced_v3', part_rows=args.part_rows)
+    for batch in batches:
+        writer.write_rows(batch)
+    writer.publish('results/enhanced_v3_final.csv')
+    stream_time = time.perf_counter() - start
+    stream_ok = sum(1 for a, b in zip(rows, final_rows(stream_s3, 'results/enhanced_v3_final.csv')) if a == b)
+    remaining = len(stream_s3.list_objects_v2(Bucket='results-bench', Prefix='results/').get('Contents', []))
+    print(f"⚡ Streaming writer: {stream_time:.2f}s, {stream_s3.put_count} PUTs ({len(writer.parts)} parts), "
+          f"{stream_s3.bytes_uploaded / 1e6:.1f} MB uploaded, {remaining} objects left "
+          f"({legacy_s3.bytes_uploaded / max(1, stream_s3.bytes_uploaded):.0f}x fewer bytes)")
+    print(f"   {'✅' if stream_ok == len(rows) else '❌'} Rows that round-trip: {stream_ok}/{len(rows)}")
+
+def bench_export(args) -> None:
+    """Size and dashboard-query scan time: results CSV vs Parquet / Arrow IPC exports"""
+    import pyarrow.compute as pc
+    from offline_reclassifier import build_repo_frame, classify_frame
+    from results_export import read_table, results_to_table, table_to_bytes
+    from results_writer import rows_to_csv
+
+    print("📦 Committed result files:")
+    for path in ['aws_samples_classification.csv', 'classification_results.csv', 'enhanced_v3_progress_batch100.csv']:
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        table = results_to_table(rows)
+        sizes = {fmt: len(table_to_bytes(table, fmt)) for fmt in ('parquet', 'arrow')}
+        print(f"   {path}: {len(rows)} rows, CSV {os.path.getsize(path) / 1e6:.2f} MB -> "
+              f"Parquet {sizes['parquet'] / 1e6:.2f} MB, Arrow {sizes['arrow'] / 1e6:.2f} MB")
+
+    repos = make_synthetic_repos(args.repos)
+    rows = classify_frame(build_repo_frame(repos)).to_dict("records")
+    csv_bytes = rows_to_csv(rows).encode('utf-8')
+    table = results_to_table(rows)
+    exports = {fmt: table_to_bytes(table, fmt) for fmt in ('parquet', 'arrow')}
+    print(f"📊 {len(rows)} classified rows: CSV {len(csv_bytes) / 1e6:.2f} MB, "
+          f"Parquet {len(exports['parquet']) / 1e6:.2f} MB, Arrow {len(exports['arrow']) / 1e6:.2f} MB")
+    print(f"   Schema: stars {table.schema.field('stars').type}, created_date {table.schema.field('created_date').type}, "
+          f"solution_type {table.schema.field('solution_type').type}, aws_services {table.schema.field('aws_services').type}")
+
+    restored = read_table(exports['parquet'])
+    round_trip = (restored['stars'].to_pylist() == [int(row['stars']) for row in rows]
+                  and restored['solution_type'].to_pylist() == [row['solution_type'] for row in rows]
+                  and restored['aws_services'].to_pylist() == [row['aws_services'].split(', ') for row in rows])
+    print(f"{'✅' if round_trip else '❌'} stars / solution_type / aws_services round-trip: {round_trip}")
+
+    # Dashboard query: repos per solution type with more than 100 stars, and how many use Lambda
+    def query_csv():
+        counts = {}
+        lambda_repos = 0
+        for row in csv.DictReader(io.StringIO(csv_bytes.decode('utf-8'))):
+            if int(row['stars']) > 100:
+                counts[row['solution_type']] = counts.get(row['solution_type'], 0) + 1
+            lambda_repos += 'Lambda' in [s.strip() for s in row['aws_services'].split(',')]
+        return counts, lambda_repos
+
+    def query_columnar(fmt):
+        data = read_table(exports[fmt], fmt, columns=['solution_type', 'stars', 'aws_services'])
+        popular = data.filter(pc.greater(data['stars'], 100))
+        grouped = popular.group_by('solution_type').aggregate([('stars', 'count')])
+        counts = {str(k): v for k, v in zip(grouped['solution_type'].to_pylist(), grouped['stars_count'].to_pylist())}
+        services = data['aws_services'].combine_chunks()
+        lambda_rows = pc.filter(pc.list_parent_indices(services), pc.equal(pc.list_flatten(services), 'Lambda'))
+        lambda_repos = pc.count_distinct(lambda_rows).as_py()
+        return counts, lambda_repos
+
+    answers = {}
+    for label, query in [("CSV (csv module, all columns)", query_csv),
+                         ("Parquet (3 columns)", lambda: query_columnar('parquet')),
+                         ("Arrow IPC (3 columns)", lambda: query_columnar('arrow'))]:
+        best = None
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            answers[label] = query()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"⏱️  {label}: {best * 1000:.1f}ms")
+    identical = len({repr(sorted(a[0].items())) + str(a[1]) for a in answers.values()}) == 1
+    print(f"{'✅' if identical else '❌'} Same query answers from every format: {identical}")
+
+def process_memory_mb(field: str) -> float:
+    """VmRSS (current) or VmHWM (peak) of this process from /proc; unlike ru_maxrss, the peak
+    is not inherited from the parent that forked us"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def measure_master_index_load(path: str, mode: str, results) -> None:
+    """Child process: load a master index file (legacy json.loads or streamed) and report peak RSS"""
+    from master_index import iter_repositories
+
+    baseline_mb = process_memory_mb('VmRSS')
+    start = time.perf_counter()
+    with open(path, 'rb') as body:
+        if mode == 'legacy':
+            repos = json.loads(body.read())['repositories']
+        else:
+            repos = list(iter_repositories(body))
+    elapsed = time.perf_counter() - start
+    peak_mb = process_memory_mb('VmHWM')
+    retained_mb = process_memory_mb('VmRSS') - baseline_mb
+    digest = hashlib.sha256(json.dumps([[repo.get(field) for field in REPO_FIELDS] for repo in repos]).encode()).hexdigest()
+    results.put({"mode": mode, "repos": len(repos), "seconds": elapsed, "peak_mb": peak_mb,
+                 "delta_mb": peak_mb - baseline_mb, "retained_mb": retained_mb, "digest": digest})
+
+def bench_master_index(args) -> None:
+    """json.loads of the full master index vs the streaming RepoRecord loader (peak RSS and load time)"""
+    import multiprocessing
+    import tempfile
+    from local_stubs import full_repo_payload
+
+    repos = [full_repo_payload(repo) for repo in make_synthetic_repos(args.repos)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'aws-samples_repos.json')
+        with open(path, 'w') as f:
+            json.dump({"repositories": repos}, f, indent=2)
+        del repos
+        print(f"📄 Master index: {args.repos} repos, {os.path.getsize(path) / 1e6:.1f} MB "
+              f"(full GitHub payloads, indent=2)")
+
+        # Fresh interpreters so one loader's heap doesn't inflate the other's peak
+        context = multiprocessing.get_context('spawn')
+        measured = {}
+        for mode in ('legacy', 'streaming'):
+            queue = context.Queue()
+            child = context.Process(target=measure_master_index_load, args=(path, mode, queue))
+            child.start()
+            measured[mode] = queue.get()
+            child.join()
+
+    for mode, label in [('legacy', 'json.loads(Body.read())'), ('streaming', 'Streaming RepoRecords')]:
+        m = measured[mode]
+        print(f"⏱️  {label}: {m['seconds']:.2f}s, peak RSS {m['peak_mb']:.0f} MB "
+              f"(+{m['delta_mb']:.0f} MB over the interpreter, {m['retained_mb']:.0f} MB still held), {m['repos']} repos")
+    same = measured['legacy']['digest'] == measured['streaming']['digest']
+    print(f"{'✅' if same else '❌'} Same values for every field the classifiers read: {same}")
+
+def bench_repo_record(args) -> None:
+    """Slim listing dicts vs slotted RepoRecords: retained memory, freshness parse time, row parity"""
+    import tracemalloc
+    from generic_classifier import GenericRepositoryClassifier
+    from repo_record import RepoRecord, updated_datetime
+
+    # Decode from JSON so every record owns its strings, as when loaded from the master index
+    payload = json.dumps(make_synthetic_repos(args.repos))
+
+    def build_all(build) -> tuple:
+        decoded = json.loads(payload)
+        start = time.perf_counter()
+        repos = [build(repo) for repo in decoded]
+        return repos, time.perf_counter() - start
+
+    def retained(build) -> tuple:
+        _, elapsed = build_all(build)
+        tracemalloc.start()
+        repos = [build(repo) for repo in json.loads(payload)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return repos, size, elapsed
+
+    dicts, dict_bytes, dict_time = retained(lambda repo: {field: repo.get(field) for field in REPO_FIELDS})
+    records, record_bytes, record_time = retained(RepoRecord.from_api)
+    print(f"🧮 {args.repos} repos held in memory: dicts {dict_bytes / 1e6:.1f} MB, "
+          f"RepoRecords {record_bytes / 1e6:.1f} MB ({dict_bytes / record_bytes:.1f}x smaller)")
+    print(f"   Build from decoded JSON: dicts {dict_time * 1000:.0f}ms, RepoRecords {record_time * 1000:.0f}ms "
+          f"(parses created_at/updated_at/pushed_at once)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        classifier = GenericRepositoryClassifier('aws-samples', s3_client=InMemoryS3Client())
+    timings = {}
+    for label, repos in [("dicts", dicts), ("records", records)]:
+        start = time.perf_counter()
+        values = [(classifier.get_freshness(updated_datetime(repo)), classifier.get_days_since_update(updated_datetime(repo)))
+                  for repo in repos]
+        timings[label] = (time.perf_counter() - start, values)
+    print(f"⏱️  freshness + days_since_update: dicts {timings['dicts'][0] * 1000:.0f}ms "
+          f"(two fromisoformat per repo), RepoRecords {timings['records'][0] * 1000:.0f}ms (pre-parsed)")
+    same = timings['dicts'][1] == timings['records'][1]
+    print(f"{'✅' if same else '❌'} Same freshness values: {same}")
+    del dicts, records
+
+    # End to end: classification rows from records match the dict rows
+    sample = make_synthetic_repos(min(args.repos, args.parity_repos))
+    ignored = {"classification_timestamp"}
+    with StubGitHubServer(sample) as server:
+        identical = True
+        for cls in (GenericRepositoryClassifier, EnhancedClassifierV4):
+            rows = {}
+            for label, repos in [("dicts", sample), ("records", [RepoRecord.from_api(repo) for repo in sample])]:
+                classifier = make_classifier(cls, server)
+                if cls is GenericRepositoryClassifier:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        result = [classifier.classify_repository(repo) for repo in repos]
+                else:
+                    result = classify_v4(classifier, repos)
+                rows[label] = results_to_csv([{k: v for k, v in row.items() if k not in ignored} for row in result])
+            same = rows["dicts"] == rows["records"]
+            identical = identical and same
+            print(f"{'✅' if same else '❌'} {cls.__name__} rows identical for dicts and RepoRecords ({len(sample)} repos): {same}")
+
+class CrashOnceClassifierV4(EnhancedClassifierV4):
+    """V4 whose worker hard-exits after SHARD_CRASH_AFTER repos, once per SHARD_CRASH_MARKER file"""
+
+    def classify_repository_enhanced_with_logging(self, repo):
+        marker = os.environ.get('SHARD_CRASH_MARKER')
+        if marker and not os.path.exists(marker):
+            self.crash_countdown = getattr(self, 'crash_countdown', int(os.environ['SHARD_CRASH_AFTER'])) - 1
+            if self.crash_countdown < 0:
+                open(marker, 'w').close()
+                os._exit(17)  # No flush, no cleanup: like a killed process
+        return super().classify_repository_enhanced_with_logging(repo)
+
+def bench_sharded(args) -> None:
+    """Sharded multi-process runner vs one worker against a latency-bound stub, plus a shard crash"""
+    import functools
+    import tempfile
+    from local_stubs import DirectoryS3Client
+    from sharded_runner import ShardedRunner
+
+    repos = make_synthetic_repos(args.repos)
+    ignored = {"classification_timestamp"}
+
+    def canonical(rows: List[Dict]) -> str:
+        return results_to_csv(sorted(({k: v for k, v in row.items() if k not in ignored} for row in rows),
+                                     key=lambda row: row["repository"]))
+
+    def run(root: str, shards: int, classifier_cls) -> tuple:
+        client = DirectoryS3Client(root)
+        bucket = 'aws-github-repo-classification-aws-samples'
+        client.create_bucket(Bucket=bucket)
+        client.put_object(Bucket=bucket, Key='master-index/aws-samples_repos.json',
+                          Body=json.dumps({"repositories": repos}))
+        runner = ShardedRunner('aws-samples', classifier_cls, shards, batch_size=args.batch_size,
+                               save_every=args.save_every, s3_factory=functools.partial(DirectoryS3Client, root),
+                               quiet=True)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = runner.run()
+        return rows, time.perf_counter() - start, runner
+
+    with StubGitHubServer(repos, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ['GITHUB_API_URL'] = server.url
+        print(f"🧪 {args.repos} repos, {args.latency * 1000:.0f}ms stub latency, {os.cpu_count()} CPU(s)")
+        baseline = None
+        single_time = None
+        for shards in args.shards:
+            rows, elapsed, _ = run(os.path.join(tmp, f"shards-{shards}"), shards, EnhancedClassifierV4)
+            single_time = single_time or elapsed
+            baseline = baseline or canonical(rows)
+            same = canonical(rows) == baseline
+            print(f"⏱️  {shards} shard(s): {elapsed:.1f}s, {len(rows)} rows, {single_time / elapsed:.1f}x "
+                  f"vs {args.shards[0]} shard(s) {'✅' if same else '❌ rows differ'}")
+
+        shards = args.shards[-1]
+        os.environ['SHARD_CRASH_MARKER'] = os.path.join(tmp, 'crashed')
+        os.environ['SHARD_CRASH_AFTER'] = str(args.crash_after)
+        readme_before = server.request_counts["readme"]
+        try:
+            rows, elapsed, runner = run(os.path.join(tmp, 'crash'), shards, CrashOnceClassifierV4)
+        finally:
+            os.environ.pop('SHARD_CRASH_MARKER')
+        redone = server.request_counts["readme"] - readme_before - args.repos
+        same = canonical(rows) == baseline
+        print(f"💥 {shards} shards, one worker killed after {args.crash_after} repos: {elapsed:.1f}s, "
+              f"restarts {runner.restarts}, {redone} READMEs fetched again after the restart")
+        print(f"{'✅' if same else '❌'} Merged rows identical to the uninterrupted run: {same}")
+
+SUITE_CLASSIFIERS = ("generic", "smart", "v4")
+
+def run_suite_classifier(name: str, fixtures_path: str, api_url: str, options: Dict, results) -> None:
+    """Child process: one classifier end-to-end against the stub (fresh in-memory S3), reporting
+    time, repos classified, S3 uploads and peak RSS"""
+    from generic_classifier import GenericRepositoryClassifier
+    from local_stubs import load_fixtures
+
+    os.environ['GITHUB_API_URL'] = api_url
+    fixtures = load_fixtures(fixtures_path)
+    org_name, repos = fixtures["org"], fixtures["repos"]
+    s3_client = InMemoryS3Client()
+    del fixtures
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "generic":
+            classifier = GenericRepositoryClassifier(org_name, s3_client=s3_client)
+        elif name == "smart":
+            classifier = SmartRateLimitClassifier(org_name, s3_client=s3_client)
+        else:
+            classifier = EnhancedClassifierV4(org_name, s3_client=s3_client)
+            if options["concurrency"]:
+                classifier.enable_async_fetch(options["concurrency"])
+        if name != "generic":
+            # The generic classifier builds the master index itself from the org listing
+            s3_client.put_object(Bucket=classifier.bucket_name, Key=classifier.master_index_key,
+                                 Body=json.dumps({"repositories": repos}))
+    total = len(repos)
+    del repos
+    s3_client.bytes_uploaded = s3_client.put_count = 0
+    rss_before = process_memory_mb('VmRSS')
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "generic":
+            classifier.run_classification(options["batch_size"])
+        elif name == "smart":
+            classifier.run_smart_classification(options["batch_size"])
+        else:
+            classifier.process_all_repositories_with_logging(batch_size=options["batch_size"])
+    elapsed = time.perf_counter() - start
+
+    classified = classifier.success_count if name == "v4" else len(classifier.checkpoint_store.completed)
+    results.put({"name": name, "seconds": elapsed, "repos": total, "classified": classified,
+                 "bytes_uploaded": s3_client.bytes_uploaded, "puts": s3_client.put_count,
+                 "peak_mb": process_memory_mb('VmHWM'), "delta_mb": process_memory_mb('VmHWM') - rss_before})
+
+def bench_suite(args) -> None:
+    """End-to-end throughput of the generic, smart and V4 classifiers against recorded (or synthetic)
+    fixtures: repos/sec, GitHub requests per repo, bytes uploaded to S3 and peak memory"""
+    import gzip
+    import multiprocessing
+    import tempfile
+    from local_stubs import load_fixtures, synthetic_fixtures
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fixtures:
+            fixtures_path = args.fixtures
+            fixtures = load_fixtures(fixtures_path)
+            source = f"{args.fixtures} (recorded {fixtures['recorded_at']})"
+        else:
+            fixtures = synthetic_fixtures(args.repos)
+            fixtures_path = os.path.join(tmp, 'fixtures.json.gz')
+            with gzip.open(fixtures_path, 'wt', encoding='utf-8') as f:
+                json.dump(fixtures, f)
+            source = "synthetic fixtures"
+
+        print(f"🧪 {len(fixtures['repos'])} {fixtures['org']} repos from {source}: {args.latency * 1000:.0f}ms latency, "
+              f"rate limit {args.rate_limit or 'off'}, 502 every {args.error_every or '-'} requests")
+        context = multiprocessing.get_context('spawn')
+        with StubGitHubServer.from_fixtures(fixtures, latency=args.latency, rate_limit=args.rate_limit,
+                                            rate_window=args.rate_window, error_every=args.error_every) as server:
+            del fixtures
+            for name in args.classifiers:
+                before = dict(server.request_counts)
+                server.rate_state.clear()  # Every classifier starts with a full rate-limit window
+                queue = context.Queue()
+                child = context.Process(target=run_suite_classifier, args=(
+                    name, fixtures_path, server.url,
+                    {"batch_size": args.batch_size, "concurrency": args.concurrency}, queue
+                ))
+                child.start()
+                m = queue.get()
+                child.join()
+                counts = {kind: server.request_counts[kind] - before.get(kind, 0)
+                          for kind in ('list', 'readme', 'topics', 'repo', 'injected_errors', 'rate_limited')}
+                requests_made = sum(counts.values())
+                print(f"⏱️  {name:8s} {m['classified']}/{m['repos']} classified "
+                      f"({m['classified'] / m['repos'] * 100:.1f}%) in {m['seconds']:.1f}s = "
+                      f"{m['repos'] / m['seconds']:.1f} repos/s")
+                print(f"   {requests_made / m['repos']:.2f} requests/repo (list {counts['list']}, readme {counts['readme']}, "
+                      f"topics {counts['topics']}; {counts['injected_errors']} injected 502s, "
+                      f"{counts['rate_limited']} rate-limited)")
+                print(f"   S3: {m['bytes_uploaded'] / 1e6:.2f} MB in {m['puts']} uploads; "
+                      f"peak RSS {m['peak_mb']:.0f} MB (+{m['delta_mb']:.0f} MB during the run)")
+
+def bench_iac_scan(args) -> None:
+    """IaC scan requests and time: cold, unchanged re-run, re-pushed re-run (tree 304s) with the on-disk cache"""
+    import tempfile
+    from iac_scanner import IaCScanner, deployment_tools_label
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} repos, {args.latency * 1000:.0f}ms stub latency, {args.workers} repos in flight")
+    with tempfile.TemporaryDirectory() as tmp, StubGitHubServer(repos, latency=args.latency) as server:
+        from persistent_cache import PersistentGitHubCache
+        os.environ['GITHUB_API_URL'] = server.url
+        cache = PersistentGitHubCache(os.path.join(tmp, 'github_cache.sqlite'))
+        runs = [
+            ("Cold cache", repos),
+            ("Re-run, nothing changed", repos),
+            ("Re-run, every repo re-pushed", [dict(repo, pushed_at='2099-01-01T00:00:00Z') for repo in repos]),
+        ]
+        for label, run_repos in runs:
+            server.request_counts.clear()
+            scanner = IaCScanner(api_url=server.url, max_workers=args.workers, persistent_cache=cache)
+            start = time.time()
+            scans = scanner.scan_all(run_repos)
+            elapsed = time.time() - start
+            requests_made = sum(server.request_counts.values()) - server.request_counts['not_modified']
+            labelled = Counter(deployment_tools_label(scan) or 'none' for scan in scans.values())
+            print(f"⏱️  {label}: {elapsed:.2f}s, {requests_made} requests ({server.request_counts['git']} trees/blobs, "
+                  f"{server.request_counts['not_modified']} of them tree 304s), {scanner.stats['files_fetched']} files downloaded")
+        print(f"🏗️  Deployment tools: {dict(labelled)}")
+        every_file = sum(len(make_repo_files(repo)) for repo in repos)
+        print(f"📁 {every_file} files in the trees; a per-file scan would download all of them")
+        cache.close()
+
+def bench_tarball(args) -> None:
+    """Per-file REST (README/topics + IaC tree scan) vs one streamed tarball per repo; then the byte budget
+    against archives padded with incompressible data"""
+    import tracemalloc
+    from tarball_analyzer import TarballAnalyzer
+
+    repos = make_synthetic_repos(args.repos)
+    print(f"📊 {len(repos)} repos, {args.latency * 1000:.0f}ms stub latency")
+    modes = [
+        ("REST README/topics + IaC tree scan", lambda c: c.enable_iac_scan(args.workers)),
+        ("Tarball stream", lambda c: c.enable_tarball_analysis(args.workers)),
+    ]
+    with StubGitHubServer(repos, latency=args.latency) as server:
+        for label, configure in modes:
+            server.request_counts.clear()
+            classifier = make_classifier(EnhancedClassifierV4, server)
+            with contextlib.redirect_stdout(io.StringIO()):
+                configure(classifier)
+            start = time.time()
+            rows = classify_v4(classifier, repos)
+            elapsed = time.time() - start
+            requests_made = sum(server.request_counts.values())
+            from_content = sum(1 for row in rows if row['secondary_language'] != 'N/A')
+            print(f"⏱️  {label}: {elapsed:.2f}s, {requests_made / len(repos):.2f} requests/repo, "
+                  f"secondary_language from content for {from_content}/{len(rows)}")
+        print(f"   e.g. {rows[3]['repository']}: {rows[3]['secondary_language']} | {rows[3]['framework']} | {rows[3]['aws_services']}")
+
+    padding = int(args.padding_mb * 1024 * 1024)
+    with StubGitHubServer(repos[:args.workers * 2], tarball_padding=padding) as server:
+        for repo in repos[:args.workers * 2]:
+            server.tarball(repo)  # Built up front so the heap peak below is the analyzer's alone
+        for max_mb in (args.padding_mb * 2, args.padding_mb / 4):
+            analyzer = TarballAnalyzer(api_url=server.url, max_workers=args.workers, max_bytes=int(max_mb * 1024 * 1024))
+            tracemalloc.start()
+            analyses = analyzer.analyze_all(repos[:args.workers * 2])
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            stopped = sum(1 for analysis in analyses.values() if analysis['stopped'])
+            print(f"📦 {args.padding_mb:g} MB archives, {max_mb:g} MB budget: {analyzer.stats['bytes_read'] / 1e6:.1f} MB read, "
+                  f"{stopped}/{len(analyses)} cut off, peak Python heap {peak / 1e6:.1f} MB ({args.workers} streams)")
+
+def bench_results_index(args) -> None:
+    """Boolean/faceted queries over a results CSV: csv scan per query vs the inverted index; then
+    index build, save/load and an incremental update after a few rows change"""
+    import random
+    from offline_reclassifier import build_repo_frame, classify_frame
+    from results_index import ResultsIndex, read_rows, refresh_index, tokenize
+    from results_writer import rows_to_csv
+
+    repos = make_synthetic_repos(args.repos)
+    rows = classify_frame(build_repo_frame(repos)).to_dict("records")
+    csv_bytes = rows_to_csv(rows).encode('utf-8')
+    rows = read_rows(csv_bytes)
+    print(f"📊 {len(rows)} classified rows, CSV {len(csv_bytes) / 1e6:.2f} MB")
+
+    start = time.perf_counter()
+    index, _ = refresh_index(csv_bytes, None)
+    build = time.perf_counter() - start
+    saved = index.to_bytes()
+    start = time.perf_counter()
+    ResultsIndex.from_bytes(saved)
+    load = time.perf_counter() - start
+    print(f"🗂️  Build {build:.2f}s, index {len(saved) / 1e6:.2f} MB gzipped, load {load * 1000:.0f}ms, "
+          f"facets: {', '.join(index.facet_columns)}")
+
+    def services(row):
+        return {s.strip() for s in row['aws_services'].split(',')}
+
+    def tokenize_row(row):
+        return tokenize(' '.join([row['repository'].split('/', 1)[-1], row['description'], row['topics']]))
+
+    # Each query as index syntax and as the equivalent per-row predicate
+    queries = [
+        ("service:Lambda service:DynamoDB -lang:Java",
+         lambda r: {'Lambda', 'DynamoDB'} <= services(r) and r['primary_language'] != 'Java'),
+        ("(service:S3 OR genai_agentic:Yes) stars:>=100 lang:TypeScript",
+         lambda r: ('S3' in services(r) or r['genai_agentic'] == 'Yes') and int(r['stars']) >= 100
+         and r['primary_language'] == 'TypeScript'),
+        ("solution_type:\"Innovation Catalysts\" days_since_update:<400",
+         lambda r: r['solution_type'] == 'Innovation Catalysts' and int(r['days_since_update']) < 400),
+        ("serverless api", lambda r: {'serverless', 'api'} <= set(tokenize_row(r))),
+    ]
+
+    facet_columns = ['solution_type', 'aws_services']
+    for query, predicate in queries:
+        start = time.perf_counter()
+        scanned = [r for r in csv.DictReader(io.StringIO(csv_bytes.decode('utf-8'))) if predicate(r)]
+        facets = Counter(r['solution_type'] for r in scanned)
+        scan_ms = (time.perf_counter() - start) * 1000
+        best = None
+        for _ in range(args.rounds):
+            result = index.search(query, limit=20, facets=facet_columns)
+            best = result['took_ms'] if best is None else min(best, result['took_ms'])
+        same = (result['count'] == len(scanned)
+                and dict(result['facets']['solution_type']) == dict(facets.most_common(10)))
+        print(f"⏱️  {query!r}: {result['count']} matches, csv scan {scan_ms:.1f}ms vs index {best:.2f}ms "
+              f"{'✅' if same else '❌ MISMATCH'}")
+
+    changed = random.Random(0).sample(range(len(rows)), args.changed)
+    for position in changed:
+        rows[position]['aws_services'] = 'Lambda, Bedrock'
+    csv_bytes = rows_to_csv(rows).encode('utf-8')
+    start = time.perf_counter()
+    updated, stats = refresh_index(csv_bytes, saved)
+    incremental = time.perf_counter() - start
+    rebuilt = ResultsIndex.build(read_rows(csv_bytes))
+    same = all(updated.search(q)['count'] == rebuilt.search(q)['count'] for q, _ in queries + [("service:Bedrock", None)])
+    print(f"🔄 {args.changed} rows changed: load + incremental update {incremental:.2f}s ({stats}) vs build {build:.2f}s; "
+          f"{'✅' if same else '❌'} same answers as a rebuild")
+
+def bench_similarity(args) -> None:
+    """TF-IDF similarity index: build, top-k query latency, near-duplicate clusters against planted forks
+    (and a brute-force pass), and an incremental update vs a rebuild"""
+    import random
+    import numpy as np
+    from local_stubs import make_readme
+    from similarity_index import SimilarityIndex, document_text
+
+    # READMEs: the stub template plus Zipf-distributed filler words; every fork_every-th repo is followed by
+    # --forks copies of it with a few words changed (the same workshop forked into several repos)
+    rng = random.Random(0)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10))) for _ in range(30000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    repos = make_synthetic_repos(args.repos)
+    fork_every = 50
+    documents = {}
+    planted = []
+    for i, repo in enumerate(repos):
+        offset = i % fork_every
+        if 0 < offset <= args.forks:
+            original = repos[i - offset]['full_name']
+            words = documents[original].split(' ')
+            for _ in range(5):
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            documents[repo['full_name']] = ' '.join(words)
+            planted[-1].append(repo['full_name'])
+            continue
+        readme = make_readme(repo) + ' ' + ' '.join(rng.choices(vocabulary, weights, k=300))
+        documents[repo['full_name']] = document_text(repo['full_name'], repo.get('description') or '', repo['topics'], readme)
+        if offset == 0:
+            planted.append([repo['full_name']])
+    planted = sorted((sorted(group) for group in planted if len(group) > 1), key=lambda group: (-len(group), group[0]))
+
+    start = time.perf_counter()
+    index = SimilarityIndex()
+    index.update(documents)
+    build = time.perf_counter() - start
+    print(f"📊 {index.size} repos, {len(index.vocabulary)} terms, {index.matrix.nnz} weights; build {build:.2f}s")
+
+    names = list(documents)
+    timings = []
+    for name in rng.sample(names, min(args.queries, len(names))):
+        start = time.perf_counter()
+        index.most_similar(name, args.top)
+        timings.append(time.perf_counter() - start)
+    print(f"⏱️  Top-{args.top} query: p50 {np.percentile(timings, 50) * 1000:.2f}ms, p99 {np.percentile(timings, 99) * 1000:.2f}ms "
+          f"({len(timings)} queries)")
+    example = index.most_similar(planted[0][0], 3) if planted else []
+    print(f"   e.g. like {planted[0][0] if planted else '-'}: {', '.join(f'{name} ({score:.2f})' for name, score in example)}")
+
+    start = time.perf_counter()
+    clusters = index.near_duplicate_clusters(args.threshold)
+    elapsed = time.perf_counter() - start
+    print(f"👯 Clusters (cosine >= {args.threshold}): {len(clusters)} in {elapsed:.2f}s; "
+          f"{'✅' if clusters == planted else '❌'} planted forks recovered exactly: {clusters == planted}")
+
+    # Brute force: every row against every row, a block at a time
+    start = time.perf_counter()
+    parent = list(range(index.matrix.shape[0]))
+
+    def find(row):
+        while parent[row] != row:
+            row = parent[row]
+        return row
+
+    transposed = index.matrix.T.tocsr()
+    for block in range(0, index.matrix.shape[0], 512):
+        similarities = index.matrix[block:block + 512].dot(transposed).tocoo()
+        for a, b, value in zip(similarities.row + block, similarities.col, similarities.data):
+            if a < b and value >= args.threshold:
+                root_a, root_b = find(a), find(b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    groups = {}
+    for row, name in enumerate(index.docs):
+        groups.setdefault(find(row), []).append(name)
+    brute = sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda group: (-len(group), group[0]))
+    print(f"   Brute-force all pairs: {time.perf_counter() - start:.2f}s; {'✅' if brute == clusters else '❌'} same clusters")
+
+    changed = {name: documents[name] + ' updated with a new section' for name in rng.sample(names, args.changed)}
+    saved = index.to_bytes()
+    start = time.perf_counter()
+    updated = SimilarityIndex.from_bytes(saved)
+    stats = updated.update(changed)
+    incremental = time.perf_counter() - start
+    documents.update(changed)
+    rebuilt = SimilarityIndex()
+    rebuilt.update(documents)
+    probes = rng.sample(names, 50)
+    agree = sum(1 for name in probes if [n for n, _ in updated.most_similar(name, args.top)][:3]
+                == [n for n, _ in rebuilt.most_similar(name, args.top)][:3])
+    print(f"🔄 {args.changed} repos changed: load ({len(saved) / 1e6:.1f} MB) + update {incremental:.2f}s ({stats}) vs "
+          f"rebuild {build:.2f}s; top-3 identical to a rebuild for {agree}/{len(probes)} probes")
+
+def bench_record_fixtures(args) -> None:
+    """Record live GitHub responses for the suite benchmark"""
+    from local_stubs import record_fixtures
+    record_fixtures(args.org, args.output, token=args.github_token, limit=args.limit)
+
+def bench_metrics(args) -> None:
+    """Overhead of run metrics (off vs on) on the CPU-bound classify path, then a V4 run's stage breakdown"""
+    import requests
+    from generic_classifier import GenericRepositoryClassifier
+    from run_metrics import NullMetrics, disable_metrics, enable_metrics, get_metrics, instrument_classifier, print_summary
+
+    # Every repo has a description, so classification is pure CPU (no README fallback)
+    repos = make_synthetic_repos(args.repos)
+    for repo in repos:
+        repo["description"] = repo["description"] or f"Sample {repo['name'].replace('-', ' ')} with Lambda and S3"
+
+    def classify_all(classifier) -> float:
+        start = time.perf_counter()
+        for repo in repos:
+            classifier.classify_repository(repo)
+        return time.perf_counter() - start
+
+    timings = {}
+    for label in ('off', 'on'):
+        disable_metrics()
+        with contextlib.redirect_stdout(io.StringIO()):
+            classifier = GenericRepositoryClassifier('aws-samples', s3_client=InMemoryS3Client())
+        if label == 'on':
+            instrument_classifier(classifier, enable_metrics())
+        classify_all(classifier)  # Warm-up
+        timings[label] = min(classify_all(classifier) for _ in range(args.rounds))
+    per_repo = {label: seconds / len(repos) * 1e6 for label, seconds in timings.items()}
+    print(f"⏱️  Generic classify, {len(repos)} repos: metrics off {per_repo['off']:.1f}µs/repo, "
+          f"on {per_repo['on']:.1f}µs/repo (+{per_repo['on'] - per_repo['off']:.1f}µs for "
+          f"{len(get_metrics().timers)} timed stages)")
+
+    null = NullMetrics()
+    start = time.perf_counter()
+    for _ in range(1_000_000):
+        with null.timer('fetch', method='x'):
+            pass
+    print(f"   Disabled timer (NullMetrics): {(time.perf_counter() - start) * 1000:.0f}ns per call")
+
+    disable_metrics()
+    stub_repos = make_synthetic_repos(args.e2e_repos)
+    with StubGitHubServer(stub_repos, latency=args.latency) as server:
+        os.environ['GITHUB_API_URL'] = server.url
+        s3_client = InMemoryS3Client()
+        with contextlib.redirect_stdout(io.StringIO()):
+            classifier = EnhancedClassifierV4('aws-samples', s3_client=s3_client)
+            s3_client.put_object(Bucket=classifier.bucket_name, Key=classifier.master_index_key,
+                                 Body=json.dumps({"repositories": stub_repos}))
+            if args.concurrency:
+                classifier.enable_async_fetch(args.concurrency)
+            metrics = enable_metrics()
+            instrument_classifier(classifier, metrics)
+            endpoint = metrics.serve(0, host='127.0.0.1')
+            classifier.process_all_repositories_with_logging(batch_size=args.batch_size)
+        exposition = requests.get(f"http://127.0.0.1:{endpoint.server_address[1]}/metrics").text
+        endpoint.shutdown()
+
+    summary = metrics.summary(org='aws-samples', classifier='EnhancedClassifierV4')
+    print(f"🧪 V4, {args.e2e_repos} repos, {args.latency * 1000:.0f}ms stub latency, "
+          f"prefetch concurrency {args.concurrency or 'off'}:")
+    print_summary(summary, top=6)
+    samples = [line for line in exposition.splitlines() if line and not line.startswith('#')]
+    example = next(line for line in samples if 'endpoint="readme"' in line)
+    print(f"📄 /metrics: {len(samples)} samples, e.g. {example}")
+    disable_metrics()
+
+class CrashOnceSmartClassifier(SmartRateLimitClassifier):
+    """Smart classifier whose worker hard-exits after SHARD_CRASH_AFTER repos, once per SHARD_CRASH_MARKER file"""
+
+    def classify_repository_with_smart_retry(self, repo):
+        marker = os.environ.get('SHARD_CRASH_MARKER')
+        if marker and not os.path.exists(marker):
+            self.crash_countdown = getattr(self, 'crash_countdown', int(os.environ['SHARD_CRASH_AFTER'])) - 1
+            if self.crash_countdown < 0:
+                open(marker, 'w').close()
+                os._exit(17)
+        return super().classify_repository_with_smart_retry(repo)
+
+def bench_work_queue(args) -> None:
+    """Queue workers with one node's token nearly spent: hand-off vs holding the lease, plus a killed worker"""
+    import functools
+    import multiprocessing
+    import tempfile
+    import requests
+    from local_stubs import DirectoryS3Client
+    from work_queue import enqueue_org, merge_org, open_queue, run_worker
+
+    repos = make_synthetic_repos(args.repos)
+    ignored = {"classification_timestamp"}
+
+    def canonical(rows: List[Dict]) -> str:
+        return results_to_csv(sorted(({k: v for k, v in row.items() if k not in ignored} for row in rows),
+                                     key=lambda row: row["repository"]))
+
+    def run(server, root: str, name: str, classifier_cls, handoff_after, visibility_timeout: float = 60.0) -> tuple:
+        client = DirectoryS3Client(root)
+        bucket = 'aws-github-repo-classification-aws-samples'
+        client.create_bucket(Bucket=bucket)
+        client.put_object(Bucket=bucket, Key='master-index/aws-samples_repos.json',
+                          Body=json.dumps({"repositories": repos}))
+        queue_spec = f"sqlite://{os.path.join(root, 'queue.db')}"
+        queue = open_queue(queue_spec, visibility_timeout)
+        with contextlib.redirect_stdout(io.StringIO()):
+            enqueue_org(queue, 'aws-samples', classifier_cls, s3_client=client, batch_size=args.batch_size)
+
+        # Worker 0's token has been used elsewhere: only 2 requests left in the current window
+        for _ in range(args.rate_limit - 2):
+            requests.get(f"{server.url}/rate_limit", headers={'Authorization': f'token {name}-0'})
+
+        context = multiprocessing.get_context('spawn')
+        start = time.perf_counter()
+        workers = [context.Process(target=run_worker, args=({
+            "queue": queue_spec, "classifier_cls": classifier_cls, "worker_id": f"{name}-{i}",
+            "tokens": [f"{name}-{i}"], "handoff_after": handoff_after, "poll_interval": 0.2,
+            "visibility_timeout": visibility_timeout, "s3_factory": functools.partial(DirectoryS3Client, root),
+            "quiet": True
+        },)) for i in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        drained = None
+        while any(worker.is_alive() for worker in workers):
+            stats = queue.stats()
+            if drained is None and not stats["visible"] and not stats["in_flight"]:
+                drained = time.perf_counter() - start
+            time.sleep(0.05)
+        finished = time.perf_counter() - start
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = merge_org('aws-samples', classifier_cls, s3_client=client)
+        return rows, drained or finished, finished
+
+    with StubGitHubServer(repos, latency=args.latency, rate_limit=args.rate_limit,
+                          rate_window=args.rate_window) as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ['GITHUB_API_URL'] = server.url
+        print(f"🧪 {args.repos} repos in batches of {args.batch_size}, {args.workers} workers, "
+              f"{args.rate_limit} requests/{args.rate_window:.0f}s per token, worker 0 starts with 2 left")
+
+        rows, drained, finished = run(server, os.path.join(tmp, 'hold'), 'hold', SmartRateLimitClassifier, None)
+        baseline = canonical(rows)
+        print(f"⏱️  Hold the lease through the wait: queue drained in {drained:.1f}s, "
+              f"workers exited in {finished:.1f}s, {len(rows)} rows")
+
+        readme_before = server.request_counts["readme"]
+        rows, drained_handoff, finished = run(server, os.path.join(tmp, 'handoff'), 'handoff',
+                                              SmartRateLimitClassifier, args.handoff_after)
+        same = canonical(rows) == baseline
+        print(f"⏱️  Hand off after {args.handoff_after:.0f}s: queue drained in {drained_handoff:.1f}s "
+              f"({drained / drained_handoff:.1f}x sooner), workers exited in {finished:.1f}s, {len(rows)} rows "
+              f"{'✅' if same else '❌ rows differ'}")
+        print(f"   README requests: {server.request_counts['readme'] - readme_before}")
+
+        os.environ['SHARD_CRASH_MARKER'] = os.path.join(tmp, 'crashed')
+        os.environ['SHARD_CRASH_AFTER'] = str(args.crash_after)
+        readme_before = server.request_counts["readme"]
+        try:
+            rows, drained, finished = run(server, os.path.join(tmp, 'crash'), 'crash', CrashOnceSmartClassifier,
+                                          args.handoff_after, visibility_timeout=args.crash_visibility)
+        finally:
+            os.environ.pop('SHARD_CRASH_MARKER')
+        same = canonical(rows) == baseline
+        print(f"💥 One worker killed after {args.crash_after} repos ({args.crash_visibility:.0f}s visibility timeout): "
+              f"drained in {drained:.1f}s, {server.request_counts['readme'] - readme_before} README requests")
+        print(f"{'✅' if same else '❌'} Merged rows identical to the uninterrupted run: {same}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local benchmarks for the repository classifiers')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    async_parser = subparsers.add_parser('async-fetch', help='Sequential vs concurrent README/topics fetching')
+    async_parser.add_argument('--repos', type=int, default=1000, help='Number of synthetic repositories')
+    async_parser.add_argument('--latency', type=float, default=0.02, help='Stub server latency per request (seconds)')
+    async_parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight for the async engine')
+    async_parser.set_defaults(func=bench_async_fetch)
+
+    readme_parser = subparsers.add_parser('readme-requests', help='Verify at most one README request per repo')
+    readme_parser.add_argument('--repos', type=int, default=60, help='Number of synthetic repositories')
+    readme_parser.set_defaults(func=bench_readme_requests)
+
+    cache_parser = subparsers.add_parser('persistent-cache', help='API quota used by re-runs with the on-disk cache')
+    cache_parser.add_argument('--repos', type=int, default=300, help='Number of synthetic repositories')
+    cache_parser.add_argument('--concurrency', type=int, default=0, help='Also exercise the async prefetch path')
+    cache_parser.set_defaults(func=bench_persistent_cache)
+
+    graphql_parser = subparsers.add_parser('graphql', help='REST vs GraphQL batch fetch backends')
+    graphql_parser.add_argument('--repos', type=int, default=1000, help='Number of synthetic repositories')
+    graphql_parser.add_argument('--latency', type=float, default=0.02, help='Stub server latency per request (seconds)')
+    graphql_parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight for the async REST mode')
+    graphql_parser.add_argument('--batch-size', type=int, default=50, help='Repositories per GraphQL request')
+    graphql_parser.set_defaults(func=bench_graphql)
+
+    rate_parser = subparsers.add_parser('rate-limit', help='Token pool scheduling against a rate-limited stub')
+    rate_parser.add_argument('--repos', type=int, default=600, help='Number of README requests')
+    rate_parser.add_argument('--tokens', type=int, default=3, help='Tokens in the pool')
+    rate_parser.add_argument('--rate-limit', type=int, default=50, help='Requests per token per window')
+    rate_parser.add_argument('--window', type=float, default=2.0, help='Rate limit window (seconds)')
+    rate_parser.add_argument('--secondary-every', type=int, default=0, help='Secondary-limit 403 every N requests')
+    rate_parser.set_defaults(func=bench_rate_limit)
+
+    http_parser = subparsers.add_parser('http-client', help='Per-call connections vs the shared keep-alive session')
+    http_parser.add_argument('--repos', type=int, default=300, help='Number of synthetic repositories')
+    http_parser.add_argument('--latency', type=float, default=0.0, help='Stub server latency per request (seconds)')
+    http_parser.set_defaults(func=bench_http_client)
+
+    list_parser = subparsers.add_parser('list-repos', help='Serial vs concurrent paginated org listing')
+    list_parser.add_argument('--repos', type=int, default=7600, help='Number of synthetic repositories')
+    list_parser.add_argument('--latency', type=float, default=0.1, help='Stub server latency per request (seconds)')
+    list_parser.add_argument('--workers', type=int, default=32, help='Concurrent page fetches')
+    list_parser.set_defaults(func=bench_list_repos)
+
+    incremental_parser = subparsers.add_parser('incremental', help='Full re-run vs incremental refresh')
+    incremental_parser.add_argument('--repos', type=int, default=2000, help='Number of synthetic repositories')
+    incremental_parser.add_argument('--changed', type=int, default=40, help='Repositories pushed since the last run')
+    incremental_parser.add_argument('--new', type=int, default=10, help='Repositories created since the last run')
+    incremental_parser.add_argument('--removed', type=int, default=5, help='Repositories deleted since the last run')
+    incremental_parser.add_argument('--latency', type=float, default=0.02, help='Stub server latency per request (seconds)')
+    incremental_parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight for the async engine')
+    incremental_parser.set_defaults(func=bench_incremental)
+
+    checkpoint_parser = subparsers.add_parser('checkpoints', help='Checkpoint bytes uploaded per run and resume time')
+    checkpoint_parser.add_argument('--repos', type=int, default=7552, help='Number of synthetic repositories')
+    checkpoint_parser.add_argument('--batch-size', type=int, default=5, help='Batch size for processing')
+    checkpoint_parser.add_argument('--crash-after', type=int, default=4000, help='Simulate a crash after this many repos')
+    checkpoint_parser.set_defaults(func=bench_checkpoints)
+
+    log_parser = subparsers.add_parser('log-sink', help='Read-modify-write log vs buffered segment sink')
+    log_parser.add_argument('--events', type=int, default=3000, help='Number of log events')
+    log_parser.add_argument('--flush-interval', type=float, default=30.0, help='Sink background flush interval (seconds)')
+    log_parser.set_defaults(func=bench_log_sink)
+
+    matcher_parser = subparsers.add_parser('service-matcher', help='AWS service keyword extraction speed and parity')
+    matcher_parser.add_argument('--rounds', type=int, default=3, help='Timing rounds (best is reported)')
+    matcher_parser.set_defaults(func=bench_service_matcher)
+
+    rules_parser = subparsers.add_parser('rules', help='Keyword dimension loops vs the declarative rule engine')
+    rules_parser.add_argument('--repos', type=int, default=100000, help='Repos classified offline')
+    rules_parser.set_defaults(func=bench_rules)
+
+    offline_parser = subparsers.add_parser('offline-reclassify', help='Row-by-row vs vectorized offline re-labelling')
+    offline_parser.add_argument('--repos', type=int, default=7552, help='Number of synthetic repositories')
+    offline_parser.set_defaults(func=bench_offline_reclassify)
+
+    writer_parser = subparsers.add_parser('results-writer', help='Per-batch CSV rewrites vs the streaming results writer')
+    writer_parser.add_argument('--repos', type=int, default=7552, help='Number of result rows')
+    writer_parser.add_argument('--batch-size', type=int, default=5, help='Rows per classification batch')
+    writer_parser.add_argument('--part-rows', type=int, default=500, help='Rows per uploaded part file')
+    writer_parser.set_defaults(func=bench_results_writer)
+
+    export_parser = subparsers.add_parser('export', help='Results CSV vs Parquet/Arrow size and query scan time')
+    export_parser.add_argument('--repos', type=int, default=50000, help='Number of synthetic result rows')
+    export_parser.add_argument('--rounds', type=int, default=3, help='Timed runs per format (best is reported)')
+    export_parser.set_defaults(func=bench_export)
+
+    index_parser = subparsers.add_parser('master-index', help='Full json.loads vs streaming master index loader')
+    index_parser.add_argument('--repos', type=int, default=50000, help='Number of repositories in the index')
+    index_parser.set_defaults(func=bench_master_index)
+
+    record_parser = subparsers.add_parser('repo-record', help='Slim dicts vs slotted RepoRecords (memory, parse time)')
+    record_parser.add_argument('--repos', type=int, default=100000, help='Number of repositories held in memory')
+    record_parser.add_argument('--parity-repos', type=int, default=500, help='Repositories classified for the row parity check')
+    record_parser.set_defaults(func=bench_repo_record)
+
+    sharded_parser = subparsers.add_parser('sharded', help='Sharded multi-process runner scaling and crash recovery')
+    sharded_parser.add_argument('--repos', type=int, default=400, help='Number of synthetic repositories')
+    sharded_parser.add_argument('--latency', type=float, default=0.02, help='Stub API latency per request (seconds)')
+    sharded_parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8], help='Shard counts to time')
+    sharded_parser.add_argument('--batch-size', type=int, default=5, help='Repos per batch')
+    sharded_parser.add_argument('--save-every', type=int, default=4, help='Batches between part upload + checkpoint')
+    sharded_parser.add_argument('--crash-after', type=int, default=30, help='Repos a worker classifies before the injected crash')
+    sharded_parser.set_defaults(func=bench_sharded)
+
+    queue_parser = subparsers.add_parser('work-queue', help='Lease-based queue workers: rate-limit hand-off and crash redelivery')
+    queue_parser.add_argument('--repos', type=int, default=300, help='Number of synthetic repositories')
+    queue_parser.add_argument('--latency', type=float, default=0.05, help='Stub API latency per request (seconds)')
+    queue_parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    queue_parser.add_argument('--batch-size', type=int, default=10, help='Repos per leased batch')
+    queue_parser.add_argument('--rate-limit', type=int, default=100, help='Stub requests per token per window')
+    queue_parser.add_argument('--rate-window', type=float, default=20, help='Stub rate-limit window (seconds)')
+    queue_parser.add_argument('--handoff-after', type=float, default=2, help='Rate-limit wait that triggers a hand-off (seconds)')
+    queue_parser.add_argument('--crash-after', type=int, default=15, help='Repos a worker classifies before the injected crash')
+    queue_parser.add_argument('--crash-visibility', type=float, default=3, help='Visibility timeout for the crash run (seconds)')
+    queue_parser.set_defaults(func=bench_work_queue)
+
+    suite_parser = subparsers.add_parser('suite', help='End-to-end throughput of the generic, smart and V4 classifiers')
+    suite_parser.add_argument('--fixtures', help='Fixture file from record-fixtures (default: synthetic repos)')
+    suite_parser.add_argument('--repos', type=int, default=300, help='Synthetic repositories when no fixture file is given')
+    suite_parser.add_argument('--classifiers', nargs='+', choices=SUITE_CLASSIFIERS, default=list(SUITE_CLASSIFIERS),
+                              help='Classifiers to run')
+    suite_parser.add_argument('--latency', type=float, default=0.02, help='Stub API latency per request (seconds)')
+    suite_parser.add_argument('--rate-limit', type=int, default=0, help='Stub requests per token per window (0 = off)')
+    suite_parser.add_argument('--rate-window', type=float, default=3600, help='Stub rate-limit window (seconds)')
+    suite_parser.add_argument('--error-every', type=int, default=0, help='Answer every Nth GET with a 502 (0 = off)')
+    suite_parser.add_argument('--batch-size', type=int, default=5, help='Batch size passed to each classifier')
+    suite_parser.add_argument('--concurrency', type=int, default=8, help='V4 README/topics prefetch concurrency (0 = sequential)')
+    suite_parser.set_defaults(func=bench_suite)
+
+    metrics_parser = subparsers.add_parser('metrics', help='Run metrics overhead and a V4 per-stage breakdown')
+    metrics_parser.add_argument('--repos', type=int, default=2000, help='Repositories for the overhead measurement')
+    metrics_parser.add_argument('--rounds', type=int, default=3, help='Timed rounds (best is reported)')
+    metrics_parser.add_argument('--e2e-repos', type=int, default=60, help='Repositories for the V4 run')
+    metrics_parser.add_argument('--latency', type=float, default=0.02, help='Stub API latency per request (seconds)')
+    metrics_parser.add_argument('--batch-size', type=int, default=5, help='V4 batch size')
+    metrics_parser.add_argument('--concurrency', type=int, default=0, help='V4 prefetch concurrency (0 = sequential)')
+    metrics_parser.set_defaults(func=bench_metrics)
+
+    iac_parser = subparsers.add_parser('iac-scan', help='IaC file scanner requests and re-scan cost with the tree cache')
+    iac_parser.add_argument('--repos', type=int, default=400, help='Number of synthetic repositories')
+    iac_parser.add_argument('--latency', type=float, default=0.02, help='Stub API latency per request (seconds)')
+    iac_parser.add_argument('--workers', type=int, default=16, help='Repositories scanned concurrently')
+    iac_parser.set_defaults(func=bench_iac_scan)
+
+    tarball_parser = subparsers.add_parser('tarball', help='Per-file REST vs streamed tarball analysis, and the byte budget')
+    tarball_parser.add_argument('--repos', type=int, default=200, help='Number of synthetic repositories')
+    tarball_parser.add_argument('--latency', type=float, default=0.02, help='Stub API latency per request (seconds)')
+    tarball_parser.add_argument('--workers', type=int, default=4, help='Concurrent scans')
+    tarball_parser.add_argument('--padding-mb', type=float, default=20, help='Incompressible MB per archive for the budget run')
+    tarball_parser.set_defaults(func=bench_tarball)
+
+    results_index_parser = subparsers.add_parser('results-index', help='CSV scans vs the inverted results index, incremental update')
+    results_index_parser.add_argument('--repos', type=int, default=10000, help='Number of synthetic classified rows')
+    results_index_parser.add_argument('--changed', type=int, default=50, help='Rows changed before the incremental update')
+    results_index_parser.add_argument('--rounds', type=int, default=5, help='Repetitions per query (best time is reported)')
+    results_index_parser.set_defaults(func=bench_results_index)
+
+    similarity_parser = subparsers.add_parser('similarity', help='TF-IDF top-k latency, near-duplicate clusters, incremental update')
+    similarity_parser.add_argument('--repos', type=int, default=10000, help='Number of synthetic repositories')
+    similarity_parser.add_argument('--forks', type=int, default=4, help='Near-copies planted after every 50th repo')
+    similarity_parser.add_argument('--queries', type=int, default=500, help='Top-k queries timed')
+    similarity_parser.add_argument('--top', type=int, default=10, help='k')
+    similarity_parser.add_argument('--threshold', type=float, default=0.9, help='Cosine similarity for near-duplicates')
+    similarity_parser.add_argument('--changed', type=int, default=100, help='Repos changed before the incremental update')
+    similarity_parser.set_defaults(func=bench_similarity)
+
+    record_parser = subparsers.add_parser('record-fixtures', help='Record live org listing, /topics and /readme responses')
+    record_parser.add_argument('org', help='GitHub organization name')
+    record_parser.add_argument('--output', required=True, help='Fixture file to write (.json.gz)')
+    record_parser.add_argument('--limit', type=int, help='Most-starred repos to record')
+    record_parser.add_argument('--github-token', help='GitHub personal access token')
+    record_parser.set_defaults(func=bench_record_fixtures)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
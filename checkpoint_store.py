@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Append-Only Checkpoint Store
+Records per-batch deltas as small S3 segments and periodically compacts them into checkpoints/progress.json
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+def is_missing_key(error: Exception) -> bool:
+    """NoSuchKey from boto3 (ClientError code) or the in-memory stand-in (KeyError)"""
+    code = (getattr(error, 'response', None) or {}).get('Error', {}).get('Code')
+    return code in ('NoSuchKey', '404') or (code is None and 'NoSuchKey' in str(error))
+
+class CheckpointStore:
+    def __init__(self, s3_client, bucket_name: str, snapshot_key: str = 'checkpoints/progress.json',
+                 segment_prefix: str = 'checkpoints/segments/', compact_every: int = 100):
+        """snapshot_key keeps the legacy progress.json layout (plus segment_seq) so existing readers still work;
+        compact_every: segments written between snapshots"""
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.snapshot_key = snapshot_key
+        self.segment_prefix = segment_prefix
+        self.compact_every = max(1, compact_every)
+
+        self.current_index = 0
+        self.completed = set()
+        self.failed = {}
+        self.total_processed = 0
+
+        self.segment_seq = 0  # Last segment written (or folded into the snapshot)
+        self.snapshot_seq = 0
+        self.pending_completed = []
+        self.pending_failed = {}
+        self.dirty = False
+        self.bytes_written = 0
+
+    def segment_key(self, seq: int) -> str:
+        return f"{self.segment_prefix}{seq:08d}.json"
+
+    def list_segment_keys(self) -> List[str]:
+        keys = []
+        kwargs = {'Bucket': self.bucket_name, 'Prefix': self.segment_prefix}
+        while True:
+            response = self.s3_client.list_objects_v2(**kwargs)
+            keys.extend(obj['Key'] for obj in response.get('Contents', []))
+            if not response.get('IsTruncated'):
+                return sorted(keys)
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def apply(self, delta: Dict) -> None:
+        self.completed.update(delta.get('completed', []))
+        self.failed.update(delta.get('failed', {}))
+        self.current_index = delta.get('current_index', self.current_index)
+        self.total_processed = delta.get('total_processed', self.total_processed)
+
+    def load(self) -> Dict:
+        """Rebuild state from the snapshot plus newer segments; returns the legacy checkpoint dict.
+        Raises when S3 fails (anything but a missing snapshot): starting from partial state would
+        overwrite existing segments and, at the next compaction, the snapshot"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.snapshot_key)
+            snapshot = json.loads(response['Body'].read())
+        except Exception as e:
+            if not is_missing_key(e):
+                print(f"❌ Failed to read checkpoint snapshot {self.snapshot_key}: {e}")
+                raise
+            snapshot = {}
+
+        self.current_index = snapshot.get('current_index', 0)
+        self.completed = set(snapshot.get('completed_repos', []))
+        self.failed = dict(snapshot.get('failed_repos', {}))
+        self.total_processed = snapshot.get('total_processed', 0)
+        self.snapshot_seq = self.segment_seq = snapshot.get('segment_seq', 0)
+
+        try:
+            segment_keys = self.list_segment_keys()
+        except Exception as e:
+            print(f"❌ Failed to list checkpoint segments: {e}")
+            raise
+
+        for key in segment_keys:
+            seq = int(key[len(self.segment_prefix):].split('.')[0])
+            if seq <= self.snapshot_seq:
+                continue  # Already folded into the snapshot (compaction crashed before deleting it)
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            self.apply(json.loads(response['Body'].read()))
+            self.segment_seq = max(self.segment_seq, seq)
+
+        return self.to_checkpoint()
+
+    def to_checkpoint(self) -> Dict:
+        return {
+            "current_index": self.current_index,
+            "completed_repos": sorted(self.completed),
+            "failed_repos": self.failed,
+            "total_processed": self.total_processed
+        }
+
+    def mark_completed(self, repo_name: str) -> None:
+        if repo_name not in self.completed:
+            self.completed.add(repo_name)
+            self.pending_completed.append(repo_name)
+            self.total_processed += 1
+            self.dirty = True
+
+    def mark_failed(self, repo_name: str, timestamp: Optional[str] = None) -> None:
+        timestamp = timestamp or datetime.now().isoformat()
+        self.failed[repo_name] = timestamp
+        self.pending_failed[repo_name] = timestamp
+        self.dirty = True
+
+    def set_index(self, index: int) -> None:
+        if index != self.current_index:
+            self.current_index = index
+            self.dirty = True
+
+    def put(self, key: str, body: str) -> None:
+        self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=body, ContentType='application/json')
+        self.bytes_written += len(body)
+
+    def flush(self) -> None:
+        """Write pending deltas as one segment (nothing if unchanged); compacts every compact_every segments"""
+        if not self.dirty:
+            return
+        self.write_segment()
+        if self.segment_seq - self.snapshot_seq >= self.compact_every:
+            self.compact()
+
+    def write_segment(self) -> None:
+        delta = {
+            "completed": self.pending_completed,
+            "failed": self.pending_failed,
+            "current_index": self.current_index,
+            "total_processed": self.total_processed,
+            "written_at": datetime.now().isoformat()
+        }
+        self.put(self.segment_key(self.segment_seq + 1), json.dumps(delta, separators=(',', ':')))
+        # Only forget the deltas once they are durable, so a failed PUT can be retried
+        self.segment_seq += 1
+        self.pending_completed = []
+        self.pending_failed = {}
+        self.dirty = False
+
+    def compact(self) -> None:
+        """Fold all segments into the snapshot and delete them"""
+        if self.dirty:
+            self.write_segment()
+        snapshot = self.to_checkpoint()
+        snapshot["segment_seq"] = self.segment_seq
+        snapshot["last_run"] = datetime.now().isoformat()
+        self.put(self.snapshot_key, json.dumps(snapshot, separators=(',', ':')))
+
+        stale = [self.segment_key(seq) for seq in range(self.snapshot_seq + 1, self.segment_seq + 1)]
+        self.snapshot_seq = self.segment_seq
+        for i in range(0, len(stale), 1000):
+            try:
+                self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in stale[i:i + 1000]], 'Quiet': True}
+                )
+            except Exception as e:
+                # Harmless: load() skips segments already covered by the snapshot
+                print(f"⚠️  Failed to delete compacted checkpoint segments: {e}")
@@ -4,23 +4,39 @@ Enhanced Classifier V2 - Production-ready AWS services detection and description
 Fixes critical data quality issues: AWS services detection and missing descriptions
 """
 
-import json
 import boto3
 import time
-import requests
-import re
 import sys
 import argparse
 import base64
+from collections.abc import Mapping
+import heapq
 from datetime import datetime
 from typing import Dict, List, Optional, Set
 from smart_rate_limit_classifier import SmartRateLimitClassifier
+from rate_limit_scheduler import parse_token_args
+from service_matcher import ServiceMatcher
+from rule_engine import get_rule_engine
+from results_writer import S3ResultsWriter, rows_to_csv
+from master_index import iter_master_index
+from repo_record import updated_datetime
 
 class EnhancedClassifierV2(SmartRateLimitClassifier):
-    def __init__(self, org_name: str):
-        super().__init__(org_name)
+    def __init__(self, org_name: str, s3_client=None):
+        super().__init__(org_name, s3_client)
         self.readme_cache = {}  # Cache README content to avoid duplicate API calls
         self.topics_cache = {}  # Cache topics
+        self.async_fetcher = None  # Optional concurrent prefetcher, see enable_async_fetch()
+        self.graphql_fetcher = None  # Optional batched GraphQL prefetcher, see enable_graphql_fetch()
+        self.persistent_cache = None  # Optional on-disk cache, see enable_persistent_cache()
+        self.prefetch_window = 100  # Repos warmed per prefetch round
+        self.export_format = None  # Optional columnar copy of saved results, see enable_results_export()
+        self.iac_scanner = None  # Optional CloudFormation/CDK/Terraform file scanner, see enable_iac_scan()
+        self.iac_scans = {}  # Scans by full_name, filled by prefetch_iac / get_iac_scan
+        self.tarball_analyzer = None  # Optional streaming tarball content scan, see enable_tarball_analysis()
+        self.content_analyses = {}  # Tarball analyses by full_name, filled by prefetch_tarballs
+        self.similarity_index = None  # Optional TF-IDF "repos like this one" index, see enable_similarity_index()
+        self.similarity_key = f'similarity/{org_name}_tfidf.npz'
         
         # Enhanced AWS services mapping
         self.aws_services_map = {
@@ -61,6 +77,301 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
             # Messaging
             'sns': 'SNS', 'sqs': 'SQS', 'eventbridge': 'EventBridge', 'step functions': 'Step Functions'
         }
+        self.service_matcher = ServiceMatcher(self.aws_services_map)  # All keywords in one compiled scan
+        self.enhanced_rules = get_rule_engine('enhanced')  # Keyword dimensions from classification_rules.json
+
+    def enable_async_fetch(self, max_in_flight: int = 20):
+        """Prefetch README/topics for whole windows of repos with bounded concurrency"""
+        from async_fetcher import AsyncGitHubFetcher
+        
+        self.async_fetcher = AsyncGitHubFetcher(
+            github_token=self.github_token,
+            max_in_flight=max_in_flight,
+            api_url=self.github_api_url
+        )
+        self.prefetch_window = max(self.prefetch_window, max_in_flight * 4)
+        print(f"⚡ Async prefetch enabled ({max_in_flight} requests in flight)")
+
+    def enable_results_export(self, fmt: str = 'parquet'):
+        """Also write every saved results CSV as Parquet or Arrow IPC next to it"""
+        from results_export import EXPORT_FORMATS
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.export_format = fmt
+
+    def enable_graphql_fetch(self, batch_size: int = 50):
+        """Prefetch README/topics for batch_size repos per GraphQL request"""
+        from graphql_fetcher import GraphQLBatchFetcher
+        
+        self.graphql_fetcher = GraphQLBatchFetcher(
+            github_token=self.github_token,
+            api_url=self.github_api_url,
+            batch_size=batch_size
+        )
+        self.prefetch_window = max(self.prefetch_window, batch_size * 2)
+        print(f"🧬 GraphQL batch fetch enabled ({batch_size} repos per request)")
+
+    def enable_iac_scan(self, max_workers: int = 16, max_file_bytes: int = 256 * 1024, max_files: int = 20):
+        """Derive deployment tools and AWS services from each repo's IaC files (one tree listing per repo,
+        then only the templates, cdk.json/stack sources and *.tf files are downloaded)"""
+        from iac_scanner import IaCScanner
+        
+        self.iac_scanner = IaCScanner(
+            api_url=self.github_api_url,
+            max_workers=max_workers,
+            max_file_bytes=max_file_bytes,
+            max_files=max_files,
+            add_auth_header=self.add_auth_header,
+            handle_rate_limit=self.handle_rate_limit,
+            persistent_cache=self.persistent_cache
+        )
+        print(f"🏗️  IaC scan enabled ({max_workers} repos in flight, files up to {max_file_bytes // 1024} KB)")
+
+    def enable_tarball_analysis(self, max_workers: int = 4, max_mb: float = 64):
+        """Stream each repo's tarball once and take README, IaC resources, languages and frameworks from its
+        content (meant for process_top_repositories; the README then costs no separate request)"""
+        from tarball_analyzer import TarballAnalyzer
+        
+        self.tarball_analyzer = TarballAnalyzer(
+            api_url=self.github_api_url,
+            max_workers=max_workers,
+            max_bytes=int(max_mb * 1024 * 1024),
+            add_auth_header=self.add_auth_header,
+            handle_rate_limit=self.handle_rate_limit,
+            persistent_cache=self.persistent_cache
+        )
+        print(f"📦 Tarball analysis enabled ({max_workers} archives streaming, {max_mb:g} MB read per repo)")
+
+    def enable_similarity_index(self):
+        """Keep the org's TF-IDF similarity index (similarity/{org}_tfidf.npz) up to date with the descriptions,
+        topics and READMEs of every published run; only repos whose text changed are re-vectorized"""
+        from similarity_index import load_s3
+        
+        self.similarity_index = load_s3(self.s3_client, self.bucket_name, self.similarity_key)
+        print(f"🧭 Similarity index enabled ({self.similarity_index.size} repos indexed)")
+
+    def uses_prefetch(self) -> bool:
+        return bool(self.async_fetcher or self.graphql_fetcher or self.iac_scanner or self.tarball_analyzer)
+
+    def prefetch_batch(self, repos: List[Dict]):
+        """Warm readme_cache/topics_cache for a batch so classification hits no network"""
+        if not repos:
+            return
+        if self.tarball_analyzer:
+            self.prefetch_tarballs(repos)
+        if self.iac_scanner:
+            self.prefetch_iac(repos)
+        if self.graphql_fetcher:
+            return self.prefetch_batch_graphql(repos)
+        if not self.async_fetcher:
+            return
+        
+        from async_fetcher import NOT_MODIFIED
+        
+        readme_repos = []
+        topic_repos = []
+        entries = {}
+        repos_by_name = {}
+        for repo in repos:
+            repo_name = repo.get('full_name') if isinstance(repo, Mapping) else None
+            if not repo_name:
+                continue
+            repos_by_name[repo_name] = repo
+            if repo_name not in self.readme_cache:
+                entry = self.get_persistent_entry(repo, 'readme')
+                if self.is_entry_fresh(repo, entry):
+                    self.readme_cache[repo_name] = entry['content']
+                else:
+                    entries[('readme', repo_name)] = entry
+                    readme_repos.append(repo_name)
+            if repo_name not in self.topics_cache and not repo.get('topics'):
+                entry = self.get_persistent_entry(repo, 'topics')
+                if self.is_entry_fresh(repo, entry):
+                    self.topics_cache[repo_name] = entry['content']
+                else:
+                    entries[('topics', repo_name)] = entry
+                    topic_repos.append(repo_name)
+        
+        etags = {key: entry['etag'] for key, entry in entries.items() if entry and entry.get('etag')}
+        
+        start = time.time()
+        readmes, topics = self.async_fetcher.prefetch(readme_repos, topic_repos, etags)
+        
+        for kind, fetched, cache in (('readme', readmes, self.readme_cache), ('topics', topics, self.topics_cache)):
+            for repo_name, content in fetched.items():
+                repo = repos_by_name[repo_name]
+                if content is NOT_MODIFIED:
+                    content = self.revalidated_content(repo, kind, entries[(kind, repo_name)])
+                elif (kind, repo_name) in self.async_fetcher.response_etags:
+                    self.remember_content(repo, kind, content, self.async_fetcher.response_etags[(kind, repo_name)])
+                cache[repo_name] = content
+        
+        print(f"⚡ Prefetched {len(readmes)} READMEs and {len(topics)} topic lists in {time.time() - start:.1f}s")
+        
+        if self.async_fetcher.rate_limited:
+            print("🚫 Rate limit reached during prefetch - remaining repos fall back to sequential fetch")
+
+    def prefetch_tarballs(self, repos: List[Dict]):
+        """Stream the tarballs of a batch concurrently into content_analyses (and their READMEs into readme_cache)"""
+        pending = [repo for repo in repos if isinstance(repo, Mapping) and repo.get('full_name')
+                   and repo['full_name'] not in self.content_analyses]
+        if not pending:
+            return
+        
+        start = time.time()
+        try:
+            analyses = self.tarball_analyzer.analyze_all(pending)
+        except Exception as e:
+            print(f"⚠️  Tarball prefetch failed: {e}")
+            return
+        self.content_analyses.update(analyses)
+        for repo_name, analysis in analyses.items():
+            # A fully scanned archive without a README settles it too; a cut-off one leaves it to /readme
+            if repo_name not in self.readme_cache and (analysis['readme'] or analysis['complete']):
+                self.readme_cache[repo_name] = analysis['readme']
+        megabytes = sum(analysis['bytes_read'] for analysis in analyses.values()) / 1e6
+        print(f"📦 Streamed {len(analyses)}/{len(pending)} tarballs ({megabytes:.1f} MB) in {time.time() - start:.1f}s")
+
+    def get_content_analysis(self, repo: Dict) -> Optional[Dict]:
+        """Tarball analysis of a repo, None when tarball analysis is off or the archive was not fetched"""
+        if not self.tarball_analyzer:
+            return None
+        return self.content_analyses.get(repo.get('full_name'))
+
+    def prefetch_iac(self, repos: List[Dict]):
+        """Scan the IaC files of a batch concurrently into iac_scans"""
+        pending = [repo for repo in repos
+                   if isinstance(repo, Mapping) and repo.get('full_name') and repo['full_name'] not in self.iac_scans
+                   and repo['full_name'] not in self.content_analyses]
+        if not pending:
+            return
+        
+        start = time.time()
+        try:
+            self.iac_scans.update(self.iac_scanner.scan_all(pending))
+        except Exception as e:
+            print(f"⚠️  IaC prefetch failed: {e}")
+            return
+        with_iac = sum(1 for repo in pending if self.iac_scans[repo['full_name']]['tools'])
+        print(f"🏗️  Scanned {len(pending)} repos for IaC ({with_iac} with templates) in {time.time() - start:.1f}s")
+
+    def get_iac_scan(self, repo: Dict) -> Optional[Dict]:
+        """IaC scan of a repo (scanned now if no prefetch covered it), None when scanning is off or failed.
+        A tarball analysis saw the same files and is used in its place."""
+        analysis = self.get_content_analysis(repo)
+        if analysis is not None:
+            return analysis
+        if not self.iac_scanner:
+            return None
+        repo_name = repo.get('full_name')
+        if repo_name not in self.iac_scans:
+            try:
+                self.iac_scans[repo_name] = self.iac_scanner.scan(repo)
+            except Exception as e:
+                print(f"      🐛 IaC scan error for {repo_name}: {e}")
+                return None
+        return self.iac_scans[repo_name]
+
+    def get_iac_services(self, repo: Dict) -> Set[str]:
+        """AWS services behind the resource types declared in the repo's IaC files
+        (and, from a tarball analysis, the per-service AWS SDK clients it depends on)"""
+        scan = self.get_iac_scan(repo)
+        if not scan:
+            return set()
+        from iac_scanner import resource_services
+        return resource_services(scan, self.aws_services_map)
+
+    def get_secondary_language(self, repo: Dict) -> str:
+        """Largest language by bytes after the primary one, from the tarball's file sizes"""
+        analysis = self.get_content_analysis(repo)
+        if analysis and analysis['languages']:
+            primary = repo.get('language')
+            for language in analysis['languages']:
+                if language != primary:
+                    return language
+        return super().get_secondary_language(repo)
+
+    def get_framework(self, repo: Dict) -> str:
+        """Frameworks from package.json / requirements.txt / pom.xml in the tarball"""
+        analysis = self.get_content_analysis(repo)
+        if analysis and analysis['frameworks']:
+            return ', '.join(analysis['frameworks'][:3])
+        return super().get_framework(repo)
+
+    def get_deployment_tools_enhanced(self, repo: Dict) -> str:
+        """Deployment tools from the IaC files found in the repo, else guessed from its name"""
+        scan = self.get_iac_scan(repo)
+        if scan:
+            from iac_scanner import deployment_tools_label
+            label = deployment_tools_label(scan)
+            if label:
+                return label
+        return self.get_deployment_tools(repo.get('name') or '')
+
+    def prefetch_batch_graphql(self, repos: List[Dict]):
+        """GraphQL variant of prefetch_batch - one request per graphql_fetcher.batch_size repos"""
+        pending = []
+        for repo in repos:
+            repo_name = repo.get('full_name') if isinstance(repo, Mapping) else None
+            if not repo_name or repo_name in self.readme_cache:
+                continue
+            entry = self.get_persistent_entry(repo, 'readme')
+            if self.is_entry_fresh(repo, entry):
+                self.readme_cache[repo_name] = entry['content']
+                continue
+            pending.append(repo)
+        
+        start = time.time()
+        fetched = self.graphql_fetcher.fetch_all([repo['full_name'] for repo in pending])
+        
+        for repo in pending:
+            data = fetched.get(repo['full_name'])
+            if data is None:
+                continue  # Falls back to the REST path
+            repo_name = repo['full_name']
+            self.readme_cache[repo_name] = data['readme']
+            self.remember_content(repo, 'readme', data['readme'], None)
+            if not repo.get('topics') and repo_name not in self.topics_cache:
+                self.topics_cache[repo_name] = data['topics']
+                self.remember_content(repo, 'topics', data['topics'], None)
+        
+        print(f"🧬 GraphQL prefetched {len(fetched)} repos in {time.time() - start:.1f}s")
+        if self.graphql_fetcher.rate_limited:
+            print("🚫 GraphQL rate limit reached - remaining repos fall back to REST")
+
+    def enable_persistent_cache(self, path: str):
+        """Keep README/topics (with ETags) on disk so restarts and re-runs revalidate instead of refetching"""
+        from persistent_cache import PersistentGitHubCache
+        
+        self.persistent_cache = PersistentGitHubCache(path)
+        print(f"🗄️  Persistent cache: {path} ({self.persistent_cache.count()} entries)")
+
+    def get_persistent_entry(self, repo: Dict, kind: str) -> Optional[Dict]:
+        """On-disk cache entry for a repo ('readme' or 'topics'), if any"""
+        if not self.persistent_cache:
+            return None
+        return self.persistent_cache.get(repo['full_name'], kind)
+
+    def is_entry_fresh(self, repo: Dict, entry: Optional[Dict]) -> bool:
+        """Entries recorded at the repo's current pushed_at are reused without any request.
+        Topic edits don't bump pushed_at, but they show up in the org listing topics checked first."""
+        pushed_at = repo.get('pushed_at')
+        return bool(entry and pushed_at and entry.get('pushed_at') == pushed_at)
+
+    def add_conditional_header(self, headers: Dict, entry: Optional[Dict]):
+        """Send If-None-Match so unchanged content comes back as a 304 (not counted against the rate limit)"""
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+
+    def remember_content(self, repo: Dict, kind: str, content, etag: Optional[str]):
+        """Store freshly fetched content in the on-disk cache"""
+        if self.persistent_cache:
+            self.persistent_cache.put(repo['full_name'], kind, content, etag, repo.get('pushed_at'))
+
+    def revalidated_content(self, repo: Dict, kind: str, entry: Dict):
+        """Content of an entry that a 304 just confirmed is current"""
+        self.persistent_cache.touch(repo['full_name'], kind, repo.get('pushed_at'))
+        return entry['content']
 
     def get_readme_content_cached(self, repo: Dict) -> str:
         """Get README content with caching and rate limit handling"""
@@ -69,23 +380,35 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
         if repo_name in self.readme_cache:
             return self.readme_cache[repo_name]
         
+        entry = self.get_persistent_entry(repo, 'readme')
+        if self.is_entry_fresh(repo, entry):
+            self.readme_cache[repo_name] = entry['content']
+            return entry['content']
+        
         for attempt in range(self.max_retries):
             try:
-                url = f"https://api.github.com/repos/{repo_name}/readme"
+                url = f"{self.github_api_url}/repos/{repo_name}/readme"
                 headers = {}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
+                self.add_conditional_header(headers, entry)
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.http.get(url, headers=headers)
                 
                 if self.handle_rate_limit(response):
                     continue
-                    
-                if response.status_code == 200:
+                
+                if response.status_code == 304:
+                    self.readme_cache[repo_name] = self.revalidated_content(repo, 'readme', entry)
+                    return self.readme_cache[repo_name]
+                elif response.status_code == 200:
                     content = base64.b64decode(response.json()['content']).decode('utf-8', errors='ignore')
                     # Cache first 3000 chars for performance
                     self.readme_cache[repo_name] = content[:3000]
+                    self.remember_content(repo, 'readme', self.readme_cache[repo_name], response.headers.get('ETag'))
                     return self.readme_cache[repo_name]
+                elif response.status_code == 404:
+                    self.remember_content(repo, 'readme', "", response.headers.get('ETag'))
+                    break
                 else:
                     break
                     
@@ -97,6 +420,20 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
         self.readme_cache[repo_name] = ""
         return ""
 
+    def get_readme_description(self, repo: Dict) -> str:
+        """README fallback description taken from the cached README (no extra API call)"""
+        readme = self.get_readme_content_cached(repo)
+        desc_lines = []
+        for line in (readme or '').split('\n'):
+            line = line.strip()
+            if line and not line.startswith('#') and not line.startswith('!'):
+                desc_lines.append(line)
+                if len(' '.join(desc_lines)) > 300:
+                    break
+                if len(desc_lines) >= 2:
+                    break
+        return ' '.join(desc_lines)[:300]
+
     def get_repo_topics_cached(self, repo: Dict) -> List[str]:
         """Get repository topics with caching"""
         repo_name = repo['full_name']
@@ -110,22 +447,31 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
             self.topics_cache[repo_name] = topics
             return topics
         
+        entry = self.get_persistent_entry(repo, 'topics')
+        if self.is_entry_fresh(repo, entry):
+            self.topics_cache[repo_name] = entry['content']
+            return entry['content']
+        
         # Fallback to API call if needed
         for attempt in range(self.max_retries):
             try:
-                url = f"https://api.github.com/repos/{repo_name}/topics"
+                url = f"{self.github_api_url}/repos/{repo_name}/topics"
                 headers = {'Accept': 'application/vnd.github.mercy-preview+json'}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
+                self.add_conditional_header(headers, entry)
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.http.get(url, headers=headers)
                 
                 if self.handle_rate_limit(response):
                     continue
-                    
-                if response.status_code == 200:
+                
+                if response.status_code == 304:
+                    self.topics_cache[repo_name] = self.revalidated_content(repo, 'topics', entry)
+                    return self.topics_cache[repo_name]
+                elif response.status_code == 200:
                     topics = response.json().get('names', [])
                     self.topics_cache[repo_name] = topics
+                    self.remember_content(repo, 'topics', topics, response.headers.get('ETag'))
                     return topics
                 else:
                     break
@@ -143,16 +489,8 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
         if not text:
             return set()
         
-        text_lower = text.lower()
-        services = set()
-        
-        for keyword, service in self.aws_services_map.items():
-            # Look for keyword with word boundaries
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower):
-                services.add(service)
-        
-        return services
+        # Keywords with word boundaries, all found in a single pass
+        return self.service_matcher.find(text.lower())
 
     def map_topics_to_services(self, topics: List[str]) -> Set[str]:
         """Map GitHub topics to AWS services"""
@@ -201,6 +539,12 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
             if topic_services:
                 sources.append('topics')
         
+        # Source 4: Resource types declared in CloudFormation/CDK/Terraform files
+        iac_services = self.get_iac_services(repo)
+        if iac_services:
+            services.update(iac_services)
+            sources.append('iac')
+        
         # Return top 5 services
         service_list = sorted(list(services))[:5]
         
@@ -253,6 +597,8 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
             enhanced_aws_services = self.get_aws_services_enhanced(repo)
             topics = self.get_repo_topics_cached(repo)
             
+            rules = self.classify_rules_enhanced(repo, enhanced_description, enhanced_aws_services)
+            
             classification = {
                 # Basic Info
                 "repository": repo["full_name"],
@@ -268,13 +614,13 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
                 "topics": ", ".join(topics),
                 
                 # Business Classification (using enhanced description)
-                "solution_type": self.get_solution_type_enhanced(repo, enhanced_description),
-                "competency": self.get_competency_enhanced(enhanced_description, enhanced_aws_services),
+                "solution_type": rules["solution_type"],
+                "competency": rules["competency"],
                 "customer_problems": self.get_customer_problems(repo),
-                "solution_marketing": self.get_solution_marketing_enhanced(repo, enhanced_description),
+                "solution_marketing": rules["solution_marketing"],
                 
                 # Technical Classification
-                "deployment_tools": self.get_deployment_tools(repo["name"]),
+                "deployment_tools": self.get_deployment_tools_enhanced(repo),
                 "deployment_level": self.get_deployment_level(repo["name"]),
                 "deployment_readiness": self.get_deployment_readiness(repo),
                 "primary_language": repo["language"] or "Multiple",
@@ -291,11 +637,11 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
                 "maintenance_level": self.get_maintenance_level(repo),
                 "scalability": self.get_scalability(repo),
                 "usp": self.get_usp(repo),
-                "freshness_status": self.get_freshness(repo["updated_at"]),
-                "days_since_update": self.get_days_since_update(repo["updated_at"]),
+                "freshness_status": self.get_freshness(updated_datetime(repo)),
+                "days_since_update": self.get_days_since_update(updated_datetime(repo)),
                 
                 # AI/GenAI
-                "genai_agentic": self.is_genai_agentic_enhanced(repo, enhanced_description),
+                "genai_agentic": rules["genai_agentic"],
                 
                 # Metadata
                 "classification_method": "Enhanced V2 - Multi-source Analysis",
@@ -306,82 +652,46 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
             print(f"❌ Failed to classify {repo['full_name']}: {e}")
             return None
 
-    def get_solution_type_enhanced(self, repo: Dict, description: str) -> str:
-        """Enhanced solution type detection"""
-        text = f"{repo.get('name', '')} {description}".lower()
-        
-        if any(word in text for word in ['starter', 'template', 'boilerplate', 'example']):
-            return "Quick Wins"
-        elif any(word in text for word in ['security', 'compliance', 'governance']):
-            return "Compliance Accelerators"
-        elif any(word in text for word in ['ai', 'ml', 'machine learning', 'bedrock', 'sagemaker']):
-            return "Innovation Catalysts"
-        else:
-            return "Foundation Builders"
-
-    def get_competency_enhanced(self, description: str, aws_services: str) -> str:
-        """Enhanced competency detection based on AWS services"""
-        text = f"{description} {aws_services}".lower()
-        
-        if any(service in text for service in ['sagemaker', 'bedrock', 'comprehend', 'rekognition']):
-            return "AI/ML"
-        elif any(service in text for service in ['iam', 'cognito', 'kms', 'waf']):
-            return "Security"
-        elif any(service in text for service in ['kinesis', 'athena', 'glue', 'redshift']):
-            return "Analytics"
-        elif any(service in text for service in ['cloudformation', 'cdk', 'codebuild']):
-            return "DevOps"
-        else:
-            return "General Development"
-
-    def get_solution_marketing_enhanced(self, repo: Dict, description: str) -> str:
-        """Enhanced solution marketing categorization"""
-        text = f"{repo.get('name', '')} {description}".lower()
-        
-        if any(word in text for word in ['starter', 'template', 'example']):
-            return "starter"
-        elif any(word in text for word in ['setup', 'bootstrap', 'getting-started']):
-            return "setup"
-        elif any(word in text for word in ['security', 'compliance']):
-            return "compliance"
-        elif any(word in text for word in ['monitor', 'observ', 'dashboard']):
-            return "visibility"
-        else:
-            return "foundation"
-
-    def is_genai_agentic_enhanced(self, repo: Dict, description: str) -> str:
-        """Enhanced GenAI/Agentic detection"""
-        text = f"{repo.get('name', '')} {description}".lower()
-        
-        if any(word in text for word in ['agent', 'bedrock', 'langchain', 'llm', 'chatbot']):
-            return "Yes"
-        else:
-            return "No"
+    def classify_rules_enhanced(self, repo: Dict, description: str, aws_services: str) -> Dict[str, str]:
+        """Solution type, competency, marketing and GenAI labels from one rule engine scan
+        of the repo name, enhanced description and detected AWS services"""
+        return self.enhanced_rules.classify({
+            "name": (repo.get("name") or "").lower(),
+            "description": description.lower(),
+            "aws_services": aws_services.lower()
+        })
 
     def process_top_repositories(self, limit: int = 500, batch_size: int = 5):
         """Process top N repositories by star count"""
         print(f"🚀 Starting Enhanced Classification V2 for top {limit} repositories")
         
-        # Load all repositories
+        # Stream the index and keep only the top N by star count
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.master_index_key)
-            all_repos = json.loads(response['Body'].read())['repositories']
+            top_repos = heapq.nlargest(
+                limit, iter_master_index(self.s3_client, self.bucket_name, self.master_index_key),
+                key=lambda x: x.get('stargazers_count', 0)
+            )
         except Exception as e:
             print(f"❌ Failed to load repositories: {e}")
             return
         
-        # Sort by stars and take top N
-        top_repos = sorted(all_repos, key=lambda x: x.get('stargazers_count', 0), reverse=True)[:limit]
-        
         print(f"📊 Processing top {len(top_repos)} repositories (sorted by stars)")
         print(f"⭐ Star range: {top_repos[0].get('stargazers_count', 0)} to {top_repos[-1].get('stargazers_count', 0)}")
         
-        # Process in batches
+        # Process in batches; rows stream into part files (see results/parts/) as they are classified
         results = []
+        writer = S3ResultsWriter(self.s3_client, self.bucket_name, f"enhanced_top{limit}")
+        prefetched_until = 0
         for i in range(0, len(top_repos), batch_size):
             batch = top_repos[i:i+batch_size]
             batch_num = i // batch_size + 1
             
+            # Warm caches for the next window concurrently
+            if self.uses_prefetch() and i >= prefetched_until:
+                window = top_repos[i:i + max(batch_size, self.prefetch_window)]
+                self.prefetch_batch(window)
+                prefetched_until = i + len(window)
+            
             print(f"\n📦 Processing batch {batch_num}/{(len(top_repos)-1)//batch_size + 1} (repos {i+1}-{min(i+batch_size, len(top_repos))})")
             
             for repo in batch:
@@ -390,67 +700,129 @@ class EnhancedClassifierV2(SmartRateLimitClassifier):
                 classification = self.classify_repository_enhanced(repo)
                 if classification:
                     results.append(classification)
+                    writer.write(classification)
                     print(f"    ✅ AWS Services: {classification['aws_services']}")
                     print(f"    📝 Description: {classification['description'][:100]}...")
                 else:
                     print(f"    ❌ Classification failed")
             
-            # Save progress every batch
-            if results:
-                self.save_enhanced_results(results, f"enhanced_top{limit}_batch{batch_num}")
-            
-            # Rate limiting delay
-            time.sleep(2)
+            # Rate limiting delay (prefetch already bounds request concurrency)
+            if not self.uses_prefetch():
+                time.sleep(2)
         
         print(f"\n🎉 Enhanced classification complete!")
         print(f"✅ Successfully processed: {len(results)}/{len(top_repos)} repositories")
         
-        # Save final results
+        # Publish the parts as one final CSV
         if results:
-            self.save_enhanced_results(results, f"enhanced_top{limit}_final")
+            self.publish_results(writer, f"enhanced_top{limit}_final", results)
 
     def save_enhanced_results(self, results: List[Dict], filename_suffix: str):
-        """Save enhanced results to CSV"""
+        """Save enhanced results to CSV in one PUT (batch loops stream through S3ResultsWriter instead)"""
         if not results:
             return
         
-        # Generate CSV content
-        headers = list(results[0].keys())
-        csv_content = ','.join(headers) + '\n'
-        
-        for result in results:
-            row = []
-            for header in headers:
-                value = str(result.get(header, '')).replace(',', ';').replace('\n', ' ')
-                row.append(f'"{value}"')
-            csv_content += ','.join(row) + '\n'
-        
         # Save to S3
         csv_key = f'results/{filename_suffix}.csv'
         try:
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
                 Key=csv_key,
-                Body=csv_content,
+                Body=rows_to_csv(results),
                 ContentType='text/csv'
             )
             print(f"💾 Saved results: s3://{self.bucket_name}/{csv_key}")
         except Exception as e:
             print(f"❌ Failed to save results: {e}")
+            return
+        self.export_results(results, filename_suffix)
+        self.update_similarity_index(results)
+
+    def publish_results(self, writer: S3ResultsWriter, filename_suffix: str, results: List[Dict]):
+        """Consolidate a results writer's part files into results/<filename_suffix>.csv"""
+        csv_key = writer.publish(f'results/{filename_suffix}.{writer.fmt}')
+        if csv_key:
+            print(f"💾 Saved results: s3://{self.bucket_name}/{csv_key} ({writer.rows_written} rows)")
+            self.export_results(results, filename_suffix)
+            self.update_similarity_index(results)
+
+    def export_results(self, results: List[Dict], filename_suffix: str):
+        """Columnar copy of saved results when enable_results_export() is on"""
+        if not self.export_format or not results:
+            return
+        from results_export import EXPORT_FORMATS, export_results_to_s3
+        key = f'results/{filename_suffix}{EXPORT_FORMATS[self.export_format]}'
+        try:
+            size = export_results_to_s3(self.s3_client, self.bucket_name, key, results, self.export_format)
+            print(f"💾 Exported {self.export_format}: s3://{self.bucket_name}/{key} ({size / 1e6:.2f} MB)")
+        except Exception as e:
+            print(f"❌ Failed to export results as {self.export_format}: {e}")
+
+    def update_similarity_index(self, results: List[Dict]):
+        """Re-vectorize changed repos of a run in the similarity index and save it"""
+        if self.similarity_index is None or not results:
+            return
+        from similarity_index import document_text
+        documents = {}
+        for row in results:
+            repo_name = row['repository']
+            readme = self.readme_cache.get(repo_name)
+            if readme is None and self.persistent_cache:
+                entry = self.persistent_cache.get(repo_name, 'readme')
+                readme = entry['content'] if entry else None
+            if readme is None and repo_name in self.similarity_index.doc_ids:
+                continue  # README not read this run: keep the vector built when it was
+            documents[repo_name] = document_text(repo_name, row.get('description', ''), row.get('topics', ''), readme or '')
+        try:
+            stats = self.similarity_index.update(documents)
+            if not stats["added"] and not stats["changed"]:
+                return
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=self.similarity_key,
+                                      Body=self.similarity_index.to_bytes(), ContentType='application/octet-stream')
+            print(f"🧭 Similarity index: s3://{self.bucket_name}/{self.similarity_key} {stats}")
+        except Exception as e:
+            print(f"❌ Failed to update similarity index: {e}")
 
 def main():
     parser = argparse.ArgumentParser(description='Enhanced AWS Repository Classifier V2')
     parser.add_argument('org_name', help='GitHub organization name')
-    parser.add_argument('--github-token', help='GitHub personal access token')
+    parser.add_argument('--github-token', action='append',
+                        help='GitHub personal access token (repeat or comma-separate for a token pool)')
     parser.add_argument('--limit', type=int, default=500, help='Number of top repositories to process')
     parser.add_argument('--batch-size', type=int, default=5, help='Batch size for processing')
+    parser.add_argument('--concurrency', type=int, default=0, help='Prefetch README/topics with this many requests in flight (0 = sequential)')
+    parser.add_argument('--cache-db', help='SQLite file for a persistent README/topics cache with ETag revalidation')
+    parser.add_argument('--fetch-mode', choices=['rest', 'graphql'], default='rest', help='README/topics fetch backend (graphql needs a token)')
+    parser.add_argument('--graphql-batch-size', type=int, default=50, help='Repositories per GraphQL request')
+    parser.add_argument('--export-format', choices=['parquet', 'arrow'], help='Also write results as Parquet or Arrow IPC (needs pyarrow)')
+    parser.add_argument('--iac-scan', action='store_true', help='Read deployment tools and AWS services from CloudFormation/CDK/Terraform files')
+    parser.add_argument('--iac-workers', type=int, default=16, help='Repositories scanned for IaC files concurrently')
+    parser.add_argument('--tarball-scan', action='store_true', help='Stream each repo tarball once and classify from its README, IaC and manifests')
+    parser.add_argument('--tarball-workers', type=int, default=4, help='Tarballs streamed concurrently')
+    parser.add_argument('--tarball-max-mb', type=float, default=64, help='Compressed MB read per tarball before scanning stops')
+    parser.add_argument('--similarity-index', action='store_true', help='Update the TF-IDF similarity index with each published run')
     
     args = parser.parse_args()
     
     classifier = EnhancedClassifierV2(args.org_name)
-    if args.github_token:
-        classifier.github_token = args.github_token
-        print("🔑 Using GitHub token for higher rate limits")
+    tokens = parse_token_args(args.github_token)
+    if tokens:
+        classifier.enable_token_pool(tokens)
+    
+    if args.cache_db:
+        classifier.enable_persistent_cache(args.cache_db)
+    if args.export_format:
+        classifier.enable_results_export(args.export_format)
+    if args.fetch_mode == 'graphql':
+        classifier.enable_graphql_fetch(args.graphql_batch_size)
+    elif args.concurrency > 0:
+        classifier.enable_async_fetch(args.concurrency)
+    if args.iac_scan:
+        classifier.enable_iac_scan(args.iac_workers)
+    if args.tarball_scan:
+        classifier.enable_tarball_analysis(args.tarball_workers, args.tarball_max_mb)
+    if args.similarity_index:
+        classifier.enable_similarity_index()
     
     classifier.process_top_repositories(args.limit, args.batch_size)
 
@@ -7,47 +7,39 @@ Logs all failed repositories for later retry processing
 import json
 import boto3
 import time
-import requests
 import re
 import sys
 import argparse
 import base64
+from itertools import islice
 from datetime import datetime
 from typing import Dict, List, Optional, Set
 from enhanced_classifier_v2 import EnhancedClassifierV2
+from incremental_refresh import diff_repositories, merge_results, parse_results_csv, pick_previous_results_key
+from repo_lister import list_org_repos
+from log_sink import S3LogSink, read_log_events
+from results_writer import S3ResultsWriter
+from master_index import iter_master_index
+from repo_record import RepoRecord, updated_datetime
+from rate_limit_scheduler import parse_token_args
+from run_metrics import add_metrics_args, apply_metrics_args, get_metrics
 
 class EnhancedClassifierV3(EnhancedClassifierV2):
-    def __init__(self, org_name: str):
-        super().__init__(org_name)
+    def __init__(self, org_name: str, s3_client=None):
+        super().__init__(org_name, s3_client)
         self.failed_repos = []
-        self.failed_log_key = 'logs/failed_repositories.json'
-        self.processing_log_key = 'logs/processing_log.txt'
+        self.failed_log_key = 'logs/failed_repositories.json'  # Legacy single-object log, still read on retry
+        self.failed_log_prefix = 'logs/failed/'
+        self.processing_log_prefix = 'logs/processing/'
+        self.processing_log = S3LogSink(self.s3_client, self.bucket_name, self.processing_log_prefix)
+        self.failed_log = S3LogSink(self.s3_client, self.bucket_name, self.failed_log_prefix,
+                                    run_id=self.processing_log.run_id)
         self.success_count = 0
         self.failure_count = 0
         
     def log_processing_event(self, message: str):
-        """Log processing events to S3"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"[{timestamp}] {message}\n"
-        
-        try:
-            # Append to existing log
-            try:
-                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.processing_log_key)
-                existing_log = response['Body'].read().decode('utf-8')
-            except:
-                existing_log = ""
-            
-            updated_log = existing_log + log_entry
-            
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=self.processing_log_key,
-                Body=updated_log,
-                ContentType='text/plain'
-            )
-        except Exception as e:
-            print(f"⚠️  Failed to log to S3: {e}")
+        """Log processing events to S3 (buffered, flushed as rotated segments)"""
+        self.processing_log.write({"timestamp": datetime.now().isoformat(), "message": message})
 
     def log_failed_repository(self, repo: Dict, error: str):
         """Log failed repository with error details"""
@@ -71,34 +63,31 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
             self.save_failed_repos_log()
 
     def save_failed_repos_log(self):
-        """Save failed repositories log to S3"""
+        """Hand the failures collected so far to the failed-repos log sink"""
         if not self.failed_repos:
             return
-            
+        
+        for failed_entry in self.failed_repos:
+            self.failed_log.write(failed_entry)
+        print(f"💾 Logged {len(self.failed_repos)} failed repositories")
+        self.failed_repos = []  # Clear current batch
+
+    def flush_logs(self):
+        """Write buffered processing/failure events to S3 now"""
+        self.save_failed_repos_log()
+        self.processing_log.flush()
+        self.failed_log.flush()
+
+    def load_failed_repositories(self) -> List[Dict]:
+        """Failed entries from every run's log segments plus the legacy JSON log, latest per repository"""
+        entries = []
         try:
-            # Load existing failed repos if any
-            try:
-                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.failed_log_key)
-                existing_failed = json.loads(response['Body'].read().decode('utf-8'))
-            except:
-                existing_failed = []
-            
-            # Merge with current failures
-            all_failed = existing_failed + self.failed_repos
-            
-            # Save to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=self.failed_log_key,
-                Body=json.dumps(all_failed, indent=2),
-                ContentType='application/json'
-            )
-            
-            print(f"💾 Saved {len(all_failed)} failed repositories to S3")
-            self.failed_repos = []  # Clear current batch
-            
-        except Exception as e:
-            print(f"⚠️  Failed to save failed repos log: {e}")
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.failed_log_key)
+            entries.extend(json.loads(response['Body'].read().decode('utf-8')))
+        except Exception:
+            pass
+        entries.extend(read_log_events(self.s3_client, self.bucket_name, self.failed_log_prefix))
+        return list({entry['repository']: entry for entry in entries}.values())
 
     def classify_repository_enhanced_with_logging(self, repo: Dict) -> Optional[Dict]:
         """Enhanced repository classification with comprehensive error logging"""
@@ -131,6 +120,8 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
                 print(f"      ⚠️  Topics failed for {repo_name}: {e}")
                 topics = repo.get('topics', [])
             
+            rules = self.classify_rules_enhanced(repo, enhanced_description, enhanced_aws_services)
+            
             # Build classification with safe defaults
             classification = {
                 # Basic Info
@@ -147,13 +138,13 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
                 "topics": ", ".join(topics),
                 
                 # Business Classification (using enhanced description)
-                "solution_type": self.get_solution_type_enhanced(repo, enhanced_description),
-                "competency": self.get_competency_enhanced(enhanced_description, enhanced_aws_services),
+                "solution_type": rules["solution_type"],
+                "competency": rules["competency"],
                 "customer_problems": self.get_customer_problems(repo),
-                "solution_marketing": self.get_solution_marketing_enhanced(repo, enhanced_description),
+                "solution_marketing": rules["solution_marketing"],
                 
                 # Technical Classification
-                "deployment_tools": self.get_deployment_tools(repo["name"]),
+                "deployment_tools": self.get_deployment_tools_enhanced(repo),
                 "deployment_level": self.get_deployment_level(repo["name"]),
                 "deployment_readiness": self.get_deployment_readiness(repo),
                 "primary_language": repo["language"] or "Multiple",
@@ -170,11 +161,11 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
                 "maintenance_level": self.get_maintenance_level(repo),
                 "scalability": self.get_scalability(repo),
                 "usp": self.get_usp(repo),
-                "freshness_status": self.get_freshness(repo["updated_at"]),
-                "days_since_update": self.get_days_since_update(repo["updated_at"]),
+                "freshness_status": self.get_freshness(updated_datetime(repo)),
+                "days_since_update": self.get_days_since_update(updated_datetime(repo)),
                 
                 # AI/GenAI
-                "genai_agentic": self.is_genai_agentic_enhanced(repo, enhanced_description),
+                "genai_agentic": rules["genai_agentic"],
                 
                 # Metadata
                 "classification_method": "Enhanced V3 - Error-Resilient Analysis",
@@ -188,22 +179,34 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
             self.log_failed_repository(repo, str(e))
             return None
 
-    def process_all_repositories_with_logging(self, limit: int = None, batch_size: int = 5):
-        """Process all repositories with comprehensive logging and error handling"""
+    def process_all_repositories_with_logging(self, limit: int = None, batch_size: int = 5,
+                                              repos: Optional[List[Dict]] = None,
+                                              results_name: str = "enhanced_v3") -> List[Dict]:
+        """Process all repositories with comprehensive logging and error handling
+        
+        repos: classify these instead of the S3 master index; results_name prefixes the result CSVs.
+        """
         print(f"🚀 Starting Enhanced Classification V3 with Error Logging")
         
-        # Load all repositories
-        try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.master_index_key)
-            all_repos = json.loads(response['Body'].read())['repositories']
-        except Exception as e:
-            print(f"❌ Failed to load repositories: {e}")
-            return
+        if repos is not None:
+            all_repos = list(repos)
+        else:
+            # Load all repositories (streamed; with a limit the rest of the index is never read)
+            try:
+                repo_stream = iter_master_index(self.s3_client, self.bucket_name, self.master_index_key)
+                all_repos = list(islice(repo_stream, limit) if limit else repo_stream)
+            except Exception as e:
+                print(f"❌ Failed to load repositories: {e}")
+                return []
         
         # Apply limit if specified
         if limit:
             all_repos = all_repos[:limit]
         
+        if not all_repos:
+            print("✅ Nothing to process")
+            return []
+        
         # Sort by stars for better progress visibility
         all_repos = sorted(all_repos, key=lambda x: x.get('stargazers_count', 0), reverse=True)
         
@@ -212,15 +215,24 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
         
         self.log_processing_event(f"Started processing {len(all_repos)} repositories")
         
-        # Process in batches
+        # Process in batches; rows stream into part files (see results/parts/) as they are classified
         results = []
+        writer = S3ResultsWriter(self.s3_client, self.bucket_name, results_name)
         start_time = time.time()
         
+        prefetched_until = 0
+        
         for i in range(0, len(all_repos), batch_size):
             batch = all_repos[i:i+batch_size]
             batch_num = i // batch_size + 1
             total_batches = (len(all_repos) - 1) // batch_size + 1
             
+            # Warm caches for the next window concurrently
+            if self.uses_prefetch() and i >= prefetched_until:
+                window = all_repos[i:i + max(batch_size, self.prefetch_window)]
+                self.prefetch_batch(window)
+                prefetched_until = i + len(window)
+            
             print(f"\n📦 Batch {batch_num}/{total_batches} (repos {i+1}-{min(i+batch_size, len(all_repos))})")
             
             batch_start = time.time()
@@ -235,6 +247,7 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
                 classification = self.classify_repository_enhanced_with_logging(repo)
                 if classification:
                     results.append(classification)
+                    writer.write(classification)
                     batch_successes += 1
                     print(f"    ✅ AWS: {classification['aws_services']}")
                     print(f"    📝 Desc: {classification['description'][:80]}...")
@@ -249,19 +262,17 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
             print(f"  📈 Overall: {self.success_count}/{i+len(batch)} successful, {self.failure_count} failed")
             print(f"  ⏱️  Estimated remaining: {estimated_remaining/60:.1f} minutes")
             
-            # Save progress every batch
-            if results:
-                self.save_enhanced_results(results, f"enhanced_v3_progress_batch{batch_num}")
-            
-            # Save failed repos log
+            # Hand failures to the log sink (written in the background)
             if self.failed_repos:
                 self.save_failed_repos_log()
             
             # Log progress
             self.log_processing_event(f"Completed batch {batch_num}/{total_batches}: {batch_successes}/{len(batch)} successful")
             
-            # Rate limiting delay
-            time.sleep(1)
+            # Rate limiting delay (prefetch already bounds request concurrency)
+            if not self.uses_prefetch():
+                with get_metrics().timer('rate_limit_wait', source='batch_delay'):
+                    time.sleep(1)
         
         # Final summary
         total_time = time.time() - start_time
@@ -272,20 +283,104 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
         print(f"❌ Failed: {self.failure_count}/{len(all_repos)} ({100-success_rate:.1f}%)")
         print(f"⏱️  Total time: {total_time/60:.1f} minutes")
         
-        # Save final results
+        # Publish the parts as one final CSV
         if results:
-            self.save_enhanced_results(results, f"enhanced_v3_final_{len(results)}_repos")
+            self.publish_results(writer, f"{results_name}_final_{len(results)}_repos", results)
         
         # Save final failed repos log
         if self.failed_repos:
             self.save_failed_repos_log()
         
         self.log_processing_event(f"Processing complete: {self.success_count} successful, {self.failure_count} failed")
+        self.flush_logs()
         
         # Show failed repos summary
         if self.failure_count > 0:
-            print(f"\n📋 Failed repositories logged to: s3://{self.bucket_name}/{self.failed_log_key}")
+            print(f"\n📋 Failed repositories logged to: s3://{self.bucket_name}/{self.failed_log_prefix}{self.failed_log.run_id}/")
             print(f"🔄 Run retry processing later to fix failed repositories")
+        
+        return results
+
+    def load_previous_results(self) -> List[Dict]:
+        """Rows of the most recent full (or merged incremental) results CSV in S3"""
+        try:
+            keys = []
+            kwargs = {'Bucket': self.bucket_name, 'Prefix': 'results/enhanced_v3_'}
+            while True:
+                listing = self.s3_client.list_objects_v2(**kwargs)
+                keys.extend(obj['Key'] for obj in listing.get('Contents', []))
+                if not listing.get('IsTruncated'):
+                    break
+                kwargs['ContinuationToken'] = listing['NextContinuationToken']
+            key = pick_previous_results_key(keys)
+            if not key:
+                return []
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            rows = parse_results_csv(response['Body'].read().decode('utf-8'))
+            print(f"📄 Previous results: s3://{self.bucket_name}/{key} ({len(rows)} rows)")
+            return rows
+        except Exception as e:
+            print(f"⚠️  Failed to load previous results: {e}")
+            return []
+
+    def process_incremental_refresh(self, batch_size: int = 5) -> List[Dict]:
+        """Re-classify only repos that are new or changed since the previous master index and merge the results"""
+        print(f"🔁 Incremental refresh for {self.org_name}")
+        
+        previous_repos = self.load_master_index()
+        previous_rows = self.load_previous_results()
+        if not previous_repos or not previous_rows:
+            print("⚠️  No previous master index/results - running a full classification")
+            self.fetch_all_repos()
+            return self.process_all_repositories_with_logging(batch_size=batch_size)
+        
+        # An incomplete listing would count every repo on a failed page as removed: refuse it
+        current_repos = list_org_repos(self.org_name, add_auth_header=self.add_auth_header, api_url=self.github_api_url,
+                                       handle_rate_limit=self.handle_rate_limit)
+        if not current_repos:
+            print("❌ Failed to list repositories completely, keeping previous results and master index")
+            self.log_processing_event("Incremental refresh aborted: repository listing incomplete")
+            self.flush_logs()
+            return []
+        
+        # Classify compact records; the full listing entries go back into the master index
+        current_records = [RepoRecord.from_api(repo) for repo in current_repos]
+        diff = diff_repositories(previous_repos, current_records, {row.get('repository') for row in previous_rows})
+        print(f"📊 {len(current_repos)} repos: {len(diff['new'])} new, {len(diff['changed'])} changed, "
+              f"{len(diff['unchanged'])} unchanged, {len(diff['removed'])} removed")
+        self.log_processing_event(
+            f"Incremental refresh: {len(diff['new'])} new, {len(diff['changed'])} changed, {len(diff['removed'])} removed"
+        )
+        
+        to_classify = diff['new'] + diff['changed']
+        new_rows = self.process_all_repositories_with_logging(
+            batch_size=batch_size, repos=to_classify, results_name="enhanced_v3_incremental"
+        ) if to_classify else []
+        
+        merged = merge_results(previous_rows, new_rows, current_repos)
+        self.save_enhanced_results(merged, "enhanced_v3_latest")
+        
+        # Repos that failed keep their old index entry (or stay out of it) so the next run retries them
+        failed = {repo['full_name'] for repo in to_classify} - {row['repository'] for row in new_rows}
+        previous_by_name = {repo['full_name']: repo for repo in previous_repos}
+        next_index = []
+        for repo in current_repos:
+            if repo['full_name'] in failed:
+                if repo['full_name'] in previous_by_name:
+                    next_index.append(dict(previous_by_name[repo['full_name']]))
+                continue
+            next_index.append(repo)
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=self.master_index_key,
+            Body=json.dumps({"repositories": next_index}, indent=2),
+            ContentType='application/json'
+        )
+        
+        self.flush_logs()
+        print(f"✅ Incremental refresh complete: {len(new_rows)} re-classified, {len(merged)} rows in "
+              f"s3://{self.bucket_name}/results/enhanced_v3_latest.csv")
+        return merged
 
     def process_failed_repositories_only(self):
         """Process only the failed repositories from previous runs"""
@@ -293,8 +388,7 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
         
         try:
             # Load failed repositories
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.failed_log_key)
-            failed_repos_data = json.loads(response['Body'].read().decode('utf-8'))
+            failed_repos_data = self.load_failed_repositories()
             
             print(f"📋 Found {len(failed_repos_data)} failed repositories to retry")
             
@@ -306,13 +400,12 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
                 print(f"🔍 Fetching repo data for: {repo_name}")
                 
                 # Fetch repo data from GitHub API
-                url = f"https://api.github.com/repos/{repo_name}"
+                url = f"{self.github_api_url}/repos/{repo_name}"
                 headers = {}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
                 
                 try:
-                    response = requests.get(url, headers=headers, timeout=10)
+                    response = self.http.get(url, headers=headers)
                     if response.status_code == 200:
                         repo_data = response.json()
                         retry_repos.append(repo_data)
@@ -323,7 +416,7 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
             
             if retry_repos:
                 print(f"🚀 Retrying {len(retry_repos)} repositories")
-                self.process_all_repositories_with_logging(limit=len(retry_repos), batch_size=3)
+                self.process_all_repositories_with_logging(batch_size=3, repos=retry_repos, results_name="enhanced_v3_retry")
             else:
                 print("❌ No repositories available for retry")
                 
@@ -333,20 +426,40 @@ class EnhancedClassifierV3(EnhancedClassifierV2):
 def main():
     parser = argparse.ArgumentParser(description='Enhanced AWS Repository Classifier V3 with Error Logging')
     parser.add_argument('org_name', help='GitHub organization name')
-    parser.add_argument('--github-token', help='GitHub personal access token')
+    parser.add_argument('--github-token', action='append',
+                        help='GitHub personal access token (repeat or comma-separate for a token pool)')
     parser.add_argument('--limit', type=int, help='Number of repositories to process')
     parser.add_argument('--batch-size', type=int, default=5, help='Batch size for processing')
     parser.add_argument('--retry-failed', action='store_true', help='Process only failed repositories from previous runs')
+    parser.add_argument('--incremental', action='store_true', help='Re-classify only new/changed repositories and merge into the previous results')
+    parser.add_argument('--concurrency', type=int, default=0, help='Prefetch README/topics with this many requests in flight (0 = sequential)')
+    parser.add_argument('--cache-db', help='SQLite file for a persistent README/topics cache with ETag revalidation')
+    parser.add_argument('--fetch-mode', choices=['rest', 'graphql'], default='rest', help='README/topics fetch backend (graphql needs a token)')
+    parser.add_argument('--graphql-batch-size', type=int, default=50, help='Repositories per GraphQL request')
+    parser.add_argument('--export-format', choices=['parquet', 'arrow'], help='Also write results as Parquet or Arrow IPC (needs pyarrow)')
+    add_metrics_args(parser)
     
     args = parser.parse_args()
     
     classifier = EnhancedClassifierV3(args.org_name)
-    if args.github_token:
-        classifier.github_token = args.github_token
-        print("🔑 Using GitHub token for higher rate limits")
+    tokens = parse_token_args(args.github_token)
+    if tokens:
+        classifier.enable_token_pool(tokens)
+    
+    if args.cache_db:
+        classifier.enable_persistent_cache(args.cache_db)
+    if args.export_format:
+        classifier.enable_results_export(args.export_format)
+    if args.fetch_mode == 'graphql':
+        classifier.enable_graphql_fetch(args.graphql_batch_size)
+    elif args.concurrency > 0:
+        classifier.enable_async_fetch(args.concurrency)
+    apply_metrics_args(classifier, args)
     
     if args.retry_failed:
         classifier.process_failed_repositories_only()
+    elif args.incremental:
+        classifier.process_incremental_refresh(args.batch_size)
     else:
         classifier.process_all_repositories_with_logging(args.limit, args.batch_size)
 
@@ -4,21 +4,22 @@ Enhanced Classifier V4 - Bug fixes for None handling and robust error recovery
 Fixes: 'NoneType' object has no attribute 'strip' and other None-related errors
 """
 
-import json
 import boto3
 import time
-import requests
-import re
 import sys
 import argparse
 import base64
+from collections.abc import Mapping
 from datetime import datetime
 from typing import Dict, List, Optional, Set
 from enhanced_classifier_v3 import EnhancedClassifierV3
+from rate_limit_scheduler import parse_token_args
+from repo_record import updated_datetime
+from run_metrics import add_metrics_args, apply_metrics_args
 
 class EnhancedClassifierV4(EnhancedClassifierV3):
-    def __init__(self, org_name: str):
-        super().__init__(org_name)
+    def __init__(self, org_name: str, s3_client=None):
+        super().__init__(org_name, s3_client)
 
     def get_description_enhanced(self, repo: Dict) -> str:
         """Enhanced description with README fallback - FIXED None handling"""
@@ -81,23 +82,15 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
             return set()
         
         try:
-            text_lower = text.lower()
-            services = set()
-            
-            for keyword, service in self.aws_services_map.items():
-                # Look for keyword with word boundaries
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, text_lower):
-                    services.add(service)
-            
-            return services
+            # Keywords with word boundaries, all found in a single pass
+            return self.service_matcher.find(text.lower())
         except Exception as e:
             print(f"      🐛 AWS services extraction error: {e}")
             return set()
 
     def get_readme_content_cached(self, repo: Dict) -> str:
         """Get README content with caching - FIXED None handling"""
-        if not repo or not isinstance(repo, dict):
+        if not repo or not isinstance(repo, Mapping):
             return ""
             
         repo_name = repo.get('full_name')
@@ -107,25 +100,37 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
         if repo_name in self.readme_cache:
             return self.readme_cache[repo_name]
         
+        entry = self.get_persistent_entry(repo, 'readme')
+        if self.is_entry_fresh(repo, entry):
+            self.readme_cache[repo_name] = entry['content'] or ""
+            return self.readme_cache[repo_name]
+        
         for attempt in range(self.max_retries):
             try:
-                url = f"https://api.github.com/repos/{repo_name}/readme"
+                url = f"{self.github_api_url}/repos/{repo_name}/readme"
                 headers = {}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
+                self.add_conditional_header(headers, entry)
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.http.get(url, headers=headers)
                 
                 if self.handle_rate_limit(response):
                     continue
-                    
-                if response.status_code == 200:
+                
+                if response.status_code == 304:
+                    self.readme_cache[repo_name] = self.revalidated_content(repo, 'readme', entry) or ""
+                    return self.readme_cache[repo_name]
+                elif response.status_code == 200:
                     response_data = response.json()
                     if response_data and 'content' in response_data:
                         content = base64.b64decode(response_data['content']).decode('utf-8', errors='ignore')
                         # Cache first 3000 chars for performance
                         self.readme_cache[repo_name] = content[:3000] if content else ""
+                        self.remember_content(repo, 'readme', self.readme_cache[repo_name], response.headers.get('ETag'))
                         return self.readme_cache[repo_name]
+                elif response.status_code == 404:
+                    self.remember_content(repo, 'readme', "", response.headers.get('ETag'))
+                    break
                 else:
                     break
                     
@@ -139,7 +144,7 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
 
     def get_repo_topics_cached(self, repo: Dict) -> List[str]:
         """Get repository topics - FIXED None handling"""
-        if not repo or not isinstance(repo, dict):
+        if not repo or not isinstance(repo, Mapping):
             return []
             
         repo_name = repo.get('full_name')
@@ -155,25 +160,35 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
             self.topics_cache[repo_name] = topics
             return topics
         
+        entry = self.get_persistent_entry(repo, 'topics')
+        if self.is_entry_fresh(repo, entry) and isinstance(entry['content'], list):
+            self.topics_cache[repo_name] = entry['content']
+            return entry['content']
+        
         # Fallback to API call if needed
         for attempt in range(self.max_retries):
             try:
-                url = f"https://api.github.com/repos/{repo_name}/topics"
+                url = f"{self.github_api_url}/repos/{repo_name}/topics"
                 headers = {'Accept': 'application/vnd.github.mercy-preview+json'}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
+                self.add_conditional_header(headers, entry)
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.http.get(url, headers=headers)
                 
                 if self.handle_rate_limit(response):
                     continue
-                    
-                if response.status_code == 200:
+                
+                if response.status_code == 304:
+                    topics = self.revalidated_content(repo, 'topics', entry)
+                    self.topics_cache[repo_name] = topics if isinstance(topics, list) else []
+                    return self.topics_cache[repo_name]
+                elif response.status_code == 200:
                     response_data = response.json()
                     if response_data and 'names' in response_data:
                         topics = response_data.get('names', [])
                         if isinstance(topics, list):
                             self.topics_cache[repo_name] = topics
+                            self.remember_content(repo, 'topics', topics, response.headers.get('ETag'))
                             return topics
                 else:
                     break
@@ -188,7 +203,7 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
 
     def get_aws_services_enhanced(self, repo: Dict) -> str:
         """Enhanced AWS services detection - FIXED None handling"""
-        if not repo or not isinstance(repo, dict):
+        if not repo or not isinstance(repo, Mapping):
             return 'General AWS'
             
         try:
@@ -219,6 +234,12 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
                 if topic_services:
                     sources.append('topics')
             
+            # Source 4: Resource types declared in CloudFormation/CDK/Terraform files
+            iac_services = self.get_iac_services(repo)
+            if iac_services:
+                services.update(iac_services)
+                sources.append('iac')
+            
             # Return top 5 services
             service_list = sorted(list(services))[:5]
             
@@ -260,7 +281,7 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
 
     def classify_repository_enhanced_with_logging(self, repo: Dict) -> Optional[Dict]:
         """Enhanced repository classification - FIXED None handling"""
-        if not repo or not isinstance(repo, dict):
+        if not repo or not isinstance(repo, Mapping):
             return None
             
         repo_name = repo.get("full_name", "unknown")
@@ -299,6 +320,8 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
                 print(f"      ⚠️  Topics failed for {repo_name}: {e}")
                 topics = repo.get('topics', []) if isinstance(repo.get('topics'), list) else []
             
+            rules = self.classify_rules_enhanced(repo, enhanced_description, enhanced_aws_services)
+            
             # Build classification with safe defaults and None checks
             classification = {
                 # Basic Info - with None checks
@@ -315,13 +338,13 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
                 "topics": ", ".join(topics) if topics else "",
                 
                 # Business Classification (using enhanced description)
-                "solution_type": self.get_solution_type_enhanced(repo, enhanced_description),
-                "competency": self.get_competency_enhanced(enhanced_description, enhanced_aws_services),
+                "solution_type": rules["solution_type"],
+                "competency": rules["competency"],
                 "customer_problems": self.get_customer_problems(repo),
-                "solution_marketing": self.get_solution_marketing_enhanced(repo, enhanced_description),
+                "solution_marketing": rules["solution_marketing"],
                 
                 # Technical Classification
-                "deployment_tools": self.get_deployment_tools(repo.get("name", "")),
+                "deployment_tools": self.get_deployment_tools_enhanced(repo),
                 "deployment_level": self.get_deployment_level(repo.get("name", "")),
                 "deployment_readiness": self.get_deployment_readiness(repo),
                 "primary_language": repo.get("language") or "Multiple",
@@ -338,11 +361,11 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
                 "maintenance_level": self.get_maintenance_level(repo),
                 "scalability": self.get_scalability(repo),
                 "usp": self.get_usp(repo),
-                "freshness_status": self.get_freshness(repo.get("updated_at", "")),
-                "days_since_update": self.get_days_since_update(repo.get("updated_at", "")),
+                "freshness_status": self.get_freshness(updated_datetime(repo)),
+                "days_since_update": self.get_days_since_update(updated_datetime(repo)),
                 
                 # AI/GenAI
-                "genai_agentic": self.is_genai_agentic_enhanced(repo, enhanced_description),
+                "genai_agentic": rules["genai_agentic"],
                 
                 # Metadata
                 "classification_method": "Enhanced V4 - Bug-Fixed Analysis",
@@ -359,20 +382,52 @@ class EnhancedClassifierV4(EnhancedClassifierV3):
 def main():
     parser = argparse.ArgumentParser(description='Enhanced AWS Repository Classifier V4 - Bug Fixed')
     parser.add_argument('org_name', help='GitHub organization name')
-    parser.add_argument('--github-token', help='GitHub personal access token')
+    parser.add_argument('--github-token', action='append',
+                        help='GitHub personal access token (repeat or comma-separate for a token pool)')
     parser.add_argument('--limit', type=int, help='Number of repositories to process')
     parser.add_argument('--batch-size', type=int, default=5, help='Batch size for processing')
     parser.add_argument('--retry-failed', action='store_true', help='Process only failed repositories from previous runs')
+    parser.add_argument('--incremental', action='store_true', help='Re-classify only new/changed repositories and merge into the previous results')
+    parser.add_argument('--concurrency', type=int, default=0, help='Prefetch README/topics with this many requests in flight (0 = sequential)')
+    parser.add_argument('--cache-db', help='SQLite file for a persistent README/topics cache with ETag revalidation')
+    parser.add_argument('--fetch-mode', choices=['rest', 'graphql'], default='rest', help='README/topics fetch backend (graphql needs a token)')
+    parser.add_argument('--graphql-batch-size', type=int, default=50, help='Repositories per GraphQL request')
+    parser.add_argument('--export-format', choices=['parquet', 'arrow'], help='Also write results as Parquet or Arrow IPC (needs pyarrow)')
+    parser.add_argument('--iac-scan', action='store_true', help='Read deployment tools and AWS services from CloudFormation/CDK/Terraform files')
+    parser.add_argument('--iac-workers', type=int, default=16, help='Repositories scanned for IaC files concurrently')
+    parser.add_argument('--tarball-scan', action='store_true', help='Stream each repo tarball once and classify from its README, IaC and manifests')
+    parser.add_argument('--tarball-workers', type=int, default=4, help='Tarballs streamed concurrently')
+    parser.add_argument('--tarball-max-mb', type=float, default=64, help='Compressed MB read per tarball before scanning stops')
+    parser.add_argument('--similarity-index', action='store_true', help='Update the TF-IDF similarity index with each published run')
+    add_metrics_args(parser)
     
     args = parser.parse_args()
     
     classifier = EnhancedClassifierV4(args.org_name)
-    if args.github_token:
-        classifier.github_token = args.github_token
-        print("🔑 Using GitHub token for higher rate limits")
+    tokens = parse_token_args(args.github_token)
+    if tokens:
+        classifier.enable_token_pool(tokens)
+    
+    if args.cache_db:
+        classifier.enable_persistent_cache(args.cache_db)
+    if args.export_format:
+        classifier.enable_results_export(args.export_format)
+    if args.fetch_mode == 'graphql':
+        classifier.enable_graphql_fetch(args.graphql_batch_size)
+    elif args.concurrency > 0:
+        classifier.enable_async_fetch(args.concurrency)
+    if args.iac_scan:
+        classifier.enable_iac_scan(args.iac_workers)
+    if args.tarball_scan:
+        classifier.enable_tarball_analysis(args.tarball_workers, args.tarball_max_mb)
+    if args.similarity_index:
+        classifier.enable_similarity_index()
+    apply_metrics_args(classifier, args)
     
     if args.retry_failed:
         classifier.process_failed_repositories_only()
+    elif args.incremental:
+        classifier.process_incremental_refresh(args.batch_size)
     else:
         classifier.process_all_repositories_with_logging(args.limit, args.batch_size)
 
@@ -4,19 +4,18 @@ Enhanced Generic Repository Classifier with Advanced Rate Limit Handling
 Optimized for large organizations like aws-samples (7.6k+ repositories)
 """
 
-import json
 import boto3
 import time
-import requests
 import sys
 import argparse
 from datetime import datetime
 from typing import Dict, List, Optional
 from generic_classifier import GenericRepositoryClassifier
+from repo_record import updated_datetime
 
 class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
-    def __init__(self, org_name: str):
-        super().__init__(org_name)
+    def __init__(self, org_name: str, s3_client=None):
+        super().__init__(org_name, s3_client)
         self.rate_limit_delay = 1  # Start with 1 second delay
         self.max_retries = 3
         self.github_token = None  # Add GitHub token support for higher rate limits
@@ -25,12 +24,11 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
         """Get README description with rate limit handling"""
         for attempt in range(self.max_retries):
             try:
-                url = f"https://api.github.com/repos/{repo['full_name']}/readme"
+                url = f"{self.github_api_url}/repos/{repo['full_name']}/readme"
                 headers = {}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.http.get(url, headers=headers)
                 
                 if response.status_code == 403:  # Rate limit
                     print(f"⚠️  Rate limit hit, waiting {self.rate_limit_delay * (attempt + 1)} seconds...")
@@ -63,11 +61,12 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
         """Classify repository with enhanced error handling"""
         for attempt in range(self.max_retries):
             try:
+                context = self.get_feature_context(repo)
                 classification = {
                     # Basic Info
                     "repository": repo["full_name"],
                     "url": repo["html_url"],
-                    "description": self.get_description(repo),
+                    "description": context.description,
                     "created_date": repo.get("created_at", ""),
                     "last_modified": repo["updated_at"],
                     "stars": repo["stargazers_count"],
@@ -86,7 +85,7 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
                     "primary_language": repo["language"] or "Multiple",
                     "secondary_language": self.get_secondary_language(repo),
                     "framework": self.get_framework(repo),
-                    "aws_services": self.get_aws_services(self.get_description(repo)),
+                    "aws_services": self.get_aws_services(context.description),
                     
                     # Business Value
                     "cost_range": self.get_cost_range(repo),
@@ -98,8 +97,8 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
                     "maintenance_level": self.get_maintenance_level(repo),
                     "scalability": self.get_scalability(repo),
                     "usp": self.get_usp(repo),
-                    "freshness_status": self.get_freshness(repo["updated_at"]),
-                    "days_since_update": self.get_days_since_update(repo["updated_at"]),
+                    "freshness_status": self.get_freshness(updated_datetime(repo)),
+                    "days_since_update": self.get_days_since_update(updated_datetime(repo)),
                     
                     # AI/GenAI
                     "genai_agentic": self.is_genai_agentic(repo),
@@ -118,25 +117,16 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
                     print(f"❌ Failed to classify {repo['full_name']} after {self.max_retries} attempts")
                     return None
 
-    def get_description(self, repo: Dict) -> str:
-        """Get description with enhanced README fallback"""
-        desc = repo.get("description")
-        if not desc:
-            desc = self.get_readme_description_with_retry(repo)
-        return desc or ""
+    def get_readme_description(self, repo: Dict) -> str:
+        """README fallback description with rate limit handling"""
+        return self.get_readme_description_with_retry(repo)
 
-    def save_checkpoint_with_retry(self, checkpoint: Dict) -> None:
+    def save_checkpoint_with_retry(self) -> None:
         """Save checkpoint with retry logic"""
         for attempt in range(self.max_retries):
             try:
-                checkpoint["last_run"] = datetime.now().isoformat()
-                
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=self.checkpoint_key,
-                    Body=json.dumps(checkpoint, indent=2),
-                    ContentType='application/json'
-                )
+                # Pending deltas survive a failed PUT, so retrying just writes the same segment
+                self.checkpoint_store.flush()
                 return
             except Exception as e:
                 print(f"⚠️  Checkpoint save attempt {attempt + 1} failed: {e}")
@@ -203,20 +193,19 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
                 if classification:
                     print(f"✅ {repo_full_name} - {classification['solution_type']}")
                     completed_repos.add(repo_full_name)
-                    checkpoint["total_processed"] += 1
+                    self.checkpoint_store.mark_completed(repo_full_name)
                 else:
                     print(f"❌ Failed to classify {repo_full_name}")
                     failed_repos[repo_full_name] = datetime.now().isoformat()
+                    self.checkpoint_store.mark_failed(repo_full_name, failed_repos[repo_full_name])
                 
                 processed_in_session += 1
                 
                 # Update checkpoint more frequently for large datasets
-                checkpoint["current_index"] = i + j + 1
-                checkpoint["completed_repos"] = list(completed_repos)
-                checkpoint["failed_repos"] = failed_repos
+                self.checkpoint_store.set_index(i + j + 1)
             
             # Save checkpoint after each batch
-            self.save_checkpoint_with_retry(checkpoint)
+            self.save_checkpoint_with_retry()
             
             batch_time = time.time() - batch_start_time
             print(f"💾 Batch checkpoint saved - Progress: {len(completed_repos)}/{len(repos)} ({len(completed_repos)/len(repos)*100:.1f}%)")
@@ -227,6 +216,9 @@ class EnhancedGenericRepositoryClassifier(GenericRepositoryClassifier):
                 print(f"\n🎯 Milestone: {len(completed_repos)} repositories processed!")
                 print(f"📈 Success rate: {len(completed_repos)/(len(completed_repos)+len(failed_repos))*100:.1f}%")
         
+        # Fold the run's segments into progress.json so readers of the snapshot see the final state
+        self.checkpoint_store.compact()
+        
         print(f"\n✅ Classification completed!")
         print(f"📊 Total processed: {len(completed_repos)}")
         print(f"❌ Total failed: {len(failed_repos)}")
@@ -1,34 +1,16 @@
 #!/usr/bin/env python3
-import requests
 import json
 import boto3
+from repo_lister import list_org_repos
 
 def fetch_all_awslabs_repos():
-    repos = []
-    page = 1
-    per_page = 100
-    
-    while True:
-        url = f"https://api.github.com/orgs/awslabs/repos?page={page}&per_page={per_page}"
-        response = requests.get(url)
-        
-        if response.status_code != 200:
-            print(f"API Error: {response.status_code}")
-            break
-            
-        page_repos = response.json()
-        if not page_repos:
-            break
-            
-        repos.extend(page_repos)
-        print(f"Fetched page {page}: {len(page_repos)} repos (total: {len(repos)})")
-        page += 1
-    
-    return repos
+    return list_org_repos('awslabs')
 
 # Fetch repositories
 print("Fetching all awslabs repositories...")
 all_repos = fetch_all_awslabs_repos()
+if all_repos is None:
+    raise SystemExit("❌ Repository listing incomplete, master index not uploaded")
 print(f"Total repositories found: {len(all_repos)}")
 
 # Upload to S3
@@ -3,75 +3,56 @@
 Fix: Add classification results storage to smart classifier
 """
 
-import json
 import boto3
-import csv
-from io import StringIO
+from checkpoint_store import CheckpointStore
+from master_index import iter_master_index
+from offline_reclassifier import build_repo_frame, classify_frame, load_cached_descriptions, results_frame_to_csv
 
 def save_classification_results():
-    """Re-run classification on completed repos and save actual results"""
-    
-    # Import the classifier
-    import sys
-    sys.path.append('/persistent/home/ubuntu/workspace/24oct/awsgithubresearch')
-    from smart_rate_limit_classifier import SmartRateLimitClassifier
+    """Re-label completed repos offline (vectorized, no GitHub API calls) and save actual results"""
     
     s3_client = boto3.client('s3')
     bucket_name = 'aws-github-repo-classification-aws-samples'
+    results_key = 'results/classification_results.csv'
     
-    # Load progress and repos
-    progress_response = s3_client.get_object(Bucket=bucket_name, Key='checkpoints/progress.json')
-    progress = json.loads(progress_response['Body'].read().decode('utf-8'))
+    # Load progress (snapshot + any segments not compacted yet) and repos
+    progress = CheckpointStore(s3_client, bucket_name).load()
     completed_repos = set(progress.get('completed_repos', []))
     
-    repos_response = s3_client.get_object(Bucket=bucket_name, Key='master-index/aws-samples_repos.json')
-    data = json.loads(repos_response['Body'].read().decode('utf-8'))
-    repos = data.get('repositories', [])
-    
-    print(f"Re-classifying {len(completed_repos)} completed repositories...")
-    
-    # Initialize classifier
-    classifier = SmartRateLimitClassifier('aws-samples')
+    repos = [repo for repo in iter_master_index(s3_client, bucket_name, 'master-index/aws-samples_repos.json')
+             if repo['full_name'] in completed_repos]
     
-    # Store all classification results
-    all_results = []
+    # Descriptions of the previous results stand in for README fallbacks
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=results_key)
+        cached = load_cached_descriptions(response['Body'].read().decode('utf-8'))
+    except Exception as e:
+        print(f"⚠️  No previous results to take descriptions from: {e}")
+        cached = {}
     
-    # Process only completed repos (no API calls needed)
-    for i, repo in enumerate(repos):
-        if repo['full_name'] in completed_repos:
-            print(f"🔍 Re-classifying {repo['full_name']} ({i+1}/{len(repos)})")
-            
-            # Run actual classification (this has the real logic)
-            classification = classifier.classify_repository(repo)
-            if classification:
-                all_results.append(classification)
-                print(f"✅ {repo['full_name']} - {classification['solution_type']}")
+    print(f"Re-classifying {len(repos)} completed repositories...")
+    results = classify_frame(build_repo_frame(repos, cached))
     
     # Generate CSV from actual results
-    if all_results:
-        csv_buffer = StringIO()
-        fieldnames = list(all_results[0].keys())
-        
-        writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for result in all_results:
-            writer.writerow(result)
+    if len(results):
+        csv_content = results_frame_to_csv(results)
         
         # Upload to S3
         s3_client.put_object(
             Bucket=bucket_name,
-            Key='results/classification_results.csv',
-            Body=csv_buffer.getvalue(),
+            Key=results_key,
+            Body=csv_content,
             ContentType='text/csv'
         )
         
         # Save locally
         with open('/persistent/home/ubuntu/workspace/24oct/awsgithubresearch/aws_samples_real_classification.csv', 'w') as f:
-            f.write(csv_buffer.getvalue())
+            f.write(csv_content)
         
-        print(f"✅ Generated real CSV with {len(all_results)} repositories")
-        print(f"🔗 CSV: https://{bucket_name}.s3.amazonaws.com/results/classification_results.csv")
+        for solution_type, count in results['solution_type'].value_counts().items():
+            print(f"   {solution_type}: {count}")
+        print(f"✅ Generated real CSV with {len(results)} repositories")
+        print(f"🔗 CSV: https://{bucket_name}.s3.amazonaws.com/{results_key}")
 
 if __name__ == "__main__":
     save_classification_results()
@@ -7,25 +7,82 @@ Processes repositories from any GitHub organization with resumability and crash
 import json
 import boto3
 import time
-import requests
 import re
 import sys
 import argparse
 from datetime import datetime
 from typing import Dict, List, Optional
+from github_http import get_api_url, get_http_client
+from repo_lister import list_org_repos
+from checkpoint_store import CheckpointStore
+from rule_engine import get_rule_engine
+from master_index import read_master_index
+from repo_record import RepoRecord, parse_github_datetime, updated_datetime
+from run_metrics import add_metrics_args, apply_metrics_args
+
+class RepoFeatureContext:
+    """Text features of one repository, built once and shared by every classification dimension"""
+    def __init__(self, repo: Dict, description: str):
+        self.repo = repo
+        self.full_name = repo.get("full_name", "")
+        self.description = description or ""
+        self.topics = repo.get("topics") or []
+        
+        # Lowercased views used by the keyword rules
+        self.name_lower = (repo.get("name") or "").lower()
+        self.desc_lower = self.description.lower()
+        self.topics_text = " ".join(self.topics).lower()
+        self.text = f"{self.name_lower} {self.desc_lower} {self.topics_text}"
+        self.rules = None  # Keyword dimension labels, filled by the rule engine on first use
 
 class GenericRepositoryClassifier:
-    def __init__(self, org_name: str):
-        self.s3_client = boto3.client('s3')
+    def __init__(self, org_name: str, s3_client=None):
+        self.s3_client = s3_client or boto3.client('s3')
+        self.github_api_url = get_api_url()
+        self.http = get_http_client()  # Shared keep-alive session for every GitHub call
+        self.github_token = None
         self.org_name = org_name
         self.bucket_name = f'aws-github-repo-classification-{org_name.lower()}'
         self.master_index_key = f'master-index/{org_name}_repos.json'
         self.checkpoint_key = 'checkpoints/progress.json'
+        self.checkpoint_store = CheckpointStore(self.s3_client, self.bucket_name, self.checkpoint_key)
         self.results_key = 'results/classification_results.csv'
+        self.feature_context = None  # RepoFeatureContext of the repo being classified
+        self.rule_engine = get_rule_engine('generic')  # Keyword dimensions from classification_rules.json
+        self.metrics = None  # MetricsRegistry once enable_metrics() is called
         
         # Create bucket if it doesn't exist
         self.create_bucket_if_not_exists()
         
+    def enable_metrics(self, prometheus_file: Optional[str] = None, port: Optional[int] = None,
+                       summary_path: Optional[str] = None):
+        """Time GitHub fetches, each dimension, S3 uploads and rate-limit waits; the JSON summary goes to
+        metrics/<run>.json in the bucket when the process exits"""
+        import atexit
+        from run_metrics import enable_metrics, instrument_classifier
+        
+        self.metrics = enable_metrics()
+        instrument_classifier(self, self.metrics)
+        self.metrics_file = prometheus_file
+        self.metrics_summary_path = summary_path
+        if prometheus_file:
+            self.metrics.export_file(prometheus_file)
+        if port:
+            self.metrics.serve(port)
+        atexit.register(self.save_metrics)
+        print("📈 Run metrics enabled")
+        
+    def save_metrics(self):
+        """Print the per-stage breakdown and save the run summary (and the Prometheus file)"""
+        from run_metrics import print_summary, save_summary
+        
+        summary = self.metrics.summary(org=self.org_name, classifier=type(self).__name__)
+        print_summary(summary)
+        key = f"metrics/{self.metrics.started_at.strftime('%Y%m%dT%H%M%S')}-{type(self).__name__}.json"
+        save_summary(summary, self.s3_client, self.bucket_name, key, self.metrics_summary_path)
+        if self.metrics_file:
+            self.metrics.write_prometheus(self.metrics_file)
+        
     def create_bucket_if_not_exists(self):
         """Create S3 bucket if it doesn't exist and make it public"""
         try:
@@ -66,29 +123,21 @@ class GenericRepositoryClassifier:
             
             print(f"✅ Created public bucket: {self.bucket_name}")
 
+    def add_auth_header(self, headers: Dict) -> Dict:
+        """Attach the GitHub token (if any) to a request's headers"""
+        if self.github_token:
+            headers['Authorization'] = f'token {self.github_token}'
+        return headers
+
     def fetch_all_repos(self) -> List[Dict]:
         """Fetch all repositories for the organization"""
-        repos = []
-        page = 1
-        per_page = 100
-        
         print(f"Fetching all {self.org_name} repositories...")
         
-        while True:
-            url = f"https://api.github.com/orgs/{self.org_name}/repos?page={page}&per_page={per_page}"
-            response = requests.get(url)
-            
-            if response.status_code != 200:
-                print(f"API Error: {response.status_code}")
-                break
-                
-            page_repos = response.json()
-            if not page_repos:
-                break
-                
-            repos.extend(page_repos)
-            print(f"Fetched page {page}: {len(page_repos)} repos (total: {len(repos)})")
-            page += 1
+        repos = list_org_repos(self.org_name, add_auth_header=self.add_auth_header, api_url=self.github_api_url,
+                               handle_rate_limit=getattr(self, 'handle_rate_limit', None))
+        if repos is None:
+            print("❌ Repository listing incomplete, master index not updated")
+            return []
         
         print(f"Total repositories found: {len(repos)}")
         
@@ -102,17 +151,12 @@ class GenericRepositoryClassifier:
         )
         
         print(f"✅ Uploaded {len(repos)} repositories to S3")
-        return repos
+        return [RepoRecord.from_api(repo) for repo in repos]
 
     def load_master_index(self) -> List[Dict]:
-        """Load master index from S3"""
+        """Load master index from S3 (streamed; slim records with the fields classification reads)"""
         try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=self.master_index_key
-            )
-            data = json.loads(response['Body'].read())
-            return data["repositories"]
+            return read_master_index(self.s3_client, self.bucket_name, self.master_index_key)
         except Exception as e:
             print(f"❌ Failed to load master index: {e}")
             return []
@@ -120,8 +164,8 @@ class GenericRepositoryClassifier:
     def get_readme_description(self, repo: Dict) -> str:
         """Get first 1-2 paragraphs from README as fallback description"""
         try:
-            url = f"https://api.github.com/repos/{repo['full_name']}/readme"
-            response = requests.get(url, timeout=10)
+            url = f"{self.github_api_url}/repos/{repo['full_name']}/readme"
+            response = self.http.get(url)
             if response.status_code == 200:
                 import base64
                 content = base64.b64decode(response.json()['content']).decode('utf-8')
@@ -141,21 +185,34 @@ class GenericRepositoryClassifier:
             pass
         return ""
     
-    def get_description(self, repo: Dict) -> str:
-        """Get description with README fallback"""
-        desc = repo.get("description")
+    def build_feature_context(self, repo: Dict) -> RepoFeatureContext:
+        """Collect description (with README fallback) and topics - at most one API call"""
+        desc = repo.get("description") or ""
         if not desc:
             desc = self.get_readme_description(repo)
-        return desc or ""
+        return RepoFeatureContext(repo, desc)
+    
+    def get_feature_context(self, repo: Dict) -> RepoFeatureContext:
+        """Feature context for repo, reused across all dimension lookups for the same repo"""
+        context = self.feature_context
+        if context is None or context.repo is not repo:
+            context = self.build_feature_context(repo)
+            self.feature_context = context
+        return context
+    
+    def get_description(self, repo: Dict) -> str:
+        """Get description with README fallback"""
+        return self.get_feature_context(repo).description
 
     def classify_repository(self, repo: Dict) -> Optional[Dict]:
         """Classify a single repository with all 20 dimensions"""
         try:
+            context = self.get_feature_context(repo)
             classification = {
                 # Basic Info
                 "repository": repo["full_name"],
                 "url": repo["html_url"],
-                "description": self.get_description(repo),
+                "description": context.description,
                 "created_date": repo.get("created_at", ""),
                 "last_modified": repo["updated_at"],
                 "stars": repo["stargazers_count"],
@@ -174,7 +231,7 @@ class GenericRepositoryClassifier:
                 "primary_language": repo["language"] or "Multiple",
                 "secondary_language": self.get_secondary_language(repo),
                 "framework": self.get_framework(repo),
-                "aws_services": self.get_aws_services(self.get_description(repo)),
+                "aws_services": self.get_aws_services(context.description),
                 
                 # Business Value
                 "cost_range": self.get_cost_range(repo),
@@ -186,8 +243,8 @@ class GenericRepositoryClassifier:
                 "maintenance_level": self.get_maintenance_level(repo),
                 "scalability": self.get_scalability(repo),
                 "usp": self.get_usp(repo),
-                "freshness_status": self.get_freshness(repo["updated_at"]),
-                "days_since_update": self.get_days_since_update(repo["updated_at"]),
+                "freshness_status": self.get_freshness(updated_datetime(repo)),
+                "days_since_update": self.get_days_since_update(updated_datetime(repo)),
                 
                 # AI/GenAI
                 "genai_agentic": self.is_genai_agentic(repo),
@@ -202,94 +259,33 @@ class GenericRepositoryClassifier:
             print(f"❌ Failed to classify {repo['full_name']}: {e}")
             return None
     
+    def get_rule_results(self, repo: Dict) -> Dict[str, str]:
+        """All keyword dimensions of a repo from one rule engine scan, cached on its feature context"""
+        context = self.get_feature_context(repo)
+        if context.rules is None:
+            context.rules = self.rule_engine.classify({
+                "name": context.name_lower,
+                "description": context.desc_lower,
+                "topics": context.topics_text
+            })
+        return context.rules
+
     def get_solution_marketing(self, repo: Dict) -> str:
         """Determine solution marketing category"""
-        repo_name = repo.get("name", "").lower()
-        desc = (self.get_description(repo)).lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{repo_name} {desc} {topics}"
-        
-        # Setup & Bootstrap
-        if any(word in text for word in ["setup", "bootstrap", "install", "getting-started", "quickstart"]):
-            return "setup"
-        
-        # Landing Zone
-        if any(word in text for word in ["landing-zone", "account-setup", "multi-account", "organization"]):
-            return "landingzone"
-        
-        # Starter Templates
-        if any(word in text for word in ["starter", "template", "boilerplate", "scaffold"]):
-            return "starter"
-        
-        # Optimization
-        if any(word in text for word in ["optim", "performance", "cost", "efficiency"]):
-            return "optimise"
-        
-        # Compliance & Security
-        if any(word in text for word in ["compliance", "security", "governance", "audit"]):
-            return "compliance"
-        
-        # Improvement & Enhancement
-        if any(word in text for word in ["improve", "enhance", "upgrade", "migrate"]):
-            return "improvement"
-        
-        # Visibility & Monitoring
-        if any(word in text for word in ["monitor", "observ", "dashboard", "metric", "log"]):
-            return "visibility"
-        
-        # Foundation & Infrastructure
-        if any(word in text for word in ["foundation", "infrastructure", "core", "base"]):
-            return "foundation"
-        
-        # Default fallback
-        return "foundation"
+        return self.get_rule_results(repo)["solution_marketing"]
 
     # All other classification methods remain the same as s3_classifier.py
     def get_solution_type(self, repo: Dict) -> str:
         """Determine solution type based on repo characteristics"""
-        desc = (self.get_description(repo)).lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        
-        # Innovation Catalysts - AI/ML, experimental, cutting-edge
-        if any(word in desc for word in ["ai", "ml", "machine learning", "neural", "deep learning", "llm", "genai", "bedrock"]):
-            return "Innovation Catalysts"
-        
-        # Compliance Accelerators - security, governance, compliance
-        if any(word in desc for word in ["security", "compliance", "governance", "audit", "policy"]):
-            return "Compliance Accelerators"
-        
-        # Quick Wins - simple tools, utilities, small solutions
-        if any(word in desc for word in ["tool", "utility", "helper", "simple", "quick"]):
-            return "Quick Wins"
-        
-        # Default to Foundation Builders
-        return "Foundation Builders"
+        return self.get_rule_results(repo)["solution_type"]
 
     def get_competency(self, repo: Dict) -> str:
         """Determine AWS competency area"""
-        desc = (self.get_description(repo)).lower()
-        
-        if any(word in desc for word in ["analytics", "data", "etl", "warehouse"]):
-            return "Analytics"
-        elif any(word in desc for word in ["security", "iam", "encryption"]):
-            return "Security"
-        elif any(word in desc for word in ["devops", "cicd", "pipeline", "deploy"]):
-            return "DevOps"
-        elif any(word in desc for word in ["ai", "ml", "machine learning"]):
-            return "AI/ML"
-        else:
-            return "General"
+        return self.get_rule_results(repo)["competency"]
 
     def get_customer_problems(self, repo: Dict) -> str:
         """Identify customer problems this solves"""
-        desc = (self.get_description(repo)).lower()
-        
-        if any(word in desc for word in ["complex", "difficult", "challenge"]):
-            return "Complex Implementation"
-        elif any(word in desc for word in ["time", "quick", "fast"]):
-            return "Time to Market"
-        else:
-            return "Development Efficiency"
+        return self.get_rule_results(repo)["customer_problems"]
 
     def get_deployment_tools(self, repo_name: str) -> str:
         """Get deployment tools based on repo name"""
@@ -405,11 +401,11 @@ class GenericRepositoryClassifier:
         else:
             return "Reliable solution"
 
-    def get_freshness(self, updated_at: str) -> str:
-        """Determine freshness status"""
+    def get_freshness(self, updated_at) -> str:
+        """Determine freshness status (updated_at: ISO string or a RepoRecord's parsed datetime)"""
         try:
             from datetime import datetime, timezone
-            updated = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+            updated = parse_github_datetime(updated_at)
             now = datetime.now(timezone.utc)
             days_diff = (now - updated).days
             
@@ -422,11 +418,11 @@ class GenericRepositoryClassifier:
         except:
             return "Unknown"
 
-    def get_days_since_update(self, updated_at: str) -> int:
-        """Calculate days since last update"""
+    def get_days_since_update(self, updated_at) -> int:
+        """Calculate days since last update (updated_at: ISO string or a RepoRecord's parsed datetime)"""
         try:
             from datetime import datetime, timezone
-            updated = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+            updated = parse_github_datetime(updated_at)
             now = datetime.now(timezone.utc)
             return (now - updated).days
         except:
@@ -434,41 +430,15 @@ class GenericRepositoryClassifier:
 
     def is_genai_agentic(self, repo: Dict) -> str:
         """Detect GenAI/Agentic capabilities"""
-        desc = (self.get_description(repo)).lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{desc} {topics}"
-        
-        if any(word in text for word in ["agent", "llm", "genai", "bedrock", "anthropic", "openai"]):
-            return "Yes"
-        else:
-            return "No"
+        return self.get_rule_results(repo)["genai_agentic"]
 
     def load_checkpoint(self) -> Dict:
-        """Load processing checkpoint from S3"""
-        try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=self.checkpoint_key
-            )
-            return json.loads(response['Body'].read())
-        except:
-            return {
-                "current_index": 0,
-                "completed_repos": [],
-                "failed_repos": {},
-                "total_processed": 0
-            }
+        """Load processing checkpoint (snapshot + delta segments) from S3"""
+        return self.checkpoint_store.load()
 
-    def save_checkpoint(self, checkpoint: Dict) -> None:
-        """Save checkpoint to S3"""
-        checkpoint["last_run"] = datetime.now().isoformat()
-        
-        self.s3_client.put_object(
-            Bucket=self.bucket_name,
-            Key=self.checkpoint_key,
-            Body=json.dumps(checkpoint, indent=2),
-            ContentType='application/json'
-        )
+    def save_checkpoint(self) -> None:
+        """Append the progress made since the last save as one small checkpoint segment"""
+        self.checkpoint_store.flush()
 
     def run_classification(self, batch_size: int = 10) -> None:
         """Run classification with checkpointing"""
@@ -509,15 +479,15 @@ class GenericRepositoryClassifier:
                 if classification:
                     print(f"✅ {repo['full_name']} - {classification['solution_type']}")
                     completed_repos.add(repo["full_name"])
-                    checkpoint["total_processed"] += 1
+                    self.checkpoint_store.mark_completed(repo["full_name"])
                 
-                checkpoint["current_index"] = i + batch_size
-                checkpoint["completed_repos"] = list(completed_repos)
+                self.checkpoint_store.set_index(i + batch_size)
             
             # Save checkpoint after each batch
-            self.save_checkpoint(checkpoint)
+            self.save_checkpoint()
             print(f"\n💾 Checkpoint saved - Progress: {len(completed_repos)}/{len(repos)}")
         
+        self.checkpoint_store.compact()
         print(f"\n✅ Classification completed!")
         print(f"📊 Total processed: {len(completed_repos)}")
         print(f"🔗 Bucket: https://{self.bucket_name}.s3.amazonaws.com/")
@@ -526,10 +496,12 @@ def main():
     parser = argparse.ArgumentParser(description='Generic GitHub Repository Classifier')
     parser.add_argument('org_name', help='GitHub organization name (e.g., awslabs, microsoft, google)')
     parser.add_argument('--batch-size', type=int, default=10, help='Batch size for processing (default: 10)')
+    add_metrics_args(parser)
     
     args = parser.parse_args()
     
     classifier = GenericRepositoryClassifier(args.org_name)
+    apply_metrics_args(classifier, args)
     classifier.run_classification(args.batch_size)
 
 if __name__ == "__main__":
@@ -4,34 +4,18 @@ Generic Repository Fetcher
 Fetches all repositories from any GitHub organization
 """
 
-import requests
 import json
 import boto3
 import argparse
+from repo_lister import list_org_repos
 
 def fetch_and_upload_repos(org_name: str):
     """Fetch all repositories for an organization and upload to S3"""
-    repos = []
-    page = 1
-    per_page = 100
-    
     print(f"Fetching all {org_name} repositories...")
     
-    while True:
-        url = f"https://api.github.com/orgs/{org_name}/repos?page={page}&per_page={per_page}"
-        response = requests.get(url)
-        
-        if response.status_code != 200:
-            print(f"API Error: {response.status_code}")
-            break
-            
-        page_repos = response.json()
-        if not page_repos:
-            break
-            
-        repos.extend(page_repos)
-        print(f"Fetched page {page}: {len(page_repos)} repos (total: {len(repos)})")
-        page += 1
+    repos = list_org_repos(org_name)
+    if repos is None:
+        raise SystemExit("❌ Repository listing incomplete, master index not uploaded")
     
     print(f"Total repositories found: {len(repos)}")
     
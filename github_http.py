@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Shared GitHub HTTP Client
+One pooled keep-alive session (gzip, retries, default timeout) used by every GitHub fetch site
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from run_metrics import get_metrics
+
+DEFAULT_TIMEOUT = 10
+USER_AGENT = 'awsgithubresearch-classifier'
+
+def get_api_url() -> str:
+    """GitHub REST base URL (GITHUB_API_URL overrides, e.g. for GitHub Enterprise or a local stub)"""
+    return os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+class GitHubHTTPClient:
+    def __init__(self, pool_size: int = 32, timeout: float = DEFAULT_TIMEOUT, retries: int = 3,
+                 backoff_factor: float = 0.5):
+        """pool_size: keep-alive connections kept per host (should cover the number of worker threads);
+        retries: transport errors and 5xx answers to GET are retried with exponential backoff"""
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        # 403/429 are rate limits - the classifiers and RateLimitScheduler decide what to do with those
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        metrics = get_metrics()
+        if not metrics.enabled:
+            return self.session.request(method, url, **kwargs)
+        endpoint = github_endpoint(url)
+        with metrics.timer('github_request', endpoint=endpoint):
+            response = self.session.request(method, url, **kwargs)
+        metrics.count('github_responses', endpoint=endpoint, status=response.status_code)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+def github_endpoint(url: str) -> str:
+    """Metrics label for a GitHub API URL: readme, topics, git_trees, git_blobs, org_repos, graphql, repo or other"""
+    parts = [part for part in url.split('?', 1)[0].split('/') if part]
+    if parts and parts[-1] == 'graphql':
+        return 'graphql'
+    if 'orgs' in parts and parts[-1] == 'repos':
+        return 'org_repos'
+    if 'repos' in parts:
+        tail = parts[parts.index('repos') + 3:]
+        if len(tail) > 1 and tail[0] == 'git':
+            return f"git_{tail[1]}"  # git/trees, git/blobs
+        return tail[0] if tail else 'repo'
+    return 'other'
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+def get_http_client() -> GitHubHTTPClient:
+    """Process-wide client, sized from GITHUB_HTTP_POOL_SIZE / GITHUB_HTTP_TIMEOUT / GITHUB_HTTP_RETRIES"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = GitHubHTTPClient(
+                pool_size=int(os.environ.get('GITHUB_HTTP_POOL_SIZE', 32)),
+                timeout=float(os.environ.get('GITHUB_HTTP_TIMEOUT', DEFAULT_TIMEOUT)),
+                retries=int(os.environ.get('GITHUB_HTTP_RETRIES', 3))
+            )
+        return _shared_client
+
+def configure_http_client(**kwargs) -> GitHubHTTPClient:
+    """Replace the shared client (e.g. a bigger pool for more worker threads)"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = GitHubHTTPClient(**kwargs)
+        return _shared_client
+
+def reset_http_client() -> None:
+    """Drop the shared client so the next get_http_client() builds a fresh one"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = None
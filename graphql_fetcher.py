@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+GraphQL Batch Fetcher
+Pulls description, topics, README and pushedAt for dozens of repositories per request
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from github_http import get_http_client
+
+README_PATHS = ["README.md", "readme.md", "README.rst", "README"]
+
+REPO_FIELDS = """
+    nameWithOwner
+    description
+    pushedAt
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+"""
+
+class GraphQLBatchFetcher:
+    def __init__(self, github_token: Optional[str] = None, api_url: str = 'https://api.github.com',
+                 batch_size: int = 50, timeout: int = 30, readme_chars: int = 3000):
+        self.github_token = github_token
+        self.graphql_url = self.get_graphql_url(api_url)
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.readme_chars = readme_chars
+        self.rate_limited = False
+        self.requests_made = 0
+
+    @staticmethod
+    def get_graphql_url(api_url: str) -> str:
+        """api.github.com -> /graphql, GitHub Enterprise .../api/v3 -> .../api/graphql"""
+        api_url = api_url.rstrip('/')
+        if api_url.endswith('/v3'):
+            return api_url[:-3] + '/graphql'
+        return api_url + '/graphql'
+
+    def build_query(self, repo_names: List[str]) -> str:
+        """One aliased repository() block per repo"""
+        blocks = []
+        for i, full_name in enumerate(repo_names):
+            owner, name = full_name.split('/', 1)
+            readme_fields = "\n".join(
+                f'    readme{j}: object(expression: {json.dumps("HEAD:" + path)}) {{ ... on Blob {{ text }} }}'
+                for j, path in enumerate(README_PATHS)
+            )
+            blocks.append(
+                f'  r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{'
+                f'{REPO_FIELDS}{readme_fields}\n  }}'
+            )
+        return "query {\n" + "\n".join(blocks) + "\n  rateLimit { cost remaining resetAt }\n}"
+
+    def parse_repository(self, node: Dict) -> Dict:
+        """Flatten a repository node into the fields the classifiers use"""
+        readme = ""
+        for j in range(len(README_PATHS)):
+            blob = node.get(f'readme{j}')
+            if blob and blob.get('text'):
+                readme = blob['text'][:self.readme_chars]
+                break
+
+        topics = [
+            topic_node['topic']['name']
+            for topic_node in (node.get('repositoryTopics') or {}).get('nodes', [])
+            if topic_node and topic_node.get('topic')
+        ]
+        return {
+            "description": node.get('description') or "",
+            "topics": topics,
+            "readme": readme,
+            "pushed_at": node.get('pushedAt')
+        }
+
+    def fetch_batch(self, repo_names: List[str]) -> Dict[str, Dict]:
+        """Query one batch; repos missing from the result could not be fetched"""
+        if not repo_names:
+            return {}
+
+        headers = {'Content-Type': 'application/json'}
+        if self.github_token:
+            headers['Authorization'] = f'bearer {self.github_token}'
+
+        try:
+            response = get_http_client().post(
+                self.graphql_url,
+                headers=headers,
+                data=json.dumps({"query": self.build_query(repo_names)}),
+                timeout=self.timeout
+            )
+            self.requests_made += 1
+        except Exception as e:
+            print(f"⚠️  GraphQL batch failed: {e}")
+            return {}
+
+        if response.status_code in (502, 504) and len(repo_names) > 1:
+            # Query too expensive for one request - split it
+            middle = len(repo_names) // 2
+            results = self.fetch_batch(repo_names[:middle])
+            results.update(self.fetch_batch(repo_names[middle:]))
+            return results
+
+        if response.status_code != 200:
+            if response.status_code == 403 or response.headers.get('X-RateLimit-Remaining') == '0':
+                self.rate_limited = True
+            print(f"⚠️  GraphQL API error: {response.status_code}")
+            return {}
+
+        payload = response.json()
+        if any(error.get('type') == 'RATE_LIMITED' for error in payload.get('errors') or []):
+            self.rate_limited = True
+
+        data = payload.get('data') or {}
+        results = {}
+        for i, full_name in enumerate(repo_names):
+            node = data.get(f'r{i}')
+            if node:
+                results[full_name] = self.parse_repository(node)
+            elif f'r{i}' in data:
+                # Repository deleted or renamed: nothing to fetch
+                results[full_name] = {"description": "", "topics": [], "readme": "", "pushed_at": None}
+        return results
+
+    def fetch_all(self, repo_names: List[str]) -> Dict[str, Dict]:
+        """Fetch any number of repos in batch_size chunks"""
+        self.rate_limited = False
+        results = {}
+        for i in range(0, len(repo_names), self.batch_size):
+            if self.rate_limited:
+                break
+            results.update(self.fetch_batch(repo_names[i:i + self.batch_size]))
+        return results
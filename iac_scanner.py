@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Infrastructure-as-Code Scanner
+Lists a repository's file tree in one git/trees?recursive=1 call, downloads only its CloudFormation/SAM,
+CDK and Terraform files (size-capped) and extracts the AWS resource types they declare
+"""
+
+import base64
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from github_http import get_api_url, get_http_client
+
+# CloudFormation "Type: AWS::S3::Bucket" (YAML) and "Type": "AWS::S3::Bucket" (JSON, incl. cdk.out synth output).
+# A regex rather than a YAML parser: templates use !Ref/!Sub tags that yaml.safe_load rejects.
+CFN_RESOURCE_TYPE = re.compile(r'''["']?Type["']?\s*:\s*["']?(AWS::[A-Za-z0-9]+::[A-Za-z0-9]+)''')
+# resource "aws_lambda_function" "handler" {  (data sources are reads, not deployed resources)
+TF_RESOURCE_TYPE = re.compile(r'''^\s*resource\s+"(aws_[a-z0-9_]+)"''', re.MULTILINE)
+# aws-cdk-lib/aws-lambda, @aws-cdk/aws-lambda, aws_cdk.aws_lambda, "from aws_cdk import aws_lambda as _lambda,
+# aws_s3", software.amazon.awscdk.services.lambda
+CDK_MODULE_IMPORT = re.compile(
+    r'''(?:aws-cdk-lib/|@aws-cdk/|aws_cdk\.)aws[-_]([a-z0-9]+(?:[-_][a-z0-9]+)*)|awscdk\.services\.([a-z0-9]+)'''
+)
+CDK_FROM_IMPORT = re.compile(r'from\s+aws_cdk\s+import\s+(?:\(([^)]*)\)|([^\n(]+))')
+
+CFN_TEMPLATE_NAMES = frozenset(['template.yaml', 'template.yml', 'template.json'])
+CFN_TEMPLATE_SUFFIXES = ('.template', '.template.json', '.template.yaml', '.template.yml',
+                         '.cfn.yaml', '.cfn.yml', '.cfn.json')
+CFN_TEMPLATE_DIRS = frozenset(['cloudformation', 'cfn', 'templates', 'cloudformation-templates'])
+CDK_SOURCE_SUFFIXES = ('.ts', '.py', '.java', '.go', '.cs')
+SKIPPED_DIRS = frozenset(['node_modules', 'vendor', '.terraform', '.git', '.venv', 'venv', 'dist', 'build'])
+
+# Resource namespaces whose lowercased name is not a key of the classifiers' aws_services_map
+CFN_NAMESPACE_SERVICES = {
+    'stepfunctions': 'Step Functions', 'events': 'EventBridge', 'logs': 'CloudWatch',
+    'elasticloadbalancing': 'ELB', 'elasticloadbalancingv2': 'ELB', 'apigatewayv2': 'API Gateway',
+    'secretsmanager': 'Secrets Manager', 'certificatemanager': 'ACM', 'opensearchservice': 'OpenSearch',
+    'elasticsearch': 'OpenSearch', 'wafv2': 'WAF', 'xray': 'X-Ray', 'ecr': 'ECS',
+}
+SAM_RESOURCE_SERVICES = {
+    'Function': 'Lambda', 'Api': 'API Gateway', 'HttpApi': 'API Gateway', 'SimpleTable': 'DynamoDB',
+    'StateMachine': 'Step Functions', 'LayerVersion': 'Lambda',
+}
+TF_PREFIX_SERVICES = {
+    'api_gateway': 'API Gateway', 'apigatewayv2': 'API Gateway', 'sfn': 'Step Functions', 'lb': 'ELB',
+    'alb': 'ELB', 'cloudwatch_event': 'EventBridge', 'cloudwatch_log': 'CloudWatch', 'db': 'RDS',
+    'rds': 'RDS', 'secretsmanager': 'Secrets Manager', 'acm': 'ACM', 'opensearch': 'OpenSearch',
+    'elasticsearch': 'OpenSearch', 'wafv2': 'WAF', 'route53': 'Route53', 'cloudfront': 'CloudFront',
+    'ecr': 'ECS', 'subnet': 'VPC', 'security_group': 'VPC', 'internet_gateway': 'VPC', 'nat_gateway': 'VPC',
+    'instance': 'EC2', 'launch_template': 'EC2', 'autoscaling': 'EC2',
+}
+
+def iac_file_kind(path: str) -> Optional[str]:
+    """'cloudformation', 'cdk', 'terraform' or None for a path in the repo tree (CDK stack sources are
+    only candidates, see cdk_source_candidate)"""
+    parts = path.split('/')
+    if SKIPPED_DIRS.intersection(parts[:-1]):
+        return None
+    name = parts[-1].lower()
+    if name == 'cdk.json':
+        return 'cdk'
+    if name.endswith('.tf'):
+        return 'terraform'
+    if name in CFN_TEMPLATE_NAMES or name.endswith(CFN_TEMPLATE_SUFFIXES):
+        return 'cloudformation'
+    if name.endswith(('.yaml', '.yml', '.json')) and CFN_TEMPLATE_DIRS.intersection(p.lower() for p in parts[:-1]):
+        return 'cloudformation'
+    return None
+
+def cdk_source_candidate(path: str) -> bool:
+    """Stack definitions of a CDK app: lib/*.ts, *stack*.{ts,py,java,go,cs}, app.py"""
+    parts = path.split('/')
+    if SKIPPED_DIRS.intersection(parts[:-1]) or 'cdk.out' in parts[:-1]:
+        return False
+    name = parts[-1].lower()
+    if not name.endswith(CDK_SOURCE_SUFFIXES) or name.endswith('.d.ts') or 'test' in name:
+        return False
+    return 'stack' in name or name == 'app.py' or (name.endswith('.ts') and 'lib' in parts[:-1])
+
+def extract_cfn_resource_types(text: str) -> Set[str]:
+    return set(CFN_RESOURCE_TYPE.findall(text))
+
+def extract_tf_resource_types(text: str) -> Set[str]:
+    return set(TF_RESOURCE_TYPE.findall(text))
+
+def extract_cdk_modules(text: str) -> Set[str]:
+    """CDK service modules imported by a stack source, normalised to 'aws-lambda' form"""
+    modules = set()
+    for module, java_module in CDK_MODULE_IMPORT.findall(text):
+        modules.add('aws-' + (module or java_module).replace('_', '-'))
+    for grouped, single in CDK_FROM_IMPORT.findall(text):
+        for name in re.split(r'[,\s]+', grouped or single):
+            if name.startswith('aws_'):
+                modules.add(name.replace('_', '-'))
+    return modules
+
+def resource_type_service(resource_type: str, keyword_map: Dict[str, str]) -> Optional[str]:
+    """AWS service name (as in the classifiers' aws_services_map) for a CloudFormation type, a Terraform
+    resource type or a CDK module"""
+    if resource_type.startswith('AWS::'):
+        _, namespace, resource = resource_type.split('::', 2)
+        if namespace == 'Serverless':
+            return SAM_RESOURCE_SERVICES.get(resource, 'Lambda')
+        namespace = namespace.lower()
+        return CFN_NAMESPACE_SERVICES.get(namespace) or keyword_map.get(namespace)
+    if resource_type.startswith('aws-'):
+        # aws-stepfunctions-tasks -> stepfunctionstasks, then stepfunctions; aws-lambda-nodejs -> lambda
+        tokens = resource_type[4:].split('-')
+        for end in range(len(tokens), 0, -1):
+            module = ''.join(tokens[:end])
+            service = CFN_NAMESPACE_SERVICES.get(module) or keyword_map.get(module) or TF_PREFIX_SERVICES.get(module)
+            if service:
+                return service
+        return None
+    if resource_type.startswith('aws_'):
+        name = resource_type[4:]
+        # Longest known prefix first: aws_cloudwatch_event_rule is EventBridge, aws_cloudwatch_metric_alarm CloudWatch
+        tokens = name.split('_')
+        for end in range(len(tokens), 0, -1):
+            prefix = '_'.join(tokens[:end])
+            if prefix in TF_PREFIX_SERVICES:
+                return TF_PREFIX_SERVICES[prefix]
+            if prefix in keyword_map:
+                return keyword_map[prefix]
+    return None
+
+def resource_services(scan: Dict, keyword_map: Dict[str, str]) -> Set[str]:
+    """AWS services behind a scan's resource types, CDK modules and (tarball analyses) AWS SDK clients"""
+    services = set()
+    for field in ('resource_types', 'cdk_modules', 'sdk_clients'):
+        for resource_type in scan.get(field, []):
+            service = resource_type_service(resource_type, keyword_map)
+            if service:
+                services.add(service)
+    return services
+
+def empty_scan(tree_sha: Optional[str] = None) -> Dict:
+    return {"tree_sha": tree_sha, "tools": [], "files": [], "resource_types": [], "cdk_modules": [],
+            "skipped_files": 0, "failed_files": [], "truncated": False}
+
+class IaCScanner:
+    def __init__(self, api_url: Optional[str] = None, max_workers: int = 16, max_file_bytes: int = 256 * 1024,
+                 max_files: int = 20, add_auth_header: Optional[Callable[[Dict], Dict]] = None,
+                 handle_rate_limit: Optional[Callable] = None, persistent_cache=None, max_retries: int = 3):
+        """max_file_bytes: IaC files larger than this (per the tree's blob size) are not downloaded;
+        max_files: downloads per repo, templates nearest the root first;
+        add_auth_header / handle_rate_limit: the classifier's token and rate-limit handling
+        (handle_rate_limit returns True when the request should be retried);
+        persistent_cache: PersistentGitHubCache for scans by repo (kind 'iac') and by tree SHA"""
+        self.api_url = (api_url or get_api_url()).rstrip('/')
+        self.max_workers = max(1, max_workers)
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.add_auth_header = add_auth_header
+        self.handle_rate_limit = handle_rate_limit
+        self.persistent_cache = persistent_cache
+        self.max_retries = max_retries
+        self.http = get_http_client()
+        self.tree_scans = {}  # tree SHA -> scan; forks and copies of a workshop share a tree
+        self.lock = threading.Lock()
+        self.stats = {"trees_fetched": 0, "trees_not_modified": 0, "tree_cache_hits": 0, "fresh_hits": 0,
+                      "files_fetched": 0, "bytes_fetched": 0, "files_failed": 0}
+
+    def count(self, stat: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[stat] += amount
+
+    def get(self, url: str, headers: Optional[Dict] = None):
+        """GET with auth and rate-limit retries; None when every attempt failed"""
+        for attempt in range(self.max_retries):
+            request_headers = dict(headers or {})
+            if self.add_auth_header:
+                self.add_auth_header(request_headers)
+            try:
+                response = self.http.get(url, headers=request_headers)
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    print(f"      🐛 IaC scan request failed for {url}: {e}")
+                time.sleep(1)
+                continue
+            if self.handle_rate_limit and self.handle_rate_limit(response):
+                continue
+            return response
+        return None
+
+    def scan(self, repo: Dict) -> Dict:
+        """Scan one repository; an empty scan when the tree could not be listed"""
+        full_name = repo['full_name']
+        pushed_at = repo.get('pushed_at')
+        entry = self.persistent_cache.get(full_name, 'iac') if self.persistent_cache else None
+        # Recorded at the repo's current pushed_at: nothing can have changed, no request needed
+        if entry and pushed_at and entry.get('pushed_at') == pushed_at:
+            self.count('fresh_hits')
+            return entry['content']
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        response = self.get(f"{self.api_url}/repos/{full_name}/git/trees/HEAD?recursive=1", headers)
+        if response is None:
+            return empty_scan()
+        if response.status_code == 304:
+            self.count('trees_not_modified')
+            self.persistent_cache.touch(full_name, 'iac', pushed_at)
+            return entry['content']
+        if response.status_code in (404, 409):
+            # 409: empty repository, no commits to list
+            scan = empty_scan()
+            self.remember(repo, scan, response.headers.get('ETag'))
+            return scan
+        if response.status_code != 200:
+            return empty_scan()
+
+        self.count('trees_fetched')
+        tree = response.json()
+        tree_sha = tree.get('sha')
+        scan = self.tree_scan(tree_sha)
+        if scan is None:
+            scan = self.scan_tree(full_name, tree)
+            if scan['failed_files']:
+                # A download failed: use the partial scan this run but cache nothing, so the next run retries
+                return scan
+            self.remember_tree(tree_sha, scan)
+        self.remember(repo, scan, response.headers.get('ETag'))
+        return scan
+
+    def tree_scan(self, tree_sha: Optional[str]) -> Optional[Dict]:
+        """Scan already done for an identical tree (this run or, with a persistent cache, any earlier one)"""
+        if not tree_sha:
+            return None
+        with self.lock:
+            scan = self.tree_scans.get(tree_sha)
+        if scan is None and self.persistent_cache:
+            entry = self.persistent_cache.get(f"tree:{tree_sha}", 'iac')
+            scan = entry['content'] if entry else None
+        if scan is not None:
+            self.count('tree_cache_hits')
+        return scan
+
+    def remember_tree(self, tree_sha: Optional[str], scan: Dict) -> None:
+        if not tree_sha:
+            return
+        with self.lock:
+            self.tree_scans[tree_sha] = scan
+        if self.persistent_cache:
+            self.persistent_cache.put(f"tree:{tree_sha}", 'iac', scan)
+
+    def remember(self, repo: Dict, scan: Dict, etag: Optional[str]) -> None:
+        if self.persistent_cache:
+            self.persistent_cache.put(repo['full_name'], 'iac', scan, etag, repo.get('pushed_at'))
+
+    def select_files(self, entries: Iterable[Dict]) -> tuple:
+        """(IaC blobs to download, nearest the root first, tools seen, files skipped by the caps)"""
+        candidates = []
+        cdk_sources = []
+        tools = set()
+        skipped = 0
+        for entry in entries:
+            if entry.get('type') != 'blob':
+                continue
+            path = entry.get('path', '')
+            kind = iac_file_kind(path)
+            if kind is None:
+                if cdk_source_candidate(path):
+                    cdk_sources.append(entry)
+                continue
+            if kind != 'cloudformation':
+                # A YAML/JSON file only counts as CloudFormation once it declares resources
+                tools.add(kind)
+            if (entry.get('size') or 0) > self.max_file_bytes:
+                skipped += 1
+                continue
+            candidates.append((kind, entry))
+
+        if 'cdk' in tools:
+            # Stack sources only matter in a CDK app; cdk.json itself carries no resources
+            candidates = [c for c in candidates if c[0] != 'cdk']
+            for entry in cdk_sources:
+                if (entry.get('size') or 0) > self.max_file_bytes:
+                    skipped += 1
+                    continue
+                candidates.append(('cdk', entry))
+
+        candidates.sort(key=lambda c: (c[1]['path'].count('/'), c[1]['path']))
+        skipped += max(0, len(candidates) - self.max_files)
+        return candidates[:self.max_files], tools, skipped
+
+    def fetch_blob(self, full_name: str, sha: str) -> Optional[str]:
+        response = self.get(f"{self.api_url}/repos/{full_name}/git/blobs/{sha}")
+        if response is None or response.status_code != 200:
+            return None
+        data = response.json()
+        content = data.get('content') or ''
+        raw = base64.b64decode(content) if data.get('encoding') == 'base64' else content.encode('utf-8')
+        self.count('files_fetched')
+        self.count('bytes_fetched', len(raw))
+        return raw.decode('utf-8', errors='ignore')
+
+    def scan_tree(self, full_name: str, tree: Dict) -> Dict:
+        """Download and parse the IaC files of a listed tree"""
+        scan = empty_scan(tree.get('sha'))
+        scan['truncated'] = bool(tree.get('truncated'))
+        files, tools, skipped = self.select_files(tree.get('tree') or [])
+        scan['skipped_files'] = skipped
+
+        resource_types = set()
+        cdk_modules = set()
+        for kind, entry in files:
+            text = self.fetch_blob(full_name, entry['sha'])
+            if text is None:
+                self.count('files_failed')
+                scan['failed_files'].append(entry['path'])
+                continue
+            if kind == 'terraform':
+                found = extract_tf_resource_types(text)
+            elif kind == 'cdk':
+                found = extract_cdk_modules(text)
+                cdk_modules |= found
+                found = set()
+            else:
+                found = extract_cfn_resource_types(text)
+                if not found:
+                    continue  # A YAML/JSON file that isn't a template
+                tools.add('cloudformation')
+                if any(t.startswith('AWS::Serverless::') for t in found):
+                    tools.add('sam')
+            resource_types |= found
+            scan['files'].append(entry['path'])
+
+        scan['tools'] = sorted(tools)
+        scan['resource_types'] = sorted(resource_types)
+        scan['cdk_modules'] = sorted(cdk_modules)
+        return scan
+
+    def scan_all(self, repos: List[Dict]) -> Dict[str, Dict]:
+        """full_name -> scan for many repos, max_workers repos in flight"""
+        repos = [repo for repo in repos if repo.get('full_name')]
+        if not repos:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(repos))) as executor:
+            scans = executor.map(self.scan, repos)
+            return {repo['full_name']: scan for repo, scan in zip(repos, scans)}
+
+def deployment_tools_label(scan: Dict) -> Optional[str]:
+    """deployment_tools column value for a scan, None when no IaC was found"""
+    tools = set(scan.get('tools') or [])
+    labels = []
+    if 'cdk' in tools:
+        labels.append('CDK')
+    if 'sam' in tools:
+        labels.append('SAM')
+    if 'cdk' in tools or 'sam' in tools or 'cloudformation' in tools:
+        labels.append('CloudFormation')
+    if 'terraform' in tools:
+        labels.append('Terraform')
+    return ', '.join(labels) if labels else None
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scan repositories for CloudFormation/CDK/Terraform resources')
+    parser.add_argument('repos', nargs='+', help='owner/name of each repository')
+    parser.add_argument('--github-token', help='GitHub personal access token')
+    parser.add_argument('--cache-db', help='SQLite file to cache scans by repo and tree SHA')
+    parser.add_argument('--max-workers', type=int, default=16, help='Repositories scanned concurrently')
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache_db:
+        from persistent_cache import PersistentGitHubCache
+        cache = PersistentGitHubCache(args.cache_db)
+
+    def add_auth_header(headers: Dict) -> Dict:
+        if args.github_token:
+            headers['Authorization'] = f'token {args.github_token}'
+        return headers
+
+    scanner = IaCScanner(max_workers=args.max_workers, add_auth_header=add_auth_header, persistent_cache=cache)
+    scans = scanner.scan_all([{"full_name": name} for name in args.repos])
+    print(json.dumps(scans, indent=2))
+    print(f"📊 {scanner.stats}")
+
+if __name__ == "__main__":
+    main()
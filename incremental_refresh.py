@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Incremental Refresh Helpers
+Diffs a fresh org listing against the previous master index and results so only changed repos are re-classified
+"""
+
+import csv
+import io
+import re
+from typing import Dict, List, Optional
+
+# Listing fields that can change a repository's classification
+CHANGE_FIELDS = ("pushed_at", "updated_at")
+
+def repo_fingerprint(repo: Dict) -> tuple:
+    """pushed_at, updated_at and the (order-insensitive) topic set of a listing entry"""
+    return tuple(repo.get(field) for field in CHANGE_FIELDS) + (tuple(sorted(repo.get("topics") or [])),)
+
+def diff_repositories(previous_repos: List[Dict], current_repos: List[Dict],
+                      classified: Optional[set] = None) -> Dict[str, List]:
+    """Split the current listing into new / changed / unchanged repos and list removed names.
+
+    classified: full names that have a row in the previous results; a repo without one
+    (e.g. it failed last time) is treated as changed even if its listing entry is identical.
+    """
+    previous_by_name = {repo["full_name"]: repo for repo in previous_repos}
+    current_names = set()
+    diff = {"new": [], "changed": [], "unchanged": [], "removed": []}
+
+    for repo in current_repos:
+        name = repo["full_name"]
+        current_names.add(name)
+        previous = previous_by_name.get(name)
+        if previous is None:
+            diff["new"].append(repo)
+        elif repo_fingerprint(repo) != repo_fingerprint(previous):
+            diff["changed"].append(repo)
+        elif classified is not None and name not in classified:
+            diff["changed"].append(repo)
+        else:
+            diff["unchanged"].append(repo)
+
+    diff["removed"] = [name for name in previous_by_name if name not in current_names]
+    return diff
+
+def parse_results_csv(content: str) -> List[Dict]:
+    """Rows of a results CSV written by save_enhanced_results"""
+    if not content.strip():
+        return []
+    return list(csv.DictReader(io.StringIO(content)))
+
+def pick_previous_results_key(keys: List[str], prefix: str = "results/enhanced_v3") -> Optional[str]:
+    """Merged dataset of the last incremental run, else the largest full run's final CSV"""
+    latest_key = f"{prefix}_latest.csv"
+    if latest_key in keys:
+        return latest_key
+    finals = []
+    for key in keys:
+        match = re.fullmatch(re.escape(prefix) + r"_final_(\d+)_repos\.csv", key)
+        if match:
+            finals.append((int(match.group(1)), key))
+    return max(finals)[1] if finals else None
+
+def merge_results(previous_rows: List[Dict], new_rows: List[Dict], current_repos: List[Dict]) -> List[Dict]:
+    """Previous rows with re-classified repos replaced, removed repos dropped and new repos added,
+    ordered by stars like a full run"""
+    current_names = {repo["full_name"] for repo in current_repos}
+    merged = {}
+    for row in previous_rows:
+        if row.get("repository") in current_names:
+            merged[row["repository"]] = row
+    for row in new_rows:
+        merged[row["repository"]] = row
+
+    def stars(row: Dict) -> int:
+        try:
+            return int(row.get("stars") or 0)
+        except ValueError:
+            return 0
+
+    return sorted(merged.values(), key=stars, reverse=True)
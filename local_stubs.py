@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+Local GitHub API and S3 Stand-ins
+Lets the classifiers run end-to-end on one machine for benchmarks and parity checks
+"""
+
+import base64
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import ssl
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+SAMPLE_WORDS = [
+    "serverless", "lambda", "dynamodb", "s3", "bedrock", "agent", "pipeline", "security",
+    "analytics", "kinesis", "glue", "template", "starter", "monitoring", "dashboard", "cdk",
+    "terraform", "sagemaker", "machine learning", "workshop", "api gateway", "cognito",
+]
+
+def make_synthetic_repos(count: int, org_name: str = "aws-samples") -> List[Dict]:
+    """Build deterministic GitHub-shaped repo payloads for local runs"""
+    repos = []
+    base_time = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    languages = ["Python", "TypeScript", "Java", "JavaScript", "Go", None]
+
+    for i in range(count):
+        words = [SAMPLE_WORDS[(i * 7 + k) % len(SAMPLE_WORDS)] for k in range(3)]
+        name = f"sample-{'-'.join(w.replace(' ', '-') for w in words[:2])}-{i}"
+        updated = base_time - timedelta(days=(i * 13) % 900)
+        repos.append({
+            "id": 100000 + i,
+            "name": name,
+            "full_name": f"{org_name}/{name}",
+            "html_url": f"https://github.com/{org_name}/{name}",
+            # Every third repo has no description so the README fallback is exercised
+            "description": None if i % 3 == 0 else f"Sample using {words[0]} and {words[1]} with {words[2]}",
+            "language": languages[i % len(languages)],
+            "stargazers_count": (i * 37) % 6000,
+            "forks_count": (i * 11) % 900,
+            "topics": [] if i % 2 == 0 else [w.replace(' ', '-') for w in words],
+            "created_at": (updated - timedelta(days=400)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "updated_at": updated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "pushed_at": updated.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "archived": False,
+        })
+    return repos
+
+URL_TEMPLATES = {
+    "forks": "forks", "keys": "keys{/key_id}", "collaborators": "collaborators{/collaborator}",
+    "teams": "teams", "hooks": "hooks", "issue_events": "issues/events{/number}", "events": "events",
+    "assignees": "assignees{/user}", "branches": "branches{/branch}", "tags": "tags",
+    "blobs": "git/blobs{/sha}", "git_tags": "git/tags{/sha}", "git_refs": "git/refs{/sha}",
+    "trees": "git/trees{/sha}", "statuses": "statuses/{sha}", "languages": "languages",
+    "stargazers": "stargazers", "contributors": "contributors", "subscribers": "subscribers",
+    "subscription": "subscription", "commits": "commits{/sha}", "git_commits": "git/commits{/sha}",
+    "comments": "comments{/number}", "issue_comment": "issues/comments{/number}",
+    "contents": "contents/{+path}", "compare": "compare/{base}...{head}", "merges": "merges",
+    "archive": "{archive_format}{/ref}", "downloads": "downloads", "issues": "issues{/number}",
+    "pulls": "pulls{/number}", "milestones": "milestones{/number}",
+    "notifications": "notifications{?since,all,participating}", "labels": "labels{/name}",
+    "releases": "releases{/id}", "deployments": "deployments",
+}
+
+def full_repo_payload(repo: Dict) -> Dict:
+    """A make_synthetic_repos entry padded out to a full GitHub REST listing entry (~80 top-level fields plus owner/license)"""
+    org_name, name = repo["full_name"].split("/", 1)
+    api = f"https://api.github.com/repos/{repo['full_name']}"
+    payload = dict(repo)
+    payload.update({
+        "node_id": base64.b64encode(f"010:Repository{repo['id']}".encode()).decode(),
+        "private": False,
+        "owner": {
+            "login": org_name, "id": 8931462, "node_id": "MDEyOk9yZ2FuaXphdGlvbjg5MzE0NjI=",
+            "avatar_url": "https://avatars.githubusercontent.com/u/8931462?v=4", "gravatar_id": "",
+            "url": f"https://api.github.com/users/{org_name}", "html_url": f"https://github.com/{org_name}",
+            "followers_url": f"https://api.github.com/users/{org_name}/followers",
+            "following_url": f"https://api.github.com/users/{org_name}/following{{/other_user}}",
+            "gists_url": f"https://api.github.com/users/{org_name}/gists{{/gist_id}}",
+            "starred_url": f"https://api.github.com/users/{org_name}/starred{{/owner}}{{/repo}}",
+            "subscriptions_url": f"https://api.github.com/users/{org_name}/subscriptions",
+            "organizations_url": f"https://api.github.com/users/{org_name}/orgs",
+            "repos_url": f"https://api.github.com/users/{org_name}/repos",
+            "events_url": f"https://api.github.com/users/{org_name}/events{{/privacy}}",
+            "received_events_url": f"https://api.github.com/users/{org_name}/received_events",
+            "type": "Organization", "user_view_type": "public", "site_admin": False
+        },
+        "fork": False,
+        "url": api,
+        "git_url": f"git://github.com/{repo['full_name']}.git",
+        "ssh_url": f"git@github.com:{repo['full_name']}.git",
+        "clone_url": f"https://github.com/{repo['full_name']}.git",
+        "svn_url": f"https://github.com/{repo['full_name']}",
+        "mirror_url": None,
+        "homepage": None,
+        "size": (repo["id"] * 97) % 50000,
+        "watchers_count": repo.get("stargazers_count", 0),
+        "watchers": repo.get("stargazers_count", 0),
+        "forks": repo.get("forks_count", 0),
+        "open_issues_count": repo["id"] % 40,
+        "open_issues": repo["id"] % 40,
+        "has_issues": True, "has_projects": False, "has_downloads": True, "has_wiki": False,
+        "has_pages": False, "has_discussions": False, "disabled": False, "is_template": False,
+        "web_commit_signoff_required": False, "allow_forking": True,
+        "visibility": "public",
+        "default_branch": "main",
+        "license": {
+            "key": "mit-0", "name": "MIT No Attribution", "spdx_id": "MIT-0",
+            "url": "https://api.github.com/licenses/mit-0", "node_id": "MDc6TGljZW5zZTQx"
+        },
+        "permissions": {"admin": False, "maintain": False, "push": False, "triage": False, "pull": True},
+    })
+    for field, template in URL_TEMPLATES.items():
+        payload[f"{field}_url"] = f"{api}/{template}"
+    return payload
+
+def make_readme(repo: Dict) -> str:
+    """Deterministic README body for a synthetic repo"""
+    return (
+        f"# {repo['name']}\n\n"
+        f"![badge](https://example.com/badge.svg)\n\n"
+        f"This project shows how to build {repo['name'].replace('-', ' ')} on AWS with Lambda and Amazon S3.\n"
+        f"It deploys an API Gateway endpoint backed by DynamoDB and uses CloudWatch for monitoring.\n\n"
+        f"## Deploy\n\nRun `cdk deploy` to create the CloudFormation stack.\n"
+    )
+
+def make_repo_files(repo: Dict) -> Dict[str, str]:
+    """Deterministic file tree for a synthetic repo: a SAM template, a CDK app, Terraform or no IaC
+    (by repo id), plus a README and some source that the IaC scanner must not download"""
+    name = repo["name"]
+    files = {"README.md": make_readme(repo), "src/handler.py": f"def handler(event, context):\n    return '{name}'\n"}
+    variant = repo.get("id", 0) % 4
+    if variant == 0:
+        files["template.yaml"] = (
+            "AWSTemplateFormatVersion: '2010-09-09'\nTransform: AWS::Serverless-2016-10-31\nResources:\n"
+            "  Handler:\n    Type: AWS::Serverless::Function\n    Properties:\n      CodeUri: src/\n"
+            "  Table:\n    Type: AWS::DynamoDB::Table\n  Queue:\n    Type: AWS::SQS::Queue\n"
+            "  Bucket:\n    Type: AWS::S3::Bucket\n    Properties:\n      BucketName: !Sub '${AWS::StackName}-data'\n"
+        )
+    elif variant == 1:
+        files["cdk.json"] = json.dumps({"app": "npx ts-node --prefer-ts-exts bin/app.ts"})
+        files["bin/app.ts"] = "import * as cdk from 'aws-cdk-lib';\nnew cdk.App();\n"
+        files[f"lib/{name}-stack.ts"] = (
+            "import * as cdk from 'aws-cdk-lib';\nimport * as lambda from 'aws-cdk-lib/aws-lambda';\n"
+            "import * as apigw from 'aws-cdk-lib/aws-apigateway';\nimport * as sfn from 'aws-cdk-lib/aws-stepfunctions';\n"
+        )
+        files["package.json"] = json.dumps({"name": name, "dependencies": {
+            "aws-cdk-lib": "^2.0.0", "@aws-sdk/client-dynamodb": "^3.0.0", "express": "^4.0.0"}})
+    elif variant == 2:
+        files["terraform/main.tf"] = (
+            'resource "aws_lambda_function" "handler" {\n  function_name = "handler"\n}\n'
+            'resource "aws_cloudwatch_event_rule" "schedule" {\n}\n'
+            'resource "aws_s3_bucket" "data" {\n}\n'
+            'data "aws_iam_policy_document" "assume" {\n}\n'
+        )
+        files["requirements.txt"] = "boto3>=1.28\nfastapi==0.110.0\naws-lambda-powertools[tracer]\n"
+    else:
+        files["pom.xml"] = (
+            "<project><dependencies>\n"
+            "<dependency><groupId>org.springframework.boot</groupId><artifactId>spring-boot-starter-web</artifactId></dependency>\n"
+            "<dependency><groupId>software.amazon.awssdk</groupId><artifactId>sqs</artifactId></dependency>\n"
+            "</dependencies></project>\n"
+        )
+        files["src/main/java/App.java"] = "public class App { }\n"
+    return files
+
+def make_tarball(repo: Dict, padding_bytes: int = 0) -> bytes:
+    """GitHub-style .tar.gz of make_repo_files (members under <owner>-<repo>-<sha>/), optionally with an
+    incompressible assets/padding.bin of padding_bytes to exercise the analyzer's byte budget"""
+    files = {path: content.encode('utf-8') for path, content in make_repo_files(repo).items()}
+    if padding_bytes:
+        # Placed before the rest so a budget cut leaves the interesting files unread
+        files = {"assets/padding.bin": os.urandom(padding_bytes), **files}
+    root = f"{repo['full_name'].replace('/', '-')}-{hashlib.sha1(repo['full_name'].encode()).hexdigest()[:7]}"
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for path, data in files.items():
+            info = tarfile.TarInfo(f"{root}/{path}")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def git_blob_sha(content: str) -> str:
+    data = content.encode('utf-8')
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def synthetic_fixtures(count: int, org_name: str = "aws-samples") -> Dict:
+    """Fixtures in the record_fixtures format built from make_synthetic_repos / make_readme"""
+    repos = make_synthetic_repos(count, org_name)
+    return {"org": org_name, "recorded_at": None, "repos": repos,
+            "readmes": {repo["full_name"]: make_readme(repo) for repo in repos}}
+
+def record_fixtures(org_name: str, path: str, token: Optional[str] = None, limit: Optional[int] = None,
+                    api_url: Optional[str] = None) -> Dict:
+    """Record an org's listing, /topics and /readme responses from the live API into a gzipped JSON
+    fixture file for StubGitHubServer.from_fixtures; limit keeps the most-starred repos"""
+    from github_http import get_api_url, get_http_client
+    from repo_lister import list_org_repos
+
+    api_url = api_url or get_api_url()
+    http = get_http_client()
+    headers = {'Authorization': f'token {token}'} if token else {}
+    repos = list_org_repos(org_name, add_auth_header=lambda h: {**h, **headers}, api_url=api_url)
+    if repos is None:
+        raise RuntimeError(f"Listing {org_name} failed, no fixtures recorded")
+    repos = sorted(repos, key=lambda repo: repo.get("stargazers_count", 0), reverse=True)[:limit]
+
+    readmes = {}
+    for i, repo in enumerate(repos, 1):
+        name = repo["full_name"]
+        response = http.get(f"{api_url}/repos/{name}/topics",
+                            headers={**headers, 'Accept': 'application/vnd.github.mercy-preview+json'})
+        if response.status_code == 200:
+            repo["topics"] = response.json().get("names", [])
+        response = http.get(f"{api_url}/repos/{name}/readme", headers=headers)
+        readmes[name] = (base64.b64decode(response.json()["content"]).decode('utf-8', errors='ignore')
+                         if response.status_code == 200 else None)
+        if i % 100 == 0:
+            print(f"📼 Recorded {i}/{len(repos)} repos")
+
+    fixtures = {"org": org_name, "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "repos": repos, "readmes": readmes}
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixtures, f)
+    print(f"📼 Recorded {len(repos)} {org_name} repos to {path}")
+    return fixtures
+
+def load_fixtures(path: str) -> Dict:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # Deep accept backlog so concurrent clients are not throttled by the listener
+    request_queue_size = 256
+    daemon_threads = True
+
+class StubGitHubServer:
+    """Threaded local HTTP server answering the GitHub REST endpoints the classifiers call"""
+
+    def __init__(self, repos: List[Dict], latency: float = 0.0, port: int = 0,
+                 rate_limit: int = 0, rate_window: float = 3600.0, secondary_limit_every: int = 0,
+                 tls: bool = False, readmes: Optional[Dict[str, Optional[str]]] = None, error_every: int = 0,
+                 tarball_padding: int = 0):
+        """rate_limit: requests per token per rate_window (0 = unlimited), answered with
+        X-RateLimit-* headers and a 403 once exhausted; secondary_limit_every: every Nth
+        request gets a 403 with Retry-After: 1; tls: serve HTTPS with a throwaway
+        self-signed certificate (trust it via cert_path / REQUESTS_CA_BUNDLE);
+        readmes: full_name -> README text (None = no README, 404) instead of make_readme;
+        error_every: every Nth GET gets a 502; tarball_padding: incompressible bytes added to every /tarball"""
+        self.repos = repos
+        self.repos_by_name = {repo["full_name"]: repo for repo in repos}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.secondary_limit_every = secondary_limit_every
+        self.readmes = readmes
+        self.error_every = error_every
+        self.tarball_padding = tarball_padding
+        self.rate_state = {}  # Authorization header -> [remaining, reset_at]
+        self.blobs = {}  # Blob SHA -> content of files listed by git/trees
+        self.tarballs = {}  # full_name -> archive, built once per repo
+        self.request_counts = Counter()
+        self.repo_request_counts = Counter()  # (kind, full_name) -> requests
+        self.connections = 0  # TCP (and TLS) connections accepted
+        self.bytes_sent = 0  # Response bodies as sent on the wire
+        self._lock = threading.Lock()
+        self._server = StubHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._thread = None
+        self.cert_path = None
+        if tls:
+            self._enable_tls()
+
+    def _enable_tls(self) -> None:
+        """Wrap the listener in TLS using a freshly generated self-signed cert for 127.0.0.1"""
+        self._cert_dir = tempfile.TemporaryDirectory()
+        self.cert_path = os.path.join(self._cert_dir.name, 'cert.pem')
+        key_path = os.path.join(self._cert_dir.name, 'key.pem')
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+             '-keyout', key_path, '-out', self.cert_path],
+            check=True, capture_output=True
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert_path, key_path)
+        self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+
+    @classmethod
+    def from_fixtures(cls, fixtures: Dict, **kwargs) -> 'StubGitHubServer':
+        """Serve recorded (or synthetic_fixtures) repos and READMEs"""
+        return cls(fixtures["repos"], readmes=fixtures["readmes"], **kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        scheme = 'https' if self.cert_path else 'http'
+        return f"{scheme}://{host}:{port}"
+
+    def start(self) -> 'StubGitHubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self.cert_path:
+            self._cert_dir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def set_repos(self, repos: List[Dict]) -> None:
+        """Swap the organization's repositories (e.g. to simulate a week of pushes)"""
+        with self._lock:
+            self.repos = repos
+            self.repos_by_name = {repo["full_name"]: repo for repo in repos}
+
+    def count(self, kind: str, repo_name: Optional[str] = None) -> None:
+        with self._lock:
+            self.request_counts[kind] += 1
+            if repo_name:
+                self.repo_request_counts[(kind, repo_name)] += 1
+
+    def inject_error(self) -> bool:
+        """True when this GET should fail with a 502 (every error_every-th request)"""
+        if not self.error_every:
+            return False
+        with self._lock:
+            self.request_counts['error_seen'] += 1
+            if self.request_counts['error_seen'] % self.error_every:
+                return False
+            self.request_counts['injected_errors'] += 1
+            return True
+
+    def check_rate_limit(self, auth: str) -> tuple:
+        """Return (rate-limit headers, error status or None, extra headers) for one request"""
+        if not self.rate_limit and not self.secondary_limit_every:
+            return {}, None, {}
+
+        with self._lock:
+            self.request_counts['total_seen'] += 1
+            if self.secondary_limit_every and self.request_counts['total_seen'] % self.secondary_limit_every == 0:
+                self.request_counts['secondary_limited'] += 1
+                return {}, 403, {'Retry-After': '1'}
+            if not self.rate_limit:
+                return {}, None, {}
+
+            now = time.time()
+            state = self.rate_state.get(auth)
+            if state is None or now >= state[1]:
+                state = [self.rate_limit, now + self.rate_window]
+                self.rate_state[auth] = state
+            headers = {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Reset': str(int(math.ceil(state[1]))),
+            }
+            if state[0] <= 0:
+                self.request_counts['rate_limited'] += 1
+                headers['X-RateLimit-Remaining'] = '0'
+                return headers, 403, {}
+            state[0] -= 1
+            headers['X-RateLimit-Remaining'] = str(state[0])
+            return headers, None, {}
+
+    def list_link_header(self, path: str, page: int, per_page: int) -> Dict:
+        """GitHub-style pagination Link header (next/last/prev/first) for an org listing page"""
+        last_page = max(1, -(-len(self.repos) // per_page))
+        links = []
+        if page < last_page:
+            links.append(f'<{self.url}{path}?page={page + 1}&per_page={per_page}>; rel="next"')
+            links.append(f'<{self.url}{path}?page={last_page}&per_page={per_page}>; rel="last"')
+        if page > 1:
+            links.append(f'<{self.url}{path}?page={page - 1}&per_page={per_page}>; rel="prev"')
+            links.append(f'<{self.url}{path}?page=1&per_page={per_page}>; rel="first"')
+        return {'Link': ', '.join(links)} if links else {}
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> tuple:
+        """Return (status, payload, extra headers) for a request path"""
+        parts = [p for p in path.split('/') if p]
+
+        if len(parts) == 3 and parts[0] == 'orgs' and parts[2] == 'repos':
+            self.count('list')
+            page = int(query.get('page', ['1'])[0])
+            per_page = int(query.get('per_page', ['30'])[0])
+            start = (page - 1) * per_page
+            return 200, self.repos[start:start + per_page], self.list_link_header(path, page, per_page)
+
+        if len(parts) >= 3 and parts[0] == 'repos':
+            repo_name = f"{parts[1]}/{parts[2]}"
+            repo = self.repos_by_name.get(repo_name)
+            kind = parts[3] if len(parts) > 3 else 'repo'
+            self.count(kind, repo_name)
+            if repo is None:
+                return 404, {"message": "Not Found"}, {}
+            if kind == 'readme':
+                readme = make_readme(repo) if self.readmes is None else self.readmes.get(repo_name)
+                if readme is None:
+                    return 404, {"message": "Not Found"}, {}
+                content = base64.b64encode(readme.encode('utf-8')).decode('ascii')
+                return 200, {"name": "README.md", "encoding": "base64", "content": content}, {}
+            if kind == 'topics':
+                return 200, {"names": repo.get("topics", [])}, {}
+            if kind == 'repo':
+                return 200, repo, {}
+            if kind == 'tarball':
+                return 200, self.tarball(repo), {'Content-Type': 'application/x-gzip'}
+            if kind == 'git' and len(parts) > 5 and parts[4] == 'trees':
+                return 200, self.git_tree(repo), {}
+            if kind == 'git' and len(parts) > 5 and parts[4] == 'blobs':
+                content = self.blobs.get(parts[5])
+                if content is None:
+                    return 404, {"message": "Not Found"}, {}
+                encoded = base64.b64encode(content.encode('utf-8')).decode('ascii')
+                return 200, {"sha": parts[5], "size": len(content), "encoding": "base64", "content": encoded}, {}
+
+        self.count('unknown')
+        return 404, {"message": "Not Found"}, {}
+
+    def tarball(self, repo: Dict) -> bytes:
+        """make_tarball for a repo, built on first use"""
+        with self._lock:
+            if repo["full_name"] not in self.tarballs:
+                self.tarballs[repo["full_name"]] = make_tarball(repo, self.tarball_padding)
+            return self.tarballs[repo["full_name"]]
+
+    def git_tree(self, repo: Dict) -> Dict:
+        """Recursive git/trees listing of make_repo_files (directories included, as GitHub lists them)"""
+        files = make_repo_files(repo)
+        entries = []
+        directories = set()
+        for path, content in sorted(files.items()):
+            sha = git_blob_sha(content)
+            with self._lock:
+                self.blobs[sha] = content
+            entries.append({"path": path, "mode": "100644", "type": "blob", "sha": sha, "size": len(content.encode('utf-8'))})
+            directories.update('/'.join(path.split('/')[:i]) for i in range(1, path.count('/') + 1))
+        entries.extend({"path": d, "mode": "040000", "type": "tree", "sha": hashlib.sha1(d.encode()).hexdigest()}
+                       for d in sorted(directories))
+        tree_sha = hashlib.sha1(json.dumps(entries, sort_keys=True).encode('utf-8')).hexdigest()
+        return {"sha": tree_sha, "tree": entries, "truncated": False}
+
+    def graphql(self, query: str) -> Dict:
+        """Answer the aliased repository() query built by graphql_fetcher"""
+        self.count('graphql')
+        data = {}
+        for alias, owner, name in re.findall(r'(\w+): repository\(owner: "([^"]+)", name: "([^"]+)"\)', query):
+            repo = self.repos_by_name.get(f"{owner}/{name}")
+            if repo is None:
+                data[alias] = None
+                continue
+            node = {
+                "nameWithOwner": repo["full_name"],
+                "description": repo.get("description"),
+                "pushedAt": repo.get("pushed_at"),
+                "repositoryTopics": {"nodes": [{"topic": {"name": t}} for t in repo.get("topics", [])]},
+                # README.md is the first object() alias; the other README spellings don't exist
+                "readme0": {"text": make_readme(repo)},
+            }
+            data[alias] = node
+        data["rateLimit"] = {"cost": 1, "remaining": 4999, "resetAt": "2099-01-01T00:00:00Z"}
+        return {"data": data}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one segment so keep-alive clients don't hit delayed-ACK stalls
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def send_json(self, status: int, payload, headers: Optional[Dict] = None):
+                """JSON payload, or raw bytes (tarballs) sent as they are"""
+                raw = isinstance(payload, bytes)
+                body = payload if raw else json.dumps(payload).encode('utf-8') if status != 304 else b''
+                gzipped = not raw and len(body) > 256 and 'gzip' in self.headers.get('Accept-Encoding', '')
+                if gzipped:
+                    body = gzip.compress(body, compresslevel=6)
+                self.send_response(status)
+                headers = dict(headers or {})
+                self.send_header('Content-Type', headers.pop('Content-Type', 'application/json'))
+                self.send_header('Content-Length', str(len(body)))
+                if gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The tarball analyzer hangs up once its byte budget is spent
+                    self.close_connection = True
+                    return
+                with stub._lock:
+                    stub.bytes_sent += len(body)
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                response_headers, limited_status, extra_headers = stub.check_rate_limit(self.headers.get('Authorization', ''))
+                if limited_status:
+                    self.send_json(limited_status, {"message": "API rate limit exceeded"}, {**response_headers, **extra_headers})
+                    return
+                if stub.inject_error():
+                    self.send_json(502, {"message": "Server Error"}, response_headers)
+                    return
+
+                parsed = urlparse(self.path)
+                status, payload, route_headers = stub.route(parsed.path, parse_qs(parsed.query))
+                response_headers.update(route_headers)
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    # Conditional hit: GitHub doesn't charge these against the rate limit
+                    stub.count('not_modified')
+                    self.send_json(304, None, {'ETag': etag, **response_headers})
+                    return
+
+                if status == 200:
+                    response_headers['ETag'] = etag
+                self.send_json(status, payload, response_headers)
+
+            def do_POST(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if urlparse(self.path).path.rstrip('/').endswith('/graphql'):
+                    self.send_json(200, stub.graphql(request.get('query', '')))
+                else:
+                    stub.count('unknown')
+                    self.send_json(404, {"message": "Not Found"})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+class InMemoryS3Client:
+    """Minimal boto3 S3 client stand-in that keeps objects in memory and counts uploads"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.uploads = {}  # Multipart upload id -> {part number: bytes}
+        self.put_count = 0
+        self.bytes_uploaded = 0
+
+    def head_bucket(self, Bucket: str):
+        if Bucket not in self.buckets:
+            raise KeyError(f"NoSuchBucket: {Bucket}")
+        return {}
+
+    def create_bucket(self, Bucket: str, **kwargs):
+        self.buckets.setdefault(Bucket, {})
+        return {}
+
+    def put_bucket_policy(self, Bucket: str, Policy: str):
+        return {}
+
+    def put_public_access_block(self, Bucket: str, PublicAccessBlockConfiguration: Dict):
+        return {}
+
+    def put_object(self, Bucket: str, Key: str, Body, ContentType: Optional[str] = None, **kwargs):
+        data = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        self.buckets.setdefault(Bucket, {})[Key] = data
+        self.put_count += 1
+        self.bytes_uploaded += len(data)
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs):
+        try:
+            data = self.buckets[Bucket][Key]
+        except KeyError:
+            raise KeyError(f"NoSuchKey: {Key}")
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def delete_object(self, Bucket: str, Key: str):
+        self.buckets.get(Bucket, {}).pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: Dict):
+        for obj in Delete.get('Objects', []):
+            self.buckets.get(Bucket, {}).pop(obj['Key'], None)
+        return {}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body):
+        data = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        self.uploads[UploadId][PartNumber] = data
+        self.put_count += 1
+        self.bytes_uploaded += len(data)
+        return {"ETag": f'"{UploadId}-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        for number in numbers[:-1]:
+            if len(parts[number]) < 5 * 1024 * 1024:
+                raise ValueError(f"EntityTooSmall: part {number} is {len(parts[number])} bytes")
+        self.buckets.setdefault(Bucket, {})[Key] = b''.join(parts[number] for number in numbers)
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str):
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = '', **kwargs):
+        keys = sorted(k for k in self.buckets.get(Bucket, {}) if k.startswith(Prefix))
+        return {
+            "KeyCount": len(keys),
+            "Contents": [{"Key": k, "Size": len(self.buckets[Bucket][k])} for k in keys],
+        }
+
+class DirectoryBucket:
+    """Objects of one bucket as files under a directory (key 'a/b.json' -> <dir>/a/b.json)"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def __getitem__(self, key: str) -> bytes:
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers in other processes never see a partial object
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def pop(self, key: str, default=None):
+        try:
+            data = self[key]
+            os.remove(self.path(key))
+            return data
+        except (KeyError, FileNotFoundError):
+            return default
+
+    def __iter__(self):
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.startswith('.tmp-'):
+                    yield os.path.relpath(os.path.join(directory, name), self.root).replace(os.sep, '/')
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+class DirectoryBuckets:
+    """Bucket name -> DirectoryBucket under one root directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def __contains__(self, bucket: str) -> bool:
+        return os.path.isdir(os.path.join(self.root, bucket))
+
+    def __getitem__(self, bucket: str) -> DirectoryBucket:
+        if bucket not in self:
+            raise KeyError(bucket)
+        return DirectoryBucket(os.path.join(self.root, bucket))
+
+    def get(self, bucket: str, default=None):
+        return self[bucket] if bucket in self else default
+
+    def setdefault(self, bucket: str, default=None) -> DirectoryBucket:
+        os.makedirs(os.path.join(self.root, bucket), exist_ok=True)
+        return self[bucket]
+
+class DirectoryS3Client(InMemoryS3Client):
+    """InMemoryS3Client whose objects live in a directory, so several processes share one bucket"""
+
+    def __init__(self, root: str):
+        super().__init__()
+        self.root = root
+        self.buckets = DirectoryBuckets(root)
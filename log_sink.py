@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Buffered S3 Log Sink
+Buffers JSON log events and flushes them in the background as immutable gzipped segments
+(<prefix><run>/<seq>.jsonl.gz), with a reader that stitches the segments back together
+"""
+
+import argparse
+import atexit
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+class S3LogSink:
+    def __init__(self, s3_client, bucket_name: str, prefix: str, run_id: Optional[str] = None,
+                 max_events: int = 500, max_bytes: int = 256 * 1024, flush_interval: float = 30.0):
+        """Segments are written when max_events/max_bytes are buffered or every flush_interval seconds"""
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix.rstrip('/') + '/'
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.seq = 0
+        self.segments_written = 0
+        self.bytes_written = 0
+
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run_flusher, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def segment_key(self, seq: int) -> str:
+        return f"{self.prefix}{self.run_id}/{seq:06d}.jsonl.gz"
+
+    def write(self, event: Dict) -> None:
+        """Buffer one event (constant cost); a full buffer wakes the background flusher"""
+        line = json.dumps(event, separators=(',', ':'), default=str)
+        with self.lock:
+            self.buffer.append(line)
+            self.buffered_bytes += len(line) + 1
+            full = len(self.buffer) >= self.max_events or self.buffered_bytes >= self.max_bytes
+        if full:
+            self.wakeup.set()
+
+    def run_flusher(self) -> None:
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            if not self.closed:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write everything buffered so far as the next segment"""
+        with self.flush_lock:
+            with self.lock:
+                lines, self.buffer = self.buffer, []
+                self.buffered_bytes = 0
+            if not lines:
+                return
+
+            body = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'))
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self.segment_key(self.seq + 1),
+                    Body=body,
+                    ContentType='application/x-ndjson',
+                    ContentEncoding='gzip'
+                )
+            except Exception as e:
+                print(f"⚠️  Failed to write log segment: {e}")
+                with self.lock:
+                    # Keep the events for the next flush, ahead of anything logged meanwhile
+                    self.buffer = lines + self.buffer
+                    self.buffered_bytes += sum(len(line) + 1 for line in lines)
+                return
+
+            self.seq += 1
+            self.segments_written += 1
+            self.bytes_written += len(body)
+
+    def close(self) -> None:
+        """Stop the background flusher and write what is left"""
+        if self.closed:
+            return
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join(timeout=5)
+        self.flush()
+
+def list_log_segments(s3_client, bucket_name: str, prefix: str, run_id: Optional[str] = None) -> List[str]:
+    """Segment keys in write order (runs sort by their timestamped id, segments by sequence number)"""
+    prefix = prefix.rstrip('/') + '/' + (f"{run_id}/" if run_id else '')
+    keys = []
+    kwargs = {'Bucket': bucket_name, 'Prefix': prefix}
+    while True:
+        response = s3_client.list_objects_v2(**kwargs)
+        keys.extend(obj['Key'] for obj in response.get('Contents', []) if obj['Key'].endswith('.jsonl.gz'))
+        if not response.get('IsTruncated'):
+            return sorted(keys)
+        kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+def read_log_events(s3_client, bucket_name: str, prefix: str, run_id: Optional[str] = None) -> Iterator[Dict]:
+    """Stitch a sink's segments back into one event stream"""
+    for key in list_log_segments(s3_client, bucket_name, prefix, run_id):
+        body = s3_client.get_object(Bucket=bucket_name, Key=key)['Body'].read()
+        for line in gzip.decompress(body).decode('utf-8').splitlines():
+            if line:
+                yield json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description='Print events from rotated S3 log segments')
+    parser.add_argument('bucket', help='S3 bucket (e.g. aws-github-repo-classification-aws-samples)')
+    parser.add_argument('prefix', help='Log prefix (e.g. logs/processing or logs/failed)')
+    parser.add_argument('--run', help='Only this run id')
+
+    args = parser.parse_args()
+
+    import boto3
+    for event in read_log_events(boto3.client('s3'), args.bucket, args.prefix, args.run):
+        if 'message' in event:
+            print(f"[{event.get('timestamp', '')}] {event['message']}")
+        else:
+            print(json.dumps(event))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Streaming Master Index Loader
+Parses master-index/{org}_repos.json incrementally from the S3 body and yields compact RepoRecords
+holding only the fields the classifiers read, so the full GitHub payloads are never all in memory
+"""
+
+import codecs
+import json
+from typing import Iterator, List
+
+from repo_record import RepoRecord
+from run_metrics import get_metrics
+
+READ_CHUNK_BYTES = 256 * 1024
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",:]}"
+
+class JSONStreamReader:
+    """Pulls JSON values one at a time out of a byte stream (anything with read(n))"""
+
+    def __init__(self, stream, chunk_size: int = READ_CHUNK_BYTES):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read the next chunk; False once the stream is exhausted"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b"", final=True)
+            self.pos = 0
+            return False
+        # Drop what was consumed so the buffer stays around one chunk plus one value
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end of the stream)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in master index JSON, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value, reading more of the stream while it is cut off"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number cut off by the chunk boundary ("1.5" of "1.5e10") decodes too; only
+            # accept a value once the character after it is visible
+            if (end == len(self.buffer) or self.buffer[end] not in DELIMITERS) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def array_items(self) -> Iterator:
+        """Items of the array starting at the current position, one at a time"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' in master index JSON, found {separator!r}")
+
+def iter_repositories(stream, key: str = "repositories", slim: bool = True) -> Iterator:
+    """RepoRecords of {"<key>": [...]} (other top-level keys are skipped) or of a bare array;
+    slim=False yields the decoded dicts unchanged"""
+    convert = RepoRecord.from_api if slim else dict
+    reader = JSONStreamReader(stream)
+    if reader.peek() == '[':
+        for repo in reader.array_items():
+            yield convert(repo)
+        return
+
+    reader.expect('{')
+    while reader.peek() != '}':
+        name = reader.value()
+        reader.expect(':')
+        if name == key:
+            for repo in reader.array_items():
+                yield convert(repo)
+            return
+        reader.value()
+        if reader.peek() == ',':
+            reader.pos += 1
+
+def iter_master_index(s3_client, bucket_name: str, key: str, slim: bool = True) -> Iterator[RepoRecord]:
+    """Stream a master index object from S3 as RepoRecords"""
+    response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    repos = iter_repositories(response['Body'], slim=slim)
+    metrics = get_metrics()
+    yield from metrics.timed_iter(repos, 'parse', source='master_index') if metrics.enabled else repos
+
+def read_master_index(s3_client, bucket_name: str, key: str, slim: bool = True) -> List[RepoRecord]:
+    return list(iter_master_index(s3_client, bucket_name, key, slim))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Offline Vectorized Re-classification
+Re-labels every repo of a master index with pandas/NumPy column operations (no GitHub API calls),
+using the descriptions cached in a previous results CSV for repos that only had a README fallback
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from master_index import read_master_index
+from rule_engine import RULES_PATH
+
+# Dimensions GenericRepositoryClassifier returns as constants
+CONSTANT_DIMENSIONS = {
+    "deployment_level": "Production Ready",
+    "secondary_language": "N/A",
+    "business_value": "High",
+    "target_audience": "Developers",
+    "use_case_category": "Infrastructure",
+    "integration_complexity": "Medium",
+    "maintenance_level": "Low",
+    "scalability": "High",
+}
+
+# GenericRepositoryClassifier.get_aws_services keywords, in output order
+SERVICE_KEYWORDS = [
+    ("s3", "S3"), ("lambda", "Lambda"), ("ec2", "EC2"), ("rds", "RDS"),
+    ("dynamodb", "DynamoDB"), ("cloudformation", "CloudFormation"),
+    ("iam", "IAM"), ("vpc", "VPC"), ("eks", "EKS"), ("ecs", "ECS")
+]
+
+# Column order of GenericRepositoryClassifier.classify_repository
+RESULT_COLUMNS = [
+    "repository", "url", "description", "created_date", "last_modified", "stars", "forks",
+    "solution_type", "competency", "customer_problems", "solution_marketing",
+    "deployment_tools", "deployment_level", "deployment_readiness", "primary_language",
+    "secondary_language", "framework", "aws_services",
+    "cost_range", "setup_time", "business_value", "target_audience", "use_case_category",
+    "integration_complexity", "maintenance_level", "scalability", "usp", "freshness_status",
+    "days_since_update", "genai_agentic", "topics", "classification_method", "classification_timestamp"
+]
+
+def load_cached_descriptions(content: str) -> Dict[str, str]:
+    """repository -> description of a results CSV (the README fallback text the classifier used)"""
+    if not content.strip():
+        return {}
+    return {row["repository"]: row.get("description") or ""
+            for row in csv.DictReader(io.StringIO(content))}
+
+def text_column(values: List) -> pd.Series:
+    """Object column even when empty (an empty list would become float64 and break the .str accessor)"""
+    return pd.Series(values, dtype=object)
+
+def build_repo_frame(repos: List[Dict], cached_descriptions: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Master index entries as columns; a missing description falls back to the cached text"""
+    cached_descriptions = cached_descriptions or {}
+    full_names = [repo["full_name"] for repo in repos]
+    return pd.DataFrame({
+        "full_name": text_column(full_names),
+        "name": text_column([repo.get("name") or "" for repo in repos]),
+        "html_url": text_column([repo.get("html_url") or "" for repo in repos]),
+        "description": text_column([repo.get("description") or cached_descriptions.get(name, "")
+                                    for repo, name in zip(repos, full_names)]),
+        "topics": text_column([repo.get("topics") or [] for repo in repos]),
+        "language": text_column([repo.get("language") for repo in repos]),
+        "stars": np.array([repo.get("stargazers_count") or 0 for repo in repos], dtype=np.int64),
+        "forks": np.array([repo.get("forks_count") or 0 for repo in repos], dtype=np.int64),
+        "created_at": text_column([repo.get("created_at", "") for repo in repos]),
+        "updated_at": text_column([repo.get("updated_at") or "" for repo in repos]),
+    })
+
+def keyword_mask(text: pd.Series, keywords: List[str]) -> np.ndarray:
+    """Rows whose text contains any of the keywords (substring match, like `word in text`)"""
+    pattern = "|".join(re.escape(keyword) for keyword in keywords)
+    return text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+def vectorized_rule_labels(parts: Dict[str, pd.Series], ruleset: str = "generic",
+                           path: str = RULES_PATH) -> Dict[str, np.ndarray]:
+    """Every dimension of a classification_rules.json ruleset, one boolean mask per category;
+    parts: part name -> lowercased text column"""
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)[ruleset]
+
+    fields = {}
+    for name, field_parts in rules["fields"].items():
+        text = parts[field_parts[0]]
+        for part in field_parts[1:]:
+            text = text + " " + parts[part]
+        fields[name] = text
+
+    labels = {}
+    for dimension, rule in rules["dimensions"].items():
+        text = fields[rule["field"]]
+        masks = [keyword_mask(text, category["keywords"]) for category in rule["categories"]]
+        choices = [category["label"] for category in rule["categories"]]
+        # np.select takes the first matching condition, i.e. the first category in rule order
+        labels[dimension] = np.select(masks, choices, default=rule["default"]).astype(object)
+    return labels
+
+def star_tiers(stars: np.ndarray, high: str, medium: str, low: str,
+               high_above: int = 5000, medium_above: int = 1000) -> np.ndarray:
+    return np.select([stars > high_above, stars > medium_above], [high, medium], default=low).astype(object)
+
+def aws_services_column(desc_lower: pd.Series) -> np.ndarray:
+    """First three services mentioned, in get_aws_services keyword order, else 'Multiple'"""
+    services = np.full(len(desc_lower), "", dtype=object)
+    found = np.zeros(len(desc_lower), dtype=np.int64)
+    for keyword, service in SERVICE_KEYWORDS:
+        take = desc_lower.str.contains(keyword, regex=False).to_numpy(dtype=bool) & (found < 3)
+        services = np.where(take & (found > 0), services + ", " + service, np.where(take, service, services))
+        found += take
+    return np.where(found > 0, services, "Multiple").astype(object)
+
+def classify_frame(frame: pd.DataFrame, now: Optional[datetime] = None,
+                   method: str = "Offline Vectorized Analysis") -> pd.DataFrame:
+    """All 20 dimensions of GenericRepositoryClassifier.classify_repository for every row"""
+    now = now or datetime.now(timezone.utc)
+    count = len(frame)
+    stars = frame["stars"].to_numpy()
+
+    name_lower = frame["name"].str.lower()
+    desc_lower = frame["description"].str.lower()
+    topics_text = frame["topics"].map(" ".join).str.lower()
+    labels = vectorized_rule_labels({"name": name_lower, "description": desc_lower, "topics": topics_text})
+
+    deployment_tools = np.select(
+        [name_lower.str.contains("cdk", regex=False).to_numpy(dtype=bool),
+         name_lower.str.contains("terraform", regex=False).to_numpy(dtype=bool),
+         name_lower.str.contains("cloudformation|cfn", regex=True).to_numpy(dtype=bool)],
+        ["CDK", "Terraform", "CloudFormation"], default="Manual").astype(object)
+
+    language = frame["language"]
+    language_lower = language.fillna("").str.lower()
+    framework = np.select(
+        [(language_lower == "python").to_numpy(), (language_lower == "javascript").to_numpy(),
+         (language_lower == "java").to_numpy()],
+        ["Python/Flask/Django", "Node.js/React", "Spring/Maven"], default="Standard").astype(object)
+
+    star_text = frame["stars"].astype(str).to_numpy(dtype=object)
+    usp = np.select(
+        [stars > 5000, stars > 1000],
+        ["Highly popular community solution (" + star_text + "+ stars)",
+         "Popular community solution (" + star_text + "+ stars)"],
+        default="Reliable solution").astype(object)
+
+    updated = pd.to_datetime(frame["updated_at"], utc=True, errors="coerce", format="ISO8601")
+    age = (pd.Timestamp(now) - updated).dt.days
+    valid = age.notna().to_numpy()
+    days = age.fillna(0).to_numpy(dtype=np.int64)
+    freshness = np.select([~valid, days < 30, days < 365],
+                          ["Unknown", "Recently Updated", "Actively Maintained"], default="Legacy").astype(object)
+
+    columns = {
+        "repository": frame["full_name"].to_numpy(dtype=object),
+        "url": frame["html_url"].to_numpy(dtype=object),
+        "description": frame["description"].to_numpy(dtype=object),
+        "created_date": frame["created_at"].to_numpy(dtype=object),
+        "last_modified": frame["updated_at"].to_numpy(dtype=object),
+        "stars": stars,
+        "forks": frame["forks"].to_numpy(),
+        "solution_type": labels["solution_type"],
+        "competency": labels["competency"],
+        "customer_problems": labels["customer_problems"],
+        "solution_marketing": labels["solution_marketing"],
+        "deployment_tools": deployment_tools,
+        "deployment_readiness": star_tiers(stars, "Production Ready", "Beta Ready", "Development", 1000, 100),
+        "primary_language": language.fillna("Multiple").replace("", "Multiple").to_numpy(dtype=object),
+        "framework": framework,
+        "aws_services": aws_services_column(desc_lower),
+        "cost_range": star_tiers(stars, "High ($10K+)", "Medium ($1K-10K)", "Low (<$1K)"),
+        "setup_time": star_tiers(stars, "Full-day Setup (4-8 hours)", "Half-day Setup (1-4 hours)",
+                                 "Quick Setup (< 1 hour)"),
+        "usp": usp,
+        "freshness_status": freshness,
+        "days_since_update": days,
+        "genai_agentic": labels["genai_agentic"],
+        "topics": frame["topics"].map(", ".join).to_numpy(dtype=object),
+        "classification_method": np.full(count, method, dtype=object),
+        "classification_timestamp": np.full(count, datetime.now().isoformat(), dtype=object),
+    }
+    for dimension, value in CONSTANT_DIMENSIONS.items():
+        columns[dimension] = np.full(count, value, dtype=object)
+    return pd.DataFrame({column: columns[column] for column in RESULT_COLUMNS})
+
+def results_frame_to_csv(results: pd.DataFrame) -> str:
+    """Same CSV layout as the csv.DictWriter output of the row-by-row classifiers"""
+    return results.to_csv(index=False, lineterminator="\r\n")
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-label an organization\'s repos offline from S3 data')
+    parser.add_argument('--org', required=True, help='GitHub organization name (e.g. aws-samples)')
+    parser.add_argument('--cached-results', default='results/classification_results.csv',
+                        help='Results CSV whose descriptions stand in for README fallbacks')
+    parser.add_argument('--output-key', default='results/offline_classification_results.csv',
+                        help='S3 key for the re-labelled CSV')
+
+    args = parser.parse_args()
+
+    import boto3
+    s3_client = boto3.client('s3')
+    bucket_name = f'aws-github-repo-classification-{args.org.lower()}'
+
+    repos = read_master_index(s3_client, bucket_name, f'master-index/{args.org}_repos.json')
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=args.cached_results)
+        cached = load_cached_descriptions(response['Body'].read().decode('utf-8'))
+    except Exception as e:
+        print(f"⚠️  No cached descriptions ({e}); repos without a description get an empty one")
+        cached = {}
+
+    start = datetime.now()
+    results = classify_frame(build_repo_frame(repos, cached))
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"⚡ Re-labelled {len(results)} repositories in {elapsed:.2f}s")
+
+    s3_client.put_object(Bucket=bucket_name, Key=args.output_key,
+                         Body=results_frame_to_csv(results), ContentType='text/csv')
+    print(f"💾 Saved s3://{bucket_name}/{args.output_key}")
+
+if __name__ == "__main__":
+    main()
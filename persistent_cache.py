@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Persistent GitHub Response Cache
+SQLite-backed README/topics cache keyed by full_name that survives crashes and rate-limit restarts
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+class PersistentGitHubCache:
+    def __init__(self, path: str = 'github_cache.sqlite'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS github_cache (
+                full_name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                content TEXT NOT NULL,
+                etag TEXT,
+                pushed_at TEXT,
+                fetched_at TEXT NOT NULL,
+                PRIMARY KEY (full_name, kind)
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, full_name: str, kind: str) -> Optional[Dict]:
+        """Cached entry as {content, etag, pushed_at, fetched_at} or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT content, etag, pushed_at, fetched_at FROM github_cache WHERE full_name = ? AND kind = ?',
+                (full_name, kind)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "content": json.loads(row[0]),
+            "etag": row[1],
+            "pushed_at": row[2],
+            "fetched_at": row[3]
+        }
+
+    def put(self, full_name: str, kind: str, content, etag: Optional[str] = None,
+            pushed_at: Optional[str] = None) -> None:
+        """Insert or replace an entry"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO github_cache (full_name, kind, content, etag, pushed_at, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (full_name, kind, json.dumps(content), etag, pushed_at, datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def touch(self, full_name: str, kind: str, pushed_at: Optional[str]) -> None:
+        """Record that a 304 revalidation confirmed the entry for this pushed_at"""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE github_cache SET pushed_at = ?, fetched_at = ? WHERE full_name = ? AND kind = ?',
+                (pushed_at, datetime.now().isoformat(), full_name, kind)
+            )
+            self.conn.commit()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM github_cache').fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Multi-Token Rate Limit Scheduler
+Spreads GitHub requests over each token's reset window and rotates across a token pool
+instead of sleeping for an hour when one token runs dry
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from run_metrics import get_metrics
+
+class TokenState:
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self.limit = None  # X-RateLimit-Limit, unknown until the first response
+        self.remaining = None  # X-RateLimit-Remaining
+        self.reset_at = 0.0  # X-RateLimit-Reset (epoch seconds)
+        self.blocked_until = 0.0  # Set by exhausted budgets and Retry-After
+        self.next_allowed = 0.0  # Pacing: earliest time of the next request
+
+    def available_at(self, now: float) -> float:
+        """Earliest time this token may send a request"""
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at > now:
+            return max(self.reset_at, self.blocked_until, self.next_allowed)
+        return max(self.blocked_until, self.next_allowed)
+
+class RateLimitScheduler:
+    def __init__(self, tokens: List[Optional[str]], pace_below: float = 0.2,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        """pace_below: once a token has less than this fraction of its limit left, its remaining
+        requests are spread evenly until the reset instead of being sent back-to-back (1.0 = always pace)"""
+        self.states = [TokenState(token) for token in (tokens or [None])]
+        self.by_token = {state.token: state for state in self.states}
+        self.pace_below = pace_below
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.total_wait = 0.0
+        self.rate_limited_responses = 0
+        self.long_wait = 60.0
+        self.on_long_wait = None  # Called with the wait (seconds) before sleeping longer than long_wait
+
+    def acquire(self) -> Optional[str]:
+        """Reserve a request slot and return the token to send it with (may wait for pacing)"""
+        with self.lock:
+            now = self.clock()
+            state = min(self.states, key=lambda s: (s.available_at(now), -(s.remaining or 0)))
+            wait = max(0.0, state.available_at(now) - now)
+            start = now + wait
+
+            if state.remaining is not None:
+                if state.reset_at <= start and state.limit:
+                    # Window rolled over while we weren't looking
+                    state.remaining = state.limit
+                state.remaining -= 1
+                if state.limit and state.remaining < state.limit * self.pace_below and state.reset_at > start:
+                    state.next_allowed = start + (state.reset_at - start) / max(state.remaining, 1)
+            self.total_wait += wait
+
+        if wait > 0:
+            if wait > self.long_wait:
+                print(f"⏳ All {len(self.states)} token(s) exhausted - waiting {wait:.0f}s until "
+                      f"{datetime.fromtimestamp(start).strftime('%H:%M:%S')}")
+            if self.on_long_wait and wait > self.long_wait:
+                self.on_long_wait(wait)
+            with get_metrics().timer('rate_limit_wait', source='token_pool'):
+                self.sleep(wait)
+        return state.token
+
+    def observe(self, response, token: Optional[str] = None) -> bool:
+        """Record rate-limit headers from a response; True means it was rate limited and should be retried"""
+        if token is None:
+            token = self.token_from_request(response)
+        headers = response.headers
+
+        with self.lock:
+            state = self.by_token.get(token) or self.states[0]
+            now = self.clock()
+
+            if headers.get('X-RateLimit-Limit'):
+                state.limit = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Remaining') is not None:
+                state.remaining = int(headers['X-RateLimit-Remaining'])
+            if headers.get('X-RateLimit-Reset'):
+                state.reset_at = float(headers['X-RateLimit-Reset'])
+
+            if response.status_code not in (403, 429):
+                return False
+
+            retry_after = headers.get('Retry-After')
+            if retry_after:
+                # Secondary (abuse) limit: back off this token for the requested time
+                state.blocked_until = max(state.blocked_until, now + float(retry_after))
+            elif state.remaining == 0:
+                state.blocked_until = max(state.blocked_until, state.reset_at + 1)
+            else:
+                return False  # A plain 403 (permissions etc.), not a rate limit
+
+            self.rate_limited_responses += 1
+            return True
+
+    def token_from_request(self, response) -> Optional[str]:
+        """Recover which pool token a requests.Response was sent with"""
+        request = getattr(response, 'request', None)
+        auth = request.headers.get('Authorization', '') if request is not None else ''
+        token = auth.split(' ', 1)[1] if ' ' in auth else None
+        return token if token in self.by_token else self.states[0].token
+
+    def status(self) -> Dict:
+        now = self.clock()
+        return {
+            "tokens": len(self.states),
+            "remaining": sum(s.remaining or 0 for s in self.states),
+            "waited_seconds": round(self.total_wait, 1),
+            "rate_limited_responses": self.rate_limited_responses,
+            "next_available_in": round(max(0.0, min(s.available_at(now) for s in self.states) - now), 1)
+        }
+
+def parse_token_args(values: Optional[List[str]]) -> List[str]:
+    """Flatten repeated/comma-separated --github-token values, dropping blanks and duplicates"""
+    tokens = []
+    for value in values or []:
+        for token in value.split(','):
+            token = token.strip()
+            if token and token not in tokens:
+                tokens.append(token)
+    return tokens
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Parallel Organization Repository Lister
+Reads the first page's Link rel="last" header and fetches the remaining pages concurrently
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+from github_http import get_api_url, get_http_client
+
+def page_url(url: str, page: int) -> str:
+    """Same listing URL with the page query parameter replaced"""
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    query['page'] = [str(page)]
+    return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+
+def last_page_number(response) -> Optional[int]:
+    """Page number from Link rel="last", or None when the header has no last link"""
+    last = response.links.get('last')
+    if not last:
+        return None
+    try:
+        return int(parse_qs(urlparse(last['url']).query)['page'][0])
+    except (KeyError, ValueError, IndexError):
+        return None
+
+def list_org_repos(org_name: str, per_page: int = 100, max_workers: int = 32,
+                   add_auth_header: Optional[Callable[[Dict], Dict]] = None,
+                   api_url: Optional[str] = None, handle_rate_limit: Optional[Callable] = None,
+                   max_retries: int = 3) -> Optional[List[Dict]]:
+    """All repositories of an organization in page order, deduplicated by id.
+
+    add_auth_header is called for every request so token pools can rotate per page; handle_rate_limit
+    (the classifier's, returns True when the request should be retried) paces 403/429 responses, and
+    5xx/connection errors are retried with backoff. Returns None when any page still failed, so a
+    partial listing is never mistaken for the whole organization.
+    """
+    http = get_http_client()
+    base_url = f"{api_url or get_api_url()}/orgs/{org_name}/repos?page=1&per_page={per_page}"
+
+    def fetch(url: str, page: int):
+        """Response for one page, or None once every attempt failed"""
+        for attempt in range(max_retries):
+            headers = add_auth_header({}) if add_auth_header else {}
+            try:
+                response = http.get(url, headers=headers)
+            except Exception as e:
+                print(f"API request failed on page {page} (attempt {attempt + 1}/{max_retries}): {e}")
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code == 200:
+                return response
+            if handle_rate_limit and handle_rate_limit(response):
+                continue
+            print(f"API Error on page {page}: {response.status_code} (attempt {attempt + 1}/{max_retries})")
+            if response.status_code < 500:
+                return None
+            time.sleep(2 ** attempt)
+        return None
+
+    first = fetch(base_url, 1)
+    if first is None:
+        return None
+
+    pages = {1: first.json()}
+    print(f"Fetched page 1: {len(pages[1])} repos")
+    last_page = last_page_number(first)
+
+    if last_page and last_page > 1:
+        # Later pages come from the URL GitHub handed back (it may rewrite /orgs/x to /organizations/id)
+        last_url = first.links['last']['url']
+        page_numbers = list(range(2, last_page + 1))
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            responses = executor.map(lambda page: (page, fetch(page_url(last_url, page), page)), page_numbers)
+            failed = []
+            for page, response in responses:
+                if response is None:
+                    failed.append(page)
+                    continue
+                pages[page] = response.json()
+        if failed:
+            print(f"❌ Listing incomplete: pages {failed} failed")
+            return None
+        print(f"Fetched pages 2-{last_page} concurrently ({max_workers} workers)")
+    elif 'next' in first.links:
+        # No rel="last" (GitHub omits it on some endpoints): follow rel="next" one page at a time
+        response = first
+        page = 1
+        while 'next' in response.links:
+            page += 1
+            response = fetch(response.links['next']['url'], page)
+            if response is None:
+                print(f"❌ Listing incomplete: page {page} failed")
+                return None
+            pages[page] = response.json()
+            print(f"Fetched page {page}: {len(pages[page])} repos")
+
+    repos = []
+    seen_ids = set()
+    for page in sorted(pages):
+        for repo in pages[page]:
+            # Repos created/deleted mid-listing shift page boundaries and can appear twice
+            repo_id = repo.get('id', repo.get('full_name'))
+            if repo_id in seen_ids:
+                continue
+            seen_ids.add(repo_id)
+            repos.append(repo)
+    return repos
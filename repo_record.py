@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Compact Repository Record
+Slotted, read-only stand-in for a GitHub listing dict: interned language/topic strings, int stars/forks
+and created/updated/pushed datetimes parsed once when the record is built
+"""
+
+import re
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+# Listing fields read by the classifiers, the incremental refresh and the offline re-classifier
+REPO_FIELDS = (
+    "name", "full_name", "html_url", "description", "language", "stargazers_count", "forks_count",
+    "topics", "created_at", "updated_at", "pushed_at"
+)
+FIELD_SET = frozenset(REPO_FIELDS)
+
+# GitHub's timestamp shape; such a value always rebuilds exactly from its parsed datetime
+GITHUB_TIMESTAMP = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ', re.ASCII)
+
+def parse_github_datetime(value) -> Optional[datetime]:
+    """'2025-10-01T12:00:00Z' -> datetime (None when missing or unparseable)"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def format_github_datetime(value: Optional[datetime]) -> Optional[str]:
+    """Inverse of parse_github_datetime for GitHub's own UTC, whole-second timestamps"""
+    if value is None:
+        return None
+    # isoformat() is 'YYYY-MM-DDTHH:MM:SS+00:00' for those, and much cheaper than strftime
+    return value.isoformat()[:-6] + 'Z'
+
+class RepoRecord(Mapping):
+    """Only the fields classification reads; repo.get('stargazers_count') / repo['full_name']
+    work as on the API dict, record.created / record.updated / record.pushed are the parsed timestamps.
+
+    html_url and the *_at strings are not stored when they can be rebuilt exactly from full_name
+    and the parsed datetimes (always, for GitHub's own values); anything else is kept in extra.
+    """
+
+    __slots__ = ("name", "full_name", "description", "language", "stargazers_count", "forks_count",
+                 "topics", "created", "updated", "pushed", "extra")
+
+    def __init__(self, name=None, full_name=None, html_url=None, description=None, language=None,
+                 stargazers_count=0, forks_count=0, topics=None, created_at=None, updated_at=None,
+                 pushed_at=None):
+        self.name = name
+        self.full_name = full_name
+        self.description = description
+        # Few distinct languages/topics across thousands of repos: share one string object each
+        self.language = sys.intern(language) if isinstance(language, str) else language
+        self.stargazers_count = int(stargazers_count or 0)
+        self.forks_count = int(forks_count or 0)
+        self.topics = [sys.intern(topic) for topic in topics] if topics else []
+        self.created = parse_github_datetime(created_at)
+        self.updated = parse_github_datetime(updated_at)
+        self.pushed = parse_github_datetime(pushed_at)
+
+        # Only values that rebuild exactly from full_name / the datetimes are dropped; the rest are kept as given
+        self.extra = None
+        if full_name is None or html_url != f"https://github.com/{full_name}":
+            self.keep("html_url", html_url)
+        match = GITHUB_TIMESTAMP.fullmatch
+        if created_at is not None and (self.created is None or not match(created_at)):
+            self.keep("created_at", created_at)
+        if updated_at is not None and (self.updated is None or not match(updated_at)):
+            self.keep("updated_at", updated_at)
+        if pushed_at is not None and (self.pushed is None or not match(pushed_at)):
+            self.keep("pushed_at", pushed_at)
+
+    def keep(self, field: str, value) -> None:
+        if self.extra is None:
+            self.extra = {}
+        self.extra[field] = value
+
+    def default_html_url(self) -> str:
+        return f"https://github.com/{self.full_name}"
+
+    def stored(self, field: str, rebuild):
+        if self.extra is not None and field in self.extra:
+            return self.extra[field]
+        return rebuild()
+
+    @property
+    def html_url(self) -> Optional[str]:
+        return self.stored("html_url", self.default_html_url)
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return self.stored("created_at", lambda: format_github_datetime(self.created))
+
+    @property
+    def updated_at(self) -> Optional[str]:
+        return self.stored("updated_at", lambda: format_github_datetime(self.updated))
+
+    @property
+    def pushed_at(self) -> Optional[str]:
+        return self.stored("pushed_at", lambda: format_github_datetime(self.pushed))
+
+    @classmethod
+    def from_api(cls, repo) -> "RepoRecord":
+        """Record of a listing entry (an API dict, a slim dict or a record)"""
+        if isinstance(repo, RepoRecord):
+            return repo
+        get = repo.get
+        return cls(get("name"), get("full_name"), get("html_url"), get("description"), get("language"),
+                   get("stargazers_count"), get("forks_count"), get("topics"), get("created_at"),
+                   get("updated_at"), get("pushed_at"))
+
+    def __getitem__(self, key: str):
+        if key not in FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        if key not in FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in FIELD_SET
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(REPO_FIELDS)
+
+    def __len__(self) -> int:
+        return len(REPO_FIELDS)
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in REPO_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"RepoRecord({self.full_name!r}, stars={self.stargazers_count})"
+
+    def __reduce__(self):
+        return (RepoRecord.from_api, (self.to_dict(),))
+
+def updated_datetime(repo) -> Optional[datetime]:
+    """Parsed updated_at of a record (already parsed) or of a plain listing dict"""
+    if isinstance(repo, RepoRecord):
+        return repo.updated
+    return parse_github_datetime(repo.get("updated_at"))
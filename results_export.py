@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Columnar Results Export
+Converts classification rows to an Arrow table (dictionary-encoded categories, typed int/timestamp
+columns, list columns for AWS services and topics) and writes it as Parquet or Arrow IPC
+"""
+
+import argparse
+import csv
+import io
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+INT_COLUMNS = {"stars", "forks", "days_since_update"}
+TIMESTAMP_COLUMNS = {"created_date", "last_modified", "classification_timestamp"}
+LIST_COLUMNS = {"aws_services", "topics"}
+# Free text / unique per repo; every other string column is a low-cardinality category
+TEXT_COLUMNS = {"repository", "url", "description", "usp", "prerequisites", "copyright_holder"}
+
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+def parse_int(value) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """ISO 8601 as written by GitHub ('...Z') or datetime.isoformat(); naive values are taken as UTC"""
+    if isinstance(value, datetime):
+        parsed = value
+    elif not value:
+        return None
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def split_list(value) -> List[str]:
+    """'S3, Lambda' -> ['S3', 'Lambda'] (lists pass through)"""
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    if value is None or value == "":
+        return []
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+def column_array(name: str, values: List) -> pa.Array:
+    if name in INT_COLUMNS:
+        return pa.array([parse_int(value) for value in values], type=pa.int64())
+    if name in TIMESTAMP_COLUMNS:
+        return pa.array([parse_timestamp(value) for value in values], type=pa.timestamp('us', tz='UTC'))
+    if name in LIST_COLUMNS:
+        return pa.array([split_list(value) for value in values], type=pa.list_(pa.string()))
+    strings = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+    if name in TEXT_COLUMNS:
+        return strings
+    return strings.dictionary_encode()
+
+def results_to_table(rows: List[Dict]) -> pa.Table:
+    """Arrow table of classification rows (dicts from the classifiers or rows of a results CSV)"""
+    if not rows:
+        return pa.table({})
+    columns = list(rows[0].keys())
+    return pa.table({name: column_array(name, [row.get(name) for row in rows]) for name in columns})
+
+def table_to_bytes(table: pa.Table, fmt: str = 'parquet') -> bytes:
+    """Parquet (zstd, dictionary pages) or Arrow IPC file (lz4) bytes"""
+    sink = io.BytesIO()
+    if fmt == 'parquet':
+        pq.write_table(table, sink, compression='zstd')
+    elif fmt == 'arrow':
+        with ipc.new_file(sink, table.schema, options=ipc.IpcWriteOptions(compression='lz4')) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return sink.getvalue()
+
+def read_table(source, fmt: Optional[str] = None, columns: Optional[List[str]] = None) -> pa.Table:
+    """Read an exported file (path or bytes), optionally only some columns"""
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+        fmt = fmt or 'parquet'
+    else:
+        fmt = fmt or ('arrow' if str(source).endswith('.arrow') else 'parquet')
+    if fmt == 'parquet':
+        return pq.read_table(source, columns=columns)
+    table = ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+def read_csv_rows(path: str) -> List[Dict]:
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def export_results_to_s3(s3_client, bucket_name: str, key: str, rows: List[Dict], fmt: str = 'parquet') -> int:
+    """Upload rows as one Parquet/Arrow object; returns its size in bytes"""
+    body = table_to_bytes(results_to_table(rows), fmt)
+    content_type = 'application/vnd.apache.parquet' if fmt == 'parquet' else 'application/vnd.apache.arrow.file'
+    s3_client.put_object(Bucket=bucket_name, Key=key, Body=body, ContentType=content_type)
+    return len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a classification results CSV to Parquet or Arrow IPC')
+    parser.add_argument('csv_path', help='Results CSV (e.g. aws_samples_classification.csv)')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='parquet', help='Output format')
+    parser.add_argument('--output', help='Output path (default: CSV path with the format extension)')
+
+    args = parser.parse_args()
+
+    rows = read_csv_rows(args.csv_path)
+    output = args.output or os.path.splitext(args.csv_path)[0] + EXPORT_FORMATS[args.format]
+    body = table_to_bytes(results_to_table(rows), args.format)
+    with open(output, 'wb') as f:
+        f.write(body)
+    print(f"💾 {len(rows)} rows: {os.path.getsize(args.csv_path) / 1e6:.2f} MB CSV -> {len(body) / 1e6:.2f} MB {args.format} ({output})")
+
+if __name__ == "__main__":
+    main()
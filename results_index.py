@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Results Inverted Index
+Indexes a classification results CSV once (description/topic/name tokens, each aws_services value,
+categorical columns as bitset facets, numeric/date columns for ranges) and answers boolean and faceted
+queries with counts in milliseconds; the index is saved next to the results and updated incrementally
+"""
+
+import argparse
+import base64
+import bisect
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx.json.gz'
+
+# Free text: tokenized, not faceted
+TEXT_COLUMNS = ("repository", "description", "topics", "usp")
+# Comma-separated multi-value columns: one facet entry per value
+LIST_COLUMNS = frozenset(["aws_services", "topics", "deployment_tools", "customer_problems", "additional_languages",
+                          "frameworks", "framework", "secondary_language", "prerequisites"])
+NUMERIC_COLUMNS = frozenset(["stars", "forks", "days_since_update"])
+TIMESTAMP_COLUMNS = frozenset(["created_date", "last_modified"])
+# Unique per repo or run metadata: neither facets nor tokens
+SKIPPED_COLUMNS = frozenset(["url", "classification_timestamp", "copyright_holder"])
+# Single-valued columns with more distinct values than this share of rows are not facets
+MAX_FACET_CARDINALITY = 0.2
+
+FIELD_ALIASES = {
+    "service": "aws_services", "services": "aws_services", "aws": "aws_services", "lang": "primary_language",
+    "language": "primary_language", "topic": "topics", "type": "solution_type", "marketing": "solution_marketing",
+    "genai": "genai_agentic", "tools": "deployment_tools", "text": None,
+}
+STOPWORDS = frozenset(["a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "by", "is", "aws", "amazon",
+                       "sample", "samples", "using", "use", "how"])
+TOKEN = re.compile(r'[a-z0-9]+')
+QUERY_TOKEN = re.compile(r'\(|\)|-?[A-Za-z_]+:(?:"[^"]*"|[^\s()]+)|-?"[^"]*"|[^\s()]+')
+RANGE = re.compile(r'^(<=|>=|<|>)?\s*(-?\d+(?:\.\d+)?)([dwmy]?)$|^(-?\d+(?:\.\d+)?)\.\.(-?\d+(?:\.\d+)?)$')
+DAYS_PER_UNIT = {"": 1, "d": 1, "w": 7, "m": 30, "y": 365}
+
+if hasattr(int, 'bit_count'):  # Python 3.10+
+    popcount = int.bit_count
+else:
+    def popcount(bits: int) -> int:
+        return bin(bits).count('1')
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN.findall((text or '').lower()) if len(token) > 1 and token not in STOPWORDS]
+
+def split_values(value) -> List[str]:
+    return [item.strip() for item in str(value or '').split(',') if item.strip()]
+
+def parse_number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_epoch(value) -> Optional[float]:
+    """GitHub/isoformat timestamp -> epoch seconds (naive values are UTC)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+def bits_from_ids(doc_ids: Iterable[int], size: int) -> int:
+    """Bitset of doc ids, built through a bytearray (setting bits on an int one by one is quadratic)"""
+    buffer = bytearray((size + 7) // 8)
+    for doc in doc_ids:
+        buffer[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(buffer, 'little')
+
+def ids_from_bits(bits: int) -> Iterator[int]:
+    """Doc ids of a bitset in ascending order"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for offset, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (offset << 3) + low.bit_length() - 1
+            byte ^= low
+
+def encode_bits(bits: int) -> str:
+    return base64.b64encode(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')).decode('ascii')
+
+def decode_bits(text: str) -> int:
+    return int.from_bytes(base64.b64decode(text), 'little')
+
+def row_hash(row: Dict) -> str:
+    return hashlib.blake2b(json.dumps(row, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+
+class QueryError(ValueError):
+    """Malformed query or unknown field"""
+
+class ResultsIndex:
+    """Categorical columns and aws_services values are bitset facets (Python ints: AND/OR/NOT and popcount
+    run in C over a few hundred machine words); text tokens are sorted doc-id posting lists, turned into a
+    bitset when a query touches them; numeric and date columns are sorted (value, doc) lists for ranges"""
+
+    def __init__(self):
+        self.docs = []  # doc id -> repository (None once removed)
+        self.doc_ids = {}  # repository -> doc id
+        self.rows = []  # doc id -> indexed fields of the row, to unindex it on update
+        self.hashes = []  # doc id -> row_hash of the full row
+        self.live = 0  # Bitset of docs not removed
+        self.facet_columns = []
+        self.facets = {}  # column -> value -> bitset
+        self.facet_keys = {}  # column -> lowercase value -> value
+        self.postings = {}  # token -> sorted doc ids
+        self.numeric = {}  # column -> doc id -> value
+        self.sorted_numeric = {}  # column -> (values, doc ids) sorted by value, rebuilt when stale
+        self.token_bits = {}  # token -> bitset, cached per query session
+        self.source = {}
+
+    # Building
+
+    @classmethod
+    def build(cls, rows: List[Dict]) -> 'ResultsIndex':
+        index = cls()
+        index.facet_columns = choose_facet_columns(rows)
+        index.update(rows)
+        return index
+
+    def indexed_fields(self, row: Dict) -> Dict:
+        fields = {column: row.get(column) or '' for column in TEXT_COLUMNS if column in row}
+        for column in self.facet_columns:
+            fields[column] = row.get(column) or ''
+        for column in NUMERIC_COLUMNS | TIMESTAMP_COLUMNS:
+            if column in row:
+                fields[column] = row.get(column) or ''
+        return fields
+
+    def terms(self, fields: Dict) -> Tuple[List[Tuple[str, str]], set, Dict[str, float]]:
+        """(facet (column, value) pairs, text tokens, numeric values) of a doc"""
+        facets = []
+        for column in self.facet_columns:
+            values = split_values(fields.get(column)) if column in LIST_COLUMNS else [str(fields.get(column) or '').strip()]
+            facets.extend((column, value) for value in values if value)
+        tokens = set()
+        for column in TEXT_COLUMNS:
+            text = fields.get(column) or ''
+            if column == 'repository':
+                text = text.split('/', 1)[-1]
+            tokens.update(tokenize(text))
+        numbers = {}
+        for column in NUMERIC_COLUMNS:
+            number = parse_number(fields.get(column))
+            if number is not None:
+                numbers[column] = number
+        for column in TIMESTAMP_COLUMNS:
+            epoch = parse_epoch(fields.get(column))
+            if epoch is not None:
+                numbers[column] = epoch
+        return facets, tokens, numbers
+
+    def add_doc(self, doc: int, row: Dict) -> None:
+        fields = self.indexed_fields(row)
+        self.rows[doc] = fields
+        self.hashes[doc] = row_hash(row)
+        self.docs[doc] = row['repository']
+        self.doc_ids[row['repository']] = doc
+        bit = 1 << doc
+        self.live |= bit
+        facets, tokens, numbers = self.terms(fields)
+        for column, value in facets:
+            values = self.facets.setdefault(column, {})
+            values[value] = values.get(value, 0) | bit
+            self.facet_keys.setdefault(column, {})[value.lower()] = value
+        for token in tokens:
+            posting = self.postings.setdefault(token, [])
+            if not posting or posting[-1] < doc:
+                posting.append(doc)
+            else:
+                bisect.insort(posting, doc)
+        for column, number in numbers.items():
+            column_values = self.numeric.setdefault(column, {})
+            column_values[doc] = number
+            self.sorted_numeric.pop(column, None)
+
+    def remove_doc(self, doc: int) -> None:
+        fields = self.rows[doc]
+        bit = 1 << doc
+        self.live &= ~bit
+        facets, tokens, numbers = self.terms(fields)
+        for column, value in facets:
+            remaining = self.facets[column].get(value, 0) & ~bit
+            if remaining:
+                self.facets[column][value] = remaining
+            else:
+                self.facets[column].pop(value, None)
+                self.facet_keys[column].pop(value.lower(), None)
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            position = bisect.bisect_left(posting, doc)
+            if position < len(posting) and posting[position] == doc:
+                del posting[position]
+            if not posting:
+                del self.postings[token]
+        for column in numbers:
+            self.numeric[column].pop(doc, None)
+            self.sorted_numeric.pop(column, None)
+        self.doc_ids.pop(self.docs[doc], None)
+        self.docs[doc] = None
+        self.rows[doc] = None
+
+    def update(self, rows: List[Dict]) -> Dict[str, int]:
+        """Make the index match rows (the whole results file): unchanged rows are skipped, changed rows
+        are re-indexed under their doc id, new rows get new ids and missing ones are removed"""
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        for row in rows:
+            repository = row.get('repository')
+            if not repository or repository in seen:
+                continue
+            seen.add(repository)
+            doc = self.doc_ids.get(repository)
+            if doc is not None and self.hashes[doc] == row_hash(row):
+                stats["unchanged"] += 1
+                continue
+            if doc is not None:
+                self.remove_doc(doc)
+                stats["changed"] += 1
+            else:
+                doc = len(self.docs)
+                self.docs.append(None)
+                self.rows.append(None)
+                self.hashes.append(None)
+                stats["added"] += 1
+            self.add_doc(doc, row)
+        for repository in [name for name in self.doc_ids if name not in seen]:
+            self.remove_doc(self.doc_ids[repository])
+            stats["removed"] += 1
+        self.token_bits = {}
+        return stats
+
+    @property
+    def size(self) -> int:
+        return popcount(self.live)
+
+    # Querying
+
+    def token_bitset(self, token: str) -> int:
+        bits = self.token_bits.get(token)
+        if bits is None:
+            bits = bits_from_ids(self.postings.get(token, ()), len(self.docs))
+            self.token_bits[token] = bits
+        return bits
+
+    def facet_bitset(self, column: str, value: str) -> int:
+        key = self.facet_keys.get(column, {}).get(value.lower())
+        return self.facets[column][key] if key is not None else 0
+
+    def range_bitset(self, column: str, low: Optional[float], high: Optional[float],
+                     low_inclusive: bool = True, high_inclusive: bool = True) -> int:
+        if column not in self.sorted_numeric:
+            pairs = sorted((value, doc) for doc, value in self.numeric.get(column, {}).items())
+            self.sorted_numeric[column] = ([value for value, _ in pairs], [doc for _, doc in pairs])
+        values, docs = self.sorted_numeric[column]
+        start = 0 if low is None else (bisect.bisect_left if low_inclusive else bisect.bisect_right)(values, low)
+        end = len(values) if high is None else (bisect.bisect_right if high_inclusive else bisect.bisect_left)(values, high)
+        return bits_from_ids(docs[start:end], len(self.docs))
+
+    def term_bitset(self, term: str) -> int:
+        """Bitset for one query term: field:value, field:<n / >=n / a..b, updated:<90d, or a text word"""
+        if term.startswith('"') and term.endswith('"') and len(term) > 1:
+            bits = self.live
+            for token in tokenize(term[1:-1]):
+                bits &= self.token_bitset(token)
+            return bits
+        if ':' not in term:
+            tokens = tokenize(term)
+            bits = self.live if tokens else 0
+            for token in tokens:
+                bits &= self.token_bitset(token)
+            return bits
+
+        field, value = term.split(':', 1)
+        field = field.lower()
+        field = FIELD_ALIASES.get(field, field)
+        if value.startswith('"') and value.endswith('"') and len(value) > 1:
+            value = value[1:-1]
+        if field is None:
+            return self.term_bitset(f'"{value}"')
+        if field == 'updated':
+            return self.updated_bitset(value)
+        if field in self.numeric or field in NUMERIC_COLUMNS | TIMESTAMP_COLUMNS:
+            return self.numeric_bitset(field, value)
+        if field in self.facets or field in self.facet_columns:
+            return self.facet_bitset(field, value)
+        if field in TEXT_COLUMNS:
+            return self.term_bitset(f'"{value}"')
+        raise QueryError(f"Unknown field: {field} (facets: {', '.join(self.facet_columns)})")
+
+    def numeric_bitset(self, column: str, value: str) -> int:
+        match = RANGE.match(value.strip())
+        if not match:
+            raise QueryError(f"Bad range for {column}: {value}")
+        operator, number, unit, low, high = match.groups()
+        if low is not None:
+            return self.range_bitset(column, float(low), float(high))
+        number = float(number)
+        if column in TIMESTAMP_COLUMNS and unit:
+            number = time.time() - number * DAYS_PER_UNIT[unit] * 86400
+            # "<90d" on a date means "less than 90 days ago", i.e. after the cut-off
+            operator = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}.get(operator, operator)
+        if operator == '<':
+            return self.range_bitset(column, None, number, high_inclusive=False)
+        if operator == '<=':
+            return self.range_bitset(column, None, number)
+        if operator == '>':
+            return self.range_bitset(column, number, None, low_inclusive=False)
+        if operator == '>=':
+            return self.range_bitset(column, number, None)
+        return self.range_bitset(column, number, number)
+
+    def updated_bitset(self, value: str) -> int:
+        """updated:<90d - last_modified when the results have it, else days_since_update; a bare number
+        is days and no operator means at most that long ago, whichever column answers"""
+        match = RANGE.match(value.strip())
+        if not match or match.group(2) is None:
+            raise QueryError(f"Bad range for updated: {value}")
+        operator, number, unit = match.group(1) or '<=', match.group(2), match.group(3) or 'd'
+        if self.numeric.get('last_modified'):
+            return self.numeric_bitset('last_modified', f"{operator}{number}{unit}")
+        return self.numeric_bitset('days_since_update', f"{operator}{float(number) * DAYS_PER_UNIT[unit]}")
+
+    def evaluate(self, query: str) -> int:
+        """Bitset of docs matching a query: terms are ANDed, OR / NOT / -term / parentheses as usual"""
+        tokens = QUERY_TOKEN.findall(query)
+        position = 0
+
+        def peek() -> Optional[str]:
+            return tokens[position] if position < len(tokens) else None
+
+        def parse_or() -> int:
+            nonlocal position
+            bits = parse_and()
+            while peek() == 'OR':
+                position += 1
+                bits |= parse_and()
+            return bits
+
+        def parse_and() -> int:
+            nonlocal position
+            bits = self.live
+            matched = False
+            while peek() not in (None, ')', 'OR'):
+                if peek() == 'AND':
+                    position += 1
+                    continue
+                bits &= parse_unary()
+                matched = True
+            if not matched:
+                raise QueryError("Empty expression")
+            return bits
+
+        def parse_unary() -> int:
+            nonlocal position
+            token = peek()
+            if token is None:
+                raise QueryError("Expected a term")
+            position += 1
+            if token == 'NOT':
+                return self.live & ~parse_unary()
+            if token == '(':
+                bits = parse_or()
+                if peek() != ')':
+                    raise QueryError("Missing )")
+                position += 1
+                return bits
+            if token.startswith('-') and len(token) > 1:
+                return self.live & ~self.term_bitset(token[1:])
+            return self.term_bitset(token)
+
+        if not tokens:
+            return self.live
+        bits = parse_or()
+        if position != len(tokens):
+            raise QueryError(f"Unexpected {tokens[position]!r}")
+        return bits & self.live
+
+    def facet_counts(self, bits: int, columns: Iterable[str], top: int = 10) -> Dict[str, List[Tuple[str, int]]]:
+        """Per column, the most frequent values among the matching docs with their counts"""
+        counts = {}
+        for column in columns:
+            column = FIELD_ALIASES.get(column, column) or column
+            values = self.facets.get(column, {})
+            column_counts = [(value, popcount(bits & value_bits)) for value, value_bits in values.items()]
+            column_counts = [item for item in column_counts if item[1]]
+            column_counts.sort(key=lambda item: (-item[1], item[0]))
+            counts[column] = column_counts[:top]
+        return counts
+
+    def search(self, query: str, limit: int = 20, facets: Iterable[str] = (), sort: Optional[str] = 'stars') -> Dict:
+        """{count, repositories (up to limit, by sort column descending), facets, took_ms}"""
+        start = time.perf_counter()
+        bits = self.evaluate(query)
+        count = popcount(bits)
+        if sort and sort in self.numeric:
+            values = self.numeric[sort]
+            matches = list(ids_from_bits(bits))
+            matches.sort(key=lambda doc: -values.get(doc, float('-inf')))
+            matches = matches[:limit]
+        else:
+            matches = []
+            for doc in ids_from_bits(bits):
+                if len(matches) >= limit:
+                    break
+                matches.append(doc)
+        result = {
+            "count": count,
+            "repositories": [self.docs[doc] for doc in matches],
+            "facets": self.facet_counts(bits, facets),
+        }
+        result["took_ms"] = (time.perf_counter() - start) * 1000
+        return result
+
+    # Persistence
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": INDEX_VERSION,
+            "source": self.source,
+            "facet_columns": self.facet_columns,
+            "docs": self.docs,
+            "rows": self.rows,
+            "hashes": self.hashes,
+            "live": encode_bits(self.live),
+            "facets": {column: {value: encode_bits(bits) for value, bits in values.items()}
+                       for column, values in self.facets.items()},
+            # Delta-encoded: ascending ids turn into small numbers that gzip well
+            "postings": {token: [doc - previous for previous, doc in zip([0] + posting, posting)]
+                         for token, posting in self.postings.items()},
+            "numeric": {column: [[doc, value] for doc, value in values.items()] for column, values in self.numeric.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ResultsIndex':
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')}")
+        index = cls()
+        index.source = data.get("source") or {}
+        index.facet_columns = data["facet_columns"]
+        index.docs = data["docs"]
+        index.rows = data["rows"]
+        index.hashes = data["hashes"]
+        index.doc_ids = {repository: doc for doc, repository in enumerate(index.docs) if repository is not None}
+        index.live = decode_bits(data["live"])
+        index.facets = {column: {value: decode_bits(bits) for value, bits in values.items()}
+                        for column, values in data["facets"].items()}
+        index.facet_keys = {column: {value.lower(): value for value in values} for column, values in index.facets.items()}
+        for token, deltas in data["postings"].items():
+            posting = []
+            doc = 0
+            for delta in deltas:
+                doc += delta
+                posting.append(doc)
+            index.postings[token] = posting
+        index.numeric = {column: {doc: value for doc, value in pairs} for column, pairs in data["numeric"].items()}
+        return index
+
+    def to_bytes(self) -> bytes:
+        return gzip.compress(json.dumps(self.to_dict(), separators=(',', ':')).encode('utf-8'), compresslevel=6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ResultsIndex':
+        return cls.from_dict(json.loads(gzip.decompress(data)))
+
+def choose_facet_columns(rows: List[Dict]) -> List[str]:
+    """Columns indexed as facets: the multi-value list columns and low-cardinality single-value columns"""
+    if not rows:
+        return []
+    columns = []
+    limit = max(50, int(len(rows) * MAX_FACET_CARDINALITY))
+    for column in rows[0].keys():
+        if column in SKIPPED_COLUMNS or column in NUMERIC_COLUMNS or column in TIMESTAMP_COLUMNS:
+            continue
+        if column in LIST_COLUMNS:
+            columns.append(column)
+            continue
+        if column in TEXT_COLUMNS:
+            continue
+        distinct = set()
+        for row in rows:
+            distinct.add(row.get(column))
+            if len(distinct) > limit:
+                break
+        if len(distinct) <= limit:
+            columns.append(column)
+    return columns
+
+def read_rows(data: bytes) -> List[Dict]:
+    return list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+
+def source_fingerprint(data: bytes) -> Dict:
+    return {"bytes": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+def refresh_index(csv_data: bytes, index_data: Optional[bytes]) -> Tuple[ResultsIndex, Optional[Dict]]:
+    """Index for a results file: the saved one as is when the file hasn't changed, else the saved one
+    updated with the changed rows (or a fresh build). Returns (index, update stats or None when unchanged)"""
+    fingerprint = source_fingerprint(csv_data)
+    index = None
+    if index_data:
+        try:
+            index = ResultsIndex.from_bytes(index_data)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"⚠️  Rebuilding unreadable index: {e}")
+    if index is not None and index.source == fingerprint:
+        return index, None
+    rows = read_rows(csv_data)
+    if index is None or (rows and set(index.facet_columns) - set(rows[0].keys())):
+        index = ResultsIndex.build(rows)
+        stats = {"added": index.size, "changed": 0, "removed": 0, "unchanged": 0}
+    else:
+        stats = index.update(rows)
+        if sum(1 for doc in index.docs if doc is None) > len(index.docs) // 2:
+            # Mostly tombstones: renumber the docs
+            index = ResultsIndex.build(rows)
+    index.source = fingerprint
+    return index, stats
+
+def load_local(csv_path: str, index_path: Optional[str] = None) -> ResultsIndex:
+    """Index for a local results CSV, saved to <csv>.idx.json.gz when it had to be (re)built"""
+    index_path = index_path or csv_path + INDEX_SUFFIX
+    with open(csv_path, 'rb') as f:
+        csv_data = f.read()
+    index_data = None
+    if os.path.exists(index_path):
+        with open(index_path, 'rb') as f:
+            index_data = f.read()
+    index, stats = refresh_index(csv_data, index_data)
+    if stats is not None:
+        with open(index_path, 'wb') as f:
+            f.write(index.to_bytes())
+        print(f"🗂️  Index {index_path}: {stats}")
+    return index
+
+def load_s3(s3_client, bucket: str, key: str) -> ResultsIndex:
+    """Index for a results CSV in S3, kept at <key>.idx.json.gz in the same bucket"""
+    csv_data = s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    index_key = key + INDEX_SUFFIX
+    try:
+        index_data = s3_client.get_object(Bucket=bucket, Key=index_key)['Body'].read()
+    except Exception:
+        index_data = None
+    index, stats = refresh_index(csv_data, index_data)
+    if stats is not None:
+        s3_client.put_object(Bucket=bucket, Key=index_key, Body=index.to_bytes(), ContentType='application/gzip')
+        print(f"🗂️  Index s3://{bucket}/{index_key}: {stats}")
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description='Query classification results through an inverted index')
+    parser.add_argument('results', help='Results CSV (local path or s3://bucket/key)')
+    parser.add_argument('query', nargs='?', default='',
+                        help='e.g. \'service:Lambda service:DynamoDB lang:Python updated:<90d genai_agentic:Yes\'')
+    parser.add_argument('--facets', default='solution_type,competency,primary_language,aws_services',
+                        help='Comma-separated columns to count values for')
+    parser.add_argument('--limit', type=int, default=20, help='Repositories to list')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args()
+
+    if args.results.startswith('s3://'):
+        import boto3
+        bucket, key = args.results[5:].split('/', 1)
+        index = load_s3(boto3.client('s3'), bucket, key)
+    else:
+        index = load_local(args.results)
+
+    facets = [column.strip() for column in args.facets.split(',') if column.strip()]
+    try:
+        result = index.search(args.query, limit=args.limit, facets=facets)
+    except QueryError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"🔎 {result['count']} of {index.size} repositories match ({result['took_ms']:.2f}ms)")
+    for repository in result['repositories']:
+        print(f"   {repository}")
+    for column, counts in result['facets'].items():
+        print(f"📊 {column}: " + ", ".join(f"{value} ({count})" for value, count in counts))
+
+if __name__ == "__main__":
+    main()
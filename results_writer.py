@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Streaming Results Writer
+Appends classification rows (CSV via the csv module, or JSONL) to part files uploaded as they fill,
+tracked by a manifest and consolidated into one final object with an S3 multipart upload
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# S3 rejects multipart parts below 5 MiB (except the last one)
+MULTIPART_CHUNK_BYTES = 8 * 1024 * 1024
+
+def rows_to_csv(rows: List[Dict]) -> str:
+    """One CSV document for rows that share the first row's columns"""
+    if not rows:
+        return ""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()), extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+def list_runs(s3_client, bucket_name: str, name: str, prefix: str = 'results/parts/') -> List[str]:
+    """run_ids of name that have a manifest"""
+    part_prefix = f"{prefix.rstrip('/')}/{name}/"
+    run_ids = []
+    kwargs = {'Bucket': bucket_name, 'Prefix': part_prefix}
+    while True:
+        response = s3_client.list_objects_v2(**kwargs)
+        for obj in response.get('Contents', []):
+            run_id, _, leaf = obj['Key'][len(part_prefix):].partition('/')
+            if leaf == 'manifest.json':
+                run_ids.append(run_id)
+        if not response.get('IsTruncated'):
+            return sorted(run_ids)
+        kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+def merge_runs(s3_client, bucket_name: str, name: str, run_ids: Iterable[str]) -> List[Dict]:
+    """CSV rows of every run's parts, one per repository (a repo classified twice after a crash or
+    a hand-off keeps its last row), ordered by stars"""
+    rows = {}
+    for run_id in run_ids:
+        writer = S3ResultsWriter(s3_client, bucket_name, name, run_id=run_id)
+        if not writer.resume():
+            continue
+        content = b''.join(
+            s3_client.get_object(Bucket=bucket_name, Key=part['key'])['Body'].read() for part in writer.parts
+        ).decode('utf-8')
+        for row in csv.DictReader(io.StringIO(content)):
+            rows[row['repository']] = row
+
+    def stars(row: Dict) -> int:
+        try:
+            return int(row.get('stars') or 0)
+        except ValueError:
+            return 0
+
+    return sorted(rows.values(), key=stars, reverse=True)
+
+class S3ResultsWriter:
+    def __init__(self, s3_client, bucket_name: str, name: str, run_id: Optional[str] = None,
+                 fmt: str = 'csv', part_rows: int = 500, prefix: str = 'results/parts/'):
+        """Parts go to <prefix><name>/<run>/part-NNNNN.<fmt> with a manifest.json next to them;
+        part_rows: rows buffered before a part is uploaded"""
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Unsupported results format: {fmt}")
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.name = name
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.fmt = fmt
+        self.part_rows = max(1, part_rows)
+        self.part_prefix = f"{prefix.rstrip('/')}/{name}/{self.run_id}/"
+        self.manifest_key = f"{self.part_prefix}manifest.json"
+
+        self.fieldnames = None
+        self.buffer = io.StringIO()
+        self.csv_writer = None
+        self.buffered_rows = 0
+        self.rows_written = 0
+        self.parts = []  # [{"key", "rows", "bytes"}] in write order
+        self.bytes_uploaded = 0
+        self.published_key = None
+
+    def resume(self) -> int:
+        """Continue an interrupted run (same name and run_id): parts already in its manifest are kept
+        and new parts are numbered after them; returns the rows those parts hold"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.manifest_key)
+            manifest = json.loads(response['Body'].read())
+        except Exception:
+            return 0
+        self.parts = manifest.get("parts", [])
+        self.fieldnames = manifest.get("fieldnames")
+        self.published_key = manifest.get("published")
+        self.rows_written = sum(part["rows"] for part in self.parts)
+        return self.rows_written
+
+    def write(self, row: Dict) -> None:
+        """Append one row (constant cost); uploads a part every part_rows rows"""
+        if self.fmt == 'csv':
+            if self.csv_writer is None:
+                if self.fieldnames is None:
+                    # Header once, at the top of the first part, so the parts concatenate into one CSV
+                    self.fieldnames = list(row.keys())
+                    self.csv_writer = csv.DictWriter(self.buffer, fieldnames=self.fieldnames, extrasaction='ignore')
+                    self.csv_writer.writeheader()
+                else:
+                    self.csv_writer = csv.DictWriter(self.buffer, fieldnames=self.fieldnames, extrasaction='ignore')
+            self.csv_writer.writerow(row)
+        else:
+            self.buffer.write(json.dumps(row, separators=(',', ':'), default=str) + '\n')
+        self.buffered_rows += 1
+        self.rows_written += 1
+        if self.buffered_rows >= self.part_rows:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[Dict]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def put(self, key: str, body: bytes, content_type: str) -> None:
+        self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=body, ContentType=content_type)
+        self.bytes_uploaded += len(body)
+
+    def content_type(self) -> str:
+        return 'text/csv' if self.fmt == 'csv' else 'application/x-ndjson'
+
+    def flush(self) -> None:
+        """Upload the buffered rows as the next part and record it in the manifest"""
+        if not self.buffered_rows:
+            return
+        body = self.buffer.getvalue().encode('utf-8')
+        key = f"{self.part_prefix}part-{len(self.parts) + 1:05d}.{self.fmt}"
+        try:
+            self.put(key, body, self.content_type())
+        except Exception as e:
+            # Keep buffering; the rows go out with the next part
+            print(f"⚠️  Failed to upload results part {key}: {e}")
+            return
+        self.parts.append({"key": key, "rows": self.buffered_rows, "bytes": len(body)})
+        self.buffer = io.StringIO()
+        self.csv_writer = None
+        self.buffered_rows = 0
+        self.save_manifest()
+
+    def save_manifest(self) -> None:
+        manifest = {
+            "name": self.name,
+            "run_id": self.run_id,
+            "format": self.fmt,
+            "fieldnames": self.fieldnames,
+            "rows": sum(part["rows"] for part in self.parts),
+            "parts": self.parts,
+            "published": self.published_key,
+            "updated_at": datetime.now().isoformat()
+        }
+        try:
+            self.put(self.manifest_key, json.dumps(manifest, indent=2).encode('utf-8'), 'application/json')
+        except Exception as e:
+            print(f"⚠️  Failed to save results manifest: {e}")
+
+    def publish(self, key: str, keep_parts: bool = False) -> Optional[str]:
+        """Concatenate the manifest's parts into one object at key (multipart upload once the
+        data outgrows one chunk); the parts are deleted afterwards unless keep_parts"""
+        self.flush()
+        if self.buffered_rows:
+            # The last part failed to upload; publishing now would silently drop those rows
+            print(f"❌ Not publishing {key}: {self.buffered_rows} rows still buffered after a failed part upload")
+            return None
+        if not self.parts:
+            return None
+
+        upload_id = None
+        uploaded = []
+        pending = bytearray()
+        try:
+            for part in self.parts:
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=part["key"])
+                pending += response['Body'].read()
+                if len(pending) >= MULTIPART_CHUNK_BYTES:
+                    if upload_id is None:
+                        upload_id = self.s3_client.create_multipart_upload(
+                            Bucket=self.bucket_name, Key=key, ContentType=self.content_type()
+                        )['UploadId']
+                    uploaded.append(self.upload_part(key, upload_id, len(uploaded) + 1, bytes(pending)))
+                    pending = bytearray()
+
+            if upload_id is None:
+                self.put(key, bytes(pending), self.content_type())
+            else:
+                if pending:
+                    uploaded.append(self.upload_part(key, upload_id, len(uploaded) + 1, bytes(pending)))
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                    MultipartUpload={'Parts': uploaded}
+                )
+        except Exception as e:
+            print(f"❌ Failed to publish results to {key}: {e}")
+            if upload_id is not None:
+                try:
+                    self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+                except Exception:
+                    pass
+            return None
+
+        self.published_key = key
+        if not keep_parts:
+            stale = [part["key"] for part in self.parts]
+            for i in range(0, len(stale), 1000):
+                try:
+                    self.s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={'Objects': [{'Key': k} for k in stale[i:i + 1000]], 'Quiet': True}
+                    )
+                except Exception as e:
+                    print(f"⚠️  Failed to delete published results parts: {e}")
+        self.save_manifest()
+        return key
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> Dict:
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )
+        self.bytes_uploaded += len(body)
+        return {'ETag': response['ETag'], 'PartNumber': part_number}
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Declarative Classification Rule Engine
+Evaluates the keyword dimensions of classification_rules.json (ordered categories, keywords, fields)
+for a repository in one compiled scan of its text
+"""
+
+import json
+import os
+import re
+from typing import Dict, List
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'classification_rules.json')
+
+def trie_pattern(keywords: List[str]) -> str:
+    """Regex alternation factored into a character trie; greedy, so it matches the longest keyword at a position"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+class RuleEngine:
+    def __init__(self, ruleset: Dict):
+        """ruleset: one entry of classification_rules.json"""
+        self.parts = list(ruleset['parts'])
+        self.dimensions = list(ruleset['dimensions'])
+        self.defaults = [ruleset['dimensions'][name]['default'] for name in self.dimensions]
+        self.labels = []
+
+        # Each field is a contiguous run of parts, i.e. one slice of the joined text
+        field_names = list(ruleset['fields'])
+        self.field_parts = []
+        for name in field_names:
+            indexes = [self.parts.index(part) for part in ruleset['fields'][name]]
+            if indexes != list(range(indexes[0], indexes[0] + len(indexes))):
+                raise ValueError(f"Field {name} must be a contiguous run of {self.parts}")
+            self.field_parts.append((indexes[0], indexes[-1]))
+
+        # keyword -> [(field, dimension, category rank)]; categories are ordered, the lowest rank wins
+        self.targets = {}
+        for dimension, name in enumerate(self.dimensions):
+            rule = ruleset['dimensions'][name]
+            field = field_names.index(rule['field'])
+            self.labels.append([category['label'] for category in rule['categories']])
+            for rank, category in enumerate(rule['categories']):
+                for keyword in category['keywords']:
+                    self.targets.setdefault(keyword.lower(), []).append((field, dimension, rank))
+
+        keywords = sorted(self.targets, key=len, reverse=True)
+        self.pattern = re.compile(trie_pattern(keywords)) if keywords else None
+
+        # The scan reports the longest keyword starting at each position; the shorter
+        # keywords starting there are its prefixes
+        self.prefixes = {}
+        for keyword in keywords:
+            self.prefixes[keyword] = [(other, len(other), self.targets[other])
+                                      for other in keywords if keyword.startswith(other)]
+
+    def classify(self, parts: Dict[str, str]) -> Dict[str, str]:
+        """Label for every dimension; parts: part name -> lowercased text (missing parts are empty).
+
+        Same result as checking each category's keywords with `keyword in field_text` in order.
+        """
+        values = [parts.get(part) or '' for part in self.parts]
+        text = ' '.join(values)
+
+        bounds = []
+        offset = 0
+        for value in values:
+            bounds.append((offset, offset + len(value)))
+            offset += len(value) + 1
+        spans = [(bounds[first][0], bounds[last][1]) for first, last in self.field_parts]
+
+        best = [None] * len(self.dimensions)
+        if self.pattern is not None:
+            search = self.pattern.search
+            prefixes = self.prefixes
+            match = search(text)
+            while match is not None:
+                start = match.start()
+                for keyword, length, targets in prefixes[match.group()]:
+                    end = start + length
+                    for field, dimension, rank in targets:
+                        field_start, field_end = spans[field]
+                        if field_start <= start and end <= field_end:
+                            current = best[dimension]
+                            if current is None or rank < current:
+                                best[dimension] = rank
+                match = search(text, start + 1)
+
+        return {
+            name: self.defaults[i] if best[i] is None else self.labels[i][best[i]]
+            for i, name in enumerate(self.dimensions)
+        }
+
+_engines = {}
+
+def get_rule_engine(ruleset: str, path: str = RULES_PATH) -> RuleEngine:
+    """Compiled engine for a ruleset, shared by every classifier in the process"""
+    key = (path, ruleset)
+    if key not in _engines:
+        with open(path, encoding='utf-8') as f:
+            rules = json.load(f)
+        _engines[key] = RuleEngine(rules[ruleset])
+    return _engines[key]
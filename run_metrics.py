@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Per-stage timers and counters for classifier runs (GitHub fetches, master index parsing, each
+classification dimension, S3 checkpoint/results/log uploads, rate-limit waits), exported as
+Prometheus text (file or /metrics endpoint) and as a per-run JSON summary. Disabled by default:
+the shared NullMetrics does nothing and no classifier methods are wrapped.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, Optional
+
+METRIC_PREFIX = "repo_classifier"
+
+# Methods wrapped by instrument_classifier when they exist on the classifier
+FETCH_METHODS = (
+    "get_readme_description", "get_readme_description_with_retry", "get_readme_with_smart_retry",
+    "get_readme_content_cached", "get_repo_topics_cached", "prefetch_batch", "get_iac_scan", "prefetch_tarballs",
+)
+DIMENSION_METHODS = (
+    "get_description_enhanced", "get_aws_services", "get_aws_services_enhanced", "classify_rules_enhanced",
+    "get_solution_type", "get_competency", "get_customer_problems", "get_solution_marketing",
+    "get_deployment_tools", "get_deployment_tools_enhanced", "get_deployment_level", "get_deployment_readiness", "get_secondary_language",
+    "get_framework", "get_cost_range", "get_setup_time", "get_business_value", "get_target_audience",
+    "get_use_case_category", "get_integration_complexity", "get_maintenance_level", "get_scalability",
+    "get_usp", "get_freshness", "get_days_since_update", "is_genai_agentic",
+)
+CLASSIFY_METHODS = (
+    "classify_repository", "classify_repository_with_retry", "classify_repository_with_smart_retry",
+    "classify_repository_enhanced", "classify_repository_enhanced_with_logging",
+)
+S3_TIMED_OPS = (
+    "put_object", "get_object", "upload_part", "complete_multipart_upload", "delete_objects", "list_objects_v2",
+)
+
+class NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class NullMetrics:
+    """Stand-in while metrics are off: every call is a no-op"""
+    enabled = False
+
+    def timer(self, stage: str, **labels):
+        return NULL_TIMER
+
+    def observe(self, stage: str, seconds: float, **labels) -> None:
+        pass
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        pass
+
+class Timer:
+    """Times one stage; time spent in timers nested inside it (same thread) is booked to those
+    stages only, so stage totals add up to the time actually spent"""
+    __slots__ = ("registry", "key", "start", "frame")
+
+    def __init__(self, registry: "MetricsRegistry", key: tuple):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.frame = [0.0]  # Time of nested timers
+        self.registry.stack().append(self.frame)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.registry.stack()
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+        self.registry.record(self.key, elapsed - self.frame[0])
+        return False
+
+class MetricsRegistry:
+    enabled = True
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.timers = {}  # (stage, labels) -> [count, self seconds, max seconds]
+        self.counters = {}  # (name, labels) -> value
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.exporters = []
+
+    def stack(self) -> list:
+        """This thread's open timers, innermost last (each a [nested seconds] frame)"""
+        try:
+            return self.local.stack
+        except AttributeError:
+            self.local.stack = []
+            return self.local.stack
+
+    def timer(self, stage: str, **labels) -> Timer:
+        return Timer(self, (stage, tuple(sorted(labels.items()))))
+
+    def record(self, key: tuple, seconds: float) -> None:
+        with self.lock:
+            entry = self.timers.get(key)
+            if entry is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def observe(self, stage: str, seconds: float, **labels) -> None:
+        """Book a duration measured elsewhere (not nested into a running timer)"""
+        self.record((stage, tuple(sorted(labels.items()))), seconds)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def timed(self, func, stage: str, **labels):
+        """func wrapped in a timer of stage"""
+        key = (stage, tuple(sorted(labels.items())))
+        stack_of, record, clock = self.stack, self.record, time.perf_counter
+
+        # Same bookkeeping as Timer, inlined: this runs for every dimension of every repo
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stack = stack_of()
+            frame = [0.0]
+            stack.append(frame)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                if stack:
+                    stack[-1][0] += elapsed
+                record(key, elapsed - frame[0])
+        return wrapper
+
+    def timed_iter(self, items: Iterable, stage: str, **labels) -> Iterator:
+        """Yield items, timing the work of producing each one (e.g. parsing a streamed document)"""
+        iterator = iter(items)
+        key = (stage, tuple(sorted(labels.items())))
+        while True:
+            with Timer(self, key):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def wall_seconds(self) -> float:
+        return time.perf_counter() - self.start
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (also valid OpenMetrics apart from the # EOF marker)"""
+        def label_text(labels: tuple, extra: Optional[Dict] = None) -> str:
+            pairs = list(labels) + list((extra or {}).items())
+            if not pairs:
+                return ""
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        with self.lock:
+            timers = sorted(self.timers.items())
+            counters = sorted(self.counters.items())
+
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Time spent per stage, excluding nested stages",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds summary",
+        ]
+        for (stage, labels), (count, total, _) in timers:
+            text = label_text(labels, {"stage": stage})
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_count{text} {count}")
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_sum{text} {total:.6f}")
+        lines.append(f"# HELP {METRIC_PREFIX}_stage_max_seconds Longest single call per stage")
+        lines.append(f"# TYPE {METRIC_PREFIX}_stage_max_seconds gauge")
+        for (stage, labels), (_, _, longest) in timers:
+            lines.append(f"{METRIC_PREFIX}_stage_max_seconds{label_text(labels, {'stage': stage})} {longest:.6f}")
+
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            for (counter, labels), value in counters:
+                if counter == name:
+                    lines.append(f"{METRIC_PREFIX}_{name}_total{label_text(labels)} {value:g}")
+
+        lines.append(f"# TYPE {METRIC_PREFIX}_run_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_run_seconds {self.wall_seconds():.3f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, **context) -> Dict:
+        """Per-run JSON summary: stages by time spent (with their share of the run's wall time) and counters"""
+        wall = self.wall_seconds()
+        with self.lock:
+            timers = list(self.timers.items())
+            counters = list(self.counters.items())
+        stages = [
+            {"stage": stage, **dict(labels), "count": count, "seconds": round(total, 4),
+             "mean_ms": round(total / count * 1000, 3), "max_ms": round(longest * 1000, 3),
+             "share": round(total / wall, 4) if wall else 0.0}
+            for (stage, labels), (count, total, longest) in timers
+        ]
+        stages.sort(key=lambda entry: entry["seconds"], reverse=True)
+        return {
+            **context,
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": round(wall, 3),
+            "stages": stages,
+            "stage_totals": self.stage_totals(),
+            "counters": [{"name": name, **dict(labels), "value": value} for (name, labels), value in sorted(counters)],
+        }
+
+    def stage_totals(self) -> Dict[str, float]:
+        totals = {}
+        with self.lock:
+            for (stage, _), (_, seconds, _) in self.timers.items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return {stage: round(seconds, 4) for stage, seconds in sorted(totals.items(), key=lambda item: -item[1])}
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomic write, e.g. for the node_exporter textfile collector"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def export_file(self, path: str, interval: float = 15.0) -> None:
+        """Rewrite path every interval seconds in a daemon thread (call write_prometheus once more at the end)"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_prometheus(path)
+                except Exception as e:
+                    print(f"⚠️  Failed to write metrics to {path}: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        self.exporters.append(thread)
+
+    def serve(self, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+        """Serve GET /metrics from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.exporters.append(server)
+        print(f"📈 Metrics at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+_metrics = NullMetrics()
+
+def get_metrics():
+    """Process-wide registry (NullMetrics unless enable_metrics() was called)"""
+    return _metrics
+
+def enable_metrics() -> MetricsRegistry:
+    global _metrics
+    if not _metrics.enabled:
+        _metrics = MetricsRegistry()
+    return _metrics
+
+def disable_metrics() -> None:
+    global _metrics
+    _metrics = NullMetrics()
+
+class InstrumentedS3Client:
+    """Wraps a boto3 S3 client: times object operations by op and key area (checkpoints, results,
+    logs, master-index, ...) and counts bytes uploaded"""
+
+    def __init__(self, client, metrics: MetricsRegistry):
+        self.client = client
+        self.metrics = metrics
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.client, name)
+        if name not in S3_TIMED_OPS:
+            return attr
+        metrics = self.metrics
+
+        def call(*args, **kwargs):
+            key = kwargs.get('Key') or kwargs.get('Prefix') or ''
+            area = key.split('/', 1)[0] or 'bucket'
+            with metrics.timer('s3', op=name, area=area):
+                response = attr(*args, **kwargs)
+            body = kwargs.get('Body')
+            if body is not None:
+                size = len(body.encode('utf-8')) if isinstance(body, str) else len(body)
+                metrics.count('s3_bytes_uploaded', size, area=area)
+            metrics.count('s3_requests', op=name, area=area)
+            return response
+        return call
+
+def instrument_classifier(classifier, metrics: MetricsRegistry) -> None:
+    """Wrap the classifier's fetch, dimension and per-repo classify methods in timers, and its S3
+    client (and every helper holding the same client) in InstrumentedS3Client"""
+    for name in FETCH_METHODS:
+        if hasattr(classifier, name):
+            setattr(classifier, name, metrics.timed(getattr(classifier, name), 'fetch', method=name))
+    for name in DIMENSION_METHODS:
+        if hasattr(classifier, name):
+            setattr(classifier, name, metrics.timed(getattr(classifier, name), 'dimension', dimension=name))
+    for name in CLASSIFY_METHODS:
+        if hasattr(classifier, name):
+            setattr(classifier, name, counted_classify(metrics, getattr(classifier, name), name))
+
+    raw_client = classifier.s3_client
+    if isinstance(raw_client, InstrumentedS3Client):
+        return
+    wrapped = InstrumentedS3Client(raw_client, metrics)
+    for value in list(vars(classifier).values()):
+        if getattr(value, 's3_client', None) is raw_client:
+            value.s3_client = wrapped
+    classifier.s3_client = wrapped
+
+def counted_classify(metrics: MetricsRegistry, func, name: str):
+    """Per-repo classify entry point: times the rest of the row build and counts the outcome"""
+    timed = metrics.timed(func, 'repository', method=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        row = timed(*args, **kwargs)
+        # Outer entry points (e.g. the V3 logging wrapper) call inner ones; count the outermost only
+        if len(metrics.stack()) == 0:
+            metrics.count('repositories', outcome='classified' if row else 'failed')
+        return row
+    return wrapper
+
+def print_summary(summary: Dict, top: int = 8) -> None:
+    print(f"\n📈 Run metrics ({summary['wall_seconds']:.1f}s wall)")
+    for stage, seconds in summary['stage_totals'].items():
+        share = seconds / summary['wall_seconds'] * 100 if summary['wall_seconds'] else 0
+        print(f"   {stage:16s} {seconds:9.2f}s  {share:5.1f}%")
+    for entry in summary['stages'][:top]:
+        labels = ", ".join(f"{k}={v}" for k, v in entry.items()
+                           if k not in ('stage', 'count', 'seconds', 'mean_ms', 'max_ms', 'share'))
+        print(f"   ⏱️  {entry['stage']}[{labels}]: {entry['count']} calls, {entry['seconds']:.2f}s, "
+              f"mean {entry['mean_ms']:.1f}ms, max {entry['max_ms']:.1f}ms")
+
+def save_summary(summary: Dict, s3_client=None, bucket_name: Optional[str] = None, key: Optional[str] = None,
+                 path: Optional[str] = None) -> None:
+    body = json.dumps(summary, indent=2, default=str)
+    if path:
+        with open(path, 'w') as f:
+            f.write(body)
+    if s3_client is not None and key:
+        try:
+            s3_client.put_object(Bucket=bucket_name, Key=key, Body=body, ContentType='application/json')
+            print(f"📈 Metrics summary: s3://{bucket_name}/{key}")
+        except Exception as e:
+            print(f"⚠️  Failed to save metrics summary: {e}")
+
+def add_metrics_args(parser) -> None:
+    parser.add_argument('--metrics', action='store_true',
+                        help='Time fetches, dimensions, S3 writes and rate-limit waits; JSON summary to metrics/ in S3')
+    parser.add_argument('--metrics-file', help='Also keep a Prometheus text file up to date (implies --metrics)')
+    parser.add_argument('--metrics-port', type=int, help='Also serve Prometheus /metrics on this port (implies --metrics)')
+    parser.add_argument('--metrics-summary', help='Also write the JSON run summary to this local file (implies --metrics)')
+
+def apply_metrics_args(classifier, args) -> None:
+    if args.metrics or args.metrics_file or args.metrics_port or args.metrics_summary:
+        classifier.enable_metrics(args.metrics_file, args.metrics_port, args.metrics_summary)
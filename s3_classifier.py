@@ -7,10 +7,12 @@ Processes all 939 awslabs repositories with resumability and crash recovery
 import json
 import boto3
 import time
-import requests
 import re
 from datetime import datetime
 from typing import Dict, List, Optional
+from checkpoint_store import CheckpointStore
+from github_http import get_api_url, get_http_client
+from rule_engine import get_rule_engine
 
 class S3RepositoryClassifier:
     def __init__(self):
@@ -18,7 +20,10 @@ class S3RepositoryClassifier:
         self.bucket_name = 'aws-github-repo-classification'
         self.master_index_key = 'master-index/awslabs_repos_939.json'
         self.checkpoint_key = 'checkpoints/progress.json'
+        self.checkpoint_store = CheckpointStore(self.s3_client, self.bucket_name, self.checkpoint_key)
         self.results_key = 'results/classification_results.csv'
+        self.rule_engine = get_rule_engine('s3')  # Keyword dimensions from classification_rules.json
+        self.rule_cache = (None, None)  # (repo, labels) of the repo being classified
         
     def create_master_index(self, repos_data: List[Dict]) -> None:
         """Create and upload master index of all repositories"""
@@ -61,32 +66,12 @@ class S3RepositoryClassifier:
         print(f"📁 Uploaded to s3://{self.bucket_name}/{self.master_index_key}")
         
     def load_checkpoint(self) -> Dict:
-        """Load checkpoint from S3"""
-        try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=self.checkpoint_key
-            )
-            return json.loads(response['Body'].read())
-        except:
-            return {
-                "current_index": 0,
-                "completed_repos": [],
-                "failed_repos": {},
-                "last_run": None,
-                "total_processed": 0
-            }
+        """Load checkpoint (snapshot + delta segments) from S3"""
+        return self.checkpoint_store.load()
     
-    def save_checkpoint(self, checkpoint: Dict) -> None:
-        """Save checkpoint to S3"""
-        checkpoint["last_run"] = datetime.now().isoformat()
-        
-        self.s3_client.put_object(
-            Bucket=self.bucket_name,
-            Key=self.checkpoint_key,
-            Body=json.dumps(checkpoint, indent=2),
-            ContentType='application/json'
-        )
+    def save_checkpoint(self) -> None:
+        """Append the progress made since the last save as one small checkpoint segment"""
+        self.checkpoint_store.flush()
     
     def load_master_index(self) -> List[Dict]:
         """Load master index from S3"""
@@ -104,8 +89,8 @@ class S3RepositoryClassifier:
     def get_readme_description(self, repo: Dict) -> str:
         """Get first 1-2 paragraphs from README as fallback description"""
         try:
-            url = f"https://api.github.com/repos/{repo['full_name']}/readme"
-            response = requests.get(url, timeout=10)
+            url = f"{get_api_url()}/repos/{repo['full_name']}/readme"
+            response = get_http_client().get(url)
             if response.status_code == 200:
                 import base64
                 content = base64.b64decode(response.json()['content']).decode('utf-8')
@@ -203,92 +188,26 @@ class S3RepositoryClassifier:
             print(f"❌ Failed to classify {repo['full_name']}: {e}")
             return None
     
+    def get_rule_results(self, repo: Dict) -> Dict[str, str]:
+        """Solution type, marketing and GenAI labels from one rule engine scan, reused for the same repo"""
+        cached_repo, labels = self.rule_cache
+        if cached_repo is not repo:
+            labels = self.rule_engine.classify({
+                "name": repo.get("name", "").lower(),
+                "raw_description": (repo.get("description") or "").lower(),  # Marketing ignores the README fallback
+                "description": self.get_description(repo).lower(),
+                "topics": " ".join(repo.get("topics", [])).lower()
+            })
+            self.rule_cache = (repo, labels)
+        return labels
+    
     def get_solution_marketing(self, repo: Dict) -> str:
         """Determine solution marketing category based on repo name, description and functionality"""
-        repo_name = repo.get("name", "").lower()
-        desc = (repo.get("description") or "").lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{repo_name} {desc} {topics}"
-        
-        # Setup & Bootstrap
-        if any(word in text for word in ["setup", "bootstrap", "quickstart", "quick-start", "getting-started", "install", "deployment"]):
-            return "setup"
-        
-        # Landing Zone
-        if any(word in text for word in ["landing-zone", "landingzone", "multi-account", "account-factory", "control-tower"]):
-            return "landingzone"
-        
-        # Starter & Templates
-        if any(word in text for word in ["starter", "template", "boilerplate", "scaffold", "blueprint", "reference-architecture"]):
-            return "starter"
-        
-        # Optimization
-        if any(word in text for word in ["optim", "performance", "cost", "efficiency", "tuning", "scaling"]):
-            return "optimise"
-        
-        # Compliance & Security
-        if any(word in text for word in ["compliance", "security", "audit", "governance", "policy", "config-rules"]):
-            return "compliance"
-        
-        # Improvement & Enhancement
-        if any(word in text for word in ["improve", "enhance", "upgrade", "migration", "moderniz", "refactor"]):
-            return "improvement"
-        
-        # Visibility & Monitoring
-        if any(word in text for word in ["monitor", "observ", "dashboard", "metrics", "logging", "visibility", "insight"]):
-            return "visibility"
-        
-        # Foundation & Infrastructure
-        if any(word in text for word in ["foundation", "infrastructure", "platform", "framework", "core", "base"]):
-            return "foundation"
-        
-        # Readiness & Preparation
-        if any(word in text for word in ["ready", "prepar", "provision", "orchestrat", "automation"]):
-            return "readiness"
-        
-        # Enablement & Tools
-        if any(word in text for word in ["enable", "tool", "utility", "helper", "support", "assist"]):
-            return "enablement"
-        
-        # Innovation & AI/ML
-        if any(word in text for word in ["innovat", "ai", "ml", "machine-learning", "bedrock", "agent", "genai"]):
-            return "innovation"
-        
-        # Assessment & Analysis
-        if any(word in text for word in ["assess", "analyz", "evaluat", "test", "benchmark", "profil"]):
-            return "assessment"
-        
-        # Advisor & Intelligence
-        if any(word in text for word in ["advisor", "intelligent", "smart", "recommend", "suggest"]):
-            return "advisor"
-        
-        # Recommendation & Best Practices
-        if any(word in text for word in ["recommend", "best-practice", "pattern", "guideline", "standard"]):
-            return "recommendation"
-        
-        # Guidance & Documentation
-        if any(word in text for word in ["guidance", "guide", "tutorial", "workshop", "learn", "documentation"]):
-            return "guidance"
-        
-        # Default based on solution type fallback
-        return "enablement"
+        return self.get_rule_results(repo)["solution_marketing"]
     
     def get_solution_type(self, repo: Dict) -> str:
         """Determine solution type"""
-        desc = self.get_description(repo).lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{desc} {topics}"
-        
-        if any(word in text for word in ["security", "compliance", "audit", "governance"]):
-            return "Compliance Accelerators"
-        elif any(word in text for word in ["ai", "ml", "machine-learning", "bedrock", "agent"]):
-            return "Innovation Catalysts"
-        elif any(word in text for word in ["cost", "optimization", "performance"]):
-            return "Quick Wins"
-        elif any(word in text for word in ["monitoring", "observability", "logging"]):
-            return "Operational Excellence"
-        else:
-            return "Foundation Builders"
+        return self.get_rule_results(repo)["solution_type"]
     
     def get_technical_competencies(self, repo: Dict) -> str:
         """Get technical competencies"""
@@ -443,12 +362,7 @@ class S3RepositoryClassifier:
     
     def is_genai_agentic(self, repo: Dict) -> str:
         """Check if repository is GenAI/Agentic"""
-        desc = self.get_description(repo).lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{desc} {topics}"
-        
-        genai_keywords = ["ai", "ml", "bedrock", "agent", "llm", "generative", "neural"]
-        return "Yes" if any(word in text for word in genai_keywords) else "No"
+        return self.get_rule_results(repo)["genai_agentic"]
     
     def append_to_results_csv(self, classification: Dict) -> None:
         """Append classification result to S3 CSV (simplified for demo)"""
@@ -489,15 +403,14 @@ class S3RepositoryClassifier:
                 if classification:
                     self.append_to_results_csv(classification)
                     completed_repos.add(repo["full_name"])
-                    checkpoint["total_processed"] += 1
+                    self.checkpoint_store.mark_completed(repo["full_name"])
                 
                 # Small delay to avoid rate limits
                 time.sleep(0.1)
             
             # Update checkpoint after each batch
-            checkpoint["current_index"] = min(i + batch_size, len(repos))
-            checkpoint["completed_repos"] = list(completed_repos)
-            self.save_checkpoint(checkpoint)
+            self.checkpoint_store.set_index(min(i + batch_size, len(repos)))
+            self.save_checkpoint()
             
             print(f"\n💾 Checkpoint saved - Progress: {len(completed_repos)}/{len(repos)}")
             
@@ -505,6 +418,7 @@ class S3RepositoryClassifier:
             if len(completed_repos) % 50 == 0 and len(completed_repos) > 0:
                 print(f"\n🎯 Milestone: {len(completed_repos)} repositories processed")
         
+        self.checkpoint_store.compact()
         print(f"\n✅ Classification completed!")
         print(f"📊 Total processed: {len(completed_repos)}")
         print(f"🔗 Bucket: https://{self.bucket_name}.s3.amazonaws.com/")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Compiled AWS Service Matcher
+Finds every keyword of a keyword -> service map in one regex scan with word-boundary semantics
+"""
+
+import re
+from typing import Dict, Set
+
+class ServiceMatcher:
+    def __init__(self, keyword_map: Dict[str, str]):
+        """keyword_map: lowercase keyword -> service name (e.g. EnhancedClassifierV2.aws_services_map)"""
+        self.keyword_map = dict(keyword_map)
+
+        # Longest keyword first so 'api gateway' wins over any shorter keyword starting at the same spot.
+        # The lookahead makes matches zero-width, so overlapping keywords are all visited.
+        keywords = sorted(self.keyword_map, key=len, reverse=True)
+        alternation = '|'.join(re.escape(keyword) for keyword in keywords)
+        self.pattern = re.compile(r'(?=\b(' + alternation + r')\b)') if keywords else None
+
+        # A match also implies every keyword that occurs word-bounded inside it
+        # (the scan only reports the longest keyword per start position)
+        self.implied = {}
+        for keyword in keywords:
+            services = {self.keyword_map[keyword]}
+            for other in keywords:
+                if other != keyword and re.search(r'\b' + re.escape(other) + r'\b', keyword):
+                    services.add(self.keyword_map[other])
+            self.implied[keyword] = services
+
+    def find(self, text_lower: str) -> Set[str]:
+        """Services whose keyword appears as a whole word in already-lowercased text"""
+        services = set()
+        if not text_lower or self.pattern is None:
+            return services
+        for keyword in set(self.pattern.findall(text_lower)):
+            services |= self.implied[keyword]
+        return services
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Sharded Multi-Process Classification
+Partitions the master index by a stable hash of full_name across N worker processes; each shard has its
+own checkpoint and results parts, crashed shards are restarted from their checkpoint, and the coordinator
+merges the shard parts into one results CSV at the end
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional
+
+from checkpoint_store import CheckpointStore
+from master_index import iter_master_index
+from results_writer import S3ResultsWriter, merge_runs, rows_to_csv
+
+def shard_of(full_name: str, shards: int) -> int:
+    """Stable across processes and runs (unlike hash(), which is salted per interpreter)"""
+    digest = hashlib.blake2b(full_name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+def shard_id(shard: int, shards: int) -> str:
+    return f"shard-{shard:03d}-of-{shards:03d}"
+
+def checkpoint_prefix(results_name: str, shard: int, shards: int) -> str:
+    return f"checkpoints/shards/{results_name}/{shard_id(shard, shards)}/"
+
+def classify_function(classifier):
+    """The per-repo classification entry point of a classifier in the chain"""
+    for name in ('classify_repository_enhanced_with_logging', 'classify_repository_with_smart_retry',
+                 'classify_repository'):
+        if hasattr(classifier, name):
+            return getattr(classifier, name)
+    raise TypeError(f"{type(classifier).__name__} has no classify method")
+
+def run_shard(job: Dict) -> Dict:
+    """Worker process: classify the repos of one shard, resuming from the shard's checkpoint.
+
+    The checkpoint only records repos whose rows are already in an uploaded part, so after a crash
+    at most save_every batches are classified again.
+    """
+    if not job.get('quiet'):
+        return classify_shard(job)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return classify_shard(job)
+
+def classify_shard(job: Dict) -> Dict:
+    shard, shards, results_name = job['shard'], job['shards'], job['results_name']
+    s3_client = job['s3_factory']() if job.get('s3_factory') else None
+    classifier = job['classifier_cls'](job['org_name'], s3_client=s3_client)
+    if job.get('tokens'):
+        classifier.enable_token_pool(job['tokens'])
+    if job.get('concurrency') and hasattr(classifier, 'enable_async_fetch'):
+        classifier.enable_async_fetch(job['concurrency'])
+    classify = classify_function(classifier)
+
+    prefix = checkpoint_prefix(results_name, shard, shards)
+    store = CheckpointStore(classifier.s3_client, classifier.bucket_name,
+                            snapshot_key=f"{prefix}progress.json", segment_prefix=f"{prefix}segments/")
+    checkpoint = store.load()
+    done = set(checkpoint['completed_repos']) | set(checkpoint['failed_repos'])
+
+    writer = S3ResultsWriter(classifier.s3_client, classifier.bucket_name, results_name,
+                             run_id=shard_id(shard, shards), part_rows=job.get('part_rows', 500))
+    resumed_rows = writer.resume()
+
+    repos = [repo for repo in iter_master_index(classifier.s3_client, classifier.bucket_name,
+                                                classifier.master_index_key)
+             if shard_of(repo['full_name'], shards) == shard and repo['full_name'] not in done]
+    repos.sort(key=lambda repo: repo.get('stargazers_count', 0), reverse=True)
+    print(f"🧩 {shard_id(shard, shards)}: {len(repos)} repos to classify "
+          f"({len(checkpoint['completed_repos'])} done, {resumed_rows} rows in earlier parts)")
+
+    def save() -> None:
+        writer.flush()
+        if not writer.buffered_rows:
+            store.flush()
+
+    batch_size = job.get('batch_size', 5)
+    save_every = max(1, job.get('save_every', 10))
+    classified = failed = 0
+    prefetched_until = 0
+    for i in range(0, len(repos), batch_size):
+        if hasattr(classifier, 'uses_prefetch') and classifier.uses_prefetch() and i >= prefetched_until:
+            window = repos[i:i + max(batch_size, classifier.prefetch_window)]
+            classifier.prefetch_batch(window)
+            prefetched_until = i + len(window)
+
+        for repo in repos[i:i + batch_size]:
+            row = classify(repo)
+            if row:
+                writer.write(row)
+                store.mark_completed(repo['full_name'])
+                classified += 1
+            else:
+                store.mark_failed(repo['full_name'])
+                failed += 1
+
+        if (i // batch_size + 1) % save_every == 0:
+            save()
+
+    save()
+    store.compact()
+    if hasattr(classifier, 'flush_logs'):
+        if classifier.failed_repos:
+            classifier.save_failed_repos_log()
+        classifier.flush_logs()
+    return {"shard": shard, "classified": classified, "failed": failed}
+
+def shard_worker(job: Dict, results) -> None:
+    results.put(run_shard(job))
+
+class ShardedRunner:
+    def __init__(self, org_name: str, classifier_cls, shards: int, results_name: str = "enhanced_v3",
+                 batch_size: int = 5, save_every: int = 10, part_rows: int = 500, max_restarts: int = 2,
+                 tokens: Optional[List[str]] = None, concurrency: int = 0, s3_factory=None, quiet: bool = False):
+        """classifier_cls: any classifier of the chain (constructed as cls(org_name, s3_client=...) in each
+        worker); s3_factory: picklable callable returning the S3 client workers use (default boto3);
+        save_every: batches between part upload + checkpoint; max_restarts: per crashed shard.
+        Every worker gets the whole token pool; each pool paces itself from the X-RateLimit headers,
+        which report the budget shared by all workers"""
+        self.org_name = org_name
+        self.classifier_cls = classifier_cls
+        self.shards = max(1, shards)
+        self.results_name = results_name
+        self.batch_size = batch_size
+        self.save_every = save_every
+        self.part_rows = part_rows
+        self.max_restarts = max_restarts
+        self.tokens = tokens
+        self.concurrency = concurrency
+        self.s3_factory = s3_factory
+        self.quiet = quiet
+        self.restarts = {}
+        self.summaries = {}
+
+    def job(self, shard: int) -> Dict:
+        return {
+            "org_name": self.org_name, "classifier_cls": self.classifier_cls, "shard": shard,
+            "shards": self.shards, "results_name": self.results_name, "batch_size": self.batch_size,
+            "save_every": self.save_every, "part_rows": self.part_rows, "tokens": self.tokens,
+            "concurrency": self.concurrency, "s3_factory": self.s3_factory, "quiet": self.quiet
+        }
+
+    def run(self) -> List[Dict]:
+        """Run every shard to completion (restarting crashed ones), then merge their parts"""
+        print(f"🧩 Classifying {self.org_name} in {self.shards} shards ({self.classifier_cls.__name__})")
+        start = time.time()
+        # spawn, not fork: the parent may hold HTTP sessions and threads that must not be copied
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        running = {}
+
+        def launch(shard: int) -> None:
+            process = context.Process(target=shard_worker, args=(self.job(shard), results))
+            process.start()
+            running[process.sentinel] = (shard, process)
+
+        for shard in range(self.shards):
+            launch(shard)
+        while running:
+            for sentinel in wait(list(running)):
+                shard, process = running.pop(sentinel)
+                process.join()
+                if process.exitcode == 0:
+                    continue
+                self.restarts[shard] = self.restarts.get(shard, 0) + 1
+                if self.restarts[shard] > self.max_restarts:
+                    print(f"❌ {shard_id(shard, self.shards)} crashed {self.restarts[shard]} times, giving up")
+                    continue
+                print(f"🔄 {shard_id(shard, self.shards)} exited with {process.exitcode}, "
+                      f"resuming from its checkpoint (restart {self.restarts[shard]})")
+                launch(shard)
+        while not results.empty():
+            summary = results.get()
+            self.summaries[summary['shard']] = summary
+
+        print(f"⏱️  Shards finished in {time.time() - start:.1f}s")
+        return self.merge()
+
+    def merge(self) -> List[Dict]:
+        """Concatenate every shard's parts, keep one row per repository (a repo redone after a crash
+        appears twice), order by stars and save results/<results_name>_final_<n>_repos.csv"""
+        s3_client = self.s3_factory() if self.s3_factory else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            classifier = self.classifier_cls(self.org_name, s3_client=s3_client)
+        s3_client, bucket = classifier.s3_client, classifier.bucket_name
+
+        merged = merge_runs(s3_client, bucket, self.results_name,
+                            [shard_id(shard, self.shards) for shard in range(self.shards)])
+        if not merged:
+            print("⚠️  No shard results to merge")
+            return []
+        key = f"results/{self.results_name}_final_{len(merged)}_repos.csv"
+        s3_client.put_object(Bucket=bucket, Key=key, Body=rows_to_csv(merged), ContentType='text/csv')
+        print(f"💾 Merged {len(merged)} rows from {self.shards} shards: s3://{bucket}/{key}")
+        return merged
+
+def main():
+    from enhanced_classifier_v3 import EnhancedClassifierV3
+    from enhanced_classifier_v4 import EnhancedClassifierV4
+    from rate_limit_scheduler import parse_token_args
+    from smart_rate_limit_classifier import SmartRateLimitClassifier
+
+    classifiers = {"smart": SmartRateLimitClassifier, "v3": EnhancedClassifierV3, "v4": EnhancedClassifierV4}
+
+    parser = argparse.ArgumentParser(description='Classify an organization in N sharded worker processes')
+    parser.add_argument('org_name', help='GitHub organization name')
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+    parser.add_argument('--classifier', choices=sorted(classifiers), default='v4', help='Classifier each worker runs')
+    parser.add_argument('--github-token', action='append',
+                        help='GitHub personal access token (repeat or comma-separate for a token pool)')
+    parser.add_argument('--batch-size', type=int, default=5, help='Batch size for processing')
+    parser.add_argument('--save-every', type=int, default=10, help='Batches between results part upload + checkpoint')
+    parser.add_argument('--concurrency', type=int, default=0, help='Prefetch README/topics per worker (v3/v4, 0 = sequential)')
+    parser.add_argument('--max-restarts', type=int, default=2, help='Restarts of a crashed shard before giving up')
+    parser.add_argument('--results-name', default='enhanced_v3', help='Prefix of the merged results CSV')
+
+    args = parser.parse_args()
+
+    runner = ShardedRunner(
+        args.org_name, classifiers[args.classifier], args.shards, results_name=args.results_name,
+        batch_size=args.batch_size, save_every=args.save_every, max_restarts=args.max_restarts,
+        tokens=parse_token_args(args.github_token), concurrency=args.concurrency
+    )
+    runner.run()
+
+if __name__ == "__main__":
+    main()
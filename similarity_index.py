@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Repository Similarity Index
+CPU-only TF-IDF vectors (SciPy sparse) over each repo's name, description, topics and README: top-k
+"repos like this one" queries, near-duplicate clusters (forks/copies of the same workshop) and
+incremental updates that re-tokenize only repos whose text changed
+"""
+
+import argparse
+import hashlib
+import io
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from results_index import tokenize
+
+INDEX_VERSION = 1
+MAX_DOCUMENT_CHARS = 20000
+
+def document_text(repository: str, description: str = '', topics: Iterable[str] = (), readme: str = '') -> str:
+    """Text vectorized for a repo: name words, description, topics and README"""
+    name = (repository or '').split('/', 1)[-1].replace('-', ' ').replace('_', ' ')
+    if isinstance(topics, str):
+        topics = topics.split(',')
+    return '\n'.join([name, description or '', ' '.join(t.strip() for t in topics), readme or ''])[:MAX_DOCUMENT_CHARS]
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+class SimilarityIndex:
+    """Rows of a CSR matrix are L2-normalized sublinear TF-IDF vectors, so a query is one sparse
+    matrix-vector product (cosine similarity against every repo) plus an argpartition for the top k.
+    Raw term counts are kept so weights can be refit as document frequencies drift; a changed repo's
+    row is zeroed (tombstone) and its new vector appended, and tombstones are compacted away"""
+
+    def __init__(self, max_df: float = 0.5, refit_ratio: float = 0.2, compact_ratio: float = 0.3):
+        self.max_df = max_df  # Terms in more than this share of repos carry no weight
+        self.refit_ratio = refit_ratio  # Reweight everything once this share of rows changed since the last fit
+        self.compact_ratio = compact_ratio
+        self.vocabulary = {}  # term -> column
+        self.docs = []  # row -> repository ('' for tombstones)
+        self.doc_ids = {}  # repository -> row
+        self.hashes = []  # row -> text_hash
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.float32)  # Raw term counts
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)  # Weighted, normalized rows
+        self.df = np.zeros(0, dtype=np.int64)  # Live repos per term
+        self.idf = np.zeros(0, dtype=np.float32)  # Weights of the last fit
+        self.changed_since_fit = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.doc_ids)
+
+    # Vectorizing
+
+    def count_terms(self, texts: List[str], grow: bool = True) -> sparse.csr_matrix:
+        """Term-count rows for texts; unknown terms get new columns when grow, else are dropped"""
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            row = {}
+            for token in tokenize(text):
+                if token.isdigit():
+                    continue
+                column = self.vocabulary.get(token)
+                if column is None:
+                    if not grow:
+                        continue
+                    column = self.vocabulary[token] = len(self.vocabulary)
+                row[column] = row.get(column, 0) + 1
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix((np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32),
+                                  np.array(indptr, dtype=np.int64)), shape=(len(texts), len(self.vocabulary)))
+
+    def fit_idf(self) -> np.ndarray:
+        live = max(self.size, 1)
+        idf = (np.log((1 + live) / (1 + self.df)) + 1).astype(np.float32)
+        idf[self.df > max(1, self.max_df * live)] = 0
+        idf[self.df == 0] = 0
+        return idf
+
+    def weigh(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Sublinear TF x IDF, rows L2-normalized"""
+        weighted = counts.astype(np.float32, copy=True)
+        weighted.data = (1 + np.log(weighted.data)) * self.idf[weighted.indices]
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        weighted = sparse.diags(1 / norms).dot(weighted).tocsr()
+        weighted.eliminate_zeros()
+        return weighted
+
+    def refit(self) -> None:
+        self.idf = self.fit_idf()
+        self.matrix = self.weigh(self.counts)
+        self.changed_since_fit = 0
+
+    # Updating
+
+    def update(self, documents: Dict[str, str]) -> Dict[str, int]:
+        """Add or re-vectorize repos (repository -> document_text); unchanged texts are skipped"""
+        stats = {"added": 0, "changed": 0, "unchanged": 0}
+        changed = []
+        for repository, text in documents.items():
+            digest = text_hash(text)
+            row = self.doc_ids.get(repository)
+            if row is not None and self.hashes[row] == digest:
+                stats["unchanged"] += 1
+                continue
+            stats["changed" if row is not None else "added"] += 1
+            changed.append((repository, text, digest))
+        if not changed:
+            return stats
+
+        self.drop_rows([self.doc_ids[repository] for repository, _, _ in changed if repository in self.doc_ids])
+        new_counts = self.count_terms([text for _, text, _ in changed])
+        vocabulary_size = len(self.vocabulary)
+        self.counts = sparse.vstack([self.resized(self.counts, vocabulary_size), new_counts], format='csr')
+        self.df = np.concatenate([self.df, np.zeros(vocabulary_size - len(self.df), dtype=np.int64)])
+        self.df += np.bincount(new_counts.indices, minlength=vocabulary_size)
+        for repository, _, digest in changed:
+            self.doc_ids[repository] = len(self.docs)
+            self.docs.append(repository)
+            self.hashes.append(digest)
+
+        self.changed_since_fit += len(changed)
+        if self.changed_since_fit > self.refit_ratio * self.size or len(self.idf) == 0:
+            self.refit()
+        else:
+            # New terms are weighted from the current frequencies; known ones keep the fitted idf
+            fitted = self.fit_idf()
+            fitted[:len(self.idf)] = self.idf
+            self.idf = fitted
+            self.matrix = sparse.vstack([self.resized(self.matrix, vocabulary_size), self.weigh(new_counts)],
+                                        format='csr')
+        if len(self.docs) - self.size > self.compact_ratio * len(self.docs):
+            self.compact()
+        return stats
+
+    def remove(self, repositories: Iterable[str]) -> int:
+        rows = [self.doc_ids[repository] for repository in repositories if repository in self.doc_ids]
+        self.drop_rows(rows)
+        self.changed_since_fit += len(rows)
+        return len(rows)
+
+    def drop_rows(self, rows: List[int]) -> None:
+        """Tombstone rows: zero their counts and vectors and take them out of the document frequencies"""
+        if not rows:
+            return
+        old = self.counts[rows]
+        self.df[:old.shape[1]] -= np.bincount(old.indices, minlength=old.shape[1])
+        keep = np.ones(self.counts.shape[0], dtype=np.float32)
+        keep[rows] = 0
+        mask = sparse.diags(keep)
+        self.counts = mask.dot(self.counts).tocsr()
+        self.counts.eliminate_zeros()
+        self.matrix = mask.dot(self.matrix).tocsr()
+        self.matrix.eliminate_zeros()
+        for row in rows:
+            del self.doc_ids[self.docs[row]]
+            self.docs[row] = ''
+            self.hashes[row] = ''
+
+    def compact(self) -> None:
+        live = [row for row, repository in enumerate(self.docs) if repository]
+        self.counts = self.counts[live]
+        self.matrix = self.matrix[live]
+        self.docs = [self.docs[row] for row in live]
+        self.hashes = [self.hashes[row] for row in live]
+        self.doc_ids = {repository: row for row, repository in enumerate(self.docs)}
+
+    @staticmethod
+    def resized(matrix: sparse.csr_matrix, columns: int) -> sparse.csr_matrix:
+        return sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], columns))
+
+    # Querying
+
+    def query_vector(self, vector: sparse.csr_matrix, k: int = 10, exclude: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Top k (repository, cosine similarity) for a 1-row weighted vector"""
+        if not self.size or vector.nnz == 0:
+            return []
+        dense = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        dense[vector.indices] = vector.data
+        scores = self.matrix.dot(dense)
+        if exclude is not None:
+            scores[exclude] = 0
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.docs[row], float(scores[row])) for row in top if scores[row] > 0]
+
+    def most_similar(self, repository: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Repos most like an indexed one (itself excluded)"""
+        row = self.doc_ids.get(repository)
+        if row is None:
+            raise KeyError(repository)
+        return self.query_vector(self.matrix[row], k, exclude=row)
+
+    def search(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Repos most like a free-text description"""
+        return self.query_vector(self.weigh(self.count_terms([text], grow=False)), k)
+
+    def near_duplicate_clusters(self, threshold: float = 0.9, rare_share: float = 0.005,
+                                block_size: int = 1024) -> List[List[str]]:
+        """Groups of repos whose vectors are at least threshold-similar (linked transitively), largest first.
+
+        Columns are split into rare terms (in at most rare_share of repos) and common ones: x.y is at most
+        x_rare.y_rare + |x_common| |y_common|, so candidate pairs come from the product of the rare parts
+        (short postings, cheap) and only pairs whose bound reaches threshold get an exact cosine. Pairs
+        sharing no rare term can only qualify when both common parts have norm >= threshold; those few
+        rows are compared directly"""
+        rows = self.matrix.shape[0]
+        parent = list(range(rows))
+
+        def find(row: int) -> int:
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        def link(left: np.ndarray, right: np.ndarray) -> None:
+            for a, b in zip(left, right):
+                root_a, root_b = find(int(a)), find(int(b))
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        rare = (self.df <= max(2, rare_share * self.size)).astype(np.float32)
+        rare_part = sparse.diags(rare).dot(self.matrix.T).T.tocsr()
+        rare_part.eliminate_zeros()
+        common_part = self.matrix - rare_part
+        common_norm = np.sqrt(np.asarray(common_part.multiply(common_part).sum(axis=1)).ravel())
+
+        rare_transposed = rare_part.T.tocsr()
+        for start in range(0, rows, block_size):
+            overlap = rare_part[start:start + block_size].dot(rare_transposed).tocoo()
+            left = overlap.row + start
+            keep = (left < overlap.col) & (overlap.data + common_norm[left] * common_norm[overlap.col] >= threshold)
+            left, right = left[keep], overlap.col[keep]
+            similar = np.asarray(self.matrix[left].multiply(self.matrix[right]).sum(axis=1)).ravel() >= threshold
+            link(left[similar], right[similar])
+
+        generic = np.flatnonzero(common_norm >= threshold)
+        generic_transposed = self.matrix[generic].T.tocsr()
+        for start in range(0, len(generic), block_size):
+            similarities = self.matrix[generic[start:start + block_size]].dot(generic_transposed).tocoo()
+            left = similarities.row + start
+            keep = (left < similarities.col) & (similarities.data >= threshold)
+            link(generic[left[keep]], generic[similarities.col[keep]])
+
+        clusters = {}
+        for row in range(rows):
+            if self.docs[row]:
+                clusters.setdefault(find(row), []).append(self.docs[row])
+        return sorted((sorted(members) for members in clusters.values() if len(members) > 1),
+                      key=lambda members: (-len(members), members[0]))
+
+    # Persistence
+
+    def to_bytes(self) -> bytes:
+        """Compressed .npz: term counts, frequencies and fitted weights (vectors are re-derived on load)"""
+        buffer = io.BytesIO()
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            buffer,
+            meta=np.array(json.dumps({"version": INDEX_VERSION, "max_df": self.max_df, "refit_ratio": self.refit_ratio,
+                                      "compact_ratio": self.compact_ratio, "changed_since_fit": self.changed_since_fit})),
+            terms=np.array(terms, dtype=str), docs=np.array(self.docs, dtype=str), hashes=np.array(self.hashes, dtype=str),
+            data=self.counts.data, indices=self.counts.indices, indptr=self.counts.indptr, df=self.df, idf=self.idf,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SimilarityIndex':
+        arrays = np.load(io.BytesIO(data), allow_pickle=False)
+        meta = json.loads(str(arrays['meta']))
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported similarity index version: {meta.get('version')}")
+        index = cls(meta["max_df"], meta["refit_ratio"], meta["compact_ratio"])
+        index.changed_since_fit = meta["changed_since_fit"]
+        index.vocabulary = {term: column for column, term in enumerate(arrays['terms'].tolist())}
+        index.docs = arrays['docs'].tolist()
+        index.hashes = arrays['hashes'].tolist()
+        index.doc_ids = {repository: row for row, repository in enumerate(index.docs) if repository}
+        index.counts = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                         shape=(len(index.docs), len(index.vocabulary)))
+        index.df = arrays['df']
+        index.idf = arrays['idf']
+        index.matrix = index.weigh(index.counts)
+        return index
+
+def load_s3(s3_client, bucket: str, key: str) -> SimilarityIndex:
+    """Saved index from S3, or an empty one when there is none yet"""
+    try:
+        data = s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+    except Exception:
+        return SimilarityIndex()
+    return SimilarityIndex.from_bytes(data)
+
+def cached_documents(repos: Iterable[Dict], persistent_cache) -> Dict[str, str]:
+    """document_text for every repo whose README is in the persistent cache (no GitHub requests)"""
+    documents = {}
+    for repo in repos:
+        full_name = repo.get('full_name')
+        readme = persistent_cache.get(full_name, 'readme') if full_name else None
+        if readme is None:
+            continue
+        topics = persistent_cache.get(full_name, 'topics')
+        documents[full_name] = document_text(full_name, repo.get('description') or '',
+                                             topics['content'] if topics else repo.get('topics') or [],
+                                             readme['content'] or '')
+    return documents
+
+def main():
+    parser = argparse.ArgumentParser(description='Find similar and near-duplicate repositories by TF-IDF')
+    parser.add_argument('org_name', help='GitHub organization name')
+    parser.add_argument('--cache-db', help='Update the index from READMEs/topics in this persistent cache first')
+    parser.add_argument('--like', action='append', default=[], help='Repository (owner/name) to find similar repos for')
+    parser.add_argument('--text', help='Free-text query')
+    parser.add_argument('--top', type=int, default=10, help='Results per query')
+    parser.add_argument('--clusters', action='store_true', help='List near-duplicate clusters')
+    parser.add_argument('--threshold', type=float, default=0.9, help='Cosine similarity for near-duplicates')
+    args = parser.parse_args()
+
+    import boto3
+    from master_index import iter_master_index
+    s3_client = boto3.client('s3')
+    bucket = f'aws-github-repo-classification-{args.org_name.lower()}'
+    key = f'similarity/{args.org_name}_tfidf.npz'
+    index = load_s3(s3_client, bucket, key)
+    print(f"🧭 Similarity index: {index.size} repos, {len(index.vocabulary)} terms")
+
+    if args.cache_db:
+        from persistent_cache import PersistentGitHubCache
+        cache = PersistentGitHubCache(args.cache_db)
+        repos = iter_master_index(s3_client, bucket, f'master-index/{args.org_name}_repos.json')
+        stats = index.update(cached_documents(repos, cache))
+        cache.close()
+        s3_client.put_object(Bucket=bucket, Key=key, Body=index.to_bytes(), ContentType='application/octet-stream')
+        print(f"💾 Updated s3://{bucket}/{key}: {stats}")
+
+    queries = [(repository, lambda r=repository: index.most_similar(r, args.top)) for repository in args.like]
+    if args.text:
+        queries.append((repr(args.text), lambda: index.search(args.text, args.top)))
+    for label, query in queries:
+        try:
+            matches = query()
+        except KeyError:
+            print(f"⚠️  {label} is not in the index")
+            continue
+        print(f"🔗 Like {label}:")
+        for repository, score in matches:
+            print(f"   {score:.3f}  {repository}")
+    if args.clusters:
+        clusters = index.near_duplicate_clusters(args.threshold)
+        print(f"👯 {len(clusters)} near-duplicate clusters (cosine >= {args.threshold}), "
+              f"{sum(len(c) for c in clusters)} repos")
+        for members in clusters[:50]:
+            print(f"   {len(members)}: {', '.join(members[:8])}{' ...' if len(members) > 8 else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,54 @@ Smart Rate Limit Classifier - Handles GitHub rate limits intelligently
 import json
 import boto3
 import time
-import requests
 import sys
 import argparse
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from enhanced_generic_classifier import EnhancedGenericRepositoryClassifier
+from rate_limit_scheduler import parse_token_args
+from repo_record import updated_datetime
+from run_metrics import add_metrics_args, apply_metrics_args, get_metrics
 
 class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
-    def __init__(self, org_name: str):
-        super().__init__(org_name)
+    def __init__(self, org_name: str, s3_client=None):
+        super().__init__(org_name, s3_client)
+        self.rate_limiter = None  # RateLimitScheduler once a token pool is enabled
+        self.rate_limit_wait_hook = None
+        self.rate_limit_hook_after = 60.0
+        
+    def enable_token_pool(self, tokens: List[str]):
+        """Rotate requests across several tokens and pace them over each reset window"""
+        from rate_limit_scheduler import RateLimitScheduler
+        
+        self.github_token = tokens[0] if tokens else None
+        self.rate_limiter = RateLimitScheduler(tokens)
+        self.on_rate_limit_wait(self.rate_limit_wait_hook, self.rate_limit_hook_after)
+        print(f"🔑 Using {len(tokens)} GitHub token(s) with rate-limit scheduling")
+        
+    def on_rate_limit_wait(self, hook, after: float = 60.0):
+        """Call hook(seconds) before any rate-limit wait longer than after seconds, e.g. so a queue
+        worker can hand its leased repos to other nodes instead of holding them while it sleeps"""
+        self.rate_limit_wait_hook = hook
+        self.rate_limit_hook_after = after
+        if self.rate_limiter:
+            self.rate_limiter.on_long_wait = hook
+            self.rate_limiter.long_wait = after
+        
+    def add_auth_header(self, headers: Dict) -> Dict:
+        """Attach the next scheduled token (waits only if every token is exhausted)"""
+        if self.rate_limiter:
+            token = self.rate_limiter.acquire()
+            if token:
+                headers['Authorization'] = f'token {token}'
+            return headers
+        return super().add_auth_header(headers)
         
     def handle_rate_limit(self, response):
         """Smart rate limit handling with proper wait times"""
+        if self.rate_limiter:
+            # Scheduler records the headers; the retry is paced by the next acquire()
+            return self.rate_limiter.observe(response)
         if response.status_code == 403:
             rate_limit_remaining = int(response.headers.get('X-RateLimit-Remaining', 0))
             rate_limit_reset = int(response.headers.get('X-RateLimit-Reset', 0))
@@ -31,12 +66,15 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
                 print(f"🚫 Rate limit exceeded!")
                 print(f"⏰ Reset time: {datetime.fromtimestamp(rate_limit_reset)}")
                 print(f"⏳ Waiting {wait_time} seconds ({wait_time//60:.1f} minutes)...")
+                if self.rate_limit_wait_hook and wait_time > self.rate_limit_hook_after:
+                    self.rate_limit_wait_hook(wait_time)
                 
                 # Save checkpoint before waiting
                 print("💾 Saving checkpoint before rate limit wait...")
                 
                 # Wait for rate limit reset
-                time.sleep(wait_time)
+                with get_metrics().timer('rate_limit_wait', source='reset'):
+                    time.sleep(wait_time)
                 print("✅ Rate limit should be reset, resuming...")
                 return True
         return False
@@ -45,14 +83,8 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
         """Classify repository with smart rate limit handling"""
         for attempt in range(self.max_retries):
             try:
-                # Check if we need README (this uses GitHub API)
-                desc = repo.get("description")
-                if not desc:
-                    # Try to get README with rate limit handling
-                    readme_desc = self.get_readme_with_smart_retry(repo)
-                    desc = readme_desc or ""
-                else:
-                    desc = desc or ""
+                # README fallback (the only GitHub API call) happens once per repo
+                desc = self.get_feature_context(repo).description
                 
                 classification = {
                     # Basic Info
@@ -65,10 +97,10 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
                     "forks": repo["forks_count"],
                     
                     # Business Classification
-                    "solution_type": self.get_solution_type_safe(repo, desc),
-                    "competency": self.get_competency_safe(desc),
-                    "customer_problems": self.get_customer_problems_safe(desc),
-                    "solution_marketing": self.get_solution_marketing_safe(repo, desc),
+                    "solution_type": self.get_solution_type(repo),
+                    "competency": self.get_competency(repo),
+                    "customer_problems": self.get_customer_problems(repo),
+                    "solution_marketing": self.get_solution_marketing(repo),
                     
                     # Technical Classification
                     "deployment_tools": self.get_deployment_tools(repo["name"]),
@@ -89,11 +121,11 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
                     "maintenance_level": self.get_maintenance_level(repo),
                     "scalability": self.get_scalability(repo),
                     "usp": self.get_usp(repo),
-                    "freshness_status": self.get_freshness(repo["updated_at"]),
-                    "days_since_update": self.get_days_since_update(repo["updated_at"]),
+                    "freshness_status": self.get_freshness(updated_datetime(repo)),
+                    "days_since_update": self.get_days_since_update(updated_datetime(repo)),
                     
                     # AI/GenAI
-                    "genai_agentic": self.is_genai_agentic_safe(repo, desc),
+                    "genai_agentic": self.is_genai_agentic(repo),
                     
                     # Metadata
                     "topics": ", ".join(repo.get("topics", [])),
@@ -109,16 +141,19 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
                     print(f"❌ Failed to classify {repo['full_name']} after {self.max_retries} attempts")
                     return None
 
+    def get_readme_description(self, repo: Dict) -> str:
+        """README fallback description with smart rate limit handling"""
+        return self.get_readme_with_smart_retry(repo)
+
     def get_readme_with_smart_retry(self, repo: Dict) -> str:
         """Get README with smart rate limit handling"""
         for attempt in range(self.max_retries):
             try:
-                url = f"https://api.github.com/repos/{repo['full_name']}/readme"
+                url = f"{self.github_api_url}/repos/{repo['full_name']}/readme"
                 headers = {}
-                if self.github_token:
-                    headers['Authorization'] = f'token {self.github_token}'
+                self.add_auth_header(headers)
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = self.http.get(url, headers=headers)
                 
                 if self.handle_rate_limit(response):
                     continue  # Rate limit handled, retry
@@ -145,84 +180,6 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
                 time.sleep(1)
         return ""
 
-    # Safe classification methods that don't call GitHub API
-    def get_solution_type_safe(self, repo: Dict, desc: str) -> str:
-        """Safe solution type classification"""
-        desc_lower = desc.lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        
-        if any(word in desc_lower for word in ["ai", "ml", "machine learning", "neural", "deep learning", "llm", "genai", "bedrock"]):
-            return "Innovation Catalysts"
-        elif any(word in desc_lower for word in ["security", "compliance", "governance", "audit", "policy"]):
-            return "Compliance Accelerators"
-        elif any(word in desc_lower for word in ["tool", "utility", "helper", "simple", "quick"]):
-            return "Quick Wins"
-        else:
-            return "Foundation Builders"
-
-    def get_competency_safe(self, desc: str) -> str:
-        """Safe competency classification"""
-        desc_lower = desc.lower()
-        
-        if any(word in desc_lower for word in ["analytics", "data", "etl", "warehouse"]):
-            return "Analytics"
-        elif any(word in desc_lower for word in ["security", "iam", "encryption"]):
-            return "Security"
-        elif any(word in desc_lower for word in ["devops", "cicd", "pipeline", "deploy"]):
-            return "DevOps"
-        elif any(word in desc_lower for word in ["ai", "ml", "machine learning"]):
-            return "AI/ML"
-        else:
-            return "General"
-
-    def get_customer_problems_safe(self, desc: str) -> str:
-        """Safe customer problems classification"""
-        desc_lower = desc.lower()
-        
-        if any(word in desc_lower for word in ["complex", "difficult", "challenge"]):
-            return "Complex Implementation"
-        elif any(word in desc_lower for word in ["time", "quick", "fast"]):
-            return "Time to Market"
-        else:
-            return "Development Efficiency"
-
-    def get_solution_marketing_safe(self, repo: Dict, desc: str) -> str:
-        """Safe solution marketing classification"""
-        repo_name = repo.get("name", "").lower()
-        desc_lower = desc.lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{repo_name} {desc_lower} {topics}"
-        
-        if any(word in text for word in ["setup", "bootstrap", "install", "getting-started", "quickstart"]):
-            return "setup"
-        elif any(word in text for word in ["landing-zone", "account-setup", "multi-account", "organization"]):
-            return "landingzone"
-        elif any(word in text for word in ["starter", "template", "boilerplate", "scaffold"]):
-            return "starter"
-        elif any(word in text for word in ["optim", "performance", "cost", "efficiency"]):
-            return "optimise"
-        elif any(word in text for word in ["compliance", "security", "governance", "audit"]):
-            return "compliance"
-        elif any(word in text for word in ["improve", "enhance", "upgrade", "migrate"]):
-            return "improvement"
-        elif any(word in text for word in ["monitor", "observ", "dashboard", "metric", "log"]):
-            return "visibility"
-        elif any(word in text for word in ["foundation", "infrastructure", "core", "base"]):
-            return "foundation"
-        else:
-            return "foundation"
-
-    def is_genai_agentic_safe(self, repo: Dict, desc: str) -> str:
-        """Safe GenAI detection"""
-        desc_lower = desc.lower()
-        topics = " ".join(repo.get("topics", [])).lower()
-        text = f"{desc_lower} {topics}"
-        
-        if any(word in text for word in ["agent", "llm", "genai", "bedrock", "anthropic", "openai"]):
-            return "Yes"
-        else:
-            return "No"
-
     def run_smart_classification(self, batch_size: int = 5) -> None:
         """Run classification with smart rate limit handling"""
         print("🧠 SMART RATE LIMIT REPOSITORY CLASSIFIER")
@@ -273,20 +230,19 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
                 if classification:
                     print(f"✅ {repo_full_name} - {classification['solution_type']}")
                     completed_repos.add(repo_full_name)
-                    checkpoint["total_processed"] += 1
+                    self.checkpoint_store.mark_completed(repo_full_name)
                 else:
                     print(f"❌ Failed to classify {repo_full_name}")
                     failed_repos[repo_full_name] = datetime.now().isoformat()
+                    self.checkpoint_store.mark_failed(repo_full_name, failed_repos[repo_full_name])
                 
                 processed_in_session += 1
                 
-                # Update checkpoint
-                checkpoint["current_index"] = i + j + 1
-                checkpoint["completed_repos"] = list(completed_repos)
-                checkpoint["failed_repos"] = failed_repos
+                # Update checkpoint (only the delta is written at the end of the batch)
+                self.checkpoint_store.set_index(i + j + 1)
             
             # Save checkpoint after each batch
-            self.save_checkpoint_with_retry(checkpoint)
+            self.save_checkpoint_with_retry()
             
             batch_time = time.time() - batch_start_time
             print(f"💾 Checkpoint saved - Progress: {len(completed_repos)}/{len(repos)} ({len(completed_repos)/len(repos)*100:.1f}%)")
@@ -296,6 +252,9 @@ class SmartRateLimitClassifier(EnhancedGenericRepositoryClassifier):
             if len(completed_repos) > 0 and len(completed_repos) % 1000 == 0:
                 print(f"\n🎯 Milestone: {len(completed_repos)} repositories processed!")
         
+        # Fold the run's segments into progress.json so readers of the snapshot see the final state
+        self.checkpoint_store.compact()
+        
         print(f"\n✅ Classification completed!")
         print(f"📊 Total processed: {len(completed_repos)}")
         print(f"❌ Total failed: {len(failed_repos)}")
@@ -305,14 +264,17 @@ def main():
     parser = argparse.ArgumentParser(description='Smart Rate Limit GitHub Repository Classifier')
     parser.add_argument('org_name', help='GitHub organization name (e.g., aws-samples)')
     parser.add_argument('--batch-size', type=int, default=5, help='Batch size for processing (default: 5)')
-    parser.add_argument('--github-token', help='GitHub personal access token')
+    parser.add_argument('--github-token', action='append',
+                        help='GitHub personal access token (repeat or comma-separate for a token pool)')
+    add_metrics_args(parser)
     
     args = parser.parse_args()
     
     classifier = SmartRateLimitClassifier(args.org_name)
-    if args.github_token:
-        classifier.github_token = args.github_token
-        print("🔑 Using GitHub token for higher rate limits")
+    tokens = parse_token_args(args.github_token)
+    if tokens:
+        classifier.enable_token_pool(tokens)
+    apply_metrics_args(classifier, args)
     
     classifier.run_smart_classification(args.batch_size)
 
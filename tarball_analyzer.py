@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming Tarball Analyzer
+Reads each repository's /tarball through an incremental gzip/tar decoder (nothing written to disk) and
+scans README, IaC templates and dependency manifests on the fly: one request per repo, bounded memory
+"""
+
+import json
+import re
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from github_http import get_api_url, get_http_client
+from iac_scanner import (cdk_source_candidate, extract_cdk_modules, extract_cfn_resource_types,
+                         extract_tf_resource_types, iac_file_kind)
+
+README_NAMES = frozenset(['readme.md', 'readme.rst', 'readme.txt', 'readme'])
+MANIFEST_NAMES = frozenset(['package.json', 'requirements.txt', 'pom.xml'])
+
+# Extension -> language, for bytes-per-language from the tar headers (member data is not read for these)
+LANGUAGE_EXTENSIONS = {
+    '.py': 'Python', '.ts': 'TypeScript', '.tsx': 'TypeScript', '.js': 'JavaScript', '.jsx': 'JavaScript',
+    '.mjs': 'JavaScript', '.java': 'Java', '.kt': 'Kotlin', '.go': 'Go', '.rs': 'Rust', '.cs': 'C#',
+    '.rb': 'Ruby', '.php': 'PHP', '.scala': 'Scala', '.swift': 'Swift', '.c': 'C', '.cpp': 'C++', '.cc': 'C++',
+    '.h': 'C', '.sh': 'Shell', '.ps1': 'PowerShell', '.tf': 'HCL', '.ipynb': 'Jupyter Notebook',
+    '.dart': 'Dart', '.r': 'R', '.sql': 'SQL', '.vue': 'Vue', '.html': 'HTML', '.css': 'CSS',
+}
+# Stack sources read before cdk.json may have been seen; capped so plain JS/TS lib/ dirs don't use up max_files
+MAX_CDK_SOURCES = 10
+SKIPPED_DIRS = frozenset(['node_modules', 'vendor', '.git', '.venv', 'venv', 'dist', 'build', 'cdk.out'])
+
+# Dependency name -> framework label, in the order labels are reported
+NPM_FRAMEWORKS = [
+    ('aws-cdk-lib', 'AWS CDK'), ('@aws-cdk/core', 'AWS CDK'), ('cdktf', 'CDK for Terraform'),
+    ('serverless', 'Serverless Framework'), ('@aws-amplify/backend', 'Amplify'), ('aws-amplify', 'Amplify'),
+    ('next', 'Next.js'), ('react', 'React'), ('vue', 'Vue'), ('@angular/core', 'Angular'), ('svelte', 'Svelte'),
+    ('express', 'Express'), ('fastify', 'Fastify'), ('@nestjs/core', 'NestJS'), ('langchain', 'LangChain'),
+]
+PYTHON_FRAMEWORKS = [
+    ('aws-cdk-lib', 'AWS CDK'), ('aws-cdk.core', 'AWS CDK'), ('chalice', 'Chalice'),
+    ('aws-lambda-powertools', 'Lambda Powertools'), ('django', 'Django'), ('flask', 'Flask'),
+    ('fastapi', 'FastAPI'), ('streamlit', 'Streamlit'), ('langchain', 'LangChain'), ('llama-index', 'LlamaIndex'),
+    ('strands-agents', 'Strands Agents'), ('sagemaker', 'SageMaker SDK'), ('torch', 'PyTorch'),
+    ('tensorflow', 'TensorFlow'), ('transformers', 'Hugging Face Transformers'), ('pyspark', 'Spark'),
+]
+JAVA_FRAMEWORKS = [
+    ('software.amazon.awscdk', 'AWS CDK'), ('spring-boot', 'Spring Boot'), ('spring-cloud-function', 'Spring Cloud Function'),
+    ('quarkus', 'Quarkus'), ('micronaut', 'Micronaut'), ('aws-lambda-java-core', 'AWS Lambda Java'),
+]
+
+NPM_SDK_CLIENT = re.compile(r'^@aws-sdk/client-([a-z0-9-]+)$')
+REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)', re.MULTILINE)
+POM_DEPENDENCY = re.compile(r'<groupId>\s*([^<\s]+)\s*</groupId>\s*<artifactId>\s*([^<\s]+)\s*</artifactId>')
+
+class BudgetExceeded(Exception):
+    """The compressed byte budget for one archive ran out"""
+
+class BudgetedReader:
+    """File-like view of a response body that stops after max_bytes (tarfile's r|gz reads it sequentially)"""
+
+    def __init__(self, raw, max_bytes: int):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.bytes_read >= self.max_bytes:
+            raise BudgetExceeded()
+        if size is None or size < 0 or size > self.max_bytes - self.bytes_read:
+            size = self.max_bytes - self.bytes_read
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+def package_json_dependencies(text: str) -> Set[str]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return set()
+    if not isinstance(data, dict):
+        return set()
+    names = set()
+    for field in ('dependencies', 'devDependencies', 'peerDependencies'):
+        if isinstance(data.get(field), dict):
+            names.update(data[field])
+    return names
+
+def requirements_dependencies(text: str) -> Set[str]:
+    return {name.lower().replace('_', '-') for name in REQUIREMENT_NAME.findall(text)
+            if not name.startswith('-')}
+
+def pom_dependencies(text: str) -> Set[str]:
+    return {f"{group}:{artifact}" for group, artifact in POM_DEPENDENCY.findall(text)}
+
+def empty_analysis() -> Dict:
+    return {"readme": "", "languages": {}, "frameworks": [], "tools": [], "resource_types": [], "cdk_modules": [],
+            "sdk_clients": [], "files": [], "members_seen": 0, "bytes_read": 0, "complete": False, "stopped": None}
+
+class TarballAnalyzer:
+    def __init__(self, api_url: Optional[str] = None, max_workers: int = 4, max_bytes: int = 64 * 1024 * 1024,
+                 max_members: int = 20000, max_seconds: float = 60.0, max_file_bytes: int = 256 * 1024,
+                 max_files: int = 60, readme_chars: int = 3000,
+                 add_auth_header: Optional[Callable[[Dict], Dict]] = None,
+                 handle_rate_limit: Optional[Callable] = None, persistent_cache=None, max_retries: int = 3):
+        """Budgets per archive: max_bytes compressed bytes read, max_members tar entries, max_seconds
+        wall time, max_files members whose content is read (each up to max_file_bytes; larger ones are
+        skipped). Whatever was scanned before a budget ran out is kept.
+        add_auth_header / handle_rate_limit: the classifier's token and rate-limit handling;
+        persistent_cache: PersistentGitHubCache for analyses by repo (kind 'tarball')"""
+        self.api_url = (api_url or get_api_url()).rstrip('/')
+        self.max_workers = max(1, max_workers)
+        self.max_bytes = max_bytes
+        self.max_members = max_members
+        self.max_seconds = max_seconds
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.readme_chars = readme_chars
+        self.add_auth_header = add_auth_header
+        self.handle_rate_limit = handle_rate_limit
+        self.persistent_cache = persistent_cache
+        self.max_retries = max_retries
+        self.http = get_http_client()
+        self.lock = threading.Lock()
+        self.stats = {"archives": 0, "cache_hits": 0, "bytes_read": 0, "members_seen": 0, "files_read": 0,
+                      "budget_stops": 0}
+
+    def count(self, stat: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[stat] += amount
+
+    def open_tarball(self, full_name: str):
+        """Streaming GET of the repo's tarball (GitHub redirects to codeload); None when unavailable"""
+        url = f"{self.api_url}/repos/{full_name}/tarball"
+        for attempt in range(self.max_retries):
+            headers = {}
+            if self.add_auth_header:
+                self.add_auth_header(headers)
+            try:
+                response = self.http.get(url, headers=headers, stream=True)
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    print(f"      🐛 Tarball request failed for {full_name}: {e}")
+                time.sleep(1)
+                continue
+            if self.handle_rate_limit and self.handle_rate_limit(response):
+                response.close()
+                continue
+            if response.status_code != 200:
+                response.close()
+                return None
+            return response
+        return None
+
+    def analyze(self, repo: Dict) -> Optional[Dict]:
+        """Analysis of one repository, None when its tarball could not be fetched"""
+        full_name = repo['full_name']
+        pushed_at = repo.get('pushed_at')
+        if self.persistent_cache:
+            entry = self.persistent_cache.get(full_name, 'tarball')
+            if entry and pushed_at and entry.get('pushed_at') == pushed_at:
+                self.count('cache_hits')
+                return entry['content']
+
+        response = self.open_tarball(full_name)
+        if response is None:
+            return None
+        try:
+            response.raw.decode_content = True  # In case a proxy added Content-Encoding on top of the .tar.gz
+            analysis = self.scan_stream(response.raw)
+        finally:
+            # Closing mid-archive drops the connection instead of draining the rest of the body
+            response.close()
+
+        self.count('archives')
+        self.count('bytes_read', analysis['bytes_read'])
+        self.count('members_seen', analysis['members_seen'])
+        if analysis['stopped']:
+            self.count('budget_stops')
+        # Byte/member budget stops are deterministic for an unchanged archive; a time limit or a broken
+        # stream would serve a partial analysis until the next push, so those are retried next run instead
+        if self.persistent_cache and analysis['stopped'] in (None, 'bytes', 'members'):
+            self.persistent_cache.put(full_name, 'tarball', analysis, None, pushed_at)
+        return analysis
+
+    def scan_stream(self, raw) -> Dict:
+        """Scan a gzipped tar stream member by member until it ends or a budget runs out"""
+        analysis = empty_analysis()
+        reader = BudgetedReader(raw, self.max_bytes)
+        deadline = time.monotonic() + self.max_seconds
+        languages = {}
+        dependencies = {'npm': set(), 'python': set(), 'maven': set()}
+        tools = set()
+        resource_types = set()
+        cdk_modules = set()
+        cdk_sources = []
+        readme_depth = None
+
+        try:
+            with tarfile.open(fileobj=reader, mode='r|gz') as archive:
+                for member in archive:
+                    analysis['members_seen'] += 1
+                    if analysis['members_seen'] > self.max_members:
+                        analysis['stopped'] = 'members'
+                        break
+                    if time.monotonic() > deadline:
+                        analysis['stopped'] = 'time'
+                        break
+                    if not member.isfile():
+                        continue
+
+                    # Members are <owner>-<repo>-<sha>/path/in/repo
+                    path = member.name.split('/', 1)[1] if '/' in member.name else member.name
+                    parts = path.split('/')
+                    if SKIPPED_DIRS.intersection(parts[:-1]):
+                        continue
+                    name = parts[-1].lower()
+                    extension = name[name.rfind('.'):] if '.' in name else ''
+                    if extension in LANGUAGE_EXTENSIONS:
+                        language = LANGUAGE_EXTENSIONS[extension]
+                        languages[language] = languages.get(language, 0) + member.size
+
+                    kind = iac_file_kind(path)
+                    if kind == 'cdk':
+                        tools.add('cdk')
+                        continue
+                    is_readme = name in README_NAMES and (readme_depth is None or len(parts) < readme_depth)
+                    is_cdk_source = not kind and cdk_source_candidate(path) and len(cdk_sources) < MAX_CDK_SOURCES
+                    wanted = is_readme or kind or name in MANIFEST_NAMES or is_cdk_source
+                    if not wanted or member.size > self.max_file_bytes or len(analysis['files']) >= self.max_files:
+                        continue
+
+                    # In stream mode a member's data can only be read while it is the current member
+                    text = archive.extractfile(member).read().decode('utf-8', errors='ignore')
+                    self.count('files_read')
+                    analysis['files'].append(path)
+
+                    if is_readme:
+                        analysis['readme'] = text[:self.readme_chars]
+                        readme_depth = len(parts)
+                    elif kind == 'terraform':
+                        found = extract_tf_resource_types(text)
+                        if found:
+                            tools.add('terraform')
+                            resource_types |= found
+                    elif kind == 'cloudformation':
+                        found = extract_cfn_resource_types(text)
+                        if found:
+                            tools.add('cloudformation')
+                            if any(t.startswith('AWS::Serverless::') for t in found):
+                                tools.add('sam')
+                            resource_types |= found
+                    elif name == 'package.json':
+                        dependencies['npm'] |= package_json_dependencies(text)
+                    elif name == 'requirements.txt':
+                        dependencies['python'] |= requirements_dependencies(text)
+                    elif name == 'pom.xml':
+                        dependencies['maven'] |= pom_dependencies(text)
+                    else:
+                        # Stack source: only counts once cdk.json shows this is a CDK app
+                        cdk_sources.append(extract_cdk_modules(text))
+                else:
+                    analysis['complete'] = True
+        except BudgetExceeded:
+            analysis['stopped'] = 'bytes'
+        except (tarfile.TarError, EOFError, OSError) as e:
+            # Truncated or corrupt stream: keep what was scanned
+            analysis['stopped'] = f'error: {e}'
+
+        if 'cdk' in tools:
+            for modules in cdk_sources:
+                cdk_modules |= modules
+
+        analysis['bytes_read'] = reader.bytes_read
+        analysis['languages'] = dict(sorted(languages.items(), key=lambda item: -item[1]))
+        analysis['frameworks'] = self.detect_frameworks(dependencies)
+        analysis['sdk_clients'] = sorted(self.sdk_clients(dependencies))
+        analysis['tools'] = sorted(tools)
+        analysis['resource_types'] = sorted(resource_types)
+        analysis['cdk_modules'] = sorted(cdk_modules)
+        return analysis
+
+    @staticmethod
+    def detect_frameworks(dependencies: Dict[str, Set[str]]) -> List[str]:
+        frameworks = []
+        for name, label in NPM_FRAMEWORKS:
+            if name in dependencies['npm'] and label not in frameworks:
+                frameworks.append(label)
+        for name, label in PYTHON_FRAMEWORKS:
+            if name in dependencies['python'] and label not in frameworks:
+                frameworks.append(label)
+        for name, label in JAVA_FRAMEWORKS:
+            if any(name in dependency for dependency in dependencies['maven']) and label not in frameworks:
+                frameworks.append(label)
+        return frameworks
+
+    @staticmethod
+    def sdk_clients(dependencies: Dict[str, Set[str]]) -> Set[str]:
+        """Per-service AWS SDK packages as 'aws-<service>' (the iac_scanner CDK module form):
+        @aws-sdk/client-dynamodb and software.amazon.awssdk:dynamodb"""
+        clients = set()
+        for name in dependencies['npm']:
+            match = NPM_SDK_CLIENT.match(name)
+            if match:
+                clients.add(f"aws-{match.group(1)}")
+        for dependency in dependencies['maven']:
+            group, artifact = dependency.split(':', 1)
+            if group == 'software.amazon.awssdk':
+                clients.add(f"aws-{artifact}")
+        return clients
+
+    def analyze_all(self, repos: List[Dict]) -> Dict[str, Dict]:
+        """full_name -> analysis for many repos, max_workers archives streaming at once;
+        repos whose tarball could not be fetched are omitted"""
+        repos = [repo for repo in repos if repo.get('full_name')]
+        if not repos:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(repos))) as executor:
+            analyses = executor.map(self.analyze, repos)
+            return {repo['full_name']: analysis for repo, analysis in zip(repos, analyses) if analysis is not None}
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stream repository tarballs and scan README/IaC/manifests')
+    parser.add_argument('repos', nargs='+', help='owner/name of each repository')
+    parser.add_argument('--github-token', help='GitHub personal access token')
+    parser.add_argument('--max-mb', type=float, default=64, help='Compressed MB read per archive')
+    parser.add_argument('--max-workers', type=int, default=4, help='Archives streamed concurrently')
+    args = parser.parse_args()
+
+    def add_auth_header(headers: Dict) -> Dict:
+        if args.github_token:
+            headers['Authorization'] = f'token {args.github_token}'
+        return headers
+
+    analyzer = TarballAnalyzer(max_workers=args.max_workers, max_bytes=int(args.max_mb * 1024 * 1024),
+                               add_auth_header=add_auth_header)
+    analyses = analyzer.analyze_all([{"full_name": name} for name in args.repos])
+    for analysis in analyses.values():
+        analysis['readme'] = analysis['readme'][:200]
+    print(json.dumps(analyses, indent=2))
+    print(f"📊 {analyzer.stats}")
+
+if __name__ == "__main__":
+    main()
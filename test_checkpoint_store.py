@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Store Tests
+Snapshot + segments round-trip, and S3 failures while loading abort instead of starting from partial state
+"""
+
+import pytest
+
+from checkpoint_store import CheckpointStore
+from local_stubs import InMemoryS3Client
+
+def failing(error: Exception):
+    def call(**kwargs):
+        raise error
+    return call
+
+@pytest.fixture
+def s3():
+    s3 = InMemoryS3Client()
+    s3.create_bucket(Bucket='bucket')
+    store = CheckpointStore(s3, 'bucket', compact_every=2)
+    for name in ['org/a', 'org/b', 'org/c']:
+        store.mark_completed(name)
+        store.flush()
+    return s3
+
+def test_missing_snapshot_starts_empty():
+    s3 = InMemoryS3Client()
+    assert CheckpointStore(s3, 'bucket').load()['completed_repos'] == []
+
+def test_load_replays_snapshot_and_segments(s3):
+    assert CheckpointStore(s3, 'bucket').load()['completed_repos'] == ['org/a', 'org/b', 'org/c']
+
+def test_failed_segment_listing_raises(s3):
+    s3.list_objects_v2 = failing(IOError("SlowDown"))
+    with pytest.raises(IOError):
+        CheckpointStore(s3, 'bucket').load()
+
+def test_unreadable_snapshot_raises(s3):
+    get_object = s3.get_object
+
+    def get_segment_only(**kwargs):
+        if kwargs['Key'] == 'checkpoints/progress.json':
+            raise PermissionError("AccessDenied")
+        return get_object(**kwargs)
+
+    s3.get_object = get_segment_only
+    with pytest.raises(PermissionError):
+        CheckpointStore(s3, 'bucket').load()
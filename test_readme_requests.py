@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+README Request Count Tests
+Every classifier entry point fetches a repository's README at most once, counted on the stub server
+(the generic classifiers only fall back to it when the description is empty, so some repos need none)
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from benchmarks import make_classifier
+from enhanced_classifier_v4 import EnhancedClassifierV4
+from enhanced_generic_classifier import EnhancedGenericRepositoryClassifier
+from generic_classifier import GenericRepositoryClassifier
+from local_stubs import StubGitHubServer, make_synthetic_repos
+from smart_rate_limit_classifier import SmartRateLimitClassifier
+
+ENTRY_POINTS = [
+    (GenericRepositoryClassifier, 'classify_repository'),
+    (EnhancedGenericRepositoryClassifier, 'classify_repository_with_retry'),
+    (SmartRateLimitClassifier, 'classify_repository_with_smart_retry'),
+    (EnhancedClassifierV4, 'classify_repository_enhanced_with_logging'),
+]
+
+@pytest.mark.parametrize("cls,method", ENTRY_POINTS, ids=[f"{cls.__name__}.{method}" for cls, method in ENTRY_POINTS])
+def test_one_readme_request_per_repo(cls, method):
+    repos = make_synthetic_repos(20)
+    with StubGitHubServer(repos) as server:
+        classifier = make_classifier(cls, server)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for repo in repos:
+                getattr(classifier, method)(repo)
+        per_repo = {repo['full_name']: server.repo_request_counts[('readme', repo['full_name'])] for repo in repos}
+
+    assert sum(per_repo.values()) > 0
+    assert {name: count for name, count in per_repo.items() if count > 1} == {}
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Results Index Query Tests
+updated: means the same with or without a last_modified column, and malformed queries raise QueryError
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from results_index import QueryError, ResultsIndex
+
+AGES = (5, 50, 200, 800)  # Days since update, away from the boundaries queried below
+
+def matches(index: ResultsIndex, query: str):
+    bits = index.evaluate(query)
+    return sorted(repository for doc, repository in enumerate(index.docs) if bits >> doc & 1)
+
+@pytest.fixture(scope="module")
+def indexes():
+    now = datetime.now()
+    rows = [{"repository": f"org/repo-{days}", "description": "lambda api",
+             "last_modified": (now - timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+             "days_since_update": str(days)} for days in AGES]
+    without_timestamps = [{k: v for k, v in row.items() if k != "last_modified"} for row in rows]
+    return ResultsIndex.build(rows), ResultsIndex.build(without_timestamps)
+
+@pytest.mark.parametrize("query,expected", [
+    ("updated:<90", ["org/repo-5", "org/repo-50"]),
+    ("updated:<90d", ["org/repo-5", "org/repo-50"]),
+    ("updated:90", ["org/repo-5", "org/repo-50"]),
+    ("updated:>=2m", ["org/repo-200", "org/repo-800"]),
+    ("updated:>1y", ["org/repo-800"]),
+])
+def test_updated_is_days_with_or_without_last_modified(indexes, query, expected):
+    with_timestamps, without_timestamps = indexes
+    assert matches(with_timestamps, query) == expected
+    assert matches(without_timestamps, query) == expected
+
+@pytest.mark.parametrize("query", ["NOT", "lambda NOT", "(NOT", "updated:10..90", "updated:soon"])
+def test_malformed_queries_raise_query_error(indexes, query):
+    for index in indexes:
+        with pytest.raises(QueryError):
+            index.evaluate(query)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+S3 Classifier Rule Parity Tests
+The rule engine labels awslabs repos exactly like the hand-written S3RepositoryClassifier methods it replaced,
+including repos with no description (marketing ignores the README fallback, the other dimensions use it)
+"""
+
+import csv
+import os
+
+import pytest
+
+import s3_classifier
+from local_stubs import InMemoryS3Client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The original get_solution_marketing categories, in order
+LEGACY_MARKETING = [
+    ("setup", ["setup", "bootstrap", "quickstart", "quick-start", "getting-started", "install", "deployment"]),
+    ("landingzone", ["landing-zone", "landingzone", "multi-account", "account-factory", "control-tower"]),
+    ("starter", ["starter", "template", "boilerplate", "scaffold", "blueprint", "reference-architecture"]),
+    ("optimise", ["optim", "performance", "cost", "efficiency", "tuning", "scaling"]),
+    ("compliance", ["compliance", "security", "audit", "governance", "policy", "config-rules"]),
+    ("improvement", ["improve", "enhance", "upgrade", "migration", "moderniz", "refactor"]),
+    ("visibility", ["monitor", "observ", "dashboard", "metrics", "logging", "visibility", "insight"]),
+    ("foundation", ["foundation", "infrastructure", "platform", "framework", "core", "base"]),
+    ("readiness", ["ready", "prepar", "provision", "orchestrat", "automation"]),
+    ("enablement", ["enable", "tool", "utility", "helper", "support", "assist"]),
+    ("innovation", ["innovat", "ai", "ml", "machine-learning", "bedrock", "agent", "genai"]),
+    ("assessment", ["assess", "analyz", "evaluat", "test", "benchmark", "profil"]),
+    ("advisor", ["advisor", "intelligent", "smart", "recommend", "suggest"]),
+    ("recommendation", ["recommend", "best-practice", "pattern", "guideline", "standard"]),
+    ("guidance", ["guidance", "guide", "tutorial", "workshop", "learn", "documentation"]),
+]
+
+# The original get_solution_type categories, in order
+LEGACY_SOLUTION_TYPE = [
+    ("Compliance Accelerators", ["security", "compliance", "audit", "governance"]),
+    ("Innovation Catalysts", ["ai", "ml", "machine-learning", "bedrock", "agent"]),
+    ("Quick Wins", ["cost", "optimization", "performance"]),
+    ("Operational Excellence", ["monitoring", "observability", "logging"]),
+]
+
+def legacy_label(categories, text: str, default: str) -> str:
+    for label, keywords in categories:
+        if any(word in text for word in keywords):
+            return label
+    return default
+
+def legacy_solution_marketing(repo) -> str:
+    """Baseline: name, the GitHub description only (no README fallback) and topics"""
+    text = f"{repo.get('name', '').lower()} {(repo.get('description') or '').lower()} {' '.join(repo.get('topics', [])).lower()}"
+    return legacy_label(LEGACY_MARKETING, text, "enablement")
+
+def legacy_solution_type(classifier, repo) -> str:
+    """Baseline: description with README fallback and topics"""
+    text = f"{classifier.get_description(repo).lower()} {' '.join(repo.get('topics', [])).lower()}"
+    return legacy_label(LEGACY_SOLUTION_TYPE, text, "Foundation Builders")
+
+def load_repos():
+    repos = []
+    for path in ['classification_results.csv', 'enhanced_v3_progress_batch100.csv']:
+        with open(os.path.join(HERE, path), newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                repos.append({
+                    "name": row['repository'].split('/')[-1],
+                    "full_name": row['repository'],
+                    "description": row.get('description') or None,
+                    "topics": [t.strip() for t in (row.get('topics') or '').split(',') if t.strip()]
+                })
+    # No description: the README line decides solution type but must not change marketing
+    for i, readme in enumerate(["A monitoring dashboard tool", "Security audit helper for accounts",
+                                "Bedrock agent starter", "Cost optimization insights", ""]):
+        for description in (None, ""):
+            repos.append({"name": f"sample-{i}", "full_name": f"awslabs/sample-{i}-{description!r}",
+                          "description": description, "topics": [], "readme": readme})
+    return repos
+
+@pytest.fixture(scope="module")
+def classifier():
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.setattr(s3_classifier.boto3, "client", lambda *args, **kwargs: InMemoryS3Client())
+    classifier = s3_classifier.S3RepositoryClassifier()
+    classifier.get_readme_description = lambda repo: repo.get("readme", "")
+    yield classifier
+    monkeypatch.undo()
+
+def test_monitoring_readme_does_not_change_marketing(classifier):
+    repo = {"name": "sample", "full_name": "awslabs/sample", "description": None, "topics": [],
+            "readme": "A monitoring dashboard tool"}
+    assert classifier.get_solution_marketing(repo) == "enablement"
+    assert classifier.get_solution_type(repo) == "Operational Excellence"
+
+def test_rule_engine_matches_legacy_methods(classifier):
+    mismatches = []
+    for repo in load_repos():
+        expected = (legacy_solution_marketing(repo), legacy_solution_type(classifier, repo))
+        actual = (classifier.get_solution_marketing(repo), classifier.get_solution_type(repo))
+        if actual != expected:
+            mismatches.append((repo['full_name'], expected, actual))
+    assert mismatches == []
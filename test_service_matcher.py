@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Service Matcher Parity Tests
+The compiled single-pass matcher finds exactly the services the original per-keyword re.search loop did
+"""
+
+import contextlib
+import io
+import os
+
+import pytest
+
+from benchmarks import legacy_extract_services, load_matcher_corpus
+from enhanced_classifier_v2 import EnhancedClassifierV2
+from local_stubs import InMemoryS3Client
+
+EDGE_CASES = ["api gateway and apigateway", "x-ray tracing", "s3-bucket lambdas", "amazon s3/lambda",
+              "secrets manager, certificate manager", "step functions+sns", "ec2ecs", "elb/alb/nlb", ""]
+
+@pytest.fixture(scope="module")
+def classifier():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return EnhancedClassifierV2("aws-samples", s3_client=InMemoryS3Client())
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_edge_cases_match_legacy(classifier, text):
+    assert classifier.extract_aws_services_from_text(text) == legacy_extract_services(classifier.aws_services_map, text)
+
+def test_corpus_matches_legacy(classifier, monkeypatch):
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
+    texts = load_matcher_corpus()
+    mismatches = [text[:80] for text in texts
+                  if classifier.extract_aws_services_from_text(text) != legacy_extract_services(classifier.aws_services_map, text)]
+    assert mismatches == []
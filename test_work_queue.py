@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Work Queue Lease Tests
+A rate-limit wait that outlasts the lease keeps the batch leased when it is not handed off,
+so no other node receives it and classifies it a second time
+"""
+
+import time
+
+import pytest
+
+from local_stubs import InMemoryS3Client
+from work_queue import QueueWorker, SQLiteWorkQueue
+
+VISIBILITY_TIMEOUT = 0.4
+
+class WaitingClassifier:
+    """Classifier stand-in whose only repo hits one rate-limit wait longer than the lease"""
+
+    wait = 3 * VISIBILITY_TIMEOUT
+
+    def __init__(self, org_name: str, s3_client=None):
+        self.s3_client = s3_client
+        self.bucket_name = 'bucket'
+        self.hook = None
+        self.hook_after = None
+        self.redelivered = []
+
+    def on_rate_limit_wait(self, hook, after: float = 60.0):
+        self.hook, self.hook_after = hook, after
+
+    def classify_repository(self, repo):
+        if self.hook and self.wait > self.hook_after:
+            self.hook(self.wait)
+        deadline = time.time() + self.wait
+        while time.time() < deadline:
+            # Another node polling the queue meanwhile
+            self.redelivered.append(self.queue.receive())
+            time.sleep(VISIBILITY_TIMEOUT / 4)
+        return {"repository": repo["full_name"]}
+
+@pytest.mark.parametrize("handoff_after", [None, 10 * VISIBILITY_TIMEOUT])
+def test_long_wait_extends_the_lease(tmp_path, handoff_after):
+    queue = SQLiteWorkQueue(str(tmp_path / 'queue.db'), visibility_timeout=VISIBILITY_TIMEOUT)
+    queue.send([{"org": "org", "repos": [{"full_name": "org/repo"}]}])
+    worker = QueueWorker(queue, WaitingClassifier, worker_id="test", handoff_after=handoff_after,
+                         s3_factory=InMemoryS3Client)
+    classifier = worker.classifier_for("org")
+    classifier.queue = queue
+
+    worker.process(queue.receive())
+
+    assert [lease for lease in classifier.redelivered if lease is not None] == []
+    assert worker.stats["classified"] == 1
+    assert queue.stats() == {"visible": 0, "in_flight": 0}  # Acked, not expired
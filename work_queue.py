@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Distributed Work Queue
+Batches of repos are enqueued as messages; workers on any number of machines lease one batch at a
+time (SQS visibility timeout, or a SQLite file for local runs), ack it once its rows are in an uploaded
+results part, and hand the rest of a batch back to the queue instead of sleeping on a rate limit with it
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from master_index import iter_master_index
+from results_writer import S3ResultsWriter, list_runs, merge_runs, rows_to_csv
+from sharded_runner import classify_function
+
+WORKER_RUN_PREFIX = "worker-"
+
+class Lease:
+    def __init__(self, handle, receipt: str, body: Dict, receive_count: int, visibility_timeout: float):
+        self.handle = handle  # Queue-specific message reference
+        self.receipt = receipt
+        self.body = body
+        self.receive_count = receive_count
+        self.expires_at = time.time() + visibility_timeout
+
+class SQLiteWorkQueue:
+    """SQS-style queue in one SQLite file: for tests and single-host fleets (several processes may share it)"""
+
+    def __init__(self, path: str, visibility_timeout: float = 600.0):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, body TEXT NOT NULL, visible_at REAL NOT NULL, "
+            "receipt TEXT, receive_count INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def send(self, bodies: List[Dict]) -> None:
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany("INSERT INTO messages (body, visible_at) VALUES (?, ?)",
+                                [(json.dumps(body, separators=(',', ':')), now) for body in bodies])
+            self.db.execute("COMMIT")
+
+    def receive(self) -> Optional[Lease]:
+        """Lease the oldest visible message (None when nothing is visible right now)"""
+        now = time.time()
+        receipt = uuid.uuid4().hex
+        with self.lock:
+            # IMMEDIATE takes the write lock up front, so two workers can't claim the same row
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute("SELECT id, body, receive_count FROM messages WHERE visible_at <= ? "
+                                  "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row:
+                self.db.execute("UPDATE messages SET visible_at = ?, receipt = ?, receive_count = receive_count + 1 "
+                                "WHERE id = ?", (now + self.visibility_timeout, receipt, row[0]))
+            self.db.execute("COMMIT")
+        if not row:
+            return None
+        return Lease(row[0], receipt, json.loads(row[1]), row[2] + 1, self.visibility_timeout)
+
+    def ack(self, lease: Lease) -> bool:
+        """Delete the message; False if the lease expired and someone else holds it now"""
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM messages WHERE id = ? AND receipt = ?", (lease.handle, lease.receipt))
+        return cursor.rowcount == 1
+
+    def extend(self, lease: Lease, seconds: float) -> None:
+        with self.lock:
+            self.db.execute("UPDATE messages SET visible_at = ? WHERE id = ? AND receipt = ?",
+                            (time.time() + seconds, lease.handle, lease.receipt))
+        lease.expires_at = time.time() + seconds
+
+    def stats(self) -> Dict:
+        with self.lock:
+            visible, in_flight = self.db.execute(
+                "SELECT COALESCE(SUM(visible_at <= ?), 0), COALESCE(SUM(visible_at > ?), 0) FROM messages",
+                (time.time(), time.time())
+            ).fetchone()
+        return {"visible": visible, "in_flight": in_flight}
+
+class SQSWorkQueue:
+    def __init__(self, queue_url: str, visibility_timeout: float = 600.0, sqs_client=None, wait_seconds: int = 10):
+        """wait_seconds: long-poll time of each receive"""
+        import boto3
+
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.sqs = sqs_client or boto3.client('sqs')
+        self.wait_seconds = wait_seconds
+
+    def send(self, bodies: List[Dict]) -> None:
+        for i in range(0, len(bodies), 10):
+            entries = [{'Id': str(j), 'MessageBody': json.dumps(body, separators=(',', ':'))}
+                       for j, body in enumerate(bodies[i:i + 10])]
+            response = self.sqs.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            if response.get('Failed'):
+                raise RuntimeError(f"SQS rejected {len(response['Failed'])} message(s): {response['Failed'][0]}")
+
+    def receive(self) -> Optional[Lease]:
+        response = self.sqs.receive_message(
+            QueueUrl=self.queue_url, MaxNumberOfMessages=1, VisibilityTimeout=int(self.visibility_timeout),
+            WaitTimeSeconds=self.wait_seconds, AttributeNames=['ApproximateReceiveCount']
+        )
+        messages = response.get('Messages', [])
+        if not messages:
+            return None
+        message = messages[0]
+        return Lease(message['MessageId'], message['ReceiptHandle'], json.loads(message['Body']),
+                     int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1)), self.visibility_timeout)
+
+    def ack(self, lease: Lease) -> bool:
+        try:
+            self.sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=lease.receipt)
+            return True
+        except Exception as e:
+            print(f"⚠️  Failed to ack batch {lease.handle}: {e}")
+            return False
+
+    def extend(self, lease: Lease, seconds: float) -> None:
+        # SQS caps a message's visibility at 12 hours
+        seconds = min(seconds, 43200)
+        self.sqs.change_message_visibility(QueueUrl=self.queue_url, ReceiptHandle=lease.receipt,
+                                           VisibilityTimeout=int(seconds))
+        lease.expires_at = time.time() + seconds
+
+    def stats(self) -> Dict:
+        attributes = self.sqs.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+        )['Attributes']
+        return {"visible": int(attributes['ApproximateNumberOfMessages']),
+                "in_flight": int(attributes['ApproximateNumberOfMessagesNotVisible'])}
+
+def open_queue(spec: str, visibility_timeout: float = 600.0):
+    """https://sqs.<region>.amazonaws.com/<account>/<name> -> SQS, sqlite:///path or a plain path -> SQLite"""
+    if spec.startswith('https://'):
+        return SQSWorkQueue(spec, visibility_timeout)
+    return SQLiteWorkQueue(spec[len('sqlite://'):] if spec.startswith('sqlite://') else spec, visibility_timeout)
+
+def enqueue_org(queue, org_name: str, classifier_cls, s3_client=None, batch_size: int = 25,
+                limit: Optional[int] = None) -> int:
+    """One message per batch_size repos of the org's master index, most-starred first; returns the batch count"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        classifier = classifier_cls(org_name, s3_client=s3_client)
+    repos = sorted(iter_master_index(classifier.s3_client, classifier.bucket_name, classifier.master_index_key),
+                   key=lambda repo: repo.get('stargazers_count', 0), reverse=True)[:limit]
+    bodies = [{"org": org_name, "repos": [dict(repo) for repo in repos[i:i + batch_size]]}
+              for i in range(0, len(repos), batch_size)]
+    queue.send(bodies)
+    print(f"📬 Enqueued {len(repos)} {org_name} repos in {len(bodies)} batches of {batch_size}")
+    return len(bodies)
+
+class QueueWorker:
+    def __init__(self, queue, classifier_cls, worker_id: Optional[str] = None, results_name: str = "enhanced_v3",
+                 tokens: Optional[List[str]] = None, handoff_after: Optional[float] = 60.0, max_receives: int = 5,
+                 poll_interval: float = 5.0, part_rows: int = 500, s3_factory=None):
+        """handoff_after: a rate-limit wait longer than this hands the unfinished part of the lease back
+        to the queue (None = sleep with it, like a standalone run, extending the lease); max_receives: deliveries after which
+        a batch that keeps killing its workers is dropped; s3_factory: callable returning the S3 client"""
+        self.queue = queue
+        self.classifier_cls = classifier_cls
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.run_id = f"{WORKER_RUN_PREFIX}{self.worker_id}"
+        self.results_name = results_name
+        self.tokens = tokens
+        self.handoff_after = handoff_after
+        self.max_receives = max_receives
+        self.poll_interval = poll_interval
+        self.part_rows = part_rows
+        self.s3_factory = s3_factory
+
+        self.classifiers = {}  # org -> classifier
+        self.writers = {}  # org -> S3ResultsWriter (per-worker parts)
+        self.rate_limiter = None  # One token pool shared by every org this worker classifies
+        self.lock = threading.Lock()
+        self.lease = None
+        self.position = 0
+        self.handed_off = False
+        self.stats = {"leases": 0, "classified": 0, "failed": 0, "handoffs": 0, "dropped": 0}
+        self.failed = {}
+
+    def classifier_for(self, org_name: str):
+        if org_name not in self.classifiers:
+            s3_client = self.s3_factory() if self.s3_factory else None
+            classifier = self.classifier_cls(org_name, s3_client=s3_client)
+            if self.tokens:
+                if self.rate_limiter is None:
+                    classifier.enable_token_pool(self.tokens)
+                    self.rate_limiter = classifier.rate_limiter
+                else:
+                    classifier.rate_limiter = self.rate_limiter
+            if hasattr(classifier, 'on_rate_limit_wait'):
+                classifier.on_rate_limit_wait(self.rate_limit_wait, self.wait_hook_after())
+            self.classifiers[org_name] = classifier
+            writer = S3ResultsWriter(classifier.s3_client, classifier.bucket_name, self.results_name,
+                                     run_id=self.run_id, part_rows=self.part_rows)
+            writer.resume()
+            self.writers[org_name] = writer
+        return self.classifiers[org_name]
+
+    def wait_hook_after(self) -> float:
+        """Waits longer than this reach rate_limit_wait: the hand-off threshold, but never more than a
+        quarter lease (heartbeats keep at least half a lease left, so a shorter wait cannot outlast it)"""
+        quarter_lease = self.queue.visibility_timeout / 4
+        return quarter_lease if self.handoff_after is None else min(self.handoff_after, quarter_lease)
+
+    def rate_limit_wait(self, wait: float) -> None:
+        """Rate-limit hook: hand the lease off when the wait is long enough; if it is still ours (no
+        hand-off configured, or rows not durable yet) keep it leased through the wait, so the batch
+        is not redelivered to another node and classified twice"""
+        if self.handoff_after is not None and wait > self.handoff_after:
+            self.hand_off(wait)
+        with self.lock:
+            if self.lease is not None and not self.handed_off:
+                self.heartbeat(self.lease, wait)
+
+    def hand_off(self, wait: float) -> None:
+        """Rate-limit hook: publish the rows done so far, requeue the rest of the lease and release it,
+        so other nodes keep working while this one waits"""
+        with self.lock:
+            lease = self.lease
+            if lease is None or self.handed_off:
+                return
+            org_name = lease.body["org"]
+            writer = self.writers[org_name]
+            writer.flush()
+            if writer.buffered_rows:
+                return  # Rows not durable yet: keep the lease so it is redelivered if we die
+            rest = lease.body["repos"][self.position:]
+            self.queue.send([{"org": org_name, "repos": rest}])
+            self.queue.ack(lease)
+            self.handed_off = True
+            self.stats["handoffs"] += 1
+        print(f"🤝 Rate limited for {wait:.0f}s - handed {len(rest)} repos back to the queue")
+
+    def heartbeat(self, lease: Lease, wait: float = 0.0) -> None:
+        """Keep a long batch leased while it is being worked on (and through a wait of wait seconds)"""
+        if lease.expires_at - time.time() < wait + self.queue.visibility_timeout / 2:
+            self.queue.extend(lease, wait + self.queue.visibility_timeout)
+
+    def process(self, lease: Lease) -> None:
+        org_name, repos = lease.body["org"], lease.body["repos"]
+        classifier = self.classifier_for(org_name)
+        writer = self.writers[org_name]
+        self.stats["leases"] += 1
+
+        if lease.receive_count > self.max_receives:
+            print(f"☠️  Dropping a batch of {len(repos)} {org_name} repos after {lease.receive_count - 1} deliveries")
+            for repo in repos:
+                self.failed[repo["full_name"]] = "dropped"
+            self.stats["dropped"] += 1
+            self.queue.ack(lease)
+            return
+
+        classify = classify_function(classifier)
+        with self.lock:
+            self.lease, self.position, self.handed_off = lease, 0, False
+        for index, repo in enumerate(repos):
+            with self.lock:
+                if self.handed_off:
+                    break
+                self.position = index
+            self.heartbeat(lease)
+            row = classify(repo)
+            with self.lock:
+                if self.handed_off:
+                    break  # This repo went back to the queue with the rest
+                if row:
+                    writer.write(row)
+                    self.stats["classified"] += 1
+                else:
+                    self.failed[repo["full_name"]] = time.strftime('%Y-%m-%dT%H:%M:%S')
+                    self.stats["failed"] += 1
+
+        with self.lock:
+            self.lease = None
+            if self.handed_off:
+                return
+            # Ack only once the batch's rows are in an uploaded part; otherwise the lease expires and
+            # the batch is redelivered
+            writer.flush()
+            if writer.buffered_rows:
+                print(f"⚠️  Results upload failed - leaving the batch to be redelivered")
+                return
+            if not self.queue.ack(lease):
+                print(f"⚠️  Lease expired before the ack; the batch may be classified again elsewhere")
+
+    def run(self) -> Dict:
+        """Lease batches until the queue is empty (nothing visible and nothing in flight)"""
+        print(f"👷 Worker {self.worker_id} ({self.classifier_cls.__name__}) polling for batches")
+        while True:
+            lease = self.queue.receive()
+            if lease is not None:
+                self.process(lease)
+                continue
+            stats = self.queue.stats()
+            if not stats["visible"] and not stats["in_flight"]:
+                break
+            # Other workers hold leases; wait in case one expires and comes back
+            time.sleep(self.poll_interval)
+
+        for org_name, classifier in self.classifiers.items():
+            if hasattr(classifier, 'flush_logs'):
+                if classifier.failed_repos:
+                    classifier.save_failed_repos_log()
+                classifier.flush_logs()
+            failed = {name: when for name, when in self.failed.items() if name.startswith(f"{org_name}/")}
+            if failed:
+                classifier.s3_client.put_object(
+                    Bucket=classifier.bucket_name, Key=f"{self.writers[org_name].part_prefix}failed.json",
+                    Body=json.dumps(failed, indent=2), ContentType='application/json'
+                )
+        print(f"✅ Worker {self.worker_id} done: {self.stats}")
+        return self.stats
+
+def run_worker(job: Dict) -> Dict:
+    """Process entry point (picklable job dict) for running several workers on one host"""
+    queue = open_queue(job['queue'], job.get('visibility_timeout', 600.0))
+    worker = QueueWorker(queue, job['classifier_cls'], worker_id=job.get('worker_id'),
+                         results_name=job.get('results_name', 'enhanced_v3'), tokens=job.get('tokens'),
+                         handoff_after=job.get('handoff_after', 60.0), max_receives=job.get('max_receives', 5),
+                         poll_interval=job.get('poll_interval', 5.0), s3_factory=job.get('s3_factory'))
+    if not job.get('quiet'):
+        return worker.run()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return worker.run()
+
+def merge_org(org_name: str, classifier_cls, results_name: str = "enhanced_v3", s3_client=None) -> List[Dict]:
+    """Merge every worker's parts for one org into results/<results_name>_final_<n>_repos.csv"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        classifier = classifier_cls(org_name, s3_client=s3_client)
+    s3_client, bucket = classifier.s3_client, classifier.bucket_name
+    run_ids = [run_id for run_id in list_runs(s3_client, bucket, results_name) if run_id.startswith(WORKER_RUN_PREFIX)]
+    merged = merge_runs(s3_client, bucket, results_name, run_ids)
+    if not merged:
+        print(f"⚠️  No worker results to merge for {org_name}")
+        return []
+    key = f"results/{results_name}_final_{len(merged)}_repos.csv"
+    s3_client.put_object(Bucket=bucket, Key=key, Body=rows_to_csv(merged), ContentType='text/csv')
+    print(f"💾 Merged {len(merged)} rows from {len(run_ids)} workers: s3://{bucket}/{key}")
+    return merged
+
+def main():
+    from enhanced_classifier_v3 import EnhancedClassifierV3
+    from enhanced_classifier_v4 import EnhancedClassifierV4
+    from rate_limit_scheduler import parse_token_args
+    from smart_rate_limit_classifier import SmartRateLimitClassifier
+
+    classifiers = {"smart": SmartRateLimitClassifier, "v3": EnhancedClassifierV3, "v4": EnhancedClassifierV4}
+
+    parser = argparse.ArgumentParser(description='Classify organizations from a shared queue of repo batches')
+    parser.add_argument('--queue', required=True, help='SQS queue URL, or sqlite:///path/to/queue.db')
+    parser.add_argument('--classifier', choices=sorted(classifiers), default='smart', help='Classifier workers run')
+    parser.add_argument('--results-name', default='enhanced_v3', help='Prefix of the results parts / merged CSV')
+    parser.add_argument('--visibility-timeout', type=float, default=600, help='Seconds a leased batch stays hidden')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Queue the master index of one or more orgs in batches')
+    enqueue_parser.add_argument('org_names', nargs='+', help='GitHub organization names')
+    enqueue_parser.add_argument('--batch-size', type=int, default=25, help='Repos per leased batch')
+    enqueue_parser.add_argument('--limit', type=int, help='Most-starred repos per org')
+
+    work_parser = subparsers.add_parser('work', help='Lease and classify batches until the queue is empty')
+    work_parser.add_argument('--worker-id', help='Names this worker\'s results parts (default: host-pid)')
+    work_parser.add_argument('--github-token', action='append',
+                             help='GitHub personal access token (repeat or comma-separate for a token pool)')
+    work_parser.add_argument('--handoff-after', type=float, default=60,
+                             help='Hand the lease back on rate-limit waits longer than this (seconds, <0 = never)')
+    work_parser.add_argument('--max-receives', type=int, default=5, help='Deliveries before a batch is dropped')
+
+    merge_parser = subparsers.add_parser('merge', help='Merge every worker\'s parts into one results CSV per org')
+    merge_parser.add_argument('org_names', nargs='+', help='GitHub organization names')
+
+    args = parser.parse_args()
+    classifier_cls = classifiers[args.classifier]
+    queue = open_queue(args.queue, args.visibility_timeout)
+
+    if args.command == 'enqueue':
+        for org_name in args.org_names:
+            enqueue_org(queue, org_name, classifier_cls, batch_size=args.batch_size, limit=args.limit)
+    elif args.command == 'work':
+        worker = QueueWorker(queue, classifier_cls, worker_id=args.worker_id, results_name=args.results_name,
+                             tokens=parse_token_args(args.github_token),
+                             handoff_after=args.handoff_after if args.handoff_after >= 0 else None,
+                             max_receives=args.max_receives)
+        worker.run()
+    else:
+        for org_name in args.org_names:
+            merge_org(org_name, classifier_cls, results_name=args.results_name)
+
+if __name__ == "__main__":
+    main()